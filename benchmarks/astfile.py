@@ -0,0 +1,121 @@
+"""Size and speed of the binary AST format against pickle and JSON.
+
+Encodes ``main.star`` repeated the given number of times (200 by default),
+as models and as nodes, and reads it back whole. The binary format is also
+read one statement at a time from a mapped file, which only builds what is
+looked up. JSON encodes each node as an object with its type and fields.
+Run from the repository root: ``python benchmarks/astfile.py [copies]``
+"""
+
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.getcwd())
+
+from compiler import (  # pylint: disable=wrong-import-position
+    StarlaCompiler,
+    astfile,
+    models,
+    nodes,
+)
+
+
+def to_json(value):
+    if isinstance(value, (nodes.Node, models.Ast)):
+        kind = type(value).__name__
+        encoded = {"type": kind}
+        for name in nodes.NODES[kind].fields:
+            encoded[name] = to_json(getattr(value, name))
+        return encoded
+    if isinstance(value, tuple):
+        return [to_json(item) for item in value]
+    if isinstance(value, dict):
+        # Keys of kwargs are names, so always strings.
+        return {"dict": {key: to_json(item) for key, item in value.items()}}
+    return value
+
+
+def from_json(value, fast):
+    if isinstance(value, list):
+        return tuple(from_json(item, fast) for item in value)
+    if isinstance(value, dict):
+        if "dict" in value:
+            return {key: from_json(item, fast) for key, item in value["dict"].items()}
+        kind = value.pop("type")
+        node_type = nodes.NODES[kind] if fast else getattr(models, kind)
+        return node_type.construct(
+            **{name: from_json(item, fast) for name, item in value.items()}
+        )
+    return value
+
+
+def timed(function, *args):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main(copies: int = 200):  # pylint: disable=too-many-locals
+    with open("main.star", encoding="utf-8") as file:
+        source = file.read() * copies
+    print(
+        "%-8s %-7s %10s %10s %11s %11s"
+        % ("tree", "format", "bytes", "zlib", "write ms", "read ms")
+    )
+    for fast in (False, True):
+        module = StarlaCompiler(lexer="scanner", fast=fast).parse(source)
+        formats = {
+            "pickle": (
+                lambda tree: pickle.dumps(tree, pickle.HIGHEST_PROTOCOL),
+                pickle.loads,
+            ),
+            "json": (
+                lambda tree: json.dumps(to_json(tree), separators=(",", ":")).encode(),
+                lambda data, fast=fast: from_json(json.loads(data), fast),
+            ),
+            "binary": (
+                astfile.dumps,
+                lambda data, fast=fast: astfile.loads(data, fast),
+            ),
+        }
+        for name, (write, read) in formats.items():
+            data, writing = timed(write, module)
+            _, reading = timed(read, data)
+            print(
+                "%-8s %-7s %10d %10d %11.1f %11.1f"
+                % (
+                    "nodes" if fast else "models",
+                    name,
+                    len(data),
+                    len(zlib.compress(data)),
+                    writing * 1000,
+                    reading * 1000,
+                )
+            )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "module.ast")
+            astfile.dump(module, path)
+            start = time.perf_counter()
+            with astfile.load(path, fast) as reader:
+                _ = reader[len(reader) // 2]
+            print(
+                "%-8s %-7s %45.1f"
+                % (
+                    "nodes" if fast else "models",
+                    "mapped",
+                    (time.perf_counter() - start) * 1000,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
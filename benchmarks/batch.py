@@ -0,0 +1,47 @@
+"""Files compiled per second by ``compile_files`` at different worker counts.
+
+Run from the repository root: ``python benchmarks/batch.py [files] [copies of main.star]``
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from compiler.batch import (  # pylint: disable=wrong-import-position
+    compile_files,
+    find_sources,
+)
+
+
+def main(files: int = 200, copies: int = 20):
+    with open("main.star", encoding="utf-8") as file:
+        source = (file.read() + "\n") * copies
+    directory = tempfile.mkdtemp()
+    try:
+        for i in range(files):
+            with open(
+                os.path.join(directory, "%d.star" % i), "w", encoding="utf-8"
+            ) as file:
+                file.write(source)
+        paths = find_sources([directory])
+        cpus = os.cpu_count() or 1
+        for workers in sorted({1, 2, 4, cpus}):
+            start = time.perf_counter()
+            for result in compile_files(paths, workers=workers):
+                if result.error is not None:
+                    raise RuntimeError("%s: %s" % (result.path, result.error))
+            elapsed = time.perf_counter() - start
+            print(
+                "%3d workers %8.1f files/s  (%.2f s)"
+                % (workers, len(paths) / elapsed, elapsed)
+            )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
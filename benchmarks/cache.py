@@ -0,0 +1,68 @@
+"""Cold and warm batch compiles with and without the on-disk AST cache.
+
+Run from the repository root: ``python benchmarks/cache.py [files] [copies of main.star]``
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from compiler.batch import (  # pylint: disable=wrong-import-position
+    compile_files,
+    find_sources,
+)
+from compiler.cache import ASTCache  # pylint: disable=wrong-import-position
+
+
+def run(name, paths, **options):
+    start = time.perf_counter()
+    for result in compile_files(paths, workers=1, **options):
+        if result.error is not None:
+            raise RuntimeError("%s: %s" % (result.path, result.error))
+    elapsed = time.perf_counter() - start
+    print("%-22s %8.1f files/s  (%.3f s)" % (name, len(paths) / elapsed, elapsed))
+
+
+def main(files: int = 200, copies: int = 20):
+    with open("main.star", encoding="utf-8") as file:
+        source = (file.read() + "\n") * copies
+    directory = tempfile.mkdtemp()
+    cache_directory = os.path.join(directory, "cache")
+    try:
+        for i in range(files):
+            # A distinct comment per file so that every file has its own entry.
+            with open(
+                os.path.join(directory, "%d.star" % i), "w", encoding="utf-8"
+            ) as file:
+                file.write("# %d\n%s" % (i, source))
+        paths = find_sources([directory])
+
+        start = time.perf_counter()
+        for path in paths:
+            with open(path, "rb") as file:
+                hashlib.sha256(file.read()).hexdigest()
+        elapsed = time.perf_counter() - start
+        print(
+            "%-22s %8.1f files/s  (%.3f s)" % ("hashing only", files / elapsed, elapsed)
+        )
+
+        run("no cache", paths)
+        run("cold cache", paths, ast_cache=ASTCache(cache_directory))
+        run("warm cache", paths, ast_cache=ASTCache(cache_directory))
+        run(
+            "warm cache, no trees",
+            paths,
+            ast_cache=ASTCache(cache_directory),
+            modules=False,
+        )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,51 @@
+"""Single character edits to a large file, reparsed whole and incrementally.
+
+Run from the repository root: ``python benchmarks/incremental.py [lines] [edits]``
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from compiler import StarlaCompiler  # pylint: disable=wrong-import-position
+from compiler.incremental import TextEdit  # pylint: disable=wrong-import-position
+
+
+def main(lines: int = 50_000, edits: int = 200):
+    with open("main.star", encoding="utf-8") as file:
+        source = file.read() + "\n"
+    source *= max(1, lines // source.count("\n"))
+    compiler = StarlaCompiler(lexer="scanner", fast=True)
+    print("%d lines, %.1f MB" % (source.count("\n"), len(source) / 1e6))
+
+    start = time.perf_counter()
+    module = compiler.parse(source)
+    whole = time.perf_counter() - start
+    print("full parse            %9.2f ms" % (whole * 1e3))
+
+    # Appending a digit to an integer always leaves a valid program.
+    digits = [match.end() for match in re.finditer(r"\b\d+\b", source)]
+    offsets = sorted(random.Random(0).sample(digits, min(edits, len(digits))))
+
+    start = time.perf_counter()
+    module = compiler.reparse(module, source, TextEdit(offsets[0], offsets[0], "1"))
+    first = time.perf_counter() - start
+    source = source[: offsets[0]] + "1" + source[offsets[0] :]
+    print("first reparse         %9.2f ms  (splits the old tree)" % (first * 1e3))
+
+    start = time.perf_counter()
+    for shift, offset in enumerate(offsets[1:], 1):
+        edit = TextEdit(offset + shift, offset + shift, "1")
+        module = compiler.reparse(module, source, edit)
+        source = edit.apply(source)
+    each = (time.perf_counter() - start) / max(1, len(offsets) - 1)
+    print("incremental reparse   %9.2f ms  (%.0fx faster)" % (each * 1e3, whole / each))
+    assert module == compiler.parse(source)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
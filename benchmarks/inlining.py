@@ -0,0 +1,71 @@
+"""Run time of the benchmark programs before and after inlining.
+
+Run from the repository root: ``python benchmarks/inlining.py [repeats] [budget]``
+"""
+
+import glob
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+# pylint: disable=wrong-import-position
+from compiler import StarlaCompiler
+from compiler.bytecode import generate
+from compiler.inlining import DEFAULT_BUDGET, inline
+from compiler.interpreter import Interpreter
+from compiler.transpiler import Runtime, transpile
+from compiler.vm import VM
+
+PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "programs")
+
+
+def best(repeats, run):
+    fastest = float("inf")
+    for _ in range(repeats):
+        stdout = io.StringIO()
+        start = time.perf_counter()
+        run(stdout)
+        fastest = min(fastest, time.perf_counter() - start)
+    return fastest, stdout.getvalue().strip()
+
+
+def timings(repeats, module):
+    """The output of ``module`` and its run time under each backend."""
+    tree, expected = best(repeats, lambda stdout: Interpreter(stdout).run(module))
+    code = generate(module)
+    vm, output = best(repeats, lambda stdout: VM(stdout).run(code))
+    assert output == expected, (output, expected)
+    python_code = transpile(module)
+    python, output = best(repeats, lambda stdout: Runtime(stdout).run(python_code))
+    assert output == expected, (output, expected)
+    return expected, (tree, vm, python)
+
+
+def main(repeats: int = 3, budget: int = DEFAULT_BUDGET):
+    compiler = StarlaCompiler(lexer="scanner", fast=True)
+    print("%-16s %7s %21s %21s %21s" % ("program", "inlined", "tree", "vm", "python"))
+    for path in sorted(glob.glob(os.path.join(PROGRAMS, "*.star"))):
+        with open(path, encoding="utf-8") as file:
+            module = compiler.parse(file.read())
+        inlined, stats = inline(module, budget)
+        expected, before = timings(repeats, module)
+        output, after = timings(repeats, inlined)
+        assert output == expected, (output, expected)
+        print(
+            "%-16s %7d %s"
+            % (
+                os.path.basename(path),
+                stats.calls,
+                " ".join(
+                    "%8.2f -> %8.2f ms" % (old * 1e3, new * 1e3)
+                    for old, new in zip(before, after)
+                ),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,75 @@
+"""Run time of the benchmark programs under each backend.
+
+Run from the repository root: ``python benchmarks/interpreter.py [repeats]``
+"""
+
+import glob
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+# pylint: disable=wrong-import-position
+from compiler import StarlaCompiler
+from compiler.bytecode import generate
+from compiler.interpreter import Interpreter
+from compiler.transpiler import CodeCache, Runtime, compile_source, transpile
+from compiler.vm import VM
+
+PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "programs")
+
+
+def best(repeats, run):
+    fastest = float("inf")
+    for _ in range(repeats):
+        stdout = io.StringIO()
+        start = time.perf_counter()
+        run(stdout)
+        fastest = min(fastest, time.perf_counter() - start)
+    return fastest, stdout.getvalue().strip()
+
+
+def caching(compiler):
+    """Parsing and transpiling every program, then loading them from the cache."""
+    sources = []
+    for path in sorted(glob.glob(os.path.join(PROGRAMS, "*.star"))):
+        with open(path, "rb") as file:
+            sources.append(file.read())
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CodeCache(directory)
+        for label in ("uncached", "cached"):
+            start = time.perf_counter()
+            for source in sources:
+                compile_source(source, compiler, cache)
+            print("%-16s %9.2f ms" % (label, (time.perf_counter() - start) * 1e3))
+
+
+def main(repeats: int = 3):
+    compiler = StarlaCompiler(lexer="scanner", fast=True)
+    print("%-16s %12s %12s %12s" % ("program", "tree", "vm", "python"))
+    for path in sorted(glob.glob(os.path.join(PROGRAMS, "*.star"))):
+        with open(path, encoding="utf-8") as file:
+            module = compiler.parse(file.read())
+        code = generate(module)
+        tree, expected = best(
+            repeats, lambda stdout, module=module: Interpreter(stdout).run(module)
+        )
+        vm, output = best(repeats, lambda stdout, code=code: VM(stdout).run(code))
+        assert output == expected, (output, expected)
+        python_code = transpile(module)
+        python, output = best(
+            repeats, lambda stdout, code=python_code: Runtime(stdout).run(code)
+        )
+        assert output == expected, (output, expected)
+        print(
+            "%-16s %9.2f ms %9.2f ms %9.2f ms"
+            % (os.path.basename(path), tree * 1e3, vm * 1e3, python * 1e3)
+        )
+    caching(compiler)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
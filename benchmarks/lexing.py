@@ -0,0 +1,32 @@
+"""Tokenization throughput of the sly lexer against the hand-written scanner.
+
+Run from the repository root: ``python benchmarks/lexing.py [copies of main.star]``
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from compiler.compiler import LEXERS  # pylint: disable=wrong-import-position
+
+
+def throughput(engine: str, source: str) -> float:
+    lexer = LEXERS[engine]()
+    start = time.perf_counter()
+    for _ in lexer.tokenize(source):
+        pass
+    return len(source) / (time.perf_counter() - start)
+
+
+def main(copies: int = 2000):
+    with open("main.star", encoding="utf-8") as file:
+        source = file.read() * copies
+    print("source size: %.1f MB" % (len(source) / 1e6))
+    for engine in sorted(LEXERS):
+        print("%-8s %6.2f MB/s" % (engine, throughput(engine, source) / 1e6))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,166 @@
+"""Response times of the language server to edits and queries on a large file.
+
+Run from the repository root: ``python benchmarks/lsp.py [lines] [edits]``
+
+The server runs in a child process, as an editor would start it, and every
+time is from writing a message to reading the server's answer: the
+diagnostics published after a change, or the response to a request. A
+"change" appends a digit to a number, and an "error" either breaks the
+statement around a number or fixes it again.
+"""
+
+import bisect
+import itertools
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+import typing as t
+
+sys.path.insert(0, os.getcwd())
+
+# pylint: disable=wrong-import-position
+from compiler.lsp import read_message, write_message
+
+URI = "file:///benchmark.star"
+
+
+class Client:
+    def __init__(self) -> None:
+        self.process = subprocess.Popen(  # pylint: disable=consider-using-with
+            [sys.executable, "-m", "compiler", "lsp"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.ids = 0
+
+    def send(self, method, params, request=True):
+        message = {"jsonrpc": "2.0", "method": method, "params": params}
+        if request:
+            self.ids += 1
+            message["id"] = self.ids
+        write_message(self.process.stdin, message)
+
+    def wait(self, predicate):
+        while True:
+            message = read_message(self.process.stdout)
+            if predicate(message):
+                return message
+
+    def request(self, method, params):
+        self.send(method, params)
+        ids = self.ids
+        return self.wait(lambda message: message.get("id") == ids)
+
+    def notify(self, method, params):
+        """Send a notification and wait for the diagnostics it publishes."""
+        self.send(method, params, request=False)
+        return self.wait(
+            lambda message: message.get("method") == "textDocument/publishDiagnostics"
+        )
+
+    def close(self):
+        self.request("shutdown", None)
+        self.send("exit", None, request=False)
+        self.process.wait()
+
+
+def percentiles(label, times):
+    times = sorted(times)
+    print(
+        "%-12s p50 %7.2f ms  p99 %7.2f ms  max %7.2f ms"
+        % (
+            label,
+            times[len(times) // 2] * 1e3,
+            times[int(len(times) * 0.99)] * 1e3,
+            times[-1] * 1e3,
+        )
+    )
+
+
+def timed(run):
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def main(lines: int = 10_000, edits: int = 200):  # pylint: disable=too-many-locals
+    with open("main.star", encoding="utf-8") as file:
+        source = file.read() + "\n"
+    source *= max(1, lines // source.count("\n"))
+    print("%d lines, %.1f MB" % (source.count("\n"), len(source) / 1e6))
+    client = Client()
+    client.request("initialize", {"capabilities": {}})
+    document = {"uri": URI}
+    print(
+        "open         %7.2f ms"
+        % (
+            timed(
+                lambda: client.notify(
+                    "textDocument/didOpen",
+                    {"textDocument": {**document, "version": 0, "text": source}},
+                )
+            )
+            * 1e3
+        )
+    )
+
+    # Appending a digit to an integer always leaves a valid program.
+    starts = [0]
+    starts.extend(match.end() for match in re.finditer("\n", source))
+    digits = [match.end() for match in re.finditer(r"\b\d+\b", source)]
+    offsets = sorted(random.Random(0).sample(digits, min(edits, len(digits))))
+    changes, errors, hovers, definitions = [], [], [], []
+    versions = itertools.count(1)
+
+    def change(start, end, text):
+        params = {
+            "textDocument": {**document, "version": next(versions)},
+            "contentChanges": [{"range": {"start": start, "end": end}, "text": text}],
+        }
+        return timed(lambda: client.notify("textDocument/didChange", params))
+
+    # How many digits were added to each line, before the offsets edited next.
+    added: t.Dict[int, int] = {}
+    for offset in offsets:
+        line = bisect.bisect_right(starts, offset) - 1
+        character = offset - starts[line] + added.get(line, 0)
+        added[line] = added.get(line, 0) + 1
+        position = {"line": line, "character": character}
+        changes.append(change(position, position, "1"))
+        # An operator without its right operand is a syntax error, until the
+        # operator is removed again.
+        after = {"line": line, "character": character + 1}
+        errors.append(change(after, after, " +"))
+        errors.append(change(after, {"line": line, "character": character + 3}, ""))
+        # The first name on the line, which is usually one, and its definition.
+        name = {"textDocument": document, "position": {"line": line, "character": 1}}
+        hovers.append(
+            timed(lambda name=name: client.request("textDocument/hover", name))
+        )
+        definitions.append(
+            timed(lambda name=name: client.request("textDocument/definition", name))
+        )
+    percentiles("change", changes)
+    percentiles("error", errors)
+    percentiles("hover", hovers)
+    percentiles("definition", definitions)
+    print(
+        "symbols      %7.2f ms"
+        % (
+            timed(
+                lambda: client.request(
+                    "textDocument/documentSymbol", {"textDocument": document}
+                )
+            )
+            * 1e3
+        )
+    )
+    client.close()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
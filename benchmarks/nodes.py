@@ -0,0 +1,50 @@
+"""Memory and build time of pydantic models against the slotted nodes.
+
+Parses ``main.star`` the given number of times (10,000 by default) and keeps
+every tree alive, so the totals are those of ``main.star`` scaled up.
+Run from the repository root: ``python benchmarks/nodes.py [copies]``
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.getcwd())
+
+from compiler import StarlaCompiler  # pylint: disable=wrong-import-position
+
+
+def build(source: str, copies: int, fast: bool) -> list:
+    compiler = StarlaCompiler(lexer="scanner", fast=fast)
+    return [compiler.parse(source) for _ in range(copies)]
+
+
+def measure(source: str, copies: int, fast: bool):
+    gc.collect()
+    start = time.perf_counter()
+    trees = build(source, copies, fast)
+    elapsed = time.perf_counter() - start
+    del trees
+
+    gc.collect()
+    tracemalloc.start()
+    trees = build(source, copies, fast)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del trees
+    return elapsed, size
+
+
+def main(copies: int = 10_000):
+    with open("main.star", encoding="utf-8") as file:
+        source = file.read()
+    for name, fast in (("pydantic", False), ("slotted", True)):
+        elapsed, size = measure(source, copies, fast)
+        print("%-9s %7.2f s %9.1f MB" % (name, elapsed, size / 1e6))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
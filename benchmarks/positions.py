@@ -0,0 +1,46 @@
+"""Line and column lookup for every token of a large file.
+
+Compares the line index against searching backwards for the previous line
+break from each token. Run from the repository root:
+``python benchmarks/positions.py [lines]``
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+# pylint: disable=wrong-import-position
+from compiler import StarlaCompiler, StarlaScanner
+from compiler.tokens import TokenStream
+
+
+def rfind_position(source: str, index: int) -> tuple:
+    line_start = source.rfind("\n", 0, index) + 1
+    return source.count("\n", 0, line_start) + 1, index - line_start + 1
+
+
+def main(lines: int = 100_000, sample: int = 100):
+    source = "".join(
+        "value_%d :int = %d * (%d + 1)\n" % (i, i, i) for i in range(lines)
+    )
+    stream = TokenStream.scan(source, StarlaScanner())
+    print("%d lines, %d tokens" % (lines, len(stream)))
+
+    start = time.perf_counter()
+    position = StarlaCompiler().line_index(source).position
+    positions = [position(index) for index in stream.starts]
+    elapsed = time.perf_counter() - start
+    print("line index, every token:      %.3f s" % elapsed)
+
+    # Scanning the source per lookup is far too slow to run on every token.
+    start = time.perf_counter()
+    for index, expected in zip(stream.starts[::sample], positions[::sample]):
+        assert rfind_position(source, index) == expected
+    elapsed = (time.perf_counter() - start) * sample
+    print("rfind + count, extrapolated:  %.3f s" % elapsed)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
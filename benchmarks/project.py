@@ -0,0 +1,73 @@
+"""Building and updating the project index of a large tree, and querying it.
+
+Run from the repository root: ``python benchmarks/project.py [files] [queries]``
+"""
+
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from compiler.project import ProjectIndex  # pylint: disable=wrong-import-position
+
+
+def timed(name, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print("%-28s %9.1f ms  %s" % (name, (time.perf_counter() - start) * 1000, result))
+    return result
+
+
+def main(files: int = 2000, queries: int = 200):  # pylint: disable=too-many-locals
+    with open("main.star", encoding="utf-8") as file:
+        source = file.read()
+    directory = tempfile.mkdtemp()
+    root = os.path.join(directory, "src")
+    try:
+        for i in range(files):
+            package = os.path.join(root, "package%d" % (i // 100))
+            os.makedirs(package, exist_ok=True)
+            with open(
+                os.path.join(package, "%d.star" % i), "w", encoding="utf-8"
+            ) as file:
+                # Functions of their own, calling those of the file before.
+                file.write("%s\ndef f%d () -> :int {\n" % (source, i))
+                file.write("    return (f%d())\n}\n" % max(i - 1, 0))
+        path = os.path.join(directory, "index.sqlite")
+
+        with ProjectIndex(root, path) as index:
+            timed("build, one worker", index.update, 1)
+        os.unlink(path)
+        with ProjectIndex(root, path) as index:
+            timed("build, one worker per CPU", index.update)
+            timed("update, nothing changed", index.update)
+            changed = os.path.join(root, "package0", "0.star")
+            with open(changed, "a", encoding="utf-8") as file:
+                file.write("x = 1\n")
+            timed("update, one file changed", index.update)
+
+            names = ["f%d" % (i * files // queries) for i in range(queries)]
+            for kind, query in (
+                ("definitions", index.definitions),
+                ("references", index.references),
+            ):
+                times = []
+                for name in names:
+                    start = time.perf_counter()
+                    query(name)
+                    times.append(time.perf_counter() - start)
+                print(
+                    "%-28s %9.3f ms"
+                    % (kind + ", median", statistics.median(times) * 1000)
+                )
+            timed("references to output", lambda: len(index.references("output")))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,42 @@
+"""Parse time of growing list literals and modules.
+
+Every size should take the same time per element if the parser accumulates
+sequences in linear time. Run from the repository root:
+``python benchmarks/scaling.py [largest size]``
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from compiler import StarlaCompiler  # pylint: disable=wrong-import-position
+
+SHAPES = {
+    "list literal": lambda size: "x = [%s]" % ", ".join(map(str, range(size))),
+    "dict literal": lambda size: "x = {%s}"
+    % ", ".join("%d: %d" % (i, i) for i in range(size)),
+    "statements": lambda size: "".join("x%d = %d\n" % (i, i) for i in range(size)),
+    "string parts": lambda size: "x = " + '"a" ' * size,
+}
+
+
+def main(largest: int = 1_000_000):
+    compiler = StarlaCompiler(lexer="scanner", fast=True)
+    for shape, generate in SHAPES.items():
+        size = 1000
+        while size <= largest:
+            source = generate(size)
+            start = time.perf_counter()
+            compiler.parse(source)
+            elapsed = time.perf_counter() - start
+            print(
+                "%-13s %9d elements %8.3f s %6.2f us/element"
+                % (shape, size, elapsed, elapsed / size * 1e6)
+            )
+            size *= 10
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,46 @@
+"""Cold import time of ``compiler.parser`` with and without the table cache.
+
+Run from the repository root: ``python benchmarks/startup.py [runs]``
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cold_import(env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import compiler.parser"],
+        cwd=ROOT,
+        env=env,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def measure(env: dict, runs: int) -> float:
+    return statistics.median(cold_import(env) for _ in range(runs))
+
+
+def main(runs: int = 10):
+    with tempfile.TemporaryDirectory() as directory:
+        cached = dict(os.environ, STARLA_TABLE_CACHE=os.path.join(directory, "tab"))
+        cold_import(cached)  # Populate the cache
+        uncached = dict(os.environ, STARLA_NO_TABLE_CACHE="1")
+
+        without_cache = measure(uncached, runs)
+        with_cache = measure(cached, runs)
+
+    print("without table cache: %.1f ms" % (without_cache * 1000))
+    print("with table cache:    %.1f ms" % (with_cache * 1000))
+    print("speedup:             %.1fx" % (without_cache / with_cache))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
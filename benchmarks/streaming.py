@@ -0,0 +1,52 @@
+"""Peak memory of parsing a large file whole against statement at a time.
+
+Run from the repository root: ``python benchmarks/streaming.py [copies of main.star]``
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.getcwd())
+
+from compiler import StarlaCompiler  # pylint: disable=wrong-import-position
+
+
+def whole(path: str) -> int:
+    with open(path, encoding="utf-8") as file:
+        return len(StarlaCompiler(lexer="scanner", fast=True).parse(file.read()).body)
+
+
+def streamed(path: str) -> int:
+    with open(path, encoding="utf-8") as file:
+        return sum(
+            1 for _ in StarlaCompiler(lexer="scanner", fast=True).parse_stream(file)
+        )
+
+
+def main(copies: int = 1000):
+    with open("main.star", encoding="utf-8") as file:
+        source = file.read() + "\n"
+    with tempfile.NamedTemporaryFile("w", suffix=".star", delete=False) as file:
+        file.write(source * copies)
+    try:
+        print("%.1f MB of source" % (os.path.getsize(file.name) / 1e6))
+        for name, parse in (("whole", whole), ("streamed", streamed)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            statements = parse(file.name)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                "%-9s %d statements %7.2f s  peak %8.2f MB"
+                % (name, statements, elapsed, peak / 1e6)
+            )
+    finally:
+        os.unlink(file.name)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
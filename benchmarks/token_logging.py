@@ -0,0 +1,55 @@
+"""Tokenization throughput of ``StarlaCompiler.tokens`` with debug logging off and on.
+
+Run from the repository root: ``python benchmarks/token_logging.py [copies of main.star]``
+
+"eager" formats every message before handing it to the logger, as the
+compiler used to; "lazy" is ``StarlaCompiler.tokens``. Enabled messages go to
+a handler that discards them, so only the cost of logging is measured.
+"""
+
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from compiler import StarlaCompiler  # pylint: disable=wrong-import-position
+
+
+def eager(compiler, source):
+    for token in compiler.token_stream(source):
+        compiler.lexer.log.debug("Encountered token, %r" % token)
+        yield token
+
+
+def throughput(tokens, source: str) -> float:
+    start = time.perf_counter()
+    for _ in tokens:
+        pass
+    return len(source) / (time.perf_counter() - start)
+
+
+def main(copies: int = 500):
+    with open("main.star", encoding="utf-8") as file:
+        source = file.read() * copies
+    compiler = StarlaCompiler(lexer="scanner")
+    log = compiler.lexer.log
+    log.addHandler(logging.NullHandler())
+    log.propagate = False
+    print("source size: %.1f MB" % (len(source) / 1e6))
+    print("%-8s %12s %12s" % ("level", "eager", "lazy"))
+    for level in (logging.ERROR, logging.DEBUG):
+        log.setLevel(level)
+        print(
+            "%-8s %7.2f MB/s %7.2f MB/s"
+            % (
+                logging.getLevelName(level),
+                throughput(eager(compiler, source), source) / 1e6,
+                throughput(compiler.tokens(source), source) / 1e6,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
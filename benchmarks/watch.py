@@ -0,0 +1,78 @@
+"""Latency from saving one file to its diagnostics while watching a large tree.
+
+Run from the repository root: ``python benchmarks/watch.py [files] [saves]``
+"""
+
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from compiler.watch import (  # pylint: disable=wrong-import-position
+    PollingWatcher,
+    Watch,
+    start_watcher,
+)
+
+
+def latency(watch: Watch, path: str, source: str, saves: int) -> float:
+    times = []
+    for save in range(saves):
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("# save %d\n%s" % (save, source))
+        start = time.perf_counter()
+        results = watch.update(timeout=5)
+        times.append(time.perf_counter() - start)
+        if [result.path for result in results] != [path]:
+            raise RuntimeError("Expected only %s to be rebuilt: %r" % (path, results))
+    return statistics.median(times)
+
+
+def main(files: int = 5000, saves: int = 20):
+    with open("main.star", encoding="utf-8") as file:
+        source = file.read()
+    root = tempfile.mkdtemp()
+    try:
+        for i in range(files):
+            directory = os.path.join(root, "package%d" % (i // 100))
+            os.makedirs(directory, exist_ok=True)
+            with open(
+                os.path.join(directory, "%d.star" % i), "w", encoding="utf-8"
+            ) as file:
+                file.write("# %d\n%s" % (i, source))
+        path = os.path.join(root, "package0", "0.star")
+
+        for name, watcher in (
+            ("inotify", start_watcher(root)),
+            ("polling", PollingWatcher(root, interval=0.05)),
+        ):
+            if name == "inotify" and isinstance(watcher, PollingWatcher):
+                print("inotify is not available")
+                continue
+            watch = Watch(root, watcher)
+            start = time.perf_counter()
+            watch.build()
+            print(
+                "%s: initial build of %d files %.2f s"
+                % (name, files, time.perf_counter() - start)
+            )
+            print(
+                "%s: save to diagnostics %.1f ms (median of %d, %.0f ms debounce)"
+                % (
+                    name,
+                    latency(watch, path, source, saves) * 1e3,
+                    saves,
+                    watch.debounce * 1e3,
+                )
+            )
+            watch.close()
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
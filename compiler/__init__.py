@@ -1,3 +1,4 @@
 from .compiler import StarlaCompiler
 from .lexer import StarlaLexer
 from .parser import StarlaParser
+from .scanner import StarlaScanner
@@ -1,24 +1,482 @@
-import io
+# Each command imports the backends it uses, so that starting one does not
+# pay for importing all the others.
+# pylint: disable=import-outside-toplevel
 import logging
+import os
+import sys
+import time
+import typing as t
 
 import click  # type: ignore[import]
 
-from .compiler import StarlaCompiler
+from .compiler import LEXERS, StarlaCompiler, configure_logging
+from .recovery import ParseError
 
 compiler = StarlaCompiler()
 
 
+def default_budget() -> int:
+    from .inlining import DEFAULT_BUDGET
+
+    return DEFAULT_BUDGET
+
+
 @click.group()
 def cli():
     """Welcome to the Starla compiler!"""
 
 
 @cli.command(name="compile")
-@click.argument("file", type=click.File("r"), default="main.star")
+@click.argument("paths", nargs=-1)
+@click.option("-l", "--level", default="ERROR", help="Logging level, INFO, DEBUG, etc.")
+@click.option(
+    "--lexer",
+    type=click.Choice(sorted(LEXERS)),
+    default="sly",
+    help="Lexer engine used to tokenize the source.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=None,
+    help="Worker processes for multiple files, one per CPU by default.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Parse every file again instead of reusing cached trees.",
+)
+@click.option(
+    "-b",
+    "--bytecode",
+    is_flag=True,
+    help="Write the bytecode of each file next to it, for the run command.",
+)
+@click.option(
+    "-O",
+    "--optimize",
+    is_flag=True,
+    help="Inline calls, fold constants and remove dead code, and report on each.",
+)
+@click.option(
+    "--removed",
+    is_flag=True,
+    help="With -O, list the unused declarations removed and their size.",
+)
+@click.option(
+    "--inline-budget",
+    type=int,
+    default=default_budget,
+    help="With -O, inline functions returning at most this many nodes, 0 for none.",
+)
+def cli_compile(
+    paths: t.Tuple[str, ...],
+    level: str,
+    lexer: str,
+    jobs: int,
+    no_cache: bool,
+    bytecode: bool,
+    optimize: bool,
+    removed: bool,
+    inline_budget: int,
+):  # pylint: disable=too-many-arguments,too-many-locals
+    """Compiles source files, directories of them or glob patterns into binaries."""
+    from .cache import default_cache_directory
+
+    paths = paths or ("main.star",)
+    cache_directory = None if no_cache else default_cache_directory()
+    if (
+        cache_directory is None
+        and not (bytecode or optimize)
+        and len(paths) == 1
+        and os.path.isfile(paths[0])
+    ):
+        # One file is parsed in this process a statement at a time, without
+        # starting any workers or reading it all in.
+        configure_logging(getattr(logging, level.upper()))
+        errors: t.List[ParseError] = []
+        try:
+            with open(paths[0], encoding="utf-8") as file:
+                for _ in StarlaCompiler(lexer=lexer).parse_stream_recovering(
+                    file, errors
+                ):
+                    pass
+        except UnicodeDecodeError as error:
+            echo_error(paths[0], str(error))
+            sys.exit(1)
+        if errors:
+            echo_error(paths[0], "\n".join(map(str, errors)))
+            sys.exit(1)
+        return
+
+    from . import optimizer
+    from .batch import compile_files, find_sources
+    from .bytecode import bytecode_path, dump, generate
+    from .cache import ASTCache
+
+    logging.basicConfig(level=getattr(logging, level.upper()))
+    failed = False
+    stats = optimizer.OptimizeStats()
+    results = compile_files(
+        find_sources(paths),
+        workers=jobs,
+        lexer=lexer,
+        ast_cache=None if cache_directory is None else ASTCache(cache_directory),
+        modules=bytecode or optimize,
+    )
+    for result in results:
+        if result.error is not None:
+            echo_error(result.path, result.error)
+            failed = True
+            continue
+        module = result.module
+        if optimize:
+            module, optimized = optimizer.optimize(module, inline_budget)
+            stats += optimized
+        if bytecode:
+            dump(generate(module), bytecode_path(result.path))
+    if optimize:
+        click.echo(stats.report(removed))
+    if failed:
+        sys.exit(1)
+
+
+@cli.command(name="check")
+@click.argument("paths", nargs=-1)
+@click.option("-l", "--level", default="ERROR", help="Logging level, INFO, DEBUG, etc.")
+@click.option(
+    "--lexer",
+    type=click.Choice(sorted(LEXERS)),
+    default="scanner",
+    help="Lexer engine used to tokenize the source.",
+)
+def cli_check(
+    paths: t.Tuple[str, ...], level: str, lexer: str
+):  # pylint: disable=too-many-locals
+    """Checks the names and types of source files, directories of them or globs."""
+    from .batch import find_sources, parse_file
+    from .resolver import resolve
+    from .typecheck import check
+
+    configure_logging(getattr(logging, level.upper()))
+    checker = StarlaCompiler(lexer=lexer, fast=True)
+    failed = False
+    for path in find_sources(paths or ("main.star",)):
+        try:
+            with open(path, "rb") as file:
+                source = file.read()
+        except OSError as error:
+            click.echo("%s: %s" % (path, error), err=True)
+            failed = True
+            continue
+        result = parse_file(path, source, checker)
+        if result.error is not None:
+            echo_error(path, result.error)
+            failed = True
+            continue
+        text = source.decode("utf-8")
+        errors = resolve(result.module, text).errors + check(result.module, text).errors
+        for problem in errors:
+            click.echo("%s:%s" % (path, problem), err=True)
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+def echo_error(path: str, error: str) -> None:
+    """Print ``error``, which may be several syntax errors, one per line."""
+    for line in error.splitlines():
+        click.echo("%s: %s" % (path, line), err=True)
+
+
+def echo_exception(path: str, error: Exception) -> None:
+    """Print an error a program raised while running, on one line."""
+    click.echo("%s: %s: %s" % (path, type(error).__name__, error), err=True)
+
+
+def report(results, elapsed: float) -> None:
+    for result in results:
+        if result.error is not None:
+            echo_error(result.path, result.error)
+    failed = sum(result.error is not None for result in results)
+    click.echo(
+        "Compiled %d files, %d failed, in %.1f ms"
+        % (len(results), failed, elapsed * 1000)
+    )
+
+
+@cli.command(name="watch")
+@click.argument("root", type=click.Path(exists=True, file_okay=False), default=".")
+@click.option("-l", "--level", default="ERROR", help="Logging level, INFO, DEBUG, etc.")
+@click.option(
+    "--lexer",
+    type=click.Choice(sorted(LEXERS)),
+    default="scanner",
+    help="Lexer engine used to tokenize the source.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Parse every file again instead of reusing cached trees.",
+)
+@click.option("--poll", is_flag=True, help="Poll for changes instead of using inotify.")
+@click.option(
+    "--interval", default=0.5, help="Seconds between scans when polling for changes."
+)
+@click.option(
+    "--debounce", default=0.02, help="Seconds of quiet that end a burst of changes."
+)
+def cli_watch(
+    root: str,
+    level: str,
+    lexer: str,
+    no_cache: bool,
+    poll: bool,
+    interval: float,
+    debounce: float,
+):  # pylint: disable=too-many-arguments,too-many-locals
+    """Compiles every source below a directory, then again whenever they change."""
+    from .cache import ASTCache, default_cache_directory
+    from .watch import Watch, start_watcher
+
+    logging.basicConfig(level=getattr(logging, level.upper()))
+    cache_directory = None if no_cache else default_cache_directory()
+    watch = Watch(
+        root,
+        start_watcher(root, poll=poll, interval=interval),
+        lexer=lexer,
+        ast_cache=None if cache_directory is None else ASTCache(cache_directory),
+        debounce=debounce,
+    )
+    try:
+        start = time.perf_counter()
+        report(watch.build(), time.perf_counter() - start)
+        while True:
+            changed = watch.wait()
+            start = time.perf_counter()
+            results = watch.build(changed)
+            if results:
+                report(results, time.perf_counter() - start)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watch.close()
+
+
+@cli.command(name="interpret")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("args", nargs=-1)
 @click.option("-l", "--level", default="ERROR", help="Logging level, INFO, DEBUG, etc.")
-def cli_compile(file: io.TextIOWrapper, level: str):
-    """Compiles a source file into a binary."""
-    compiler.compile(file.read(), level=getattr(logging, level.upper()))
+@click.option(
+    "--lexer",
+    type=click.Choice(sorted(LEXERS)),
+    default="scanner",
+    help="Lexer engine used to tokenize the source.",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["python", "tree"]),
+    default="python",
+    help="Run transpiled Python code, or walk the tree.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Transpile the source again instead of reusing cached code.",
+)
+@click.option(
+    "-O",
+    "--optimize",
+    is_flag=True,
+    help="Inline calls, fold constants and remove dead code first.",
+)
+@click.option(
+    "--inline-budget",
+    type=int,
+    default=default_budget,
+    help="With -O, inline functions returning at most this many nodes, 0 for none.",
+)
+def cli_interpret(
+    path: str,
+    args: t.Tuple[str, ...],
+    level: str,
+    lexer: str,
+    backend: str,
+    no_cache: bool,
+    optimize: bool,
+    inline_budget: int,
+):  # pylint: disable=too-many-arguments,too-many-locals
+    """Runs a source file, passing any further arguments to its main function."""
+    from . import optimizer
+    from .batch import parse_file
+    from .cache import default_cache_directory
+    from .interpreter import Interpreter, StarlaRuntimeError
+    from .transpiler import CodeCache, Runtime, compile_source
+
+    configure_logging(getattr(logging, level.upper()))
+    with open(path, "rb") as file:
+        source = file.read()
+    starla = StarlaCompiler(lexer=lexer, fast=True)
+    try:
+        if backend == "tree":
+            result = parse_file(path, source, starla)
+            if result.error is not None:
+                echo_error(path, result.error)
+                sys.exit(1)
+            module = result.module
+            if optimize:
+                module, _ = optimizer.optimize(module, inline_budget)
+            Interpreter().run(module, list(args))
+        else:
+            cache_directory = None if no_cache else default_cache_directory("code")
+            cache = None if cache_directory is None else CodeCache(cache_directory)
+            code = compile_source(source, starla, cache, path, optimize, inline_budget)
+            Runtime().run(code, list(args))
+    except SyntaxError as error:
+        click.echo(
+            "%s: %s:%s: %s" % (path, error.lineno, error.offset, error.msg), err=True
+        )
+        sys.exit(1)
+    except StarlaRuntimeError as error:
+        click.echo("%s: %s" % (path, error), err=True)
+        sys.exit(1)
+    except Exception as error:  # pylint: disable=broad-except
+        echo_exception(path, error)
+        sys.exit(1)
+
+
+@cli.command(name="run")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("args", nargs=-1)
+def cli_run(path: str, args: t.Tuple[str, ...]):
+    """Runs the bytecode written by compile --bytecode for a source file."""
+    from .bytecode import bytecode_path, load
+    from .interpreter import StarlaRuntimeError
+    from .vm import VM
+
+    if path.endswith(".star"):
+        path = bytecode_path(path)
+    try:
+        code = load(path)
+    except (OSError, ValueError) as error:
+        click.echo("%s: %s" % (path, error), err=True)
+        sys.exit(1)
+    try:
+        VM().run(code, list(args))
+    except StarlaRuntimeError as error:
+        click.echo("%s: %s" % (path, error), err=True)
+        sys.exit(1)
+    except Exception as error:  # pylint: disable=broad-except
+        echo_exception(path, error)
+        sys.exit(1)
+
+
+@cli.command(name="lsp")
+@click.option(
+    "--lexer",
+    type=click.Choice(sorted(LEXERS)),
+    default="scanner",
+    help="Lexer engine used to tokenize the source.",
+)
+def cli_lsp(lexer: str):
+    """Serves the Language Server Protocol on standard input and output."""
+    from .lsp import LanguageServer
+
+    sys.exit(LanguageServer(sys.stdin.buffer, sys.stdout.buffer, lexer).serve())
+
+
+@cli.command(name="index")
+@click.argument("root", type=click.Path(exists=True, file_okay=False), default=".")
+@click.option(
+    "--lexer",
+    type=click.Choice(sorted(LEXERS)),
+    default="scanner",
+    help="Lexer engine used to tokenize the source.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=None,
+    help="Worker processes for changed files, one per CPU by default.",
+)
+@click.option(
+    "--index",
+    "index_path",
+    default=None,
+    help="Database of the index, by default one per root in the cache directory.",
+)
+def cli_index(root: str, lexer: str, jobs: int, index_path: t.Optional[str]):
+    """Indexes the names declared and used in every source below a directory."""
+    from .project import ProjectIndex
+
+    start = time.perf_counter()
+    with ProjectIndex(root, index_path) as project:
+        updated = project.update(jobs, lexer)
+        for path, error in project.errors():
+            echo_error(path, error)
+    click.echo(
+        "Indexed %d files, %d parsed and %d removed, in %.1f ms"
+        % (*updated, (time.perf_counter() - start) * 1000)
+    )
+
+
+@cli.command(name="query")
+@click.argument("name")
+@click.option(
+    "-r",
+    "--root",
+    type=click.Path(exists=True, file_okay=False),
+    default=".",
+    help="Directory of the sources the index is of.",
+)
+@click.option(
+    "--kind",
+    type=click.Choice(["all", "definitions", "references"]),
+    default="all",
+    help="Whether to list where the name is declared, used, or both.",
+)
+@click.option(
+    "--no-update",
+    is_flag=True,
+    help="Answer from the index as it is, without indexing changed files first.",
+)
+@click.option(
+    "--lexer",
+    type=click.Choice(sorted(LEXERS)),
+    default="scanner",
+    help="Lexer engine used to tokenize changed sources.",
+)
+@click.option(
+    "--index",
+    "index_path",
+    default=None,
+    help="Database of the index, by default one per root in the cache directory.",
+)
+def cli_query(
+    name: str,
+    root: str,
+    kind: str,
+    no_update: bool,
+    lexer: str,
+    index_path: t.Optional[str],
+):  # pylint: disable=too-many-arguments
+    """Lists where a name, or a qualified one like main.x, is declared and used."""
+    from .project import ProjectIndex
+
+    with ProjectIndex(root, index_path) as project:
+        if not no_update:
+            project.update(lexer=lexer)
+        locations = []
+        if kind != "references":
+            locations.extend(project.definitions(name))
+        if kind != "definitions":
+            locations.extend(project.references(name))
+    for location in locations:
+        click.echo(str(location))
+    if not locations:
+        sys.exit(1)
 
 
 @cli.command(name="interactive")
@@ -34,4 +492,5 @@ def cli_interactive(verbose: int):
     click.echo(compiler.compile(code, level=getattr(logging, level.upper())))
 
 
-cli()  # pylint: disable=no-value-for-parameter
+if __name__ == "__main__":
+    cli()  # pylint: disable=no-value-for-parameter
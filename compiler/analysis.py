@@ -0,0 +1,295 @@
+"""Name and type analysis of a module, kept up to date as it is edited.
+
+Resolving, type checking and indexing a whole module again after every edit
+takes time in proportion to the module. ``Analyser`` instead keeps a
+``Summary`` of each top-level statement, keyed by the statement node, which
+``StarlaCompiler.reparse`` shares between the old and new tree for the
+statements an edit does not touch, moving their offsets in place. Everything
+a summary holds is positioned as of when it was made, and moved by as much
+as the first name of its statement has moved since.
+
+A statement is resolved and indexed on its own, leaving the names it uses
+from the module to be looked up among the declarations of every statement
+when the analysis is put together. Its type check depends on the types the
+module gives the names it mentions, so the errors it found are kept along
+with those types, and the statement is only checked again once they change.
+"""
+
+import bisect
+import typing as t
+
+from .incremental import POSITIONED, replace, walk
+from .interpreter import builtin_functions
+from .positions import LineIndex
+from .references import Definition, Reference, index
+from .resolver import BUILTIN, GLOBAL, Resolver, declared_names
+from .typecheck import Environment, Type, TypeChecker, module_environment
+
+# The type a module gives a name, and whether it is a constant.
+Key = t.Tuple[t.Tuple[t.Optional[Type], bool], ...]
+
+BUILTIN_NAMES = tuple(builtin_functions(print))
+
+
+class Problem(t.NamedTuple):
+    message: str
+    offset: int
+
+
+class Found(t.NamedTuple):
+    """The name at an offset, and the definition it refers to if there is one."""
+
+    name: t.Union[Definition, Reference]
+    definition: t.Optional[Definition]
+
+
+class Checked(t.NamedTuple):
+    """The errors found checking a statement in an environment, and what it left."""
+
+    key: Key
+    problems: t.List[Problem]
+    after: Key
+
+
+class Summary:  # pylint: disable=too-many-instance-attributes
+    """What a top-level statement declares and uses, and what is wrong with it."""
+
+    __slots__ = (
+        "node",
+        "anchor",
+        "base",
+        "index",
+        "names",
+        "declared",
+        "undefined",
+        "errors",
+        "function",
+        "problems",
+        "checked",
+        "body",
+    )
+
+    def __init__(self, node: t.Any, module: t.Any, line_index: LineIndex) -> None:
+        self.node = node
+        alone = replace(module, body=(node,))
+        resolution = Resolver(BUILTIN_NAMES).resolve(alone)
+        self.index = index(alone, resolution)
+        # Names of the module this statement declares, and those it mentions.
+        self.declared = frozenset(declared_names((node,)))
+        names = set()
+        self.undefined: t.Dict[str, t.List[int]] = {}
+        # The syntax errors in the statement, which parsing left in its place.
+        self.errors: t.List[Problem] = []
+        self.anchor = None
+        for child in walk(node):
+            kind = type(child).__name__
+            if kind not in POSITIONED or child.index is None:
+                continue
+            if self.anchor is None or child.index < self.anchor.index:
+                self.anchor = child
+            if kind == "Error":
+                self.errors.append(Problem(child.message, child.index))
+            elif kind == "Namespace":
+                binding = resolution.bindings[id(child)].kind
+                if binding in (GLOBAL, BUILTIN):
+                    names.add(child.name)
+                if binding == GLOBAL and child.name not in self.declared:
+                    self.undefined.setdefault(child.name, []).append(child.index)
+        self.base = 0 if self.anchor is None else self.anchor.index
+        self.names = tuple(sorted(names))
+        self.function: t.Optional[Type] = None
+        self.problems: t.List[Problem] = []
+        if type(node).__name__ == "FunctionDeclaration":
+            checker = TypeChecker(line_index)
+            environment = Environment()
+            checker.declare_function(node, environment)
+            self.function = environment.variables[node.target.name]
+            self.problems = self.positioned(checker, 0, line_index)
+        self.checked: t.Optional[Checked] = None
+        self.body: t.Optional[Checked] = None
+
+    @property
+    def shift(self) -> int:
+        """How far the statement moved since it was summarised."""
+        return 0 if self.anchor is None else self.anchor.index - self.base
+
+    def key(self, environment: Environment) -> Key:
+        variables = environment.variables
+        constants = environment.constants
+        return tuple((variables.get(name), name in constants) for name in self.names)
+
+    def positioned(
+        self, checker: TypeChecker, start: int, line_index: LineIndex
+    ) -> t.List[Problem]:
+        """The errors of ``checker`` from ``start`` on, positioned as of summarising."""
+        shift = self.shift
+        problems = []
+        for error in checker.errors[start:]:
+            offset = self.base
+            if error.line:
+                offset = line_index.starts[error.line - 1] + error.column - 1 - shift
+            problems.append(Problem(error.message, offset))
+        return problems
+
+    def check(
+        self, checker: TypeChecker, environment: Environment, line_index: LineIndex
+    ) -> t.List[Problem]:
+        """Check the statement in ``environment``, unless it was already checked in
+        one giving its names the same types, and update the environment."""
+        key = self.key(environment)
+        if self.checked is None or self.checked.key != key:
+            start = len(checker.errors)
+            node = self.node
+            if self.function is not None:
+                checker.declare_function(node, Environment())
+                del checker.errors[start:]
+            checker.enclosing = [node]
+            checker.statements[type(node)](node, environment)
+            problems = self.positioned(checker, start, line_index)
+            self.checked = Checked(key, problems, self.key(environment))
+        else:
+            variables = environment.variables
+            for name, (declared, constant) in zip(self.names, self.checked.after):
+                if declared is not None:
+                    variables[name] = declared
+                if constant:
+                    environment.constants.add(name)
+        return self.checked.problems
+
+    def check_body(
+        self, checker: TypeChecker, environment: Environment, line_index: LineIndex
+    ) -> t.List[Problem]:
+        """Check the body of the function the statement declares, in the module
+        ``environment`` every other statement was checked in."""
+        key = self.key(environment)
+        if self.body is None or self.body.key != key:
+            start = len(checker.errors)
+            node = self.node
+            checker.declare_function(node, Environment())
+            del checker.errors[start:]
+            checker.enclosing = [node]
+            checker.function_body(node, environment)
+            self.body = Checked(key, self.positioned(checker, start, line_index), key)
+        return self.body.problems
+
+
+class ModuleAnalysis:
+    """The problems of a module and the names in it, from its statement summaries."""
+
+    def __init__(self, summaries: t.List[Summary], problems: t.List[Problem]) -> None:
+        self.summaries = summaries
+        self.problems = problems
+        self.starts: t.List[int] = []
+        self.indexed: t.List[Summary] = []
+        self.module: t.Optional[t.Dict[str, t.Tuple[Summary, Definition]]] = None
+
+    def at(self, offset: int) -> t.Optional[Found]:
+        """The name ``offset`` is in, or just after."""
+        if not self.indexed:
+            for summary in self.summaries:
+                if summary.index.starts:
+                    self.indexed.append(summary)
+                    self.starts.append(summary.index.starts[0] + summary.shift)
+        position = bisect.bisect_right(self.starts, offset) - 1
+        if position < 0:
+            return None
+        summary = self.indexed[position]
+        shift = summary.shift
+        name = summary.index.at(offset - shift)
+        if name is None:
+            return None
+        definition = summary.index.definition(name)
+        if definition is None or not definition.scope:
+            # Names of the module may be declared by any other statement.
+            definition = self.module_definition(name.name)
+        else:
+            definition = definition._replace(start=definition.start + shift)
+        return Found(name._replace(start=name.start + shift), definition)
+
+    def module_definition(self, name: str) -> t.Optional[Definition]:
+        if self.module is None:
+            self.module = {}
+            for summary in self.summaries:
+                for definition in summary.index.definitions:
+                    if not definition.scope:
+                        self.module.setdefault(definition.name, (summary, definition))
+        if name not in self.module:
+            return None
+        summary, definition = self.module[name]
+        return definition._replace(start=definition.start + summary.shift)
+
+    def definitions(self) -> t.Iterator[Definition]:
+        """Every definition in the module, in the order of the statements.
+
+        As in ``SourceIndex``, only the first declaration of a name of the
+        module defines it, even if the others are in different statements.
+        """
+        declared = set()
+        for summary in self.summaries:
+            shift = summary.shift
+            for definition in summary.index.definitions:
+                if not definition.scope:
+                    if definition.name in declared:
+                        continue
+                    declared.add(definition.name)
+                yield definition._replace(start=definition.start + shift)
+
+
+class Analyser:
+    """Analyses the modules an edited source is parsed into, one after another."""
+
+    def __init__(self) -> None:
+        self.summaries: t.Dict[int, Summary] = {}
+
+    def summary(self, node: t.Any, module: t.Any, line_index: LineIndex) -> Summary:
+        summary = self.summaries.get(id(node))
+        if summary is None or summary.node is not node:
+            summary = Summary(node, module, line_index)
+        return summary
+
+    def analyse(self, module: t.Any, line_index: LineIndex) -> ModuleAnalysis:
+        """The analysis of ``module``, positioned in the source ``line_index`` indexes."""
+        summaries = [self.summary(node, module, line_index) for node in module.body]
+        self.summaries = {id(summary.node): summary for summary in summaries}
+        declared: t.Set[str] = set()
+        for summary in summaries:
+            declared |= summary.declared
+        problems: t.List[Problem] = []
+        for summary in summaries:
+            self.add(problems, summary, summary.errors)
+        for summary in summaries:
+            for name, offsets in summary.undefined.items():
+                if name not in declared:
+                    problems.extend(
+                        Problem("Name %r is not defined" % name, offset + summary.shift)
+                        for offset in offsets
+                    )
+
+        # As ``TypeChecker.body`` does, functions are declared first, and their
+        # bodies are checked after every other statement.
+        checker = TypeChecker(line_index)
+        environment = module_environment()
+        functions = []
+        for summary in summaries:
+            if summary.function is not None:
+                environment.variables[summary.node.target.name] = summary.function
+                self.add(problems, summary, summary.problems)
+                functions.append(summary)
+        for summary in summaries:
+            self.add(problems, summary, summary.check(checker, environment, line_index))
+        for summary in functions:
+            self.add(
+                problems, summary, summary.check_body(checker, environment, line_index)
+            )
+        return ModuleAnalysis(summaries, problems)
+
+    @staticmethod
+    def add(
+        problems: t.List[Problem], summary: Summary, found: t.List[Problem]
+    ) -> None:
+        """Add the problems ``found`` in ``summary``, where they are now, to ``problems``."""
+        if found:
+            shift = summary.shift
+            problems.extend(
+                problem._replace(offset=problem.offset + shift) for problem in found
+            )
@@ -0,0 +1,349 @@
+"""Parsed modules in a compact binary format, read back without copying.
+
+A file starts with ``MAGIC``, the format version and a checksum of the node
+types and their fields, followed by a table of every distinct string in the
+tree, then the offset of the root node and the nodes themselves. Integers,
+including lengths and offsets, are varints: seven bits a byte, least
+significant first, with the high bit set on every byte but the last.
+
+``Writer`` lays the nodes out in one pass, each after the nodes it holds, so
+a node refers to each child by how far back the child starts. A node is a
+byte giving its type, followed by the value of each of its fields in the
+order of ``nodes``, whichever flavour of tree is written. A value is a tag
+byte, then the index of a string, a zigzag encoded integer, the items of a
+tuple or dict preceded by their number, or the distance back to a node.
+
+``Reader`` decodes nodes straight out of a ``memoryview`` of the data, which
+``load`` maps from the file, and only decodes each string of the table the
+first time it is used. The top-level statements of the module are only
+built when they are first looked up, so reading a few statements of a large
+module costs about as much as those statements.
+"""
+
+import mmap
+import typing as t
+import zlib
+
+from . import models, nodes
+
+# Bump whenever the layout of the file changes.
+FORMAT_VERSION = 1
+MAGIC = b"STARAST"
+
+# Every node type, numbered by its position here.
+NODE_TYPES = (
+    "Module",
+    "TypeHint",
+    "Namespace",
+    "Int",
+    "Float",
+    "Double",
+    "String",
+    "Char",
+    "Bool",
+    "Null",
+    "Dict",
+    "List",
+    "Tuple",
+    "Call",
+    "Comparison",
+    "MultiComparison",
+    "Operation",
+    "IfStatement",
+    "WhileLoop",
+    "ForLoop",
+    "Arg",
+    "DefaultArg",
+    "FunctionDeclaration",
+    "Return",
+    "Pass",
+    "Error",
+    "VariableDeclaration",
+)
+TYPE_NUMBERS = {name: number for number, name in enumerate(NODE_TYPES)}
+
+# A checksum of the node types and their fields, which files must match.
+SCHEMA = zlib.crc32(
+    repr([(name, nodes.NODES[name].fields) for name in NODE_TYPES]).encode()
+).to_bytes(4, "little")
+
+# Tags of the values of fields.
+NONE, FALSE, TRUE, STRING, INTEGER, TUPLE, DICT, NODE = range(8)
+
+AnyModule = t.Union[models.Module, nodes.Module]
+Buffer = t.Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+def write_varint(output: bytearray, value: int) -> None:
+    while value > 0x7F:
+        output.append(value & 0x7F | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+class Writer:
+    """Encodes one tree of either flavour, collecting its strings as it goes."""
+
+    def __init__(self) -> None:
+        self.body = bytearray()
+        self.strings: t.Dict[str, int] = {}
+
+    def write(self, module: t.Any) -> bytes:
+        root = self.node(module)
+        header = bytearray(MAGIC)
+        write_varint(header, FORMAT_VERSION)
+        header += SCHEMA
+        write_varint(header, len(self.strings))
+        for string in self.strings:
+            encoded = string.encode("utf-8")
+            write_varint(header, len(encoded))
+            header += encoded
+        write_varint(header, root)
+        header += self.body
+        return bytes(header)
+
+    def node(self, node: t.Any) -> int:
+        """Write ``node`` after everything it holds, returning where it starts."""
+        names = nodes.NODES[type(node).__name__].fields
+        values = [getattr(node, name) for name in names]
+        children: t.List[int] = []
+        for value in values:
+            self.children(value, children)
+        start = len(self.body)
+        self.body.append(TYPE_NUMBERS[type(node).__name__])
+        offsets = iter(children)
+        for value in values:
+            self.value(value, start, offsets)
+        return start
+
+    def children(self, value: t.Any, offsets: t.List[int]) -> None:
+        if isinstance(value, (nodes.Node, models.Ast)):
+            offsets.append(self.node(value))
+        elif isinstance(value, tuple):
+            for item in value:
+                self.children(item, offsets)
+        elif isinstance(value, dict):
+            for item in value.values():
+                self.children(item, offsets)
+
+    def value(self, value: t.Any, start: int, offsets: t.Iterator[int]) -> None:
+        body = self.body
+        if value is None:
+            body.append(NONE)
+        elif value is False or value is True:
+            body.append(TRUE if value else FALSE)
+        elif isinstance(value, str):
+            body.append(STRING)
+            write_varint(body, self.strings.setdefault(value, len(self.strings)))
+        elif isinstance(value, int):
+            body.append(INTEGER)
+            write_varint(body, value << 1 if value >= 0 else (-value << 1) - 1)
+        elif isinstance(value, tuple):
+            body.append(TUPLE)
+            write_varint(body, len(value))
+            for item in value:
+                self.value(item, start, offsets)
+        elif isinstance(value, dict):
+            body.append(DICT)
+            write_varint(body, len(value))
+            for key, item in value.items():
+                self.value(key, start, offsets)
+                self.value(item, start, offsets)
+        elif isinstance(value, (nodes.Node, models.Ast)):
+            body.append(NODE)
+            write_varint(body, start - next(offsets))
+        else:
+            raise TypeError("Cannot write %r in a tree" % (value,))
+
+
+def dumps(module: t.Any) -> bytes:
+    """Encode a tree of ``models`` or of ``nodes``."""
+    return Writer().write(module)
+
+
+def dump(module: t.Any, path: str) -> None:
+    with open(path, "wb") as file:
+        file.write(dumps(module))
+
+
+class Reader(t.Sequence[t.Any]):  # pylint: disable=too-many-instance-attributes
+    """The tree encoded in ``data``, as a sequence of its top-level statements.
+
+    Statements are built as ``models``, or as ``nodes`` if ``fast``, the
+    first time they are looked up, and kept. Raises ``ValueError`` for data
+    that was not written by ``Writer``, or by another version of it.
+    """
+
+    def __init__(self, data: Buffer, fast: bool = False) -> None:
+        self.source = data
+        self.data = memoryview(data)
+        self.fast = fast
+        if bytes(self.data[: len(MAGIC)]) != MAGIC:
+            raise ValueError("Not an AST file")
+        try:
+            version, position = self.varint(len(MAGIC))
+            if version != FORMAT_VERSION:
+                raise ValueError("Written by another version, parse it again")
+            if bytes(self.data[position : position + 4]) != SCHEMA:
+                raise ValueError("Written with other node types, parse it again")
+            count, position = self.varint(position + 4)
+            # Where each string starts and ends.
+            self.starts = [0] * count
+            self.ends = [0] * count
+            for number in range(count):
+                length, position = self.varint(position)
+                self.starts[number] = position
+                position += length
+                self.ends[number] = position
+            self.strings: t.List[t.Optional[str]] = [None] * count
+            root, start = self.varint(position)
+            # Offsets in the data, rather than from the first node.
+            self.root = start + root
+            if self.data[self.root] != TYPE_NUMBERS["Module"]:
+                raise ValueError("Not a module")
+        except IndexError as error:
+            raise ValueError("Truncated AST file") from error
+        self.types: t.List[t.Tuple[t.Any, t.Tuple[str, ...]]] = [
+            (
+                nodes.NODES[name] if fast else getattr(models, name),
+                nodes.NODES[name].fields,
+            )
+            for name in NODE_TYPES
+        ]
+        # The offset of every top-level statement, and each once it is built.
+        self.offsets = self.body()
+        self.statements: t.List[t.Any] = [None] * len(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @t.overload
+    def __getitem__(self, index: int) -> t.Any:
+        ...
+
+    @t.overload
+    def __getitem__(self, index: slice) -> t.Sequence[t.Any]:
+        ...
+
+    def __getitem__(self, index: t.Union[int, slice]) -> t.Any:
+        if isinstance(index, slice):
+            return [self[position] for position in range(len(self))[index]]
+        statement = self.statements[index]
+        if statement is None:
+            statement = self.statements[index] = self.node(self.offsets[index])
+        return statement
+
+    def module(self) -> AnyModule:
+        """The whole tree, building every statement not built yet."""
+        module_type = self.types[TYPE_NUMBERS["Module"]][0]
+        return module_type.construct(body=tuple(self))
+
+    def close(self) -> None:
+        """Release the data, unmapping the file ``load`` mapped."""
+        self.data.release()
+        if isinstance(self.source, mmap.mmap):
+            self.source.close()
+
+    def __enter__(self) -> "Reader":
+        return self
+
+    def __exit__(self, *_: t.Any) -> None:
+        self.close()
+
+    def varint(self, position: int) -> t.Tuple[int, int]:
+        """The varint at ``position``, and where the data after it starts."""
+        data = self.data
+        byte = data[position]
+        value = byte & 0x7F
+        shift = 7
+        while byte & 0x80:
+            position += 1
+            byte = data[position]
+            value |= (byte & 0x7F) << shift
+            shift += 7
+        return value, position + 1
+
+    def string(self, number: int) -> str:
+        string = self.strings[number]
+        if string is None:
+            start, end = self.starts[number], self.ends[number]
+            string = self.strings[number] = str(self.data[start:end], "utf-8")
+        return string
+
+    def body(self) -> t.List[int]:
+        """The offsets of the statements of the module, without building them."""
+        position = self.root + 1
+        if self.data[position] != TUPLE:
+            raise ValueError("Not a module")
+        count, position = self.varint(position + 1)
+        offsets = []
+        for _ in range(count):
+            distance, position = self.varint(position + 1)
+            offsets.append(self.root - distance)
+        return offsets
+
+    def node(self, start: int) -> t.Any:
+        node_type, names = self.types[self.data[start]]
+        position = start + 1
+        values = {}
+        for name in names:
+            values[name], position = self.value(position, start)
+        return node_type.construct(**values)
+
+    def value(  # pylint: disable=too-many-return-statements
+        self, position: int, start: int
+    ) -> t.Tuple[t.Any, int]:
+        """The value at ``position`` in the node at ``start``, and where it ends."""
+        data = self.data
+        tag = data[position]
+        # Most numbers that follow tags are below 128, so fit in one byte. The
+        # module ends the data, so there is a byte after every tag to look at.
+        number = data[position + 1]
+        if number & 0x80:
+            number, end = self.varint(position + 1)
+        else:
+            end = position + 2
+        if tag == NODE:
+            return self.node(start - number), end
+        if tag == STRING:
+            string = self.strings[number]
+            if string is None:
+                string = self.string(number)
+            return string, end
+        if tag == TUPLE:
+            items = []
+            for _ in range(number):
+                item, end = self.value(end, start)
+                items.append(item)
+            return tuple(items), end
+        if tag == NONE:
+            return None, position + 1
+        if tag == INTEGER:
+            return (number >> 1) ^ -(number & 1), end
+        if tag == DICT:
+            entries = {}
+            for _ in range(number):
+                key, end = self.value(end, start)
+                entries[key], end = self.value(end, start)
+            return entries, end
+        if tag in (FALSE, TRUE):
+            return tag == TRUE, position + 1
+        raise ValueError("Unknown tag %d at %d" % (tag, position))
+
+
+def loads(data: Buffer, fast: bool = False) -> AnyModule:
+    """The tree encoded in ``data``, as ``models`` or, if ``fast``, ``nodes``."""
+    return Reader(data, fast).module()
+
+
+def load(path: str, fast: bool = False) -> Reader:
+    """Map the file at ``path``, whose statements are read as they are used.
+
+    The file stays mapped until the reader is closed.
+    """
+    with open(path, "rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as error:
+            raise ValueError("Not an AST file") from error
+    return Reader(data, fast)
@@ -0,0 +1,134 @@
+import functools
+import glob
+import os
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+
+from . import models, nodes
+from .cache import ASTCache
+from .compiler import StarlaCompiler
+
+# The compiler and AST cache of the current worker process, set by ``start_worker``.
+worker: t.Optional[StarlaCompiler] = None
+cache: t.Optional[ASTCache] = None
+
+
+class CompileResult(t.NamedTuple):
+    path: str
+    module: t.Optional[t.Union[models.Module, nodes.Module]]
+    error: t.Optional[str] = None
+
+
+def find_sources(paths: t.Iterable[str]) -> t.List[str]:
+    """Expand directories and glob patterns into a sorted list of ``.star`` files."""
+    sources = set()
+    for path in paths:
+        if os.path.isdir(path):
+            sources.update(
+                glob.glob(os.path.join(path, "**", "*.star"), recursive=True)
+            )
+        elif glob.has_magic(path):
+            sources.update(glob.glob(path, recursive=True))
+        else:
+            sources.add(path)
+    return sorted(sources)
+
+
+def start_worker(lexer: str, ast_cache: t.Optional[ASTCache] = None) -> None:
+    """Create the compiler that ``compile_file`` uses in this process."""
+    global worker, cache  # pylint: disable=global-statement
+    worker = StarlaCompiler(lexer=lexer, fast=True)
+    cache = ast_cache
+
+
+def parse_file(
+    path: str, source: bytes, compiler: t.Optional[StarlaCompiler] = None
+) -> CompileResult:
+    """Parse ``source`` with ``compiler``, or this process's worker by default."""
+    compiler = compiler or worker
+    if compiler is None:
+        raise RuntimeError("start_worker() has not been called in this process")
+    try:
+        module, errors = compiler.parse_recovering(source.decode("utf-8"))
+    except UnicodeDecodeError as error:
+        return CompileResult(path, None, str(error))
+    if errors:
+        # Every syntax error in the file, one per line.
+        return CompileResult(path, None, "\n".join(map(str, errors)))
+    return CompileResult(path, module)
+
+
+def compile_file(path: str, modules: bool = True) -> CompileResult:
+    """Parse the file at ``path`` into slotted nodes, which pickle compactly.
+
+    Without ``modules`` only errors are reported, so a file already in the
+    cache is hashed but never read back from it.
+    """
+    try:
+        with open(path, "rb") as file:
+            source = file.read()
+    except OSError as error:
+        return CompileResult(path, None, str(error))
+    if cache is None:
+        result = parse_file(path, source)
+        return result if modules else CompileResult(path, None, result.error)
+
+    key = cache.key(source)
+    if modules:
+        module = cache.load(key)
+        if module is not None:
+            return CompileResult(path, module)
+    elif cache.touch(key):
+        return CompileResult(path, None)
+    result = parse_file(path, source)
+    if result.module is not None:
+        cache.store(key, result.module)
+    return result if modules else CompileResult(path, None, result.error)
+
+
+Result = t.TypeVar("Result")
+
+
+def map_files(
+    function: t.Callable[[str], Result],
+    paths: t.Sequence[str],
+    workers: t.Optional[int] = None,
+    lexer: str = "scanner",
+    ast_cache: t.Optional[ASTCache] = None,
+) -> t.Iterator[Result]:
+    """Call ``function`` on every path in ``paths``, yielding results in the same order.
+
+    The paths are spread over ``workers`` processes (one per CPU by default),
+    each started by ``start_worker``, so it keeps a single compiler for all the
+    files it is given.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths)) or 1
+    initargs = (lexer, ast_cache)
+    if workers == 1:
+        start_worker(*initargs)
+        yield from map(function, paths)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=start_worker, initargs=initargs
+        ) as executor:
+            chunksize = max(1, min(64, len(paths) // (workers * 4)))
+            yield from executor.map(function, paths, chunksize=chunksize)
+
+
+def compile_files(
+    paths: t.Sequence[str],
+    workers: t.Optional[int] = None,
+    lexer: str = "scanner",
+    ast_cache: t.Optional[ASTCache] = None,
+    modules: bool = True,
+) -> t.Iterator[CompileResult]:
+    """Compile every file in ``paths``, yielding results in the same order.
+
+    The files are parsed by ``map_files`` in ``workers`` processes. With an
+    ``ast_cache``, unchanged sources are looked up there instead of being parsed
+    again, and it is pruned once every file is done.
+    """
+    compile_path = functools.partial(compile_file, modules=modules)
+    yield from map_files(compile_path, paths, workers, lexer, ast_cache)
+    if ast_cache is not None:
+        ast_cache.prune()
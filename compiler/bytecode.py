@@ -0,0 +1,594 @@
+"""Lowering parsed modules to register-based bytecode.
+
+Each function, and the module itself, becomes a ``Code`` object: a flat list
+of fixed width instructions ``(opcode, a, b, c)`` whose operands are register
+numbers, jump targets or indices into the constant pool and nested functions.
+
+Every call gets its own register file. Parameters come first, then the other
+locals declared in the function, then temporaries. Constants live at negative
+register numbers, so constant ``k`` is register ``-1 - k`` and literals are
+operands like any other without an instruction to load them. Module level
+names are global slots shared by every function of the module, names that a
+nested function reads from the functions around it are loaded from their
+register files, and anything else is a builtin. Which is which, and the slot
+numbers, come from ``resolver``. Registers start out ``UNSET``, and reading a
+local that is not assigned on every path to the read, or a name of a
+function around, is preceded by a ``CHECK_SET`` raising if it is unset.
+
+``dump`` and ``load`` store a module's code in a marshalled file that the VM
+runs without the source.
+"""
+
+import array
+import marshal
+import typing as t
+
+from .interpreter import StarlaRuntimeError, both, builtin_functions
+from .resolver import BUILTIN, FREE, LOCAL, Binding, Resolution, Resolver, Scope
+
+# Bump whenever the instruction set or the file layout changes.
+BYTECODE_VERSION = 2
+MAGIC = b"STARBC"
+
+(
+    MOVE,
+    LOAD_GLOBAL,
+    STORE_GLOBAL,
+    LOAD_FREE,
+    LOAD_BUILTIN,
+    JUMP,
+    JUMP_IF_FALSE,
+    JUMP_IF_TRUE,
+    BUILD_LIST,
+    BUILD_TUPLE,
+    BUILD_DICT,
+    CALL,
+    CALL_KW,
+    MAKE_FUNCTION,
+    GET_ITER,
+    FOR_ITER,
+    RETURN,
+    CHECK_SET,
+) = range(18)
+
+# Unary and binary operators each get an opcode, numbered from these bases so
+# that the VM can find their implementation by indexing a table.
+UNARY_BASE = 24
+UNARY = ("-", "+", "not", "~")
+BINARY_BASE = 32
+BINARY = (
+    "+", "-", "*", "/", "%", "**", "||", "&&", "^",
+    "<", ">", "<=", ">=", "==", "!=",
+)  # fmt: skip
+UNARY_OPCODES = {op: UNARY_BASE + i for i, op in enumerate(UNARY)}
+UNARY_OPCODES["!"] = UNARY_OPCODES["not"]
+BINARY_OPCODES = {op: BINARY_BASE + i for i, op in enumerate(BINARY)}
+
+OPCODE_NAMES = {
+    value: name
+    for name, value in globals().items()
+    if name.isupper() and isinstance(value, int) and value < UNARY_BASE
+}
+OPCODE_NAMES.update({UNARY_BASE + i: "UNARY " + op for i, op in enumerate(UNARY)})
+OPCODE_NAMES.update({BINARY_BASE + i: "BINARY " + op for i, op in enumerate(BINARY)})
+
+Instruction = t.Tuple[int, int, int, int]
+
+# What a register or a global slot holds before it is first assigned.
+UNSET = object()
+
+
+class Code:  # pylint: disable=too-many-instance-attributes
+    """The bytecode of one function, or of a module's top-level statements.
+
+    ``parameters`` are the names bound to the first registers of a call, the
+    last ``defaults`` of which may be left out. ``globals`` names the global
+    slots of a module and is empty for functions.
+    """
+
+    __slots__ = (
+        "name",
+        "parameters",
+        "defaults",
+        "registers",
+        "instructions",
+        "constants",
+        "functions",
+        "globals",
+        "frame",
+    )
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        name: str,
+        parameters: t.Tuple[str, ...],
+        defaults: int,
+        registers: int,
+        instructions: t.List[Instruction],
+        constants: t.Tuple[t.Any, ...],
+        functions: t.Tuple["Code", ...],
+        globals: t.Tuple[str, ...] = (),  # pylint: disable=redefined-builtin
+    ) -> None:
+        self.name = name
+        self.parameters = parameters
+        self.defaults = defaults
+        self.registers = registers
+        self.instructions = instructions
+        self.constants = constants
+        self.functions = functions
+        self.globals = globals
+        # A fresh register file is a copy of this one.
+        self.frame = [UNSET] * registers + list(reversed(constants))
+
+    def disassemble(self) -> t.Iterator[str]:
+        yield "%s(%s) registers=%d" % (
+            self.name,
+            ", ".join(self.parameters),
+            self.registers,
+        )
+        for pc, (op, a, b, c) in enumerate(self.instructions):
+            yield "%5d  %-16s %d %d %d" % (pc, OPCODE_NAMES[op], a, b, c)
+        for function in self.functions:
+            yield ""
+            yield from function.disassemble()
+
+    def to_data(self) -> t.Dict[str, t.Any]:
+        flat = array.array("i")
+        for instruction in self.instructions:
+            flat.extend(instruction)
+        return {
+            "name": self.name,
+            "parameters": self.parameters,
+            "defaults": self.defaults,
+            "registers": self.registers,
+            "instructions": flat.tobytes(),
+            "constants": self.constants,
+            "functions": tuple(function.to_data() for function in self.functions),
+            "globals": self.globals,
+        }
+
+    @classmethod
+    def from_data(cls, data: t.Dict[str, t.Any]) -> "Code":
+        flat = array.array("i", data["instructions"]).tolist()
+        return cls(
+            data["name"],
+            data["parameters"],
+            data["defaults"],
+            data["registers"],
+            [tuple(flat[i : i + 4]) for i in range(0, len(flat), 4)],  # type: ignore
+            data["constants"],
+            tuple(cls.from_data(function) for function in data["functions"]),
+            data["globals"],
+        )
+
+
+def bytecode_path(source: str) -> str:
+    """Where the bytecode of the source file ``source`` is written."""
+    return source + "c"
+
+
+def dump(code: Code, path: str) -> None:
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        marshal.dump((BYTECODE_VERSION, code.to_data()), file)
+
+
+def load(path: str) -> Code:
+    """Read the code written by ``dump``, raising ``ValueError`` for other files."""
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a bytecode file")
+        try:
+            version, data = marshal.load(file)
+        except (EOFError, TypeError) as error:
+            raise ValueError("Truncated bytecode file") from error
+    if version != BYTECODE_VERSION:
+        raise ValueError("Compiled by another version, compile it again")
+    return Code.from_data(data)
+
+
+LITERALS = ("Int", "Float", "Double", "String", "Char", "Bool", "Null")
+
+
+def literal(node: t.Any) -> t.Any:
+    kind = type(node).__name__
+    if kind == "Int":
+        return int(node.value)
+    if kind in ("Float", "Double"):
+        return float(node.value)
+    if kind == "Bool":
+        return node.value == "True"
+    return node.value
+
+
+class FunctionState:  # pylint: disable=too-many-instance-attributes
+    """What the generator knows about the function it is in the middle of."""
+
+    def __init__(
+        self,
+        name: str,
+        parameters: t.Tuple[str, ...],
+        locals: t.Dict[str, int],  # pylint: disable=redefined-builtin
+        enclosing: t.Optional["FunctionState"],
+    ) -> None:
+        self.name = name
+        self.parameters = parameters
+        self.enclosing = enclosing
+        # The registers of the names the resolver found local to the function.
+        self.locals = locals
+        self.top = self.registers = len(self.locals)
+        self.instructions: t.List[t.List[int]] = []
+        self.constants: t.List[t.Any] = []
+        self.constant_indices: t.Dict[t.Tuple[type, t.Any], int] = {}
+        self.functions: t.List[Code] = []
+        # The locals assigned on every path to the instruction being emitted.
+        self.assigned: t.Set[int] = set(range(len(parameters)))
+
+    def temporary(self) -> int:
+        register = self.top
+        self.top += 1
+        self.registers = max(self.registers, self.top)
+        return register
+
+    def constant(self, value: t.Any) -> int:
+        """The register holding ``value``."""
+        # 1, 1.0 and True are equal keys, but different constants.
+        key = (type(value), value)
+        if key not in self.constant_indices:
+            self.constant_indices[key] = len(self.constants)
+            self.constants.append(value)
+        return -1 - self.constant_indices[key]
+
+    def emit(self, op: int, a: int = 0, b: int = 0, c: int = 0) -> int:
+        self.instructions.append([op, a, b, c])
+        return len(self.instructions) - 1
+
+    def here(self) -> int:
+        return len(self.instructions)
+
+    def patch(self, pc: int, operand: int, target: int) -> None:
+        self.instructions[pc][operand] = target
+
+
+class CodeGenerator:
+    """Lowers a module to ``Code``, one dispatch table entry per node type."""
+
+    def __init__(self, builtins: t.Iterable[str]) -> None:
+        self.resolver = Resolver(builtins)
+        self.resolution = Resolution(Scope("<module>", None, ()), {}, {}, [])
+        self.function: FunctionState = FunctionState("<module>", (), {}, None)
+
+        expressions = {
+            **{name: self.emit_literal for name in LITERALS},
+            "List": self.emit_list,
+            "Tuple": self.emit_tuple,
+            "Dict": self.emit_dict,
+            "Namespace": self.emit_namespace,
+            "Call": self.emit_call,
+            "Operation": self.emit_operation,
+            "Comparison": self.emit_comparison,
+            "MultiComparison": self.emit_multi_comparison,
+        }
+        statements = {
+            "VariableDeclaration": self.emit_variable_declaration,
+            "FunctionDeclaration": self.emit_function_declaration,
+            "IfStatement": self.emit_if,
+            "WhileLoop": self.emit_while,
+            "ForLoop": self.emit_for,
+            "Return": self.emit_return,
+            "Pass": self.emit_pass,
+        }
+        self.expressions: t.Dict[type, t.Callable[[t.Any, int], None]] = {}
+        self.statements: t.Dict[type, t.Callable[[t.Any], None]] = {}
+        for name, emit in expressions.items():
+            for cls in both(name):
+                self.expressions[cls] = emit
+                self.statements[cls] = self.emit_expression_statement
+        for name, emit_statement in statements.items():
+            for cls in both(name):
+                self.statements[cls] = emit_statement
+
+    def generate(self, module: t.Any) -> Code:
+        self.resolution = self.resolver.resolve(module)
+        code = self.finish(module.body)
+        code.globals = self.resolution.module.names
+        return code
+
+    def finish(self, body: t.Iterable[t.Any]) -> Code:
+        """Emit ``body`` into the current function and return its code."""
+        function = self.function
+        self.emit_body(body)
+        function.emit(RETURN, function.constant(None))
+        parameters = function.parameters
+        return Code(
+            function.name,
+            parameters,
+            0,
+            function.registers,
+            [tuple(instruction) for instruction in function.instructions],  # type: ignore
+            tuple(function.constants),
+            tuple(function.functions),
+        )
+
+    def binding(self, node: t.Any) -> Binding:
+        """Where the value of the ``Namespace`` ``node`` lives."""
+        return self.resolution.bindings[id(node)]
+
+    def check(self, register: int, name: str) -> None:
+        """Emit a check that the variable ``name`` in ``register`` is set."""
+        function = self.function
+        function.emit(CHECK_SET, register, function.constant(name))
+
+    def local(self, binding: Binding, name: str) -> int:
+        """The register of a local about to be read, checked unless it is set."""
+        assigned = self.function.assigned
+        if binding.slot not in assigned:
+            self.check(binding.slot, name)
+            assigned.add(binding.slot)
+        return binding.slot
+
+    def emit_body(self, body: t.Iterable[t.Any]) -> None:
+        function = self.function
+        for node in body:
+            top = function.top
+            try:
+                emit = self.statements[type(node)]
+            except KeyError:
+                raise StarlaRuntimeError(
+                    "Cannot compile %s" % type(node).__name__
+                ) from None
+            emit(node)
+            function.top = top
+
+    # Expressions
+    def emit_expression(self, node: t.Any, destination: int) -> None:
+        try:
+            emit = self.expressions[type(node)]
+        except KeyError:
+            raise StarlaRuntimeError(
+                "%s is not an expression" % type(node).__name__
+            ) from None
+        emit(node, destination)
+
+    def operand(self, node: t.Any) -> int:
+        """A register holding the value of ``node``, emitting code if needed.
+
+        Locals and constants are used where they are; anything else is
+        computed into a temporary, and the temporaries that took are freed.
+        """
+        function = self.function
+        kind = type(node).__name__
+        if kind == "Namespace":
+            binding = self.binding(node)
+            if binding.kind == LOCAL:
+                return self.local(binding, node.name)
+        if kind in LITERALS:
+            return function.constant(literal(node))
+        register = function.temporary()
+        self.emit_expression(node, register)
+        function.top = register + 1
+        return register
+
+    def block(self, nodes: t.Iterable[t.Any]) -> t.Tuple[int, int]:
+        """Evaluate ``nodes`` into consecutive registers; the first and the count."""
+        function = self.function
+        start = function.top
+        count = 0
+        for node in nodes:
+            register = function.temporary()
+            self.emit_expression(node, register)
+            function.top = register + 1
+            count += 1
+        return start, count
+
+    def move(self, source: int, destination: int) -> None:
+        if source != destination:
+            self.function.emit(MOVE, destination, source)
+
+    def emit_literal(self, node: t.Any, destination: int) -> None:
+        self.move(self.function.constant(literal(node)), destination)
+
+    def emit_list(self, node: t.Any, destination: int) -> None:
+        start, count = self.block(node.items)
+        self.function.emit(BUILD_LIST, destination, start, count)
+
+    def emit_tuple(self, node: t.Any, destination: int) -> None:
+        start, count = self.block(node.items)
+        self.function.emit(BUILD_TUPLE, destination, start, count)
+
+    def emit_dict(self, node: t.Any, destination: int) -> None:
+        start, count = self.block(item for pair in node.items for item in pair)
+        self.function.emit(BUILD_DICT, destination, start, count // 2)
+
+    def emit_namespace(self, node: t.Any, destination: int) -> None:
+        function = self.function
+        binding = self.binding(node)
+        if binding.kind == LOCAL:
+            self.move(self.local(binding, node.name), destination)
+        elif binding.kind == FREE:
+            function.emit(LOAD_FREE, destination, binding.depth, binding.slot)
+            self.check(destination, node.name)
+        elif binding.kind == BUILTIN:
+            function.emit(LOAD_BUILTIN, destination, function.constant(node.name))
+        else:
+            # Unknown names have a slot that is never set, and fail when loaded.
+            function.emit(LOAD_GLOBAL, destination, binding.slot)
+
+    def emit_call(self, node: t.Any, destination: int) -> None:
+        function = self.function
+        target = function.temporary()
+        self.emit_expression(node.target, target)
+        function.top = target + 1
+        _, count = self.block(node.args)
+        if not node.kwargs:
+            function.emit(CALL, destination, target, count)
+            return
+        self.block(node.kwargs.values())
+        names = function.constant((count, tuple(node.kwargs)))
+        function.emit(CALL_KW, destination, target, names)
+
+    def emit_operation(self, node: t.Any, destination: int) -> None:
+        function = self.function
+        op = node.op
+        arguments = node.arguments
+        if len(arguments) == 1:
+            function.emit(UNARY_OPCODES[op], destination, self.operand(arguments[0]))
+        elif op in ("and", "or"):
+            # The left side is moved into the result before the right side is
+            # evaluated, so the result must not be a local the right side reads.
+            result = self.scratch(destination)
+            self.emit_expression(arguments[0], result)
+            jump = function.emit(JUMP_IF_FALSE if op == "and" else JUMP_IF_TRUE, result)
+            assigned = set(function.assigned)
+            self.emit_expression(arguments[1], result)
+            function.assigned = assigned
+            function.patch(jump, 2, function.here())
+            self.move(result, destination)
+        else:
+            left = self.operand(arguments[0])
+            right = self.operand(arguments[1])
+            function.emit(BINARY_OPCODES[op], destination, left, right)
+
+    def emit_comparison(self, node: t.Any, destination: int) -> None:
+        left = self.operand(node.arguments[0])
+        right = self.operand(node.arguments[1])
+        self.function.emit(BINARY_OPCODES[node.op], destination, left, right)
+
+    def emit_multi_comparison(self, node: t.Any, destination: int) -> None:
+        function = self.function
+        result = self.scratch(destination)
+        jumps = []
+        left = self.operand(node.comparisons[0].arguments[0])
+        assigned = function.assigned
+        for comparison in node.comparisons:
+            # Keep the shared operand alive for the next comparison.
+            right = self.operand(comparison.arguments[1])
+            function.emit(BINARY_OPCODES[comparison.op], result, left, right)
+            jumps.append(function.emit(JUMP_IF_FALSE, result))
+            left = right
+            # Only the first comparison is sure to run.
+            function.assigned = set(assigned)
+        function.assigned = assigned
+        for jump in jumps:
+            function.patch(jump, 2, function.here())
+        self.move(result, destination)
+
+    def scratch(self, destination: int) -> int:
+        """``destination`` if it is a temporary, otherwise a new temporary."""
+        function = self.function
+        if 0 <= destination < len(function.locals):
+            return function.temporary()
+        return destination
+
+    # Statements
+    def emit_expression_statement(self, node: t.Any) -> None:
+        self.emit_expression(node, self.function.temporary())
+
+    def store(self, target: t.Any, node: t.Any) -> None:
+        """Emit code computing ``node`` into the variable ``target``."""
+        binding = self.binding(target)
+        if binding.kind == LOCAL:
+            self.emit_expression(node, binding.slot)
+            self.function.assigned.add(binding.slot)
+        else:
+            self.function.emit(STORE_GLOBAL, binding.slot, self.operand(node))
+
+    def emit_variable_declaration(self, node: t.Any) -> None:
+        self.store(node.target, node.value)
+
+    def emit_function_declaration(self, node: t.Any) -> None:
+        enclosing = self.function
+        arguments = node.arguments or ()
+        default_arguments = node.default_arguments or ()
+        start, count = self.block(argument.value for argument in default_arguments)
+        parameters = tuple(argument.arg for argument in arguments + default_arguments)
+
+        self.function = FunctionState(
+            node.target.name,
+            parameters,
+            self.resolution.scopes[id(node)].slots,
+            enclosing,
+        )
+        try:
+            code = self.finish(node.body)
+        finally:
+            self.function = enclosing
+        code.defaults = count
+        enclosing.functions.append(code)
+
+        binding = self.binding(node.target)
+        local = binding.kind == LOCAL
+        register = binding.slot if local else enclosing.temporary()
+        enclosing.emit(MAKE_FUNCTION, register, len(enclosing.functions) - 1, start)
+        if local:
+            enclosing.assigned.add(register)
+        else:
+            enclosing.emit(STORE_GLOBAL, binding.slot, register)
+
+    def emit_if(self, node: t.Any) -> None:
+        function = self.function
+        ends = []
+        # What every branch assigns, each starting from what its condition left.
+        branches = []
+        for condition, body in node.conditionals:
+            top = function.top
+            skip = function.emit(JUMP_IF_FALSE, self.operand(condition))
+            function.top = top
+            tested = set(function.assigned)
+            self.emit_body(body)
+            branches.append(function.assigned)
+            function.assigned = tested
+            ends.append(function.emit(JUMP))
+            function.patch(skip, 2, function.here())
+        if node.default:
+            self.emit_body(node.default)
+        function.assigned = function.assigned.intersection(*branches)
+        for end in ends:
+            function.patch(end, 1, function.here())
+
+    def emit_while(self, node: t.Any) -> None:
+        function = self.function
+        top = function.top
+        start = function.here()
+        end = function.emit(JUMP_IF_FALSE, self.operand(node.conditional))
+        function.top = top
+        # The body may not run, so what it assigns is not assigned after.
+        tested = set(function.assigned)
+        self.emit_body(node.body)
+        function.assigned = tested
+        function.emit(JUMP, start)
+        function.patch(end, 2, function.here())
+
+    def emit_for(self, node: t.Any) -> None:
+        function = self.function
+        iterator = function.temporary()
+        self.emit_expression(node.iterator, iterator)
+        function.top = iterator + 1
+        function.emit(GET_ITER, iterator, iterator)
+
+        binding = self.binding(node.target)
+        local = binding.kind == LOCAL
+        target = binding.slot if local else function.temporary()
+        start = function.emit(FOR_ITER, target, iterator)
+        assigned = set(function.assigned)
+        if local:
+            function.assigned.add(target)
+        else:
+            function.emit(STORE_GLOBAL, binding.slot, target)
+        self.emit_body(node.body)
+        function.assigned = assigned
+        function.emit(JUMP, start)
+        function.patch(start, 3, function.here())
+
+    def emit_return(self, node: t.Any) -> None:
+        self.function.emit(RETURN, self.operand(node.value))
+
+    def emit_pass(self, node: t.Any) -> None:
+        pass
+
+
+def generate(module: t.Any, builtins: t.Optional[t.Iterable[str]] = None) -> Code:
+    """The code of ``module``, in which ``builtins`` name the VM's builtins."""
+    if builtins is None:
+        builtins = builtin_functions(print)
+    return CodeGenerator(builtins).generate(module)
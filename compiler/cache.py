@@ -0,0 +1,192 @@
+import abc
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import typing as t
+
+from . import models, nodes
+from .parser import StarlaParser  # type: ignore[attr-defined]
+from .tables import grammar_signature
+
+# Bump whenever the layout of cache entries changes.
+CACHE_VERSION = 2
+DEFAULT_MAX_SIZE = 256 * 2**20
+
+# Modules whose code decides what tree a source parses to.
+SIGNATURE_MODULES = ("lexer.py", "scanner.py", "parser.py", "nodes.py", "models")
+
+log = logging.getLogger(__name__)
+
+AnyModule = t.Union[models.Module, nodes.Module]
+
+
+def compiler_signature() -> str:
+    """Hash the grammar and the code of everything that builds the trees."""
+    digest = hashlib.sha256()
+    digest.update(repr((CACHE_VERSION, pickle.HIGHEST_PROTOCOL)).encode())
+    grammar = StarlaParser._grammar  # pylint: disable=protected-access
+    digest.update(grammar_signature(grammar).encode())
+    root = os.path.dirname(__file__)
+    for name in SIGNATURE_MODULES:
+        path = os.path.join(root, name)
+        paths = (
+            sorted(glob.glob(os.path.join(path, "*.py")))
+            if name == "models"
+            else [path]
+        )
+        for path in paths:
+            with open(path, "rb") as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+
+def default_cache_directory(kind: str = "ast") -> t.Optional[str]:
+    """Where to cache ``kind`` entries, overridden by ``STARLA_<KIND>_CACHE``."""
+    variable = "STARLA_%s_CACHE" % kind.upper()
+    if os.environ.get("STARLA_NO_%s_CACHE" % kind.upper()):
+        return None
+    if os.environ.get(variable):
+        return os.environ[variable]
+    return os.path.join(
+        os.environ.get("XDG_CACHE_HOME")
+        or os.path.expanduser(os.path.join("~", ".cache")),
+        "starla",
+        kind,
+    )
+
+
+Entry = t.TypeVar("Entry")
+
+
+class DiskCache(abc.ABC, t.Generic[Entry]):
+    """Entries on disk, addressed by a hash of the source bytes they came from.
+
+    Entries live in ``<directory>/<2 hex>/<hash><suffix>`` and are serialized
+    by ``write`` and ``read``. They are written to a private temporary file and
+    renamed into place, so any number of processes can share a directory:
+    readers see a whole entry or none at all, and the last of several identical
+    writes wins. Reading an entry refreshes its modification time, and
+    ``prune`` removes the least recently used entries once the directory grows
+    past ``max_size`` bytes.
+    """
+
+    suffix = ".entry"
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: int = DEFAULT_MAX_SIZE,
+        signature: t.Optional[str] = None,
+    ) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.signature = (signature or compiler_signature()).encode()
+        self.written = 0
+
+    def key(self, source: bytes, variant: bytes = b"") -> str:
+        """The key of ``source``, or of a ``variant`` of what it compiles to."""
+        if variant:
+            source = variant + b"\0" + source
+        return hashlib.sha256(self.signature + b"\0" + source).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def touch(self, key: str) -> bool:
+        """Mark an entry as recently used, returning whether it exists."""
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            return False
+        return True
+
+    @abc.abstractmethod
+    def read(self, file: t.BinaryIO) -> Entry:
+        """The entry serialized in ``file``."""
+
+    @abc.abstractmethod
+    def write(self, entry: Entry, file: t.BinaryIO) -> None:
+        """Serialize ``entry`` into ``file``."""
+
+    def load(self, key: str) -> t.Optional[Entry]:
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                entry = self.read(file)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError) as error:
+            log.debug("Could not read %s: %s", path, error)
+            return None
+        except (
+            AttributeError,
+            ImportError,
+            IndexError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ):
+            # A truncated or foreign file that was read into garbage.
+            return None
+        return entry
+
+    def store(self, key: str, entry: Entry) -> None:
+        path = self.path(key)
+        temporary = "%s.%d.%s.tmp" % (path, os.getpid(), os.urandom(4).hex())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temporary, "wb") as file:
+                self.write(entry, file)
+                self.written += file.tell()
+            os.replace(temporary, path)
+        except OSError as error:
+            log.debug("Could not write %s: %s", path, error)
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+            return
+        if self.written > self.max_size // 8:
+            self.prune()
+
+    def prune(self) -> int:
+        """Evict least recently used entries down to ``max_size``; return bytes freed."""
+        self.written = 0
+        entries = []
+        total = 0
+        for path in glob.glob(os.path.join(self.directory, "*", "*" + self.suffix)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        freed = 0
+        if total <= self.max_size:
+            return freed
+        entries.sort()
+        for _, size, path in entries:
+            if total - freed <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            freed += size
+        return freed
+
+
+class ASTCache(DiskCache[AnyModule]):
+    """Parsed modules, pickled."""
+
+    suffix = ".ast"
+
+    def read(self, file: t.BinaryIO) -> AnyModule:
+        module = pickle.load(file)
+        if not isinstance(module, (models.Module, nodes.Module)):
+            raise ValueError("not a module")
+        return module
+
+    def write(self, entry: AnyModule, file: t.BinaryIO) -> None:
+        pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
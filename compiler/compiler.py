@@ -1,60 +1,171 @@
 import logging
 import typing as t
 
-import sly  # type: ignore[import]
-
+from .incremental import SegmentedModule, TextEdit
 from .lexer import StarlaLexer  # type: ignore[attr-defined]
 from .models import Module
-from .parser import StarlaParser  # type: ignore[attr-defined]
+from .parser import StarlaParser, StarlaSyntaxError  # type: ignore[attr-defined]
+from .positions import LineIndex, StreamedLines
+from .recovery import ParseError, Recovered, RecoveringParser, Recovery, recover
+from .scanner import StarlaScanner
+from .symbols import SymbolTable
+from .tokens import TokenStream, TokenView, split_statements
 
+LEXERS: t.Dict[str, t.Callable[[], t.Any]] = {
+    "sly": StarlaLexer,
+    "scanner": StarlaScanner,
+}
 
-class CompilerToken:
-    def __init__(self, original_token: sly.lex.Token, source: str) -> None:
-        self.original_token = original_token
-        self.source = source
 
-    def __repr__(self) -> str:
-        return repr(self.original_token)
+def configure_logging(level: int) -> None:
+    logging.basicConfig(
+        format="[%(name)s] (%(levelname)s) %(message)s",
+        level=level,
+    )
 
-    @property
-    def value(self) -> str:
-        return self.original_token.value
 
-    @property
-    def type(self) -> str:
-        return self.original_token.type
+class StarlaCompiler:
+    def __init__(self, lexer: str = "sly", fast: bool = False):
+        self.lexer = LEXERS[lexer]()
+        self.symbols = SymbolTable()
+        self.parser = StarlaParser(fast=fast, symbols=self.symbols)
+        self._line_index: t.Optional[t.Tuple[str, LineIndex]] = None
+        self._segmented: t.Optional[SegmentedModule] = None
 
-    @property
-    def lineno(self) -> int:
-        return self.original_token.lineno
+    def line_index(self, source: str) -> LineIndex:
+        """The line index of ``source``, reused while the same source is passed in."""
+        if self._line_index is None or self._line_index[0] is not source:
+            self._line_index = (source, LineIndex(source))
+        return self._line_index[1]
 
-    @property
-    def index(self) -> int:
-        return self.original_token.index
+    def position(self, source: str, offset: int) -> t.Tuple[int, int]:
+        """Line and column, both counted from 1, of ``offset`` in ``source``."""
+        return self.line_index(source).position(offset)
 
-    @property
-    def lineco(self) -> int:
-        last_line_break = max(self.source.rfind("\n", 0, self.original_token.index), 0)
-        return token.index - last_line_break + 1
+    def token_stream(self, source: str) -> TokenStream:
+        return TokenStream.scan(source, self.lexer)
 
+    def tokens(self, source: str) -> t.Iterator[TokenView]:
+        return self.logged(self.token_stream(source))
 
-class StarlaCompiler:
-    def __init__(self):
-        self.lexer = StarlaLexer()
-        self.parser = StarlaParser()
+    def logged(self, tokens: t.Iterable[TokenView]) -> t.Iterator[TokenView]:
+        """``tokens``, each logged as it is read if debug logging is enabled.
 
-    def tokens(self, source: str) -> t.Generator[CompilerToken, None, None]:
-        for token in self.lexer.tokenize(source):
-            self.lexer.log.debug("Encountered token, %r" % token)
-            yield CompilerToken(token, source)
+        The level is checked once, so that with debug logging off the tokens
+        are passed through as they are.
+        """
+        if not self.lexer.log.isEnabledFor(logging.DEBUG):
+            return iter(tokens)
+        return self.log_tokens(tokens)
+
+    def log_tokens(self, tokens: t.Iterable[TokenView]) -> t.Iterator[TokenView]:
+        log = self.lexer.log
+        for token in tokens:
+            log.debug("Encountered token, %r", token)
+            yield token
 
     def compile(self, source: str, level: int = 0) -> Module:
-        logging.basicConfig(
-            format="[%(name)s] (%(levelname)s) %(message)s",
-            level=level,
-        )
+        configure_logging(level)
         return self.parse(source)
 
+    def compile_stream(
+        self, file: t.Iterable[str], level: int = 0
+    ) -> t.Iterator[t.Union["StatementType", "ExpressionType"]]:
+        configure_logging(level)
+        return self.parse_stream(file)
+
     def parse(self, source: str) -> Module:
         self.parser.log.flush()
         return self.parser.parse(self.tokens(source))
+
+    def parse_recovering(self, source: str) -> Recovered:
+        """Parse ``source`` past any syntax errors, which are returned with the module.
+
+        Statements that do not parse are replaced by ``Error`` nodes, so the
+        module is only partial if there are errors. Unlike ``parse`` this never
+        raises ``StarlaSyntaxError`` or returns ``None``.
+        """
+        try:
+            module = self.parse(source)
+        except StarlaSyntaxError:
+            module = None
+        if module is not None:
+            return Recovered(module, [])
+        tokens = list(self.token_stream(source))
+        return recover(tokens, self.parser, self.line_index(source))
+
+    def parse_stream(
+        self, file: t.Iterable[str]
+    ) -> t.Iterator[t.Union["StatementType", "ExpressionType"]]:
+        """Parse a file, or any iterable of lines, one top-level statement at a time.
+
+        Statements are yielded as soon as the line that ends them has been read,
+        so the whole source is never held in memory at once.
+        """
+        self.parser.log.flush()
+        for chunk in split_statements(file, self.lexer):
+            module = self.parser.parse(self.logged(chunk))
+            if module is not None:
+                yield from module.body
+
+    def parse_stream_recovering(
+        self, file: t.Iterable[str], errors: t.List[ParseError]
+    ) -> t.Iterator[t.Union["StatementType", "ExpressionType"]]:
+        """Parse a file one top-level statement at a time, as ``parse_stream``
+        does, but past any syntax errors, as ``parse_recovering`` does.
+
+        The errors of each statement are appended to ``errors`` before it is
+        yielded, so only lines of the current statement are held in memory.
+        """
+        self.parser.log.flush()
+        lines = StreamedLines(file)
+        for chunk in split_statements(lines, self.lexer):
+            recovery = Recovery(self.parser)
+            body = recovery.body(list(self.logged(chunk)))
+            errors.extend(
+                ParseError(message, *lines.position(offset))
+                for message, offset in recovery.errors
+            )
+            lines.forget(chunk[-1].index)
+            yield from body
+
+    def reparse(
+        self, module: Module, source: str, edit: TextEdit, recovering: bool = False
+    ) -> t.Optional[Module]:
+        """Parse ``source`` with ``edit`` applied, reusing what it can of ``module``.
+
+        ``module`` must be the tree of ``source``, and is taken over by the new
+        tree: statements the edit does not touch are shared with it, and their
+        offsets are moved to the new source. Only the top-level statements
+        around the edit are lexed again, and within a ``{ module }`` block only
+        the statement that was edited is parsed again, so passing the result
+        back in for the next edit keeps the cost in proportion to the edit.
+
+        If ``recovering``, statements are parsed as ``parse_recovering`` does,
+        so ``module`` may have come from it and the result may have ``Error``
+        nodes, but is never ``None``.
+        """
+        parser = RecoveringParser(self.parser) if recovering else self.parser
+        segmented = self.segment(module, source)
+        if segmented is not None:
+            segmented = segmented.edit(edit, self.lexer, parser)
+        if segmented is None:
+            segmented = SegmentedModule.parse(edit.apply(source), self.lexer, parser)
+        self._segmented = segmented
+        return None if segmented is None else segmented.module
+
+    def segment(self, module: Module, source: str) -> t.Optional[SegmentedModule]:
+        """``module``, the tree of ``source``, split up for ``reparse`` to edit.
+
+        This is done by the first ``reparse`` of a module, and takes time in
+        proportion to the module, so it may be done ahead of that instead.
+        """
+        segmented = self._segmented
+        if (
+            segmented is None
+            or segmented.module is not module
+            or segmented.source != source
+        ):
+            segmented = SegmentedModule.from_module(module, source, self.lexer)
+            self._segmented = segmented
+        return segmented
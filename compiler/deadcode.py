@@ -0,0 +1,294 @@
+"""Removal of unreachable statements and unused declarations.
+
+``Eliminator`` works one scope at a time, the module first and then every
+function it keeps. A ``VariableDeclaration`` whose value cannot raise, and a
+``FunctionDeclaration`` whose default values cannot, are candidates: they are
+kept only if the name they declare is live. Values that cannot raise are
+literals, lists and tuples of them, dicts of them with literal keys, and
+names sure to be bound: builtins, parameters of the function, and in the
+module, names declared by a top-level statement before. Names used by anything
+that is not a candidate are live, and so is ``main`` in the module, since
+running the module calls it. The names used by the candidates declaring a
+live name are live in turn. Declarations nested in ``if``, ``while`` and
+``for`` blocks are candidates too, but the blocks themselves are always kept.
+
+Statements following a ``return`` in the same block can never run, and are
+dropped as well. How much was removed is measured in the bytes the removed
+nodes take when pickled, as the AST cache stores them.
+"""
+
+import pickle
+import typing as t
+
+from . import models, nodes
+from .bytecode import LITERALS
+from .incremental import fields, replace
+from .resolver import BUILTIN, FREE, GLOBAL, LOCAL, Resolution, resolve
+
+DECLARATIONS = {"VariableDeclaration": "variable", "FunctionDeclaration": "function"}
+BLOCKS = ("IfStatement", "WhileLoop", "ForLoop")
+# Fields holding the name a statement assigns, which does not use it.
+TARGETS = {"VariableDeclaration", "FunctionDeclaration", "ForLoop"}
+
+
+class Removed(t.NamedTuple):
+    name: str
+    kind: str
+    size: int
+
+
+def size(node: t.Any) -> int:
+    return len(pickle.dumps(node, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class DeadCodeStats:
+    """What dead code elimination removed from a module."""
+
+    def __init__(self) -> None:
+        self.declarations: t.List[Removed] = []
+        self.statements = 0
+        self.statement_bytes = 0
+
+    @property
+    def saved(self) -> int:
+        return self.statement_bytes + sum(removed.size for removed in self.declarations)
+
+    def __iadd__(self, other: "DeadCodeStats") -> "DeadCodeStats":
+        self.declarations.extend(other.declarations)
+        self.statements += other.statements
+        self.statement_bytes += other.statement_bytes
+        return self
+
+    def report(self, declarations: bool = False) -> str:
+        lines = [
+            "Removed %d unused declarations and %d unreachable statements, %d bytes"
+            % (len(self.declarations), self.statements, self.saved)
+        ]
+        if declarations:
+            lines.extend(
+                "  %s %s: %d bytes" % (removed.kind, removed.name, removed.size)
+                for removed in self.declarations
+            )
+        return "\n".join(lines)
+
+
+def calls(value: t.Any) -> bool:
+    """Whether evaluating ``value`` may call a function."""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (tuple, list)):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (nodes.Node, models.Ast)):
+            if type(value).__name__ == "Call":
+                return True
+            stack.extend(getattr(value, field, None) for field in fields(value))
+    return False
+
+
+class Eliminator:
+    """Removes dead code from a module, counting what it removed in ``stats``."""
+
+    def __init__(self, resolution: Resolution) -> None:
+        self.resolution = resolution
+        self.stats = DeadCodeStats()
+        # The ``id`` of every candidate, and the position of the first
+        # top-level statement declaring each name of the module.
+        self.candidates: t.Set[int] = set()
+        self.declared: t.Dict[str, int] = {}
+
+    def eliminate_module(self, module: t.Any) -> t.Any:
+        for position, node in enumerate(module.body):
+            if type(node).__name__ in DECLARATIONS:
+                self.declared.setdefault(node.target.name, position)
+        for position, node in enumerate(module.body):
+            self.find_candidates((node,), None, position)
+        live = self.live(module.body, None)
+        return replace(module, body=self.rewrite(module.body, live, None, ""))
+
+    def eliminate_function(self, node: t.Any, prefix: str) -> t.Any:
+        live = self.live(node.body, node)
+        prefix += node.target.name + "."
+        return replace(node, body=self.rewrite(node.body, live, node, prefix))
+
+    def candidate(self, node: t.Any) -> bool:
+        """Whether ``node`` only declares a name, so is not needed if the name is not."""
+        return id(node) in self.candidates
+
+    def find_candidates(
+        self, body: t.Iterable[t.Any], function: t.Any, position: int
+    ) -> None:
+        """Find the candidates in ``body``, part of the top-level statement at
+        ``position`` in the module, or of ``function``."""
+        for node in body:
+            kind = type(node).__name__
+            if kind == "VariableDeclaration":
+                values = [node.value]
+            elif kind == "FunctionDeclaration":
+                values = [argument.value for argument in node.default_arguments or ()]
+                self.find_candidates(node.body, node, position)
+            elif kind == "IfStatement":
+                for _, block in node.conditionals:
+                    self.find_candidates(block, function, position)
+                self.find_candidates(node.default or (), function, position)
+                continue
+            elif kind in BLOCKS:
+                self.find_candidates(node.body, function, position)
+                continue
+            else:
+                continue
+            if all(self.safe(value, function, position) for value in values):
+                self.candidates.add(id(node))
+
+    def safe(self, value: t.Any, function: t.Any, position: int) -> bool:
+        """Whether evaluating ``value`` cannot raise."""
+        kind = type(value).__name__
+        if kind in LITERALS:
+            return True
+        if kind in ("List", "Tuple"):
+            return all(self.safe(item, function, position) for item in value.items)
+        if kind == "Dict":
+            return all(
+                type(key).__name__ in LITERALS and self.safe(item, function, position)
+                for key, item in value.items
+            )
+        return kind == "Namespace" and self.bound(value, function, position)
+
+    def bound(self, node: t.Any, function: t.Any, position: int) -> bool:
+        """Whether the name ``node`` is sure to hold a value where it is read."""
+        binding = self.resolution.bindings[id(node)]
+        if binding.kind == BUILTIN:
+            return True
+        if function is None:
+            return binding.kind == GLOBAL and (
+                self.declared.get(node.name, position) < position
+            )
+        arguments = (function.arguments or ()) + (function.default_arguments or ())
+        return binding.kind == LOCAL and any(
+            argument.arg == node.name for argument in arguments
+        )
+
+    def uses(self, value: t.Any, function: t.Any) -> t.Iterator[str]:
+        """Names of the scope of ``function``, or of the module, used in ``value``."""
+        bindings = self.resolution.bindings
+        stack: t.List[t.Tuple[t.Any, int]] = [(value, 0)]
+        while stack:
+            value, level = stack.pop()
+            if isinstance(value, (tuple, list)):
+                stack.extend((item, level) for item in value)
+            elif isinstance(value, dict):
+                stack.extend((item, level) for item in value.values())
+            elif isinstance(value, (nodes.Node, models.Ast)):
+                node: t.Any = value
+                kind = type(node).__name__
+                if kind == "Namespace":
+                    binding = bindings[id(node)]
+                    if function is None:
+                        used = binding.kind == GLOBAL
+                    elif level == 0:
+                        used = binding.kind == LOCAL
+                    else:
+                        # The scope is ``level`` functions out of the name.
+                        used = binding.kind == FREE and binding.depth == level - 1
+                    if used:
+                        yield node.name
+                elif kind == "FunctionDeclaration":
+                    for argument in node.default_arguments or ():
+                        stack.append((argument.value, level))
+                    stack.append((node.body, level + 1))
+                else:
+                    stack.extend(
+                        (getattr(node, field, None), level)
+                        for field in fields(node)
+                        if field != "target" or kind not in TARGETS
+                    )
+
+    def collect(
+        self,
+        body: t.Iterable[t.Any],
+        candidates: t.Dict[str, t.List[t.Any]],
+        roots: t.List[t.Any],
+    ) -> None:
+        """Sort the statements of a scope into declarations and what is always kept."""
+        for node in body:
+            kind = type(node).__name__
+            if self.candidate(node):
+                candidates.setdefault(node.target.name, []).append(node)
+            elif kind == "IfStatement":
+                for condition, block in node.conditionals:
+                    roots.append(condition)
+                    self.collect(block, candidates, roots)
+                self.collect(node.default or (), candidates, roots)
+            elif kind == "WhileLoop":
+                roots.append(node.conditional)
+                self.collect(node.body, candidates, roots)
+            elif kind == "ForLoop":
+                roots.append(node.iterator)
+                self.collect(node.body, candidates, roots)
+            else:
+                roots.append(node)
+
+    def live(self, body: t.Iterable[t.Any], function: t.Any) -> t.Set[str]:
+        candidates: t.Dict[str, t.List[t.Any]] = {}
+        roots: t.List[t.Any] = []
+        self.collect(body, candidates, roots)
+        live = set(self.uses(roots, function))
+        if function is None:
+            live.add("main")
+        stack = list(live)
+        while stack:
+            for declaration in candidates.get(stack.pop(), ()):
+                for name in self.uses(declaration, function):
+                    if name not in live:
+                        live.add(name)
+                        stack.append(name)
+        return live
+
+    def rewrite(
+        self, body: t.Iterable[t.Any], live: t.Set[str], function: t.Any, prefix: str
+    ) -> tuple:
+        kept: t.List[t.Any] = []
+        body = tuple(body)
+        for index, node in enumerate(body):
+            kind = type(node).__name__
+            if self.candidate(node) and node.target.name not in live:
+                self.stats.declarations.append(
+                    Removed(prefix + node.target.name, DECLARATIONS[kind], size(node))
+                )
+                continue
+            if kind == "FunctionDeclaration":
+                node = self.eliminate_function(node, prefix)
+            elif kind in BLOCKS:
+                node = self.rewrite_blocks(node, live, function, prefix)
+            kept.append(node)
+            if kind == "Return":
+                unreachable = body[index + 1 :]
+                self.stats.statements += len(unreachable)
+                self.stats.statement_bytes += sum(map(size, unreachable))
+                break
+        return tuple(kept)
+
+    def rewrite_blocks(
+        self, node: t.Any, live: t.Set[str], function: t.Any, prefix: str
+    ) -> t.Any:
+        if type(node).__name__ != "IfStatement":
+            return replace(node, body=self.rewrite(node.body, live, function, prefix))
+        default = node.default
+        if default:
+            default = self.rewrite(default, live, function, prefix)
+        return replace(
+            node,
+            conditionals=tuple(
+                (condition, self.rewrite(block, live, function, prefix))
+                for condition, block in node.conditionals
+            ),
+            default=default,
+        )
+
+
+def eliminate(module: t.Any) -> t.Tuple[t.Any, DeadCodeStats]:
+    """``module`` without its dead code, and what was removed."""
+    eliminator = Eliminator(resolve(module))
+    return eliminator.eliminate_module(module), eliminator.stats
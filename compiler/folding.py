@@ -0,0 +1,312 @@
+"""Constant folding over parsed modules.
+
+``Folder`` evaluates ``Operation``, ``Comparison`` and ``MultiComparison``
+nodes whose operands are literals, exactly as the interpreter would, and
+replaces them with the literal they evaluate to. ``"a" + "b"`` becomes one
+``String``, ``60 * 60 * 24`` one ``Int`` and ``-1`` an ``Int`` holding
+``"-1"``. ``and`` and ``or`` fold as soon as their left side is a literal,
+since that alone decides which side is the result.
+
+Branches of ``if`` statements whose condition folds to a false literal are
+removed, a true one makes the rest of the statement unreachable, and a
+``while`` loop whose condition folds to false is dropped entirely. Operations
+that would raise, such as dividing by zero, are left for the program to raise
+at run time, and so are ones whose result would be unreasonably large.
+
+Nodes are folded through dispatch tables keyed by class, and new nodes are
+built with the flavour, models or slotted nodes, of the tree being folded.
+"""
+
+import math
+import typing as t
+
+from . import models, nodes
+from .bytecode import LITERALS, literal
+from .incremental import replace, walk
+from .interpreter import BINARY_OPERATORS, COMPARISONS, UNARY_OPERATORS, both
+
+# Folding stops short of building ints, strings or lists bigger than this.
+MAX_FOLDED_SIZE = 4096
+
+
+class FoldStats:
+    """How much a module shrank by folding."""
+
+    def __init__(self) -> None:
+        self.operations = 0
+        self.comparisons = 0
+        self.branches = 0
+        self.loops = 0
+        self.nodes_before = 0
+        self.nodes_after = 0
+
+    @property
+    def removed(self) -> int:
+        return self.nodes_before - self.nodes_after
+
+    def __iadd__(self, other: "FoldStats") -> "FoldStats":
+        for name in vars(self):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def report(self) -> str:
+        return "\n".join(
+            (
+                "Folded %d operations and %d comparisons"
+                % (self.operations, self.comparisons),
+                "Removed %d if branches and %d while loops"
+                % (self.branches, self.loops),
+                "Nodes: %d before, %d after, %d removed"
+                % (self.nodes_before, self.nodes_after, self.removed),
+            )
+        )
+
+
+def too_large(value: t.Any) -> bool:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value.bit_length() > MAX_FOLDED_SIZE
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, (str, list, tuple)):
+        return len(value) > MAX_FOLDED_SIZE
+    return False
+
+
+def may_overflow(op: str, left: t.Any, right: t.Any) -> bool:
+    """Whether computing ``left op right`` could take unreasonable time or memory."""
+    if op == "**" and isinstance(right, int) and isinstance(left, int):
+        return abs(right) * max(1, abs(left).bit_length()) > MAX_FOLDED_SIZE
+    if op == "*" and isinstance(right, int) and isinstance(left, (str, list, tuple)):
+        return len(left) * right > MAX_FOLDED_SIZE
+    if op == "*" and isinstance(left, int) and isinstance(right, (str, list, tuple)):
+        return len(right) * left > MAX_FOLDED_SIZE
+    return False
+
+
+class Folder:
+    """Folds a module, counting what it removed in ``stats``."""
+
+    def __init__(self) -> None:
+        self.stats = FoldStats()
+        expressions = {
+            "Operation": self.fold_operation,
+            "Comparison": self.fold_comparison,
+            "MultiComparison": self.fold_multi_comparison,
+            "Call": self.fold_call,
+            "List": self.fold_items,
+            "Tuple": self.fold_items,
+            "Dict": self.fold_dict,
+        }
+        statements = {
+            "VariableDeclaration": self.fold_variable_declaration,
+            "FunctionDeclaration": self.fold_function_declaration,
+            "IfStatement": self.fold_if,
+            "WhileLoop": self.fold_while,
+            "ForLoop": self.fold_for,
+            "Return": self.fold_return,
+        }
+        self.expressions: t.Dict[type, t.Callable[[t.Any], t.Any]] = {}
+        self.statements: t.Dict[type, t.Callable[[t.Any], t.List[t.Any]]] = {}
+        for name, fold_expression in expressions.items():
+            for cls in both(name):
+                self.expressions[cls] = fold_expression
+                self.statements[cls] = self.fold_expression_statement
+        for name, fold_statement in statements.items():
+            for cls in both(name):
+                self.statements[cls] = fold_statement
+
+    def fold_module(self, module: t.Any) -> t.Any:
+        self.stats.nodes_before += sum(1 for _ in walk(module))
+        module = replace(module, body=self.fold_body(module.body))
+        self.stats.nodes_after += sum(1 for _ in walk(module))
+        return module
+
+    def fold_body(self, body: t.Iterable[t.Any]) -> tuple:
+        folded: t.List[t.Any] = []
+        for node in body:
+            fold_statement = self.statements.get(type(node))
+            if fold_statement is None:
+                folded.append(node)
+            else:
+                folded.extend(fold_statement(node))
+        return tuple(folded)
+
+    def fold(self, node: t.Any) -> t.Any:
+        fold_expression = self.expressions.get(type(node))
+        return node if fold_expression is None else fold_expression(node)
+
+    @staticmethod
+    def is_literal(node: t.Any) -> bool:
+        return type(node).__name__ in LITERALS
+
+    @staticmethod
+    def make_literal(like: t.Any, value: t.Any, doubles: bool = True) -> t.Any:
+        """The literal node for ``value``, built like the node ``like``."""
+        if value is None:
+            name, text = "Null", None
+        elif isinstance(value, bool):
+            name, text = "Bool", str(value)
+        elif isinstance(value, int):
+            name, text = "Int", str(value)
+        elif isinstance(value, float):
+            name, text = ("Double" if doubles else "Float"), repr(value)
+        else:
+            name, text = "String", value
+        cls = (
+            nodes.NODES[name] if isinstance(like, nodes.Node) else getattr(models, name)
+        )
+        return cls.construct(value=text)
+
+    def result(self, node: t.Any, value: t.Any) -> t.Any:
+        """A literal for ``value``, the value of ``node``, unless it is too large."""
+        if too_large(value):
+            return node
+        self.stats.operations += 1
+        doubles = any(type(operand).__name__ == "Double" for operand in node.arguments)
+        return self.make_literal(node, value, doubles)
+
+    # Expressions
+    def fold_operation(self, node: t.Any) -> t.Any:
+        op = node.op
+        operands = tuple(self.fold(argument) for argument in node.arguments)
+        unchanged = replace(node, arguments=operands)
+        if not self.is_literal(operands[0]):
+            return unchanged
+        if op in ("and", "or") and len(operands) == 2:
+            # The left side alone decides which side is the result.
+            self.stats.operations += 1
+            return operands[(op == "and") == bool(literal(operands[0]))]
+        if not all(map(self.is_literal, operands)):
+            return unchanged
+        values = [literal(operand) for operand in operands]
+        try:
+            if len(values) == 1:
+                value = UNARY_OPERATORS[op](values[0])
+            elif may_overflow(op, *values):
+                return unchanged
+            else:
+                value = BINARY_OPERATORS[op](*values)
+        except (ArithmeticError, TypeError, ValueError):
+            return unchanged
+        return self.result(unchanged, value)
+
+    def compare(self, op: str, left: t.Any, right: t.Any) -> t.Optional[bool]:
+        try:
+            return bool(COMPARISONS[op](literal(left), literal(right)))
+        except TypeError:
+            return None
+
+    def fold_comparison(self, node: t.Any) -> t.Any:
+        operands = [self.fold(argument) for argument in node.arguments]
+        if all(map(self.is_literal, operands)):
+            value = self.compare(node.op, *operands)
+            if value is not None:
+                self.stats.comparisons += 1
+                return self.make_literal(node, value)
+        return replace(node, arguments=tuple(operands))
+
+    def fold_multi_comparison(self, node: t.Any) -> t.Any:
+        # Each comparison's left operand is the previous one's right operand.
+        operands = [self.fold(node.comparisons[0].arguments[0])]
+        operands.extend(
+            self.fold(comparison.arguments[1]) for comparison in node.comparisons
+        )
+        if all(map(self.is_literal, operands)):
+            values = [
+                self.compare(comparison.op, left, right)
+                for comparison, left, right in zip(
+                    node.comparisons, operands, operands[1:]
+                )
+            ]
+            if None not in values:
+                self.stats.comparisons += 1
+                return self.make_literal(node, all(values))
+        comparisons = tuple(
+            replace(comparison, arguments=(left, right))
+            for comparison, left, right in zip(node.comparisons, operands, operands[1:])
+        )
+        return replace(node, comparisons=comparisons)
+
+    def fold_call(self, node: t.Any) -> t.Any:
+        return replace(
+            node,
+            target=self.fold(node.target),
+            args=tuple(map(self.fold, node.args)),
+            kwargs={name: self.fold(value) for name, value in node.kwargs.items()},
+        )
+
+    def fold_items(self, node: t.Any) -> t.Any:
+        return replace(node, items=tuple(map(self.fold, node.items)))
+
+    def fold_dict(self, node: t.Any) -> t.Any:
+        return replace(
+            node,
+            items=tuple(
+                (self.fold(key), self.fold(value)) for key, value in node.items
+            ),
+        )
+
+    # Statements
+    def fold_expression_statement(self, node: t.Any) -> t.List[t.Any]:
+        return [self.fold(node)]
+
+    def fold_variable_declaration(self, node: t.Any) -> t.List[t.Any]:
+        return [replace(node, value=self.fold(node.value))]
+
+    def fold_function_declaration(self, node: t.Any) -> t.List[t.Any]:
+        default_arguments = node.default_arguments
+        if default_arguments:
+            default_arguments = tuple(
+                replace(argument, value=self.fold(argument.value))
+                for argument in default_arguments
+            )
+        return [
+            replace(
+                node,
+                default_arguments=default_arguments,
+                body=self.fold_body(node.body),
+            )
+        ]
+
+    def fold_if(self, node: t.Any) -> t.List[t.Any]:
+        conditionals = []
+        default = node.default
+        for index, (condition, body) in enumerate(node.conditionals):
+            condition = self.fold(condition)
+            if not self.is_literal(condition):
+                conditionals.append((condition, self.fold_body(body)))
+                continue
+            if literal(condition):
+                # Nothing after a branch that is always taken can run.
+                self.stats.branches += len(node.conditionals) - index - 1
+                self.stats.branches += 1 if default else 0
+                default = body
+                break
+            self.stats.branches += 1
+        default = self.fold_body(default) if default else default
+        if not conditionals:
+            return list(default or ())
+        return [replace(node, conditionals=tuple(conditionals), default=default)]
+
+    def fold_while(self, node: t.Any) -> t.List[t.Any]:
+        conditional = self.fold(node.conditional)
+        if self.is_literal(conditional) and not literal(conditional):
+            self.stats.loops += 1
+            return []
+        return [replace(node, conditional=conditional, body=self.fold_body(node.body))]
+
+    def fold_for(self, node: t.Any) -> t.List[t.Any]:
+        return [
+            replace(
+                node, iterator=self.fold(node.iterator), body=self.fold_body(node.body)
+            )
+        ]
+
+    def fold_return(self, node: t.Any) -> t.List[t.Any]:
+        return [replace(node, value=self.fold(node.value))]
+
+
+def fold(module: t.Any) -> t.Tuple[t.Any, FoldStats]:
+    """``module`` with its constants folded, and what folding removed."""
+    folder = Folder()
+    return folder.fold_module(module), folder.stats
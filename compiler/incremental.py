@@ -0,0 +1,427 @@
+"""Reparsing of edited sources that keeps the unchanged parts of the old tree.
+
+A ``SegmentedModule`` remembers which span of the source every top-level
+chunk of statements (as grouped by ``split_statements``) came from. An edit
+re-lexes only the chunks it touches, and when it falls inside a ``{ module }``
+block of a single statement, only the innermost statement around it is
+parsed again. Everything else is reused from the old tree, with the
+``index`` of its names, arguments and literals moved to the new source.
+"""
+
+import bisect
+import typing as t
+
+from . import models, nodes
+from .tokens import CLOSING, TokenView, matches, split_statements
+
+# An edit adding or removing any of these may change which tokens are brackets.
+STRUCTURAL = frozenset("{}[]()\"'#")
+# Nodes whose ``index`` stores the offset of their first token.
+POSITIONED = frozenset(
+    ("Namespace", "Arg", "DefaultArg", "Error", "Return")
+    + ("Int", "Float", "Double", "String", "Char", "Bool")
+)
+
+
+class TextEdit(t.NamedTuple):
+    """Replace ``source[start:end]`` with ``text``."""
+
+    start: int
+    end: int
+    text: str
+
+    @property
+    def delta(self) -> int:
+        return len(self.text) - (self.end - self.start)
+
+    def apply(self, source: str) -> str:
+        return source[: self.start] + self.text + source[self.end :]
+
+    def structural(self, source: str) -> bool:
+        """Whether the edit may change which tokens of ``source`` are brackets."""
+        return not STRUCTURAL.isdisjoint(self.text + source[self.start : self.end])
+
+    def lines(self, source: str) -> int:
+        """How many lines the lexer counts are added to ``source`` by the edit."""
+        removed = source[self.start : self.end]
+        return (
+            self.text.count("\n")
+            + self.text.count(";")
+            - removed.count("\n")
+            - removed.count(";")
+        )
+
+
+def fields(node: t.Any) -> t.Iterable[str]:
+    return node.fields if isinstance(node, nodes.Node) else node.__fields__
+
+
+def walk(value: t.Any) -> t.Iterator[t.Any]:
+    """Every node in ``value``, which may also be a tuple, list or dict of them."""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (nodes.Node, models.Ast)):
+            yield value
+            stack.extend(getattr(value, name) for name in fields(value))
+        elif isinstance(value, (tuple, list)):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+
+
+def positioned(value: t.Any) -> t.List[t.Any]:
+    """The nodes in ``value`` that store the offset of their token."""
+    return [node for node in walk(value) if type(node).__name__ in POSITIONED]
+
+
+def replace(node: t.Any, **changes: t.Any) -> t.Any:
+    values = {name: getattr(node, name) for name in fields(node)}
+    values.update(changes)
+    return type(node).construct(**values)
+
+
+def if_blocks(node: t.Any) -> t.List[tuple]:
+    blocks = [body for _, body in node.conditionals]
+    if node.default:
+        blocks.append(node.default)
+    return blocks
+
+
+def with_if_block(node: t.Any, block: int, body: tuple) -> t.Any:
+    if block == len(node.conditionals):
+        return replace(node, default=body)
+    conditionals = list(node.conditionals)
+    conditionals[block] = (conditionals[block][0], body)
+    return replace(node, conditionals=tuple(conditionals))
+
+
+# The ``{ module }`` blocks of each statement, in source order, and how to swap one.
+BLOCKS: t.Dict[str, t.Callable[[t.Any], t.List[tuple]]] = {
+    "IfStatement": if_blocks,
+    "WhileLoop": lambda node: [node.body],
+    "ForLoop": lambda node: [node.body],
+    "FunctionDeclaration": lambda node: [node.body],
+}
+WITH_BLOCK: t.Dict[str, t.Callable[[t.Any, int, tuple], t.Any]] = {
+    "IfStatement": with_if_block,
+    "WhileLoop": lambda node, _, body: replace(node, body=body),
+    "ForLoop": lambda node, _, body: replace(node, body=body),
+    "FunctionDeclaration": lambda node, _, body: replace(node, body=body),
+}
+
+
+def split_lines(text: str) -> t.List[str]:
+    """``text`` split after every ``\\n`` only, like iterating over a file."""
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    return lines
+
+
+def unclosed(tokens: t.Iterable[TokenView]) -> bool:
+    """Whether ``tokens`` leave a bracket open."""
+    opened: t.List[str] = []
+    for token in tokens:
+        matches(token.type, opened)
+    return bool(opened)
+
+
+def statement_groups(tokens: t.Sequence[TokenView]) -> t.List[t.List[TokenView]]:
+    """Split ``tokens`` at the line breaks that are outside of any brackets.
+
+    A closing bracket that does not match the last one opened is not counted,
+    so that a stray bracket does not join every statement after it into one.
+    """
+    groups: t.List[t.List[TokenView]] = []
+    group: t.List[TokenView] = []
+    opened: t.List[str] = []
+    for token in tokens:
+        if token.type == "NEWLINE" and not opened:
+            if group:
+                groups.append(group)
+                group = []
+            continue
+        matches(token.type, opened)
+        group.append(token)
+    if group:
+        groups.append(group)
+    return groups
+
+
+def block_groups(tokens: t.Sequence[TokenView]) -> t.List[t.Tuple[int, int]]:
+    """Positions of the braces around every ``{ module }`` block of a statement.
+
+    Dictionaries are told apart from blocks by what follows them: a block is
+    always followed by ``elif``, ``else`` or the end of the statement.
+    """
+    groups = []
+    opened: t.List[str] = []
+    opening = None
+    for position, token in enumerate(tokens):
+        if token.type == "{" and not opened:
+            opening = position
+        if matches(token.type, opened) and token.type in CLOSING and not opened:
+            if opening is not None:
+                following = (
+                    tokens[position + 1].type if position + 1 < len(tokens) else None
+                )
+                if following in (None, "ELIF", "ELSE", "NEWLINE"):
+                    groups.append((opening, position))
+                opening = None
+    return groups
+
+
+def parse_statement(tokens: t.List[TokenView], parser) -> t.Any:
+    module = parser.parse(iter(tokens))
+    if module is None or len(module.body) != 1:
+        return None
+    return module.body[0]
+
+
+def reparse_body(
+    body: tuple, tokens: t.List[TokenView], start: int, end: int, parser
+) -> t.Optional[tuple]:
+    """``body`` parsed again from ``tokens``, which were edited in ``start:end``."""
+    groups = statement_groups(tokens)
+    # Each group is one statement only if there are as many as before the edit.
+    # That holds if the edited group was not empty before, which it was not if
+    # one of its tokens starts before the edit.
+    if len(groups) == len(body):
+        for position, group in enumerate(groups):
+            last = group[-1]
+            if group[0].index < start and end <= last.index + len(last.value):
+                statement = reparse_statement(body[position], group, start, end, parser)
+                if statement is not None:
+                    return body[:position] + (statement,) + body[position + 1 :]
+                break
+    module = parser.parse(iter(tokens))
+    return None if module is None else tuple(module.body)
+
+
+def reparse_statement(
+    statement: t.Any, tokens: t.List[TokenView], start: int, end: int, parser
+) -> t.Any:
+    """``statement`` parsed again from ``tokens``, reusing any block left untouched."""
+    name = type(statement).__name__
+    if name in BLOCKS:
+        bodies = BLOCKS[name](statement)
+        groups = block_groups(tokens)
+        if len(groups) == len(bodies):
+            for block, (opening, closing) in enumerate(groups):
+                if tokens[opening].index < start and end <= tokens[closing].index:
+                    inner = tokens[opening + 1 : closing]
+                    body = reparse_body(bodies[block], inner, start, end, parser)
+                    if body is None:
+                        return None
+                    return WITH_BLOCK[name](statement, block, body)
+    return parse_statement(tokens, parser)
+
+
+class Chunk(t.NamedTuple):
+    start: int
+    end: int
+    lineno: int
+    tokens: t.List[TokenView]
+
+
+class Segment:
+    """Top-level statements parsed from the source from ``start`` to the next segment."""
+
+    __slots__ = ("start", "lineno", "items", "positioned")
+
+    def __init__(self, start: int, lineno: int, items: tuple) -> None:
+        self.start = start
+        self.lineno = lineno
+        self.items = items
+        self.positioned = positioned(items)
+
+    def move(self, delta: int, lines: int) -> None:
+        self.start += delta
+        self.lineno += lines
+        for node in self.positioned:
+            node.index += delta
+
+
+class SegmentedModule:
+    """A parsed module together with the source span of each of its segments."""
+
+    __slots__ = ("source", "module", "segments")
+
+    def __init__(self, source: str, module: t.Any, segments: t.List[Segment]) -> None:
+        self.source = source
+        self.module = module
+        self.segments = segments
+
+    @classmethod
+    def from_module(
+        cls, module: t.Any, source: str, lexer
+    ) -> t.Optional["SegmentedModule"]:
+        """Split an existing ``module`` of ``source`` into segments, without parsing.
+
+        This only works if every top-level line break separates two statements,
+        and returns ``None`` otherwise.
+        """
+        segments = []
+        body = module.body
+        position = 0
+        for chunk in split_statements(split_lines(source), lexer):
+            count = len(statement_groups(chunk))
+            items = tuple(body[position : position + count])
+            position += count
+            if len(items) != count:
+                return None
+            segments.append(Segment(chunk[0].index, chunk[0].lineno, items))
+        if position != len(body):
+            return None
+        if segments:
+            segments[0].start, segments[0].lineno = 0, 1
+        return cls(source, module, segments)
+
+    @classmethod
+    def parse(cls, source: str, lexer, parser) -> t.Optional["SegmentedModule"]:
+        segments = []
+        for chunk in split_statements(split_lines(source), lexer):
+            module = parser.parse(iter(chunk))
+            if module is None:
+                return None
+            segments.append(Segment(chunk[0].index, chunk[0].lineno, module.body))
+        if segments:
+            segments[0].start, segments[0].lineno = 0, 1
+        return cls(source, cls.assemble(parser, segments), segments)
+
+    @staticmethod
+    def assemble(parser, segments: t.List[Segment]) -> t.Any:
+        return parser.models.Module.construct(
+            body=tuple(item for segment in segments for item in segment.items)
+        )
+
+    def span(self, position: int) -> t.Tuple[int, int]:
+        """Start and end in the source of the segment at ``position``."""
+        if position + 1 < len(self.segments):
+            return self.segments[position].start, self.segments[position + 1].start
+        return self.segments[position].start, len(self.source)
+
+    def relex(
+        self, edit: TextEdit, new_source: str, lexer
+    ) -> t.Tuple[int, int, t.List[Chunk]]:
+        """Lex the segments from ``first`` to ``last`` that ``edit`` touches again."""
+        starts = [segment.start for segment in self.segments]
+        first = max(bisect.bisect_left(starts, edit.start) - 1, 0)
+        last = max(bisect.bisect_right(starts, edit.end) - 1, first)
+        while True:
+            start = starts[first]
+            end = self.span(last)[1] + edit.delta
+            tokens = list(
+                split_statements(
+                    split_lines(new_source[start:end]),
+                    lexer,
+                    self.segments[first].lineno,
+                    start,
+                )
+            )
+            if not (tokens and unclosed(tokens[-1]) and last + 1 < len(starts)):
+                break
+            # An opened bracket carries on into the following segment.
+            last += 1
+
+        bounds = [start] + [chunk[0].index for chunk in tokens[1:]] + [end]
+        chunks = [
+            Chunk(
+                bounds[position],
+                bounds[position + 1],
+                self.segments[first].lineno if position == 0 else chunk[0].lineno,
+                chunk,
+            )
+            for position, chunk in enumerate(tokens)
+        ]
+        return first, last, chunks
+
+    def unchanged(  # pylint: disable=too-many-arguments
+        self,
+        edit: TextEdit,
+        new_source: str,
+        first: int,
+        last: int,
+        chunks: t.List[Chunk],
+    ) -> t.Tuple[int, int]:
+        """How many chunks at the front and back of ``chunks`` are the same as the
+        segments from ``first`` to ``last`` were."""
+        count = min(len(chunks), last + 1 - first)
+        front = 0
+        while front < count:
+            chunk = chunks[front]
+            if (chunk.start, chunk.end) != self.span(first + front):
+                break
+            if chunk.end > edit.start:
+                break
+            front += 1
+
+        back = 0
+        while back < count - front:
+            chunk = chunks[-1 - back]
+            start, end = self.span(last - back)
+            if chunk.start != start + edit.delta:
+                break
+            if new_source[chunk.start : chunk.end] != self.source[start:end]:
+                break
+            back += 1
+        return front, back
+
+    def reparse(
+        self, edit: TextEdit, edited: t.List[Segment], chunks: t.List[Chunk], parser
+    ) -> t.Optional[t.List[Segment]]:
+        """Segments for ``chunks``, the edited text of the ``edited`` segments."""
+        if len(edited) == 1 and len(chunks) == 1 and len(edited[0].items) == 1:
+            groups = statement_groups(chunks[0].tokens)
+            statement = None
+            if len(groups) == 1 and not edit.structural(self.source):
+                statement = reparse_statement(
+                    edited[0].items[0],
+                    groups[0],
+                    edit.start,
+                    edit.start + len(edit.text),
+                    parser,
+                )
+            if statement is not None:
+                for node in edited[0].positioned:
+                    if node.index >= edit.end:
+                        node.index += edit.delta
+                return [Segment(chunks[0].start, chunks[0].lineno, (statement,))]
+
+        segments = []
+        for chunk in chunks:
+            module = parser.parse(iter(chunk.tokens))
+            if module is None:
+                return None
+            segments.append(Segment(chunk.start, chunk.lineno, module.body))
+        return segments
+
+    def edit(self, edit: TextEdit, lexer, parser) -> t.Optional["SegmentedModule"]:
+        """The module of the edited source, or ``None`` if it has to be parsed whole.
+
+        Segments reused from this module are moved to the new source in place,
+        so this module must not be edited again afterwards.
+        """
+        if not self.segments:
+            return None
+        new_source = edit.apply(self.source)
+        first, last, chunks = self.relex(edit, new_source, lexer)
+        front, back = self.unchanged(edit, new_source, first, last, chunks)
+        replaced = self.reparse(
+            edit,
+            self.segments[first + front : last + 1 - back],
+            chunks[front : len(chunks) - back],
+            parser,
+        )
+        if replaced is None:
+            return None
+
+        following = self.segments[last + 1 - back :]
+        lines = edit.lines(self.source)
+        if edit.delta or lines:
+            for segment in following:
+                segment.move(edit.delta, lines)
+        segments = self.segments[: first + front] + replaced + following
+        if segments:
+            segments[0].start, segments[0].lineno = 0, 1
+        return SegmentedModule(new_source, self.assemble(parser, segments), segments)
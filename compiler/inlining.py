@@ -0,0 +1,339 @@
+"""Inlining of calls to small functions.
+
+A function declared once, at the top level of the module, whose body is a
+single ``return`` of an expression of at most ``budget`` nodes and which
+does not call itself, is inlined: a ``Call`` of it whose name the resolver
+binds to the module is replaced by a copy of the returned expression, with
+each parameter replaced by its argument. Keyword arguments are bound by
+name, and parameters left out take their default value, which must be a
+literal since the default is evaluated once, where the function is declared.
+
+Substituting an argument for its parameter must not change what the program
+does. Literals can always be substituted. Names can be, unless the function
+calls something other than a builtin, which might assign them before they
+are read. Builtins, parameters, and at the top level the names declared at
+the top level before, are sure to be bound, but reading any other name may
+raise, so its parameter must be used at least once outside the right side of
+``and`` and ``or`` and the later comparisons of a chain, which may not be
+evaluated. Any other argument may raise too, like ``1 / 0``, so it must call
+nothing, and its parameter must be used exactly once and not in those parts.
+Only one argument of a call may raise, so that the first of several failing
+arguments still fails first. Calls are not inlined where a local name would
+capture a module level name the function uses, nor at the top level before
+the function is declared. Inlined expressions are not inlined into again, so
+mutually recursive functions cannot make inlining go on forever.
+"""
+
+import operator
+import typing as t
+
+from . import models, nodes
+from .bytecode import LITERALS
+from .deadcode import calls
+from .incremental import fields, replace, walk
+from .resolver import BUILTIN, GLOBAL, LOCAL, Resolution, declared_names, resolve
+
+# The largest returned expression inlined by default, counted in nodes.
+DEFAULT_BUDGET = 24
+
+
+class Inlinable(t.NamedTuple):
+    name: str
+    position: int
+    parameters: t.Tuple[str, ...]
+    defaults: t.Dict[str, t.Any]
+    body: t.Any
+    # How many times each parameter is used, and the module names used.
+    uses: t.Dict[str, int]
+    names: t.FrozenSet[str]
+    calls_functions: bool
+    # Parameters used where they may not be evaluated.
+    conditional: t.FrozenSet[str]
+
+
+class InlineStats:
+    """How many calls were inlined."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.functions: t.Set[str] = set()
+
+    def __iadd__(self, other: "InlineStats") -> "InlineStats":
+        self.calls += other.calls
+        self.functions |= other.functions
+        return self
+
+    def report(self) -> str:
+        return "Inlined %d calls to %d functions" % (self.calls, len(self.functions))
+
+
+def is_node(value: t.Any) -> bool:
+    return isinstance(value, (nodes.Node, models.Ast))
+
+
+def conditional_parts(node: t.Any) -> t.Iterator[t.Any]:
+    """The parts of an expression that are only evaluated depending on the rest."""
+    for child in walk(node):
+        kind = type(child).__name__
+        if kind == "Operation" and child.op in ("and", "or"):
+            yield child.arguments[1]
+        elif kind == "MultiComparison":
+            for comparison in child.comparisons[1:]:
+                yield comparison.arguments[1]
+
+
+def conditional_locals(node: t.Any, resolution: Resolution) -> t.FrozenSet[str]:
+    """The local names used in the conditional parts of an expression."""
+    return frozenset(
+        child.name
+        for part in conditional_parts(node)
+        for child in walk(part)
+        if type(child).__name__ == "Namespace"
+        and resolution.binding(child).kind == LOCAL
+    )
+
+
+def copy(value: t.Any, substitutions: t.Dict[int, t.Any]) -> t.Any:
+    """A copy of ``value`` sharing no nodes with it, with nodes replaced by ``id``."""
+    if isinstance(value, (tuple, list)):
+        return tuple(copy(item, substitutions) for item in value)
+    if isinstance(value, dict):
+        return {key: copy(item, substitutions) for key, item in value.items()}
+    if not is_node(value):
+        return value
+    if id(value) in substitutions:
+        return copy(substitutions[id(value)], {})
+    return replace(
+        value,
+        **{
+            field: copy(getattr(value, field), substitutions) for field in fields(value)
+        },
+    )
+
+
+class Inliner:  # pylint: disable=too-many-instance-attributes
+    """Inlines calls to small functions, counting them in ``stats``."""
+
+    def __init__(self, resolution: Resolution, budget: int = DEFAULT_BUDGET) -> None:
+        self.resolution = resolution
+        self.budget = budget
+        self.stats = InlineStats()
+        self.functions: t.Dict[str, Inlinable] = {}
+        # Names local to the functions around the node being rewritten, and
+        # the position of the top-level statement it is in, if it is not in one.
+        self.locals: t.FrozenSet[str] = frozenset()
+        self.position: t.Optional[int] = None
+        # The parameters of the functions around it that no local shadows, and
+        # the position of the first top-level declaration of each name.
+        self.parameters: t.FrozenSet[str] = frozenset()
+        self.declared: t.Dict[str, int] = {}
+
+    def inline_module(self, module: t.Any) -> t.Any:
+        declared = list(declared_names(module.body))
+        for position, node in enumerate(module.body):
+            if type(node).__name__ in ("VariableDeclaration", "FunctionDeclaration"):
+                self.declared.setdefault(node.target.name, position)
+        for position, node in enumerate(module.body):
+            if type(node).__name__ == "FunctionDeclaration":
+                name = node.target.name
+                if declared.count(name) == 1:
+                    inlinable = self.inlinable(node, position)
+                    if inlinable is not None:
+                        self.functions[name] = inlinable
+        body = []
+        for position, node in enumerate(module.body):
+            self.position = position
+            body.append(self.rewrite(node))
+        return replace(module, body=tuple(body))
+
+    def inlinable(self, node: t.Any, position: int) -> t.Optional[Inlinable]:
+        if len(node.body) != 1 or type(node.body[0]).__name__ != "Return":
+            return None
+        arguments = (node.arguments or ()) + (node.default_arguments or ())
+        defaults = {
+            argument.arg: argument.value for argument in node.default_arguments or ()
+        }
+        if any(type(value).__name__ not in LITERALS for value in defaults.values()):
+            return None
+        body = node.body[0].value
+        found = list(walk(body))
+        if len(found) > self.budget:
+            return None
+        bindings = self.resolution.bindings
+        uses: t.Dict[str, int] = {}
+        names = set()
+        calls_functions = False
+        for child in found:
+            kind = type(child).__name__
+            if kind == "Call":
+                target = child.target
+                calls_functions |= not (
+                    type(target).__name__ == "Namespace"
+                    and bindings[id(target)].kind == BUILTIN
+                )
+            elif kind == "Namespace":
+                binding = bindings[id(child)]
+                if binding.kind == LOCAL:
+                    uses[child.name] = uses.get(child.name, 0) + 1
+                else:
+                    names.add(child.name)
+        if node.target.name in names:
+            return None
+        return Inlinable(
+            node.target.name,
+            position,
+            tuple(argument.arg for argument in arguments),
+            defaults,
+            body,
+            uses,
+            frozenset(names),
+            calls_functions,
+            conditional_locals(body, self.resolution),
+        )
+
+    def rewrite(  # pylint: disable=too-many-return-statements
+        self, value: t.Any
+    ) -> t.Any:
+        """``value`` with calls inlined, or ``value`` itself if none were."""
+        if isinstance(value, (tuple, list)):
+            items = [self.rewrite(item) for item in value]
+            if all(map(operator.is_, items, value)):
+                return value
+            return tuple(items)
+        if isinstance(value, dict):
+            rewritten = {key: self.rewrite(item) for key, item in value.items()}
+            if all(rewritten[key] is item for key, item in value.items()):
+                return value
+            return rewritten
+        if not is_node(value):
+            return value
+        kind = type(value).__name__
+        if kind == "FunctionDeclaration":
+            return self.rewrite_function(value)
+        changes = {}
+        for field in fields(value):
+            old = getattr(value, field)
+            new = self.rewrite(old)
+            if new is not old:
+                changes[field] = new
+        node = replace(value, **changes) if changes else value
+        if kind == "Call":
+            inlined = self.inline(value, node)
+            if inlined is not None:
+                return inlined
+        return node
+
+    def rewrite_function(self, node: t.Any) -> t.Any:
+        enclosing = (self.locals, self.position, self.parameters)
+        names = self.resolution.scope(node).names
+        self.locals = self.locals | set(names)
+        self.position = None
+        arguments = (node.arguments or ()) + (node.default_arguments or ())
+        self.parameters = (self.parameters - set(names)) | {
+            argument.arg for argument in arguments
+        }
+        try:
+            default_arguments = node.default_arguments
+            if default_arguments:
+                default_arguments = self.rewrite(default_arguments)
+            return replace(
+                node, default_arguments=default_arguments, body=self.rewrite(node.body)
+            )
+        finally:
+            self.locals, self.position, self.parameters = enclosing
+
+    def is_bound(self, node: t.Any) -> bool:
+        """Whether the name ``node`` is sure to hold a value where it is read."""
+        binding = self.resolution.bindings.get(id(node))
+        if binding is None:
+            return False
+        if binding.kind == GLOBAL:
+            # The top-level statements before this one have all been run.
+            position = self.declared.get(node.name)
+            return (
+                self.position is not None
+                and position is not None
+                and position < self.position
+            )
+        return binding.kind == BUILTIN or node.name in self.parameters
+
+    def inline(self, original: t.Any, node: t.Any) -> t.Any:
+        """The inlined body of the call ``node``, whose original is ``original``."""
+        target = original.target
+        if type(target).__name__ != "Namespace":
+            return None
+        function = self.functions.get(target.name)
+        if (
+            function is None
+            or self.resolution.bindings[id(target)].kind != GLOBAL
+            or (self.position is not None and self.position <= function.position)
+            or not function.names.isdisjoint(self.locals)
+        ):
+            return None
+        bound = self.bind(function, node.args, node.kwargs)
+        if bound is None:
+            return None
+        substitutions = {}
+        bindings = self.resolution.bindings
+        for child in walk(function.body):
+            if (
+                type(child).__name__ == "Namespace"
+                and bindings[id(child)].kind == LOCAL
+            ):
+                substitutions[id(child)] = bound[child.name]
+        self.stats.calls += 1
+        self.stats.functions.add(function.name)
+        return copy(function.body, substitutions)
+
+    def bind(
+        self,
+        function: Inlinable,
+        args: t.Sequence[t.Any],
+        kwargs: t.Dict[str, t.Any],
+    ) -> t.Optional[t.Dict[str, t.Any]]:
+        """The argument of each parameter, if they can all be substituted."""
+        parameters = function.parameters
+        if len(args) > len(parameters):
+            return None
+        bound = dict(zip(parameters, args))
+        for name, value in kwargs.items():
+            if name not in parameters or name in bound:
+                return None
+            bound[name] = value
+        for name in parameters:
+            if name not in bound:
+                if name not in function.defaults:
+                    return None
+                bound[name] = function.defaults[name]
+        evaluated = 0
+        for name, value in bound.items():
+            raises = self.raises(function, name, value)
+            if raises is None:
+                return None
+            evaluated += raises
+        return bound if evaluated <= 1 else None
+
+    def raises(self, function: Inlinable, name: str, value: t.Any) -> t.Optional[bool]:
+        """Whether substituting ``value`` for the parameter ``name`` may make
+        the inlined expression raise, or None if it cannot be substituted."""
+        kind = type(value).__name__
+        if kind in LITERALS:
+            return False
+        if function.calls_functions:
+            return None
+        uses = function.uses.get(name, 0)
+        if kind == "Namespace":
+            if self.is_bound(value):
+                return False
+            # Reading an unbound name raises, but reading it again does not.
+            if uses == 0 or name in function.conditional:
+                return None
+        elif calls(value) or uses != 1 or name in function.conditional:
+            return None
+        return True
+
+
+def inline(module: t.Any, budget: int = DEFAULT_BUDGET) -> t.Tuple[t.Any, InlineStats]:
+    """``module`` with calls to functions of at most ``budget`` nodes inlined."""
+    inliner = Inliner(resolve(module), budget)
+    return inliner.inline_module(module), inliner.stats
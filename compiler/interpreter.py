@@ -0,0 +1,407 @@
+"""A tree-walking interpreter for parsed modules.
+
+Every node type has one function in a dispatch table keyed by its class, for
+both the pydantic models and the slotted nodes, so evaluating a node costs a
+dictionary lookup rather than a chain of ``isinstance`` checks.
+
+Values are plain Python objects: ``int``, ``float``, ``str``, ``bool``,
+``None`` for ``null``, and ``list``, ``tuple`` and ``dict`` for collections.
+Dividing two ints is floor division. Since the language has no indexing yet,
+collections are read and written with the ``get`` and ``put`` builtins.
+Assigning a name anywhere in a function makes it local to the whole function,
+so reading it before it is assigned fails rather than finding a global.
+"""
+
+import operator
+import sys
+import typing as t
+
+from . import models, nodes
+
+
+class StarlaRuntimeError(Exception):
+    pass
+
+
+def declared_names(body: t.Iterable[t.Any]) -> t.Iterator[str]:
+    """Names assigned in ``body`` and its blocks, but not in nested functions."""
+    for node in body:
+        kind = type(node).__name__
+        if kind in ("VariableDeclaration", "FunctionDeclaration"):
+            yield node.target.name
+        elif kind == "ForLoop":
+            yield node.target.name
+            yield from declared_names(node.body)
+        elif kind == "WhileLoop":
+            yield from declared_names(node.body)
+        elif kind == "IfStatement":
+            for _, block in node.conditionals:
+                yield from declared_names(block)
+            yield from declared_names(node.default or ())
+
+
+class Scope:
+    """The variables of a module or of one function call.
+
+    ``locals`` are the names assigned anywhere in the function, which are not
+    looked up in the scopes around it even before they are assigned.
+    """
+
+    __slots__ = ("variables", "parent", "locals")
+
+    def __init__(
+        self,
+        parent: t.Optional["Scope"] = None,
+        locals: t.FrozenSet[str] = frozenset(),  # pylint: disable=redefined-builtin
+    ) -> None:
+        self.variables: t.Dict[str, t.Any] = {}
+        self.parent = parent
+        self.locals = locals
+
+    def lookup(self, name: str) -> t.Any:
+        scope: t.Optional[Scope] = self
+        while scope is not None:
+            variables = scope.variables
+            if name in variables:
+                return variables[name]
+            if name in scope.locals:
+                break
+            scope = scope.parent
+        raise StarlaRuntimeError("Name %r is not defined" % name)
+
+
+class Function:
+    __slots__ = ("name", "parameters", "defaults", "body", "scope", "locals")
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        name: str,
+        parameters: t.Tuple[str, ...],
+        defaults: t.Dict[str, t.Any],
+        body: tuple,
+        scope: Scope,
+        locals: t.FrozenSet[str] = frozenset(),  # pylint: disable=redefined-builtin
+    ) -> None:
+        self.name = name
+        self.parameters = parameters
+        self.defaults = defaults
+        self.body = body
+        self.scope = scope
+        self.locals = locals
+
+    def __repr__(self) -> str:
+        return "<function %s>" % self.name
+
+
+class Returned:
+    """What executing a ``return`` statement hands back up through the blocks."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: t.Any) -> None:
+        self.value = value
+
+
+def format_value(value: t.Any) -> str:
+    if value is None:
+        return "null"
+    return str(value)
+
+
+def floor_or_true_divide(left: t.Any, right: t.Any) -> t.Any:
+    if isinstance(left, int) and isinstance(right, int):
+        return left // right
+    return left / right
+
+
+def put(collection: t.Any, key: t.Any, value: t.Any) -> None:
+    collection[key] = value
+
+
+BINARY_OPERATORS: t.Dict[str, t.Callable[[t.Any, t.Any], t.Any]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": floor_or_true_divide,
+    "%": operator.mod,
+    "**": operator.pow,
+    "||": operator.or_,
+    "&&": operator.and_,
+    "^": operator.xor,
+}
+UNARY_OPERATORS: t.Dict[str, t.Callable[[t.Any], t.Any]] = {
+    "-": operator.neg,
+    "+": operator.pos,
+    "not": operator.not_,
+    "!": operator.not_,
+    "~": operator.invert,
+}
+COMPARISONS: t.Dict[str, t.Callable[[t.Any, t.Any], bool]] = {
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def builtin_functions(output: t.Callable[..., None]) -> t.Dict[str, t.Any]:
+    """The builtins of a program, which prints through ``output``."""
+    return {
+        "output": output,
+        "len": len,
+        "range": range,
+        "str": str,
+        "int": int,
+        "float": float,
+        "abs": abs,
+        "min": min,
+        "max": max,
+        "append": list.append,
+        "get": operator.getitem,
+        "put": put,
+    }
+
+
+def both(name: str) -> t.Tuple[type, type]:
+    """The pydantic model and the slotted node called ``name``."""
+    return getattr(models, name), nodes.NODES[name]
+
+
+class Interpreter:
+    """Runs modules, keeping their top-level variables in ``globals``."""
+
+    def __init__(self, stdout: t.Optional[t.TextIO] = None) -> None:
+        self.stdout = sys.stdout if stdout is None else stdout
+        self.builtins = Scope()
+        self.builtins.variables.update(builtin_functions(self.output))
+        self.globals = Scope(self.builtins)
+
+        expressions = {
+            "Int": self.evaluate_int,
+            "Float": self.evaluate_float,
+            "Double": self.evaluate_float,
+            "String": self.evaluate_constant,
+            "Char": self.evaluate_constant,
+            "Bool": self.evaluate_bool,
+            "Null": self.evaluate_constant,
+            "List": self.evaluate_list,
+            "Tuple": self.evaluate_tuple,
+            "Dict": self.evaluate_dict,
+            "Namespace": self.evaluate_namespace,
+            "Call": self.evaluate_call,
+            "Operation": self.evaluate_operation,
+            "Comparison": self.evaluate_comparison,
+            "MultiComparison": self.evaluate_multi_comparison,
+        }
+        statements = {
+            "VariableDeclaration": self.execute_variable_declaration,
+            "FunctionDeclaration": self.execute_function_declaration,
+            "IfStatement": self.execute_if,
+            "WhileLoop": self.execute_while,
+            "ForLoop": self.execute_for,
+            "Return": self.execute_return,
+            "Pass": self.execute_pass,
+        }
+        self.expressions: t.Dict[type, t.Callable[[t.Any, Scope], t.Any]] = {}
+        self.statements: t.Dict[type, t.Callable[[t.Any, Scope], t.Any]] = {}
+        for name, evaluate in expressions.items():
+            for cls in both(name):
+                self.expressions[cls] = evaluate
+                # An expression on its own is a statement whose value is dropped.
+                self.statements[cls] = self.execute_expression
+        for name, execute in statements.items():
+            for cls in both(name):
+                self.statements[cls] = execute
+
+    def output(self, *values: t.Any) -> None:
+        self.stdout.write(" ".join(map(format_value, values)) + "\n")
+
+    def run(self, module: t.Any, args: t.Optional[t.List[str]] = None) -> t.Any:
+        """Execute ``module``, then its ``main`` function if it declares one."""
+        returned = self.execute_body(module.body, self.globals)
+        if returned is not None:
+            return returned.value
+        main = self.globals.variables.get("main")
+        if isinstance(main, Function):
+            return self.call(main, [args or []] if main.parameters else [], {})
+        return None
+
+    def evaluate(self, node: t.Any, scope: Scope) -> t.Any:
+        try:
+            evaluate = self.expressions[type(node)]
+        except KeyError:
+            raise StarlaRuntimeError(
+                "%s is not an expression" % type(node).__name__
+            ) from None
+        return evaluate(node, scope)
+
+    def execute_body(
+        self, body: t.Iterable[t.Any], scope: Scope
+    ) -> t.Optional[Returned]:
+        statements = self.statements
+        for node in body:
+            returned = statements[type(node)](node, scope)
+            if returned is not None:
+                return returned
+        return None
+
+    # Expressions
+    @staticmethod
+    def evaluate_int(node: t.Any, _: Scope) -> int:
+        return int(node.value)
+
+    @staticmethod
+    def evaluate_float(node: t.Any, _: Scope) -> float:
+        return float(node.value)
+
+    @staticmethod
+    def evaluate_bool(node: t.Any, _: Scope) -> bool:
+        return node.value == "True"
+
+    @staticmethod
+    def evaluate_constant(node: t.Any, _: Scope) -> t.Any:
+        return node.value
+
+    def evaluate_list(self, node: t.Any, scope: Scope) -> list:
+        return [self.evaluate(item, scope) for item in node.items]
+
+    def evaluate_tuple(self, node: t.Any, scope: Scope) -> tuple:
+        return tuple(self.evaluate(item, scope) for item in node.items)
+
+    def evaluate_dict(self, node: t.Any, scope: Scope) -> dict:
+        return {
+            self.evaluate(key, scope): self.evaluate(value, scope)
+            for key, value in node.items
+        }
+
+    @staticmethod
+    def evaluate_namespace(node: t.Any, scope: Scope) -> t.Any:
+        return scope.lookup(node.name)
+
+    def evaluate_call(self, node: t.Any, scope: Scope) -> t.Any:
+        function = self.evaluate(node.target, scope)
+        args = [self.evaluate(arg, scope) for arg in node.args]
+        kwargs = {
+            name: self.evaluate(value, scope) for name, value in node.kwargs.items()
+        }
+        if isinstance(function, Function):
+            return self.call(function, args, kwargs)
+        if not callable(function):
+            raise StarlaRuntimeError("%s is not a function" % format_value(function))
+        return function(*args, **kwargs)
+
+    def call(
+        self, function: Function, args: t.List[t.Any], kwargs: t.Dict[str, t.Any]
+    ) -> t.Any:
+        parameters = function.parameters
+        if len(args) > len(parameters):
+            raise StarlaRuntimeError(
+                "%s takes %d arguments but got %d"
+                % (function.name, len(parameters), len(args))
+            )
+        scope = Scope(function.scope, function.locals)
+        variables = scope.variables
+        variables.update(zip(parameters, args))
+        for name, value in kwargs.items():
+            if name not in parameters or name in variables:
+                raise StarlaRuntimeError(
+                    "%s got an unexpected argument %r" % (function.name, name)
+                )
+            variables[name] = value
+        for name in parameters[len(args) :]:
+            if name not in variables:
+                if name not in function.defaults:
+                    raise StarlaRuntimeError(
+                        "%s is missing the argument %r" % (function.name, name)
+                    )
+                variables[name] = function.defaults[name]
+        returned = self.execute_body(function.body, scope)
+        return None if returned is None else returned.value
+
+    def evaluate_operation(self, node: t.Any, scope: Scope) -> t.Any:
+        op = node.op
+        arguments = node.arguments
+        if len(arguments) == 1:
+            return UNARY_OPERATORS[op](self.evaluate(arguments[0], scope))
+        left = self.evaluate(arguments[0], scope)
+        # ``and`` and ``or`` only evaluate their right side when they need to.
+        if op == "and":
+            return left and self.evaluate(arguments[1], scope)
+        if op == "or":
+            return left or self.evaluate(arguments[1], scope)
+        return BINARY_OPERATORS[op](left, self.evaluate(arguments[1], scope))
+
+    def evaluate_comparison(self, node: t.Any, scope: Scope) -> bool:
+        left, right = node.arguments
+        return COMPARISONS[node.op](
+            self.evaluate(left, scope), self.evaluate(right, scope)
+        )
+
+    def evaluate_multi_comparison(self, node: t.Any, scope: Scope) -> bool:
+        # Neighbouring comparisons share an operand, which is evaluated once.
+        comparisons = node.comparisons
+        left = self.evaluate(comparisons[0].arguments[0], scope)
+        for comparison in comparisons:
+            right = self.evaluate(comparison.arguments[1], scope)
+            if not COMPARISONS[comparison.op](left, right):
+                return False
+            left = right
+        return True
+
+    # Statements
+    def execute_expression(self, node: t.Any, scope: Scope) -> None:
+        self.expressions[type(node)](node, scope)
+
+    def execute_variable_declaration(self, node: t.Any, scope: Scope) -> None:
+        scope.variables[node.target.name] = self.evaluate(node.value, scope)
+
+    def execute_function_declaration(self, node: t.Any, scope: Scope) -> None:
+        arguments = node.arguments or ()
+        default_arguments = node.default_arguments or ()
+        parameters = tuple(argument.arg for argument in arguments + default_arguments)
+        local_names = frozenset(parameters).union(declared_names(node.body))
+        scope.variables[node.target.name] = Function(
+            node.target.name,
+            parameters,
+            {
+                argument.arg: self.evaluate(argument.value, scope)
+                for argument in default_arguments
+            },
+            node.body,
+            scope,
+            local_names,
+        )
+
+    def execute_if(self, node: t.Any, scope: Scope) -> t.Optional[Returned]:
+        for condition, body in node.conditionals:
+            if self.evaluate(condition, scope):
+                return self.execute_body(body, scope)
+        if node.default:
+            return self.execute_body(node.default, scope)
+        return None
+
+    def execute_while(self, node: t.Any, scope: Scope) -> t.Optional[Returned]:
+        while self.evaluate(node.conditional, scope):
+            returned = self.execute_body(node.body, scope)
+            if returned is not None:
+                return returned
+        return None
+
+    def execute_for(self, node: t.Any, scope: Scope) -> t.Optional[Returned]:
+        name = node.target.name
+        variables = scope.variables
+        for value in self.evaluate(node.iterator, scope):
+            variables[name] = value
+            returned = self.execute_body(node.body, scope)
+            if returned is not None:
+                return returned
+        return None
+
+    def execute_return(self, node: t.Any, scope: Scope) -> Returned:
+        return Returned(self.evaluate(node.value, scope))
+
+    @staticmethod
+    def execute_pass(node: t.Any, scope: Scope) -> None:
+        pass
@@ -118,6 +118,11 @@ class StarlaLexer(sly.Lexer):
     ignore = " \t"
     ignore_COMMENT = r"#(.*)"
 
+    def scan(self, text: str, lineno: int = 1):
+        """Yield ``(type, start, end, lineno)`` for every token in ``text``."""
+        for token in self.tokenize(text, lineno):
+            yield token.type, token.index, token.index + len(token.value), token.lineno
+
     def error(self, t: sly.lex.Token) -> None:
         logging.warning("Illegal character %s" % t)
         self.index += len(t.value)
@@ -0,0 +1,347 @@
+"""A language server for Starla sources, speaking the Language Server Protocol.
+
+``LanguageServer`` reads JSON-RPC messages framed by ``Content-Length``
+headers from a binary stream, and writes its responses and notifications to
+another. Every open file is a ``Document`` holding its source and the tree
+parsed from it, and, worked out on first use after each change, the
+diagnostics and the index of the names of that tree. Changes to a range of a
+document are applied with ``StarlaCompiler.reparse``, which only parses the
+statements around the change again, recovering from syntax errors as
+``parse_recovering`` does. An ``Analyser`` then only resolves and checks the
+statements that changed, or that use names whose types did.
+"""
+
+import gc
+import json
+import logging
+import typing as t
+
+from .analysis import Analyser, ModuleAnalysis
+from .compiler import StarlaCompiler
+from .incremental import TextEdit
+from .interpreter import builtin_functions
+from .positions import LineIndex
+from .references import ARGUMENT, FUNCTION, VARIABLE
+
+log = logging.getLogger(__name__)
+
+# Numbers the protocol gives to kinds of symbols, severities and errors.
+SYMBOL_KINDS = {FUNCTION: 12, VARIABLE: 13}
+ERROR = 1
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+# Changes are sent as the ranges that were replaced.
+INCREMENTAL = 2
+
+BUILTINS = frozenset(builtin_functions(print))
+Message = t.Dict[str, t.Any]
+
+
+def read_message(stream: t.BinaryIO) -> t.Optional[Message]:
+    """The next message on ``stream``, or ``None`` once it is closed."""
+    length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    if length is None:
+        raise ValueError("Message without a Content-Length header")
+    return json.loads(stream.read(length))
+
+
+def write_message(stream: t.BinaryIO, message: Message) -> None:
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    stream.write(b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+    stream.flush()
+
+
+def utf16_index(text: str, units: int) -> int:
+    """The index in ``text`` of the character ``units`` UTF-16 code units in."""
+    for position, character in enumerate(text):
+        units -= 2 if ord(character) > 0xFFFF else 1
+        if units < 0:
+            return position
+    return len(text)
+
+
+class Analysis(t.NamedTuple):
+    diagnostics: t.List[Message]
+    names: ModuleAnalysis
+
+
+class Document:
+    """An open source file, and what the server worked out about it."""
+
+    def __init__(
+        self, uri: str, source: str, compiler: StarlaCompiler, utf16: bool = True
+    ) -> None:
+        self.uri = uri
+        self.compiler = compiler
+        # Whether positions count UTF-16 code units, rather than characters.
+        self.utf16 = utf16
+        self.source = source
+        self.module: t.Any = None
+        self.analysis: t.Optional[Analysis] = None
+        self.analyser = Analyser()
+        self.parse(source)
+
+    def parse(self, source: str) -> None:
+        self.source = source
+        self.module = self.compiler.parse_recovering(source).module
+        self.compiler.segment(self.module, source)
+        self.analysis = None
+
+    def edit(self, start: int, end: int, text: str) -> None:
+        """Replace the source from ``start`` to ``end`` with ``text``."""
+        edit = TextEdit(start, end, text)
+        self.module = self.compiler.reparse(self.module, self.source, edit, True)
+        self.source = edit.apply(self.source)
+        self.analysis = None
+
+    @property
+    def lines(self) -> LineIndex:
+        return self.compiler.line_index(self.source)
+
+    def offset(self, position: Message) -> int:
+        """The offset in the source of a protocol ``Position``."""
+        starts = self.lines.starts
+        line = position["line"]
+        if line >= len(starts):
+            return len(self.source)
+        start = starts[line]
+        end = starts[line + 1] - 1 if line + 1 < len(starts) else len(self.source)
+        text = self.source[start:end]
+        character = position["character"]
+        if self.utf16 and not text.isascii():
+            character = utf16_index(text, character)
+        return start + min(character, len(text))
+
+    def position(self, offset: int) -> Message:
+        """The protocol ``Position`` of an offset in the source."""
+        line, column = self.lines.position(offset)
+        character = column - 1
+        if self.utf16:
+            text = self.source[offset - character : offset]
+            if not text.isascii():
+                character = len(text.encode("utf-16-le")) // 2
+        return {"line": line - 1, "character": character}
+
+    def range(self, start: int, end: int) -> Message:
+        return {"start": self.position(start), "end": self.position(end)}
+
+    def word(self, offset: int) -> int:
+        """Where the name or token starting at ``offset`` ends, on its line."""
+        source = self.source
+        end = offset
+        while end < len(source) and (source[end].isalnum() or source[end] == "_"):
+            end += 1
+        if end == offset < len(source) and source[end] != "\n":
+            end += 1
+        return end
+
+    def analyse(self) -> Analysis:
+        """The diagnostics and index of the current source, worked out once."""
+        if self.analysis is not None:
+            return self.analysis
+        names = self.analyser.analyse(self.module, self.lines)
+        diagnostics = [
+            {
+                "range": self.range(offset, self.word(offset)),
+                "severity": ERROR,
+                "source": "starla",
+                "message": message,
+            }
+            for message, offset in names.problems
+        ]
+        self.analysis = Analysis(diagnostics, names)
+        return self.analysis
+
+    def symbols(self) -> t.List[Message]:
+        """The functions and variables declared, each holding those local to it."""
+        roots: t.List[Message] = []
+        found: t.Dict[str, Message] = {}
+        for definition in self.analyse().names.definitions():
+            if definition.kind == ARGUMENT:
+                continue
+            name_range = self.range(definition.start, definition.end)
+            symbol = {
+                "name": definition.name,
+                "detail": definition.detail,
+                "kind": SYMBOL_KINDS[definition.kind],
+                "range": name_range,
+                "selectionRange": name_range,
+                "children": [],
+            }
+            parent = found.get(definition.scope)
+            (roots if parent is None else parent["children"]).append(symbol)
+            found.setdefault(definition.qualified, symbol)
+        return roots
+
+    def hover(self, position: Message) -> t.Optional[Message]:
+        found = self.analyse().names.at(self.offset(position))
+        if found is None:
+            return None
+        name, definition = found
+        if definition is None:
+            if name.name not in BUILTINS:
+                return None
+            text = "(builtin) " + name.name
+        elif definition.kind == FUNCTION:
+            text = definition.detail
+        else:
+            text = "(%s) %s" % (definition.kind, definition.detail)
+        return {
+            "contents": {"kind": "markdown", "value": "```starla\n%s\n```" % text},
+            "range": self.range(name.start, name.end),
+        }
+
+    def definition(self, position: Message) -> t.Optional[Message]:
+        found = self.analyse().names.at(self.offset(position))
+        if found is None or found.definition is None:
+            return None
+        definition = found.definition
+        return {"uri": self.uri, "range": self.range(definition.start, definition.end)}
+
+
+class LanguageServer:  # pylint: disable=too-many-instance-attributes
+    """Serves the documents a client opens, until it asks the server to exit."""
+
+    def __init__(
+        self, reader: t.BinaryIO, writer: t.BinaryIO, lexer: str = "scanner"
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.lexer = lexer
+        self.documents: t.Dict[str, Document] = {}
+        self.utf16 = True
+        self.shut_down = False
+        self.exited = False
+        self.requests: t.Dict[str, t.Callable[[Message], t.Any]] = {
+            "initialize": self.initialize,
+            "shutdown": self.shutdown,
+            "textDocument/hover": self.hover,
+            "textDocument/definition": self.definition,
+            "textDocument/documentSymbol": self.document_symbol,
+        }
+        self.notifications: t.Dict[str, t.Callable[[Message], None]] = {
+            "exit": self.exit,
+            "textDocument/didOpen": self.did_open,
+            "textDocument/didChange": self.did_change,
+            "textDocument/didClose": self.did_close,
+        }
+
+    def serve(self) -> int:
+        """Handle messages until ``exit``, returning the exit code it asks for."""
+        while not self.exited:
+            message = read_message(self.reader)
+            if message is None:
+                break
+            self.handle(message)
+        return 0 if self.shut_down else 1
+
+    def handle(self, message: Message) -> None:
+        method = message.get("method")
+        params = message.get("params") or {}
+        if "id" not in message:
+            # Notifications nobody handles, like "initialized", are dropped.
+            if method in self.notifications:
+                try:
+                    self.notifications[method](params)
+                except Exception:  # pylint: disable=broad-except
+                    log.exception("Failed to handle %s", method)
+            return
+        if method is None:
+            # The server sends no requests, so expects no responses.
+            return
+        response: Message = {"jsonrpc": "2.0", "id": message["id"]}
+        if method not in self.requests:
+            response["error"] = {
+                "code": METHOD_NOT_FOUND,
+                "message": "Unknown method %r" % method,
+            }
+        else:
+            try:
+                response["result"] = self.requests[method](params)
+            except Exception as error:  # pylint: disable=broad-except
+                log.exception("Failed to handle %s", method)
+                response["error"] = {"code": INTERNAL_ERROR, "message": str(error)}
+        write_message(self.writer, response)
+
+    def notify(self, method: str, params: Message) -> None:
+        write_message(
+            self.writer, {"jsonrpc": "2.0", "method": method, "params": params}
+        )
+
+    def publish(self, document: Document) -> None:
+        self.notify(
+            "textDocument/publishDiagnostics",
+            {"uri": document.uri, "diagnostics": document.analyse().diagnostics},
+        )
+
+    def document(self, params: Message) -> Document:
+        return self.documents[params["textDocument"]["uri"]]
+
+    def initialize(self, params: Message) -> Message:
+        general = (params.get("capabilities") or {}).get("general") or {}
+        self.utf16 = "utf-32" not in (general.get("positionEncodings") or ())
+        return {
+            "capabilities": {
+                "positionEncoding": "utf-16" if self.utf16 else "utf-32",
+                "textDocumentSync": {"openClose": True, "change": INCREMENTAL},
+                "hoverProvider": True,
+                "definitionProvider": True,
+                "documentSymbolProvider": True,
+            },
+            "serverInfo": {"name": "starla"},
+        }
+
+    def shutdown(self, _: Message) -> None:
+        self.shut_down = True
+
+    def exit(self, _: Message) -> None:
+        self.exited = True
+
+    def did_open(self, params: Message) -> None:
+        item = params["textDocument"]
+        document = Document(
+            item["uri"], item["text"], StarlaCompiler(self.lexer, fast=True), self.utf16
+        )
+        self.documents[document.uri] = document
+        self.publish(document)
+        # Trees hold no reference cycles, so they are freed without the cycle
+        # collector, which would otherwise go through all of them every time
+        # it collects the oldest generation while the document is edited.
+        gc.freeze()
+
+    def did_change(self, params: Message) -> None:
+        document = self.document(params)
+        for change in params["contentChanges"]:
+            if "range" in change:
+                start = document.offset(change["range"]["start"])
+                end = document.offset(change["range"]["end"])
+                document.edit(start, end, change["text"])
+            else:
+                document.parse(change["text"])
+        self.publish(document)
+
+    def did_close(self, params: Message) -> None:
+        document = self.documents.pop(params["textDocument"]["uri"])
+        self.notify(
+            "textDocument/publishDiagnostics",
+            {"uri": document.uri, "diagnostics": []},
+        )
+
+    def hover(self, params: Message) -> t.Optional[Message]:
+        return self.document(params).hover(params["position"])
+
+    def definition(self, params: Message) -> t.Optional[Message]:
+        return self.document(params).definition(params["position"])
+
+    def document_symbol(self, params: Message) -> t.List[Message]:
+        return self.document(params).symbols()
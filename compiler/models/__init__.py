@@ -10,6 +10,7 @@ from .primitives import Bool, Char, Double, Float, Int, Null, String
 from .statements import (
     Arg,
     DefaultArg,
+    Error,
     ForLoop,
     FunctionDeclaration,
     IfStatement,
@@ -28,6 +29,7 @@ StatementType = t.Union[
     ForLoop,
     Pass,
     Return,
+    Error,
 ]
 
 ObjectType = t.Union[Int, Float, Double, String, Char, Bool, Dict, Tuple, List]
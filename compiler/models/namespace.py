@@ -1,6 +1,11 @@
+from typing import Optional
+
+from pydantic import Field
+
 from .base import Ast
 
 
 class Namespace(Ast):
     name: str
     ctx: str  # We shouldn't need this, because this would be defined in variable declaration
+    index: Optional[int] = Field(None, exclude=True)  # Offset of the name in the source
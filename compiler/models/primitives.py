@@ -1,30 +1,38 @@
-from typing import Literal
+from typing import Literal, Optional
+
+from pydantic import Field
 
 from .base import Ast
 
 
 class Int(Ast):
     value: str
+    index: Optional[int] = Field(None, exclude=True)
 
 
 class Float(Ast):
     value: str
+    index: Optional[int] = Field(None, exclude=True)
 
 
 class Double(Ast):
     value: str
+    index: Optional[int] = Field(None, exclude=True)
 
 
 class String(Ast):
     value: str
+    index: Optional[int] = Field(None, exclude=True)
 
 
 class Char(Ast):
     value: str
+    index: Optional[int] = Field(None, exclude=True)
 
 
 class Bool(Ast):
     value: str
+    index: Optional[int] = Field(None, exclude=True)
 
 
 class Null(Ast):
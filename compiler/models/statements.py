@@ -1,5 +1,7 @@
 from typing import Optional, Tuple
 
+from pydantic import Field
+
 from .base import Ast
 from .namespace import Namespace
 from .types import TypeHint
@@ -18,18 +20,21 @@ class WhileLoop(Ast):
 class ForLoop(Ast):
     target: Namespace
     iterator: "ExpressionType"
+    body: "BodyType"
     orelse: Optional["BodyType"] = None
 
 
 class Arg(Ast):
     arg: str
     annotation: TypeHint
+    index: Optional[int] = Field(None, exclude=True)
 
 
 class DefaultArg(Ast):
     arg: str
     value: "ExpressionType"
     annotation: TypeHint
+    index: Optional[int] = Field(None, exclude=True)
 
 
 class FunctionDeclaration(Ast):
@@ -42,12 +47,18 @@ class FunctionDeclaration(Ast):
 
 class Return(Ast):
     value: "ExpressionType"
+    index: Optional[int] = Field(None, exclude=True)
 
 
 class Pass(Ast):
     pass
 
 
+class Error(Ast):
+    message: str  # Why the statement that was here did not parse
+    index: Optional[int] = Field(None, exclude=True)  # Offset of the bad token
+
+
 class VariableDeclaration(Ast):
     target: Namespace
     annotation: Optional[TypeHint] = None
@@ -0,0 +1,203 @@
+"""Slotted counterparts of the pydantic models in ``compiler.models``.
+
+Every class here has the same name and fields as its model, but stores them in
+``__slots__`` and skips validation entirely, which makes large trees several
+times smaller and faster to build. ``from_model`` and ``to_model`` convert
+between the two representations without losing anything.
+"""
+
+import typing as t
+
+from . import models
+
+
+class Node:
+    __slots__: t.Tuple[str, ...] = ()
+
+    model: t.Type[models.Ast]
+    fields: t.Tuple[str, ...]
+    compared: t.Tuple[str, ...]
+    defaults: t.Dict[str, t.Any]
+
+    def __init_subclass__(cls) -> None:
+        cls.model = getattr(models, cls.__name__)
+        cls.fields = cls.__slots__
+        model_fields = cls.model.__fields__
+        if set(cls.fields) != set(model_fields):
+            raise TypeError(
+                "%s does not have the fields of its model %r"
+                % (cls.__name__, tuple(model_fields))
+            )
+        cls.compared = tuple(
+            name for name in cls.fields if not model_fields[name].field_info.exclude
+        )
+        cls.defaults = {
+            name: from_model(field.default)
+            for name, field in model_fields.items()
+            if not field.required
+        }
+        NODES[cls.__name__] = cls
+
+    def __init__(self, **values: t.Any) -> None:
+        for name in self.fields:
+            if name in values:
+                value = values[name]
+            else:
+                value = self.defaults[name]
+                if isinstance(value, dict):
+                    value = {}
+            setattr(self, name, value)
+
+    @classmethod
+    def construct(cls, **values: t.Any) -> "Node":
+        return cls(**values)
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.compared
+        )
+
+    def __repr__(self) -> str:
+        return "%s(%s)" % (
+            type(self).__name__,
+            ", ".join("%s=%r" % (name, getattr(self, name)) for name in self.compared),
+        )
+
+
+NODES: t.Dict[str, t.Type[Node]] = {}
+
+
+def from_model(value: t.Any) -> t.Any:
+    """Convert pydantic models, and any tuples or dicts holding them, to nodes."""
+    if isinstance(value, models.Ast):
+        return NODES[type(value).__name__](
+            **{name: from_model(getattr(value, name)) for name in value.__fields__}
+        )
+    if isinstance(value, tuple):
+        return tuple(from_model(item) for item in value)
+    if isinstance(value, dict):
+        return {key: from_model(item) for key, item in value.items()}
+    return value
+
+
+def to_model(value: t.Any) -> t.Any:
+    """Convert nodes, and any tuples or dicts holding them, to pydantic models."""
+    if isinstance(value, Node):
+        return value.model.construct(
+            **{name: to_model(getattr(value, name)) for name in value.fields}
+        )
+    if isinstance(value, tuple):
+        return tuple(to_model(item) for item in value)
+    if isinstance(value, dict):
+        return {key: to_model(item) for key, item in value.items()}
+    return value
+
+
+class TypeHint(Node):
+    __slots__ = ("type_value", "type_structure")
+
+
+class Namespace(Node):
+    __slots__ = ("name", "ctx", "index")
+
+
+class Module(Node):
+    __slots__ = ("body",)
+
+
+class Int(Node):
+    __slots__ = ("value", "index")
+
+
+class Float(Node):
+    __slots__ = ("value", "index")
+
+
+class Double(Node):
+    __slots__ = ("value", "index")
+
+
+class String(Node):
+    __slots__ = ("value", "index")
+
+
+class Char(Node):
+    __slots__ = ("value", "index")
+
+
+class Bool(Node):
+    __slots__ = ("value", "index")
+
+
+class Null(Node):
+    __slots__ = ("value",)
+
+
+class Dict(Node):
+    __slots__ = ("items",)
+
+
+class List(Node):
+    __slots__ = ("items",)
+
+
+class Tuple(Node):
+    __slots__ = ("items",)
+
+
+class Call(Node):
+    __slots__ = ("target", "args", "kwargs")
+
+
+class Comparison(Node):
+    __slots__ = ("op", "arguments")
+
+
+class MultiComparison(Node):
+    __slots__ = ("comparisons",)
+
+
+class Operation(Node):
+    __slots__ = ("op", "arguments")
+
+
+class IfStatement(Node):
+    __slots__ = ("conditionals", "default")
+
+
+class WhileLoop(Node):
+    __slots__ = ("conditional", "body")
+
+
+class ForLoop(Node):
+    __slots__ = ("target", "iterator", "body", "orelse")
+
+
+class Arg(Node):
+    __slots__ = ("arg", "annotation", "index")
+
+
+class DefaultArg(Node):
+    __slots__ = ("arg", "value", "annotation", "index")
+
+
+class FunctionDeclaration(Node):
+    __slots__ = ("target", "annotation", "arguments", "default_arguments", "body")
+
+
+class Return(Node):
+    __slots__ = ("value", "index")
+
+
+class Pass(Node):
+    __slots__ = ()
+
+
+class Error(Node):
+    __slots__ = ("message", "index")
+
+
+class VariableDeclaration(Node):
+    __slots__ = ("target", "annotation", "value")
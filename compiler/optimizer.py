@@ -0,0 +1,53 @@
+"""The passes ``-O`` runs over a parsed module, in order.
+
+Calls to small functions are inlined first, so that constants passed to them
+are folded into their bodies, and dead code is removed last, once folding has
+removed the branches that were the only users of some declarations.
+"""
+
+import typing as t
+
+from .deadcode import DeadCodeStats, eliminate
+from .folding import FoldStats, fold
+from .inlining import DEFAULT_BUDGET, InlineStats, inline
+
+
+class OptimizeStats:
+    """What each pass did to the modules optimized."""
+
+    def __init__(self) -> None:
+        self.inlined = InlineStats()
+        self.folded = FoldStats()
+        self.eliminated = DeadCodeStats()
+
+    def __iadd__(self, other: "OptimizeStats") -> "OptimizeStats":
+        self.inlined += other.inlined
+        self.folded += other.folded
+        self.eliminated += other.eliminated
+        return self
+
+    def report(self, removed: bool = False) -> str:
+        """A summary of every pass, listing the removed declarations if ``removed``."""
+        return "\n".join(
+            (
+                self.inlined.report(),
+                self.folded.report(),
+                self.eliminated.report(declarations=removed),
+            )
+        )
+
+
+def optimize(
+    module: t.Any, inline_budget: int = DEFAULT_BUDGET
+) -> t.Tuple[t.Any, OptimizeStats]:
+    """``module`` inlined, folded and without dead code, and what that did.
+
+    Functions are only inlined if their body is at most ``inline_budget``
+    nodes, so 0 turns inlining off.
+    """
+    stats = OptimizeStats()
+    if inline_budget > 0:
+        module, stats.inlined = inline(module, inline_budget)
+    module, stats.folded = fold(module)
+    module, stats.eliminated = eliminate(module)
+    return module, stats
@@ -1,9 +1,10 @@
+import collections
 import logging
-import sys
 import typing as t
 
 import sly  # type: ignore[import]
 
+from . import models, nodes
 from .lexer import StarlaLexer
 from .models import (
     Arg,
@@ -35,43 +36,75 @@ from .models import (
     VariableDeclaration,
     WhileLoop,
 )
+from .symbols import SymbolTable
+from .tables import CachedTableParser, default_table_path
+
+
+class StarlaSyntaxError(SyntaxError):
+    """Raised by ``StarlaParser.parse`` at the first token the grammar does not
+    allow, or at a string literal with an invalid escape sequence."""
+
+    def __init__(self, token: t.Any, message: t.Optional[str] = None) -> None:
+        if message is None:
+            found = "line break" if token.type == "NEWLINE" else repr(token.value)
+            message = "Unexpected %s" % found
+        super().__init__(message)
+        self.token = token
+        # Offset of the token in the source.
+        self.index: int = token.index
 
 
 class SlyLogger:
+    """Holds what sly logs while it builds the parser until ``flush`` is called.
+
+    Messages are kept with their arguments and only formatted when flushed to a
+    logger enabled for their level. At most ``limit`` are kept, the oldest
+    being dropped first, and flushing empties the buffer, so each message is
+    logged once rather than on every parse.
+    """
+
     log = logging.getLogger(__name__)
-    buffer: t.Dict[str, t.List[str]] = {
-        "DEBUG": [],
-        "INFO": [],
-        "WARNING": [],
-        "ERROR": [],
-        "CRITICAL": [],
-    }
+
+    def __init__(self, limit: int = 100) -> None:
+        self.buffer: t.Deque[t.Tuple[int, str, tuple]] = collections.deque(maxlen=limit)
+        self.dropped = 0
+
+    def record(self, level: int, msg: str, args: tuple) -> None:
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append((level, msg, args))
 
     def debug(self, msg, *args, **kwargs):
-        self.buffer["DEBUG"].append(msg % args)
+        self.record(logging.DEBUG, msg, args)
 
     def info(self, msg, *args, **kwargs):
-        self.buffer["INFO"].append(msg % args)
+        self.record(logging.INFO, msg, args)
 
     def warning(self, msg, *args, **kwargs):
-        self.buffer["WARNING"].append(msg % args)
+        self.record(logging.WARNING, msg, args)
 
     def error(self, msg, *args, **kwargs):
-        self.buffer["ERROR"].append(msg % args)
+        self.record(logging.ERROR, msg, args)
 
     def critical(self, msg, *args, **kwargs):
-        self.buffer["CRITICAL"].append(msg % args)
+        self.record(logging.CRITICAL, msg, args)
 
     def flush(self):
-        for level, messages in self.buffer.items():
-            for msg in messages:
-                self.log.log(level=getattr(logging, level.upper()), msg=msg)
+        if self.dropped:
+            self.log.warning("%d parser messages were dropped", self.dropped)
+            self.dropped = 0
+        while self.buffer:
+            level, msg, args = self.buffer.popleft()
+            if self.log.isEnabledFor(level):
+                self.log.log(level, msg, *args)
 
 
-class StarlaParser(sly.Parser):
+class StarlaParser(CachedTableParser):
     log = SlyLogger()
+    table_cache = default_table_path("StarlaParser")
 
     tokens: t.Set[str] = StarlaLexer.tokens
+    start = "program"
 
     precedence: t.Tuple[t.Tuple[str, ...], ...] = (
         ("left", "RETURN"),  # return ( expr )
@@ -86,21 +119,35 @@ class StarlaParser(sly.Parser):
         ("left", "POWER"),  # 2 ** 3
     )
 
+    def __init__(
+        self, fast: bool = False, symbols: t.Optional[SymbolTable] = None
+    ) -> None:
+        # Build the tree from the slotted ``nodes`` instead of the pydantic models.
+        self.models = nodes if fast else models
+        self.symbols = SymbolTable() if symbols is None else symbols
+
+    # Sequences are built up in lists, which the rule that consumes the whole
+    # sequence turns into a tuple, so that each reduction is amortized O(1).
+    @_("module")
+    def program(self, p) -> Module:
+        return self.models.Module.construct(body=tuple(p.module))
+
     @_("module code")
-    def module(self, p) -> Module:
-        return Module.construct(body=p.module.body + (p.code,))
+    def module(self, p) -> t.List[t.Union["StatementType", "ExpressionType"]]:
+        p.module.append(p.code)
+        return p.module
 
     @_("module NEWLINE")
-    def module(self, p) -> Module:
+    def module(self, p) -> t.List[t.Union["StatementType", "ExpressionType"]]:
         return p.module
 
     @_("NEWLINE module")
-    def module(self, p) -> Module:
+    def module(self, p) -> t.List[t.Union["StatementType", "ExpressionType"]]:
         return p.module
 
     @_("code")
-    def module(self, p):
-        return Module.construct(body=(p.code,))
+    def module(self, p) -> t.List[t.Union["StatementType", "ExpressionType"]]:
+        return [p.code]
 
     @_("statement", "expression")
     def code(self, p) -> t.Union["StatementType", "ExpressionType"]:
@@ -121,20 +168,23 @@ class StarlaParser(sly.Parser):
     # If Statements
     @_("IF expression '{' module '}'")
     def if_statement(self, p) -> IfStatement:
-        return IfStatement.construct(conditionals=((p.expression, p.module.body),))
+        return self.models.IfStatement.construct(
+            conditionals=((p.expression, tuple(p.module)),)
+        )
 
     @_("if_statement ELIF expression '{' module '}'")
     def if_statement(self, p) -> IfStatement:
-        return IfStatement.construct(
-            conditionals=p.if_statement.conditionals + ((p.expression, p.module.body),),
+        return self.models.IfStatement.construct(
+            conditionals=p.if_statement.conditionals
+            + ((p.expression, tuple(p.module)),),
             default=p.if_statement.default,
         )
 
     @_("if_statement ELSE '{' module '}'")
     def if_statement(self, p) -> IfStatement:
-        return IfStatement.construct(
+        return self.models.IfStatement.construct(
             conditionals=p.if_statement.conditionals,
-            default=p.module.body,
+            default=tuple(p.module),
         )
 
     # Dict
@@ -143,12 +193,13 @@ class StarlaParser(sly.Parser):
         return p[0], p[2]
 
     @_("items ',' item", "items ',' NEWLINE item")
-    def items(self, p) -> t.Tuple[t.Tuple[ExpressionType, ExpressionType], ...]:
-        return p.items + (p.item,)
+    def items(self, p) -> t.List[t.Tuple[ExpressionType, ExpressionType]]:
+        p.items.append(p.item)
+        return p.items
 
     @_("item")
-    def items(self, p) -> t.Tuple[t.Tuple[ExpressionType, ExpressionType], ...]:
-        return (p.item,)
+    def items(self, p) -> t.List[t.Tuple[ExpressionType, ExpressionType]]:
+        return [p.item]
 
     @_(
         "'{' items '}'",
@@ -161,26 +212,27 @@ class StarlaParser(sly.Parser):
         "'{' NEWLINE items ',' NEWLINE '}'",
     )
     def object(self, p) -> Dict:
-        return Dict.construct(items=p.items)
+        return self.models.Dict.construct(items=tuple(p.items))
 
     @_("'{' '}'")
     def object(self, p) -> Dict:
-        return Dict.construct(items=())
+        return self.models.Dict.construct(items=())
 
     # List
     @_(
         "expression ',' expression",
         "expression ',' NEWLINE expression",
     )
-    def elements(self, p) -> t.Tuple[ExpressionType, ...]:
-        return p.expression0, p.expression1
+    def elements(self, p) -> t.List[ExpressionType]:
+        return [p.expression0, p.expression1]
 
     @_(
         "elements ',' expression",
         "elements ',' NEWLINE expression",
     )
-    def elements(self, p) -> t.Tuple[ExpressionType, ...]:
-        return p.elements + (p.expression,)
+    def elements(self, p) -> t.List[ExpressionType]:
+        p.elements.append(p.expression)
+        return p.elements
 
     @_(
         "'[' elements ']'",
@@ -202,13 +254,13 @@ class StarlaParser(sly.Parser):
     )
     def object(self, p) -> List:
         try:
-            return List.construct(items=p.elements)
+            return self.models.List.construct(items=tuple(p.elements))
         except AttributeError:
-            return List.construct(items=(p.expression,))
+            return self.models.List.construct(items=(p.expression,))
 
     @_("'[' ']'")
     def object(self, p) -> List:
-        return List.construct(items=())
+        return self.models.List.construct(items=())
 
     @_(
         "'(' expression ',' ')'",
@@ -217,7 +269,7 @@ class StarlaParser(sly.Parser):
         "'(' NEWLINE expression ',' NEWLINE ')'",
     )  # tuple
     def object(self, p) -> Tuple:
-        return Tuple.construct(items=(p.expression,))
+        return self.models.Tuple.construct(items=(p.expression,))
 
     @_(
         "'(' elements ')'",
@@ -230,11 +282,11 @@ class StarlaParser(sly.Parser):
         "'(' NEWLINE elements ',' NEWLINE ')'",
     )
     def object(self, p) -> Tuple:
-        return Tuple.construct(items=p.elements)
+        return self.models.Tuple.construct(items=tuple(p.elements))
 
     @_("'(' ')'")
     def object(self, p) -> Tuple:
-        return Tuple.construct(items=())
+        return self.models.Tuple.construct(items=())
 
     @_("function_call")
     def expression(self, p) -> ExpressionType:
@@ -242,23 +294,37 @@ class StarlaParser(sly.Parser):
 
     @_("NAMESPACE")
     def expression(self, p) -> Namespace:
-        return Namespace.construct(name=p[0], ctx="load")
+        return self.models.Namespace.construct(
+            name=self.symbols.symbol(p[0]), ctx="load", index=self.token_index(p, 0)
+        )
 
     @_("INT")
     def object(self, p) -> Int:
-        return Int.construct(value=p[0])
+        return self.models.Int.construct(value=p[0], index=self.token_index(p, 0))
 
     @_("FLOAT")
     def object(self, p) -> Float:
-        return Float.construct(value=p[0])
+        return self.models.Float.construct(value=p[0], index=self.token_index(p, 0))
 
     @_("DOUBLE")
     def object(self, p) -> Double:
-        return Double.construct(value=p[0])
+        return self.models.Double.construct(value=p[0], index=self.token_index(p, 0))
 
     @staticmethod
-    def unescape_escape_sequences(string: str):
-        return string[1:][:-1].encode().decode("unicode_escape")
+    def token_index(p, n: int) -> int:
+        """Source offset of the ``n``th symbol of a production, which must be a token."""
+        return p._slice[n].index  # pylint: disable=protected-access
+
+    @staticmethod
+    def unescape_escape_sequences(p, n: int) -> str:
+        """The value of the ``n``th symbol of a production, a string or char token."""
+        token = p._slice[n]  # pylint: disable=protected-access
+        try:
+            return token.value[1:-1].encode().decode("unicode_escape")
+        except UnicodeDecodeError as error:
+            raise StarlaSyntaxError(
+                token, "Invalid escape sequence in %s" % token.value
+            ) from error
 
     @_(
         "STRING STRING",
@@ -266,100 +332,130 @@ class StarlaParser(sly.Parser):
         "STRING CHAR",
         "CHAR CHAR",
     )
-    def string(self, p) -> String:
-        return String.construct(
-            value=self.unescape_escape_sequences(p[0])
-            + self.unescape_escape_sequences(p[1])
-        )
+    def string(self, p) -> t.List[str]:
+        return [
+            self.unescape_escape_sequences(p, 0),
+            self.unescape_escape_sequences(p, 1),
+        ]
 
     @_(
         "string STRING",
         "string CHAR",
     )
-    def string(self, p) -> String:
-        return String.construct(
-            value=p.string.value + self.unescape_escape_sequences(p[1])
-        )
+    def string(self, p) -> t.List[str]:
+        p.string.append(self.unescape_escape_sequences(p, 1))
+        return p.string
 
     @_("STRING")
     def object(self, p) -> String:
-        return String.construct(value=self.unescape_escape_sequences(p.STRING))
+        return self.models.String.construct(
+            value=self.unescape_escape_sequences(p, 0), index=self.token_index(p, 0)
+        )
 
     @_("string")
     def object(self, p) -> String:
-        return p.string
+        return self.models.String.construct(value="".join(p.string))
 
     @_("CHAR")
     def object(self, p) -> Char:
-        return Char.construct(value=self.unescape_escape_sequences(p[0]))
+        return self.models.Char.construct(
+            value=self.unescape_escape_sequences(p, 0), index=self.token_index(p, 0)
+        )
 
     @_("BOOL")
     def object(self, p) -> Bool:
-        return Bool.construct(value=p[0])
+        return self.models.Bool.construct(value=p[0], index=self.token_index(p, 0))
 
     @_("NULL")
     def object(self, p) -> Null:  # pylint: disable=unused-argument
-        return Null()
+        return self.models.Null()
 
     # Type Hints
     @_("TYPE")
     def type_hint(self, p) -> TypeHint:
-        return TypeHint.construct(type_value=p[0].replace(":", "", 1))
+        return self.symbols.type_hint(self.models.TypeHint, p[0][1:])
 
     @_("structure ',' type_hint")
-    def structure(self, p) -> t.Tuple[TypeHint, ...]:
-        return p.structure + (p.type_hint,)
+    def structure(self, p) -> t.List[TypeHint]:
+        p.structure.append(p.type_hint)
+        return p.structure
 
     @_("type_hint")
-    def structure(self, p) -> t.Tuple[TypeHint]:
-        return (p.type_hint,)
+    def structure(self, p) -> t.List[TypeHint]:
+        return [p.type_hint]
 
     @_("TYPE '[' structure ']'")
     def type_hint(self, p) -> TypeHint:
-        return TypeHint.construct(
-            type_value=p[0].replace(":", "", 1), type_structure=p[2]
-        )
+        return self.symbols.type_hint(self.models.TypeHint, p[0][1:], tuple(p[2]))
 
     # Variable Declarations
     @_("NAMESPACE type_hint EQUALS expression")
     def variable_declaration(self, p) -> VariableDeclaration:
-        return VariableDeclaration.construct(
-            target=Namespace.construct(name=p[0], ctx="store"),
+        return self.models.VariableDeclaration.construct(
+            target=self.models.Namespace.construct(
+                name=self.symbols.symbol(p[0]),
+                ctx="store",
+                index=self.token_index(p, 0),
+            ),
             annotation=p.type_hint,
             value=p.expression,
         )
 
     @_("NAMESPACE EQUALS expression")
     def variable_declaration(self, p) -> VariableDeclaration:
-        return VariableDeclaration.construct(
-            target=Namespace.construct(name=p[0], ctx="store"),
+        return self.models.VariableDeclaration.construct(
+            target=self.models.Namespace.construct(
+                name=self.symbols.symbol(p[0]),
+                ctx="store",
+                index=self.token_index(p, 0),
+            ),
             value=p.expression,
         )
 
     # Function Declarations
     @_("NAMESPACE type_hint")
-    def positional_arguments_definition(self, p) -> t.Tuple[Arg]:
-        return (Arg.construct(arg=p[0], annotation=p[1]),)
+    def positional_arguments_definition(self, p) -> t.List[Arg]:
+        return [
+            self.models.Arg.construct(
+                arg=self.symbols.symbol(p[0]),
+                annotation=p[1],
+                index=self.token_index(p, 0),
+            )
+        ]
 
     @_("positional_arguments_definition ',' NAMESPACE type_hint")
-    def positional_arguments_definition(self, p) -> t.Tuple[Arg, ...]:
-        return p.positional_arguments_definition + (
-            Arg.construct(arg=p[2], annotation=p[3]),
+    def positional_arguments_definition(self, p) -> t.List[Arg]:
+        p.positional_arguments_definition.append(
+            self.models.Arg.construct(
+                arg=self.symbols.symbol(p[2]),
+                annotation=p[3],
+                index=self.token_index(p, 2),
+            )
         )
+        return p.positional_arguments_definition
 
     @_("NAMESPACE type_hint EQUALS expression")
-    def default_arguments_definition(self, p) -> t.Tuple[DefaultArg]:
-        return (DefaultArg.construct(arg=p[0], annotation=p[1], value=p[3]),)
+    def default_arguments_definition(self, p) -> t.List[DefaultArg]:
+        return [
+            self.models.DefaultArg.construct(
+                arg=self.symbols.symbol(p[0]),
+                annotation=p[1],
+                value=p[3],
+                index=self.token_index(p, 0),
+            )
+        ]
 
     @_("default_arguments_definition ',' NAMESPACE type_hint EQUALS expression")
-    def default_arguments_definition(self, p) -> t.Tuple[DefaultArg, ...]:
-        return p.default_argument_definition + (
-            DefaultArg.construct(
-                arg=p[2],
+    def default_arguments_definition(self, p) -> t.List[DefaultArg]:
+        p.default_arguments_definition.append(
+            self.models.DefaultArg.construct(
+                arg=self.symbols.symbol(p[2]),
+                index=self.token_index(p, 2),
                 annotation=p.type_hint,
                 value=p.expression,
-            ),
+            )
         )
+        return p.default_arguments_definition
 
     @_(
         "DEFINE NAMESPACE "
@@ -368,12 +464,16 @@ class StarlaParser(sly.Parser):
         "'{' module '}'"
     )
     def function_declaration(self, p) -> FunctionDeclaration:
-        return FunctionDeclaration.construct(
-            target=Namespace.construct(name=p[1], ctx="store"),
-            arguments=p.positional_arguments_definition,
-            default_arguments=p.default_arguments_definition,
+        return self.models.FunctionDeclaration.construct(
+            target=self.models.Namespace.construct(
+                name=self.symbols.symbol(p[1]),
+                ctx="store",
+                index=self.token_index(p, 1),
+            ),
+            arguments=tuple(p.positional_arguments_definition),
+            default_arguments=tuple(p.default_arguments_definition),
             annotation=p.type_hint,
-            body=p.module.body,
+            body=tuple(p.module),
         )
 
     @_(
@@ -383,11 +483,15 @@ class StarlaParser(sly.Parser):
         "'{' module '}'"
     )
     def function_declaration(self, p) -> FunctionDeclaration:
-        return FunctionDeclaration(
-            target=Namespace.construct(name=p[1], ctx="store"),
-            arguments=p.positional_arguments_definition,
+        return self.models.FunctionDeclaration.construct(
+            target=self.models.Namespace.construct(
+                name=self.symbols.symbol(p[1]),
+                ctx="store",
+                index=self.token_index(p, 1),
+            ),
+            arguments=tuple(p.positional_arguments_definition),
             annotation=p.type_hint,
-            body=p.module.body,
+            body=tuple(p.module),
         )
 
     @_(
@@ -397,71 +501,86 @@ class StarlaParser(sly.Parser):
         "'{' module '}'"
     )
     def function_declaration(self, p) -> FunctionDeclaration:
-        return FunctionDeclaration.construct(
-            target=Namespace.construct(name=p[1], ctx="store"),
-            default_arguments=p.default_argument_definition,
+        return self.models.FunctionDeclaration.construct(
+            target=self.models.Namespace.construct(
+                name=self.symbols.symbol(p[1]),
+                ctx="store",
+                index=self.token_index(p, 1),
+            ),
+            default_arguments=tuple(p.default_arguments_definition),
             annotation=p.type_hint,
-            body=p.module.body,
+            body=tuple(p.module),
         )
 
     @_("DEFINE NAMESPACE '(' ')' ARROW type_hint '{' module '}'")
     def function_declaration(self, p) -> FunctionDeclaration:
-        return FunctionDeclaration.construct(
-            target=Namespace.construct(name=p[1], ctx="store"),
+        return self.models.FunctionDeclaration.construct(
+            target=self.models.Namespace.construct(
+                name=self.symbols.symbol(p[1]),
+                ctx="store",
+                index=self.token_index(p, 1),
+            ),
             annotation=p.type_hint,
-            body=p.module.body,
+            body=tuple(p.module),
         )
 
     @_("RETURN expression")
     def return_statement(self, p) -> Return:
-        return Return.construct(value=p[1])
+        return self.models.Return.construct(value=p[1], index=self.token_index(p, 0))
 
     # While Statements
     @_("WHILE expression '{' module '}'")
     def while_loop(self, p) -> WhileLoop:
-        return WhileLoop.construct(conditional=p[1], body=p.module.body)
+        return self.models.WhileLoop.construct(conditional=p[1], body=tuple(p.module))
 
     # For Statements
     @_("FOR NAMESPACE IN expression '{' module '}'")
     def for_loop(self, p) -> ForLoop:
-        return ForLoop.construct(
-            target=Namespace.construct(name=p[1], ctx="store"),
+        return self.models.ForLoop.construct(
+            target=self.models.Namespace.construct(
+                name=self.symbols.symbol(p[1]),
+                ctx="store",
+                index=self.token_index(p, 1),
+            ),
             iterator=p.expression,
-            body=p.module.body,
+            body=tuple(p.module),
         )
 
     # Function Calls
     @_("NAMESPACE EQUALS expression")
-    def keyword_arguments(self, p) -> t.Tuple[t.Tuple[str, "ExpressionType"]]:
-        return ((p[0], p.expression),)
+    def keyword_arguments(self, p) -> t.Dict[str, "ExpressionType"]:
+        return {self.symbols.symbol(p[0]): p.expression}
 
     @_("keyword_arguments NAMESPACE EQUALS expression")
-    def keyword_arguments(self, p) -> t.Tuple[t.Tuple[str, "ExpressionType"], ...]:
-        return p.keyword_arguments + ((p[1], p.expression),)
+    def keyword_arguments(self, p) -> t.Dict[str, "ExpressionType"]:
+        p.keyword_arguments[self.symbols.symbol(p[1])] = p.expression
+        return p.keyword_arguments
 
     @_("expression '(' keyword_arguments ')'")
     def function_call(self, p) -> Call:
-        return Call.construct(target=p.expression, kwargs=dict(p.keyword_arguments))
+        return self.models.Call.construct(
+            target=p.expression, kwargs=p.keyword_arguments
+        )
 
     @_("expression '(' elements ',' keyword_arguments ')'")
     def function_call(self, p) -> Call:
-        return Call.construct(
+        return self.models.Call.construct(
             target=p.expression,
-            args=p.elements,
+            args=tuple(p.elements),
             kwargs=p.keyword_arguments,
         )
 
     @_("expression '(' elements ')'")
     def function_call(self, p) -> Call:
-        return Call.construct(target=p.expression, args=p.elements)
+        return self.models.Call.construct(target=p.expression, args=tuple(p.elements))
 
     @_("expression '(' expression ')'")
     def function_call(self, p) -> Call:
-        return Call.construct(target=p.expression0, args=(p.expression1,))
+        return self.models.Call.construct(target=p.expression0, args=(p.expression1,))
 
     @_("expression '(' ')'")
     def function_call(self, p) -> Call:
-        return Call.construct(target=p.expression)
+        return self.models.Call.construct(target=p.expression)
 
     # Expression Operations
     @_(
@@ -478,7 +597,9 @@ class StarlaParser(sly.Parser):
         "expression POWER expression",
     )
     def expression(self, p) -> Operation:
-        return Operation.construct(op=p[1], arguments=(p[0], p[2]))
+        return self.models.Operation.construct(
+            op=self.symbols.symbol(p[1]), arguments=(p[0], p[2])
+        )
 
     @_(
         "expression NE expression",
@@ -489,7 +610,9 @@ class StarlaParser(sly.Parser):
         "expression LT expression",
     )
     def comparison(self, p) -> Comparison:
-        return Comparison.construct(op=p[1], arguments=(p.expression0, p.expression1))
+        return self.models.Comparison.construct(
+            op=self.symbols.symbol(p[1]), arguments=(p.expression0, p.expression1)
+        )
 
     @_(
         "comparison NE expression",
@@ -500,21 +623,23 @@ class StarlaParser(sly.Parser):
         "comparison LT expression",
     )
     def comparison(self, p) -> MultiComparison:
-        if isinstance(p[0], Comparison):
+        if isinstance(p[0], self.models.Comparison):
             last_comparison = p.comparison
             comparisons = (p.comparison,)
-        elif isinstance(p[0], MultiComparison):
+        elif isinstance(p[0], self.models.MultiComparison):
             last_comparison = p.comparison.comparisons[-1]
             comparisons = p.comparison.comparisons
         else:
             raise ValueError(
                 "Comparison rule returned non-comparison object! How?!?!?!"
             )
-        new_comparison = Comparison.construct(
-            op=p[1],
+        new_comparison = self.models.Comparison.construct(
+            op=self.symbols.symbol(p[1]),
             arguments=(last_comparison.arguments[-1], p.expression),
         )
-        return MultiComparison.construct(comparisons=comparisons + (new_comparison,))
+        return self.models.MultiComparison.construct(
+            comparisons=comparisons + (new_comparison,)
+        )
 
     @_("comparison")
     def expression(self, p) -> "ExpressionType":
@@ -527,7 +652,9 @@ class StarlaParser(sly.Parser):
         "BINNOT expression %prec UMINUS",
     )
     def expression(self, p) -> Operation:
-        return Operation.construct(op=p[0], arguments=(p[1],))
+        return self.models.Operation.construct(
+            op=self.symbols.symbol(p[0]), arguments=(p[1],)
+        )
 
     @_("'(' expression ')'")
     def expression(self, p) -> ExpressionType:
@@ -535,7 +662,7 @@ class StarlaParser(sly.Parser):
 
     @_("PASS")
     def pass_statement(self, p) -> Pass:  # pylint: disable=unused-argument
-        return Pass()
+        return self.models.Pass()
 
     @_("object")
     def expression(self, p) -> ObjectType:
@@ -543,7 +670,7 @@ class StarlaParser(sly.Parser):
 
     @staticmethod
     def error(token: sly.lex.Token):
+        # At the end of the input ``parse`` returns ``None`` instead.
         if token is None:
             return
-        print("Syntax error", token)
-        sys.exit(1)
+        raise StarlaSyntaxError(token)
@@ -0,0 +1,68 @@
+import typing as t
+from array import array
+from bisect import bisect_right
+
+
+class LineIndex:
+    """Offsets of the start of every line in a source string.
+
+    Built in a single pass over the source, after which any offset can be
+    turned into a ``(line, column)`` pair with a binary search. Both are
+    counted from 1, and unlike ``lineno`` on tokens only ``\\n`` starts a line.
+    """
+
+    __slots__ = ("starts",)
+
+    def __init__(self, source: str) -> None:
+        self.starts = array("Q", [0])
+        find = source.find
+        append = self.starts.append
+        newline = find("\n")
+        while newline != -1:
+            append(newline + 1)
+            newline = find("\n", newline + 1)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def line(self, offset: int) -> int:
+        return bisect_right(self.starts, offset)
+
+    def position(self, offset: int) -> t.Tuple[int, int]:
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+
+class StreamedLines:
+    """The lines of a stream, recording where each starts as it is read.
+
+    Offsets in the lines read since the last ``forget`` are turned into
+    ``(line, column)`` pairs as ``LineIndex`` does, without holding the whole
+    source. The lines must end with ``\\n``, as those of a text file do.
+    """
+
+    __slots__ = ("lines", "starts", "first", "end")
+
+    def __init__(self, lines: t.Iterable[str]) -> None:
+        self.lines = lines
+        self.starts = array("Q")
+        # The line number of ``starts[0]``, and the offset of the next line.
+        self.first = 1
+        self.end = 0
+
+    def __iter__(self) -> t.Iterator[str]:
+        for line in self.lines:
+            self.starts.append(self.end)
+            self.end += len(line)
+            yield line
+
+    def position(self, offset: int) -> t.Tuple[int, int]:
+        line = bisect_right(self.starts, offset)
+        return self.first + line - 1, offset - self.starts[line - 1] + 1
+
+    def forget(self, offset: int) -> None:
+        """Stop recording the lines before the one ``offset`` is in."""
+        line = bisect_right(self.starts, offset) - 1
+        if line > 0:
+            del self.starts[:line]
+            self.first += line
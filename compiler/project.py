@@ -0,0 +1,359 @@
+"""An index of where names are declared and used across a tree of sources.
+
+``ProjectIndex`` keeps the definitions and references of every ``.star`` file
+below a root directory in an SQLite database, so that looking a name up is a
+query on an indexed column rather than parsing every file again. Definitions
+are the targets of ``FunctionDeclaration``, ``VariableDeclaration`` and
+``ForLoop``, and every ``Arg`` and ``DefaultArg``. References are the names
+read, including the targets of calls, each with the qualified name of the
+definition it resolves to in its own file. Names that file does not declare,
+like builtins or the functions of other files, are left for ``references``
+to match by name.
+
+``update`` brings the database up to date. Files whose size and modification
+time are as they were are skipped without being read, those whose contents
+still hash the same only have their times updated, and the rest are parsed
+and indexed in worker processes, as ``compile_files`` does.
+"""
+
+import hashlib
+import os
+import sqlite3
+import typing as t
+
+from . import batch
+from .batch import find_sources, map_files
+from .cache import compiler_signature, default_cache_directory
+from .positions import LineIndex
+from .references import CALL, LOAD, SourceIndex, index
+from .resolver import resolve
+
+# Bump whenever the layout of the database changes.
+INDEX_VERSION = 1
+
+# Modules, besides those of ``compiler_signature``, that decide what is indexed.
+SIGNATURE_MODULES = ("resolver.py", "references.py", "project.py")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS definitions (
+    file INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    qualified TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    column INTEGER NOT NULL,
+    detail TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS uses (
+    file INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    target TEXT,
+    kind TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    column INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS definitions_name ON definitions (name);
+CREATE INDEX IF NOT EXISTS definitions_qualified ON definitions (qualified);
+CREATE INDEX IF NOT EXISTS definitions_file ON definitions (file);
+CREATE INDEX IF NOT EXISTS uses_name ON uses (name);
+CREATE INDEX IF NOT EXISTS uses_target ON uses (target);
+CREATE INDEX IF NOT EXISTS uses_file ON uses (file);
+"""
+
+# Rows of the definitions and uses tables, without the file.
+DefinitionRow = t.Tuple[str, str, str, int, int, str]
+UseRow = t.Tuple[str, t.Optional[str], str, int, int]
+
+
+class FileSymbols(t.NamedTuple):
+    """The names declared and used in a file, as ``index_file`` found them."""
+
+    path: str
+    mtime: int
+    size: int
+    digest: str
+    definitions: t.List[DefinitionRow]
+    uses: t.List[UseRow]
+    error: t.Optional[str] = None
+
+
+class Location(t.NamedTuple):
+    path: str
+    line: int
+    column: int
+    kind: str
+    # The declaration as it is written for definitions, and the qualified
+    # name of the definition, if the file has one, for references.
+    detail: str
+
+    def __str__(self) -> str:
+        return "%s:%d:%d: %s %s" % (
+            self.path,
+            self.line,
+            self.column,
+            self.kind,
+            self.detail,
+        )
+
+
+class Updated(t.NamedTuple):
+    files: int
+    parsed: int
+    removed: int
+
+
+def index_signature() -> str:
+    """Hash ``compiler_signature`` and the code that indexes the trees."""
+    digest = hashlib.sha256()
+    digest.update(repr((INDEX_VERSION, compiler_signature())).encode())
+    root = os.path.dirname(__file__)
+    for name in SIGNATURE_MODULES:
+        with open(os.path.join(root, name), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def default_index_path(root: str) -> str:
+    """Where the index of ``root`` is kept, in memory if caching is turned off."""
+    directory = default_cache_directory("index")
+    if directory is None:
+        return ":memory:"
+    name = hashlib.sha256(os.path.abspath(root).encode()).hexdigest()[:16]
+    return os.path.join(directory, name + ".sqlite")
+
+
+def rows(
+    found: SourceIndex, lines: LineIndex
+) -> t.Tuple[t.List[DefinitionRow], t.List[UseRow]]:
+    """The rows of the definitions and the reads and calls of a file's index."""
+    definitions = []
+    for definition in found.definitions:
+        line, column = lines.position(definition.start)
+        definitions.append(
+            (
+                definition.name,
+                definition.qualified,
+                definition.kind,
+                line,
+                column,
+                definition.detail,
+            )
+        )
+    uses = []
+    for reference in found.references:
+        if reference.kind in (LOAD, CALL):
+            line, column = lines.position(reference.start)
+            target = found.definition(reference)
+            uses.append(
+                (
+                    reference.name,
+                    None if target is None else target.qualified,
+                    reference.kind,
+                    line,
+                    column,
+                )
+            )
+    return definitions, uses
+
+
+def index_file(path: str) -> FileSymbols:
+    """Parse and index ``path`` with the compiler of this worker process.
+
+    Syntax errors are recovered from as ``parse_recovering`` does, and the
+    statements around them still indexed.
+    """
+    compiler = batch.worker
+    if compiler is None:
+        raise RuntimeError("start_worker() has not been called in this process")
+    try:
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            source = file.read()
+    except OSError as error:
+        return FileSymbols(path, 0, 0, "", [], [], str(error))
+    digest = hashlib.sha256(source).hexdigest()
+    try:
+        text = source.decode("utf-8")
+    except UnicodeDecodeError as error:
+        return FileSymbols(
+            path, stat.st_mtime_ns, stat.st_size, digest, [], [], str(error)
+        )
+    module, errors = compiler.parse_recovering(text)
+    definitions, uses = rows(index(module, resolve(module)), compiler.line_index(text))
+    return FileSymbols(
+        path,
+        stat.st_mtime_ns,
+        stat.st_size,
+        digest,
+        definitions,
+        uses,
+        "\n".join(map(str, errors)) if errors else None,
+    )
+
+
+def digest_of(path: str) -> t.Optional[str]:
+    try:
+        with open(path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class ProjectIndex:
+    """The definitions and references of the sources below ``root``, on disk.
+
+    Paths are stored relative to ``root``, and reported joined to it again.
+    The database is emptied whenever ``index_signature`` changes, as the
+    trees, or what is indexed in them, may have changed with the compiler.
+    """
+
+    def __init__(self, root: str, path: t.Optional[str] = None) -> None:
+        self.root = root
+        self.path = path or default_index_path(root)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(SCHEMA)
+        signature = index_signature()
+        found = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'signature'"
+        ).fetchone()
+        if found is None or found[0] != signature:
+            with self.connection:
+                for table in ("files", "definitions", "uses"):
+                    self.connection.execute("DELETE FROM %s" % table)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('signature', ?)", (signature,)
+                )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "ProjectIndex":
+        return self
+
+    def __exit__(self, *_: t.Any) -> None:
+        self.close()
+
+    def update(
+        self, workers: t.Optional[int] = None, lexer: str = "scanner"
+    ) -> Updated:
+        """Index every source below ``root`` that changed since the last update."""
+        known = {
+            path: (file, mtime, size, digest)
+            for file, path, mtime, size, digest in self.connection.execute(
+                "SELECT id, path, mtime, size, digest FROM files"
+            )
+        }
+        sources = {
+            os.path.relpath(path, self.root): path for path in find_sources([self.root])
+        }
+        touched = []
+        changed = []
+        for relative, path in sources.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = known.get(relative)
+            if entry is not None and entry[1:3] == (stat.st_mtime_ns, stat.st_size):
+                continue
+            if entry is not None and digest_of(path) == entry[3]:
+                touched.append((stat.st_mtime_ns, stat.st_size, entry[0]))
+            else:
+                changed.append(path)
+        removed = [known[path][0] for path in known.keys() - sources.keys()]
+
+        results = map_files(index_file, changed, workers, lexer)
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE files SET mtime = ?, size = ? WHERE id = ?", touched
+            )
+            for file in removed:
+                self.forget(file)
+            for symbols in results:
+                relative = os.path.relpath(symbols.path, self.root)
+                if relative in known:
+                    self.forget(known[relative][0])
+                if not symbols.digest:
+                    # The file could not be read, so is indexed again next time.
+                    continue
+                self.store(relative, symbols)
+        return Updated(len(sources), len(changed), len(removed))
+
+    def forget(self, file: int) -> None:
+        for table, column in (
+            ("definitions", "file"),
+            ("uses", "file"),
+            ("files", "id"),
+        ):
+            self.connection.execute(
+                "DELETE FROM %s WHERE %s = ?" % (table, column), (file,)
+            )
+
+    def store(self, relative: str, symbols: FileSymbols) -> None:
+        file = self.connection.execute(
+            "INSERT INTO files (path, mtime, size, digest, error)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (relative, symbols.mtime, symbols.size, symbols.digest, symbols.error),
+        ).lastrowid
+        self.connection.executemany(
+            "INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((file, *row) for row in symbols.definitions),
+        )
+        self.connection.executemany(
+            "INSERT INTO uses VALUES (?, ?, ?, ?, ?, ?)",
+            ((file, *row) for row in symbols.uses),
+        )
+
+    def locations(self, query: str, name: str) -> t.List[Location]:
+        return [
+            Location(os.path.join(self.root, path), line, column, kind, detail)
+            for path, line, column, kind, detail in self.connection.execute(
+                query, (name,)
+            )
+        ]
+
+    def definitions(self, name: str) -> t.List[Location]:
+        """Where ``name`` is declared, in any scope, or only in the function its
+        qualified name, like ``main.x``, gives."""
+        column = "qualified" if "." in name else "name"
+        return self.locations(
+            "SELECT path, line, column, kind, detail FROM definitions"
+            " JOIN files ON files.id = definitions.file"
+            " WHERE %s = ? ORDER BY path, line, column" % column,
+            name,
+        )
+
+    def references(self, name: str) -> t.List[Location]:
+        """Where ``name`` is read or called.
+
+        A qualified name only finds the references its file resolves to that
+        definition. Any other name finds every reference to a name like it,
+        as names a file does not declare may be declared in another.
+        """
+        column = "target" if "." in name else "name"
+        return self.locations(
+            "SELECT path, line, column, kind, coalesce(target, name) FROM uses"
+            " JOIN files ON files.id = uses.file"
+            " WHERE %s = ? ORDER BY path, line, column" % column,
+            name,
+        )
+
+    def errors(self) -> t.List[t.Tuple[str, str]]:
+        """The files that had syntax errors when they were indexed, and the errors."""
+        return [
+            (os.path.join(self.root, path), error)
+            for path, error in self.connection.execute(
+                "SELECT path, error FROM files WHERE error IS NOT NULL ORDER BY path"
+            )
+        ]
@@ -0,0 +1,126 @@
+"""Parsing that carries on past syntax errors, to report all of them at once.
+
+The tokens are split into statements at the line breaks outside of any
+brackets, as ``incremental`` does, and each statement is parsed on its own.
+A statement that does not parse is parsed again with each of its
+``{ module }`` blocks replaced by ``pass``: if that works the error is in a
+block, and the blocks are recovered in the same way, so parsing resumes at
+the next line break or at the ``}`` closing the block. Otherwise the
+statement is replaced by an ``Error`` node and the error is reported.
+"""
+
+import typing as t
+
+from .incremental import BLOCKS, WITH_BLOCK, block_groups, statement_groups
+from .parser import StarlaSyntaxError
+from .positions import LineIndex
+from .tokens import TokenView
+
+
+class ParseError(t.NamedTuple):
+    message: str
+    line: int = 0
+    column: int = 0
+
+    def __str__(self) -> str:
+        return "%d:%d: %s" % (self.line, self.column, self.message)
+
+
+class Recovered(t.NamedTuple):
+    """A module parsed from a source, with ``Error`` nodes where it did not parse."""
+
+    module: t.Any
+    errors: t.List[ParseError]
+
+
+class Recovery:
+    """Parses statements with ``parser``, collecting the ``(message, offset)`` of
+    every syntax error in ``errors``."""
+
+    def __init__(self, parser) -> None:
+        self.parser = parser
+        self.errors: t.List[t.Tuple[str, int]] = []
+
+    def body(self, tokens: t.Sequence[TokenView]) -> tuple:
+        return tuple(
+            node for group in statement_groups(tokens) for node in self.group(group)
+        )
+
+    def group(self, tokens: t.List[TokenView]) -> t.Sequence[t.Any]:
+        """The statements parsed from ``tokens``, or an ``Error`` node in their place."""
+        try:
+            module = self.parser.parse(iter(tokens))
+        except StarlaSyntaxError as error:
+            failure = (error.msg, error.index)
+        else:
+            if module is not None:
+                return module.body
+            last = next(
+                (token for token in reversed(tokens) if token.type != "NEWLINE"),
+                tokens[-1],
+            )
+            failure = ("Incomplete statement", last.index + len(last.value))
+        statement = self.blocks(tokens)
+        if statement is None:
+            self.errors.append(failure)
+            return (
+                self.parser.models.Error.construct(
+                    message=failure[0], index=failure[1]
+                ),
+            )
+        return (statement,)
+
+    def blocks(self, tokens: t.List[TokenView]) -> t.Any:
+        """The statement of ``tokens`` with its blocks recovered, if the rest parses."""
+        groups = block_groups(tokens)
+        if not groups:
+            return None
+        replaced: t.List[TokenView] = []
+        start = 0
+        for opening, closing in groups:
+            token = tokens[opening]
+            replaced.extend(tokens[start : opening + 1])
+            replaced.append(TokenView("PASS", "pass", token.lineno, token.index + 1))
+            start = closing
+        replaced.extend(tokens[start:])
+        try:
+            module = self.parser.parse(iter(replaced))
+        except StarlaSyntaxError:
+            return None
+        if module is None or len(module.body) != 1:
+            return None
+        statement = module.body[0]
+        name = type(statement).__name__
+        if name not in BLOCKS or len(BLOCKS[name](statement)) != len(groups):
+            return None
+        found = len(self.errors)
+        for block, (opening, closing) in enumerate(groups):
+            body = self.body(tokens[opening + 1 : closing])
+            statement = WITH_BLOCK[name](statement, block, body)
+        # Every block parsing on its own is not enough, as a block that starts
+        # with a dictionary may be told apart from one only by what follows.
+        return statement if len(self.errors) > found else None
+
+
+class RecoveringParser:
+    """Wraps ``parser`` to parse modules past their syntax errors, for
+    ``SegmentedModule`` to reparse edited sources with."""
+
+    def __init__(self, parser) -> None:
+        self.parser = parser
+        self.models = parser.models
+
+    def parse(self, tokens: t.Iterable[TokenView]) -> t.Any:
+        body = Recovery(self.parser).body(list(tokens))
+        return self.models.Module.construct(body=body)
+
+
+def recover(tokens: t.Sequence[TokenView], parser, line_index: LineIndex) -> Recovered:
+    """The module of ``tokens``, which ``line_index`` positions the errors in."""
+    recovery = Recovery(parser)
+    module = parser.models.Module.construct(body=recovery.body(tokens))
+    errors = [
+        ParseError(message, *line_index.position(offset))
+        for message, offset in recovery.errors
+    ]
+    return Recovered(module, errors)
@@ -0,0 +1,240 @@
+"""Where the names of a module are declared, and where each of them is used.
+
+``Indexer`` walks a resolved module and records a ``Definition`` for the first
+declaration of every name in each scope: the target of a
+``VariableDeclaration``, ``FunctionDeclaration`` or ``ForLoop``, and every
+``Arg`` and ``DefaultArg``. Every other ``Namespace`` becomes a ``Reference``
+to the definition the resolver binds it to, including the targets of later
+assignments to the same name, and records whether the name is read, called
+or assigned. Both are positioned by the offset of the name in the source, so
+``SourceIndex.at`` finds what is under a cursor with a binary search.
+"""
+
+import bisect
+import typing as t
+
+from . import models, nodes
+from .incremental import fields
+from .resolver import FREE, GLOBAL, LOCAL, Resolution, Scope
+
+FUNCTION = "function"
+VARIABLE = "variable"
+ARGUMENT = "argument"
+# How a reference uses a name: read, called, or assigned again.
+LOAD = "load"
+CALL = "call"
+STORE = "store"
+
+
+class Definition(t.NamedTuple):
+    name: str
+    kind: str
+    start: int
+    # The qualified name of the function the name is local to, "" in the module.
+    scope: str
+    # The declaration as it is written, without values or bodies.
+    detail: str
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.name)
+
+    @property
+    def qualified(self) -> str:
+        return "%s.%s" % (self.scope, self.name) if self.scope else self.name
+
+
+class Reference(t.NamedTuple):
+    name: str
+    start: int
+    # The position of the definition in ``SourceIndex.definitions``, if the
+    # name is declared in the module rather than a builtin or undefined.
+    definition: t.Optional[int]
+    kind: str = LOAD
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.name)
+
+
+def hint(node: t.Any) -> str:
+    """A type hint as it is written in the source, like ``:list[:int]``."""
+    structure = getattr(node, "type_structure", None)
+    if not structure:
+        return ":" + node.type_value
+    return ":%s[%s]" % (node.type_value, ", ".join(map(hint, structure)))
+
+
+def signature(node: t.Any) -> str:
+    arguments = [
+        "%s %s" % (argument.arg, hint(argument.annotation))
+        for argument in node.arguments or ()
+    ]
+    arguments.extend(
+        "%s %s = ..." % (argument.arg, hint(argument.annotation))
+        for argument in node.default_arguments or ()
+    )
+    return "def %s (%s) -> %s" % (
+        node.target.name,
+        ", ".join(arguments),
+        hint(node.annotation),
+    )
+
+
+class SourceIndex:
+    """The definitions and references of a module, sorted by where they start."""
+
+    def __init__(
+        self, definitions: t.List[Definition], references: t.List[Reference]
+    ) -> None:
+        self.definitions = definitions
+        self.references = references
+        self.names: t.List[t.Union[Definition, Reference]] = sorted(
+            (*definitions, *references), key=lambda name: name.start
+        )
+        self.starts = [name.start for name in self.names]
+
+    def at(self, offset: int) -> t.Optional[t.Union[Definition, Reference]]:
+        """The name ``offset`` is in, or just after."""
+        position = bisect.bisect_right(self.starts, offset) - 1
+        if position < 0:
+            return None
+        name = self.names[position]
+        return name if offset <= name.end else None
+
+    def definition(
+        self, name: t.Union[Definition, Reference]
+    ) -> t.Optional[Definition]:
+        if isinstance(name, Definition):
+            return name
+        return None if name.definition is None else self.definitions[name.definition]
+
+    def references_to(self, definition: Definition) -> t.List[Reference]:
+        position = self.definitions.index(definition)
+        return [
+            reference
+            for reference in self.references
+            if reference.definition == position
+        ]
+
+
+class Indexer:
+    """Collects the definitions and references of a module with its ``resolution``."""
+
+    def __init__(self, resolution: Resolution) -> None:
+        self.resolution = resolution
+        self.definitions: t.List[Definition] = []
+        # The definition of each name, keyed by the ``id`` of its scope.
+        self.declared: t.Dict[t.Tuple[int, str], int] = {}
+        # References are only matched to definitions once all are known, as
+        # functions may use names declared after them.
+        self.found: t.List[t.Tuple[str, int, t.Optional[t.Tuple[int, str]], str]] = []
+        # The ``id`` of every name that is the target of a call.
+        self.calls: t.Set[int] = set()
+
+    def index(self, module: t.Any) -> SourceIndex:
+        self.visit(module.body, self.resolution.module, "")
+        references = [
+            Reference(
+                name, start, None if key is None else self.declared.get(key), kind
+            )
+            for name, start, key, kind in self.found
+        ]
+        return SourceIndex(self.definitions, references)
+
+    def visit(self, value: t.Any, scope: Scope, prefix: str) -> None:
+        """Index ``value``, in ``scope``, of the function qualified as ``prefix``."""
+        if isinstance(value, (tuple, list)):
+            for item in value:
+                self.visit(item, scope, prefix)
+        elif isinstance(value, dict):
+            for item in value.values():
+                self.visit(item, scope, prefix)
+        elif isinstance(value, (nodes.Node, models.Ast)):
+            self.visit_node(value, scope, prefix)
+
+    def visit_node(self, node: t.Any, scope: Scope, prefix: str) -> None:
+        kind = type(node).__name__
+        if kind == "Namespace":
+            self.use(node, scope)
+        elif kind == "VariableDeclaration":
+            detail = node.target.name
+            if node.annotation is not None:
+                detail += " " + hint(node.annotation)
+            self.define(
+                node.target.name,
+                VARIABLE,
+                node.target.index,
+                scope,
+                prefix,
+                detail,
+            )
+            self.visit(node.value, scope, prefix)
+        elif kind == "ForLoop":
+            target = node.target
+            self.define(target.name, VARIABLE, target.index, scope, prefix, target.name)
+            self.visit((node.iterator, node.body, node.orelse), scope, prefix)
+        elif kind == "FunctionDeclaration":
+            self.visit_function(node, scope, prefix)
+        else:
+            if kind == "Call":
+                self.calls.add(id(node.target))
+            for field in fields(node):
+                self.visit(getattr(node, field, None), scope, prefix)
+
+    def visit_function(self, node: t.Any, scope: Scope, prefix: str) -> None:
+        for argument in node.default_arguments or ():
+            self.visit(argument.value, scope, prefix)
+        name = node.target.name
+        self.define(name, FUNCTION, node.target.index, scope, prefix, signature(node))
+        local = self.resolution.scope(node)
+        qualified = "%s.%s" % (prefix, name) if prefix else name
+        for argument in (node.arguments or ()) + (node.default_arguments or ()):
+            detail = "%s %s" % (argument.arg, hint(argument.annotation))
+            self.define(
+                argument.arg, ARGUMENT, argument.index, local, qualified, detail
+            )
+        self.visit(node.body, local, qualified)
+
+    def define(  # pylint: disable=too-many-arguments
+        self,
+        name: str,
+        kind: str,
+        start: t.Optional[int],
+        scope: Scope,
+        prefix: str,
+        detail: str,
+    ) -> None:
+        if start is None:
+            return
+        key = (id(scope), name)
+        if key in self.declared:
+            self.found.append((name, start, key, STORE))
+            return
+        self.declared[key] = len(self.definitions)
+        self.definitions.append(Definition(name, kind, start, prefix, detail))
+
+    def use(self, node: t.Any, scope: Scope) -> None:
+        if node.index is None:
+            return
+        binding = self.resolution.binding(node)
+        owner: t.Optional[Scope] = None
+        if binding.kind == LOCAL:
+            owner = scope
+        elif binding.kind == FREE:
+            owner = scope.parent
+            for _ in range(binding.depth):
+                owner = owner.parent if owner is not None else None
+        elif binding.kind == GLOBAL:
+            owner = self.resolution.module
+        key = None if owner is None else (id(owner), node.name)
+        if id(node) in self.calls:
+            kind = CALL
+        else:
+            kind = LOAD if node.ctx == "load" else STORE
+        self.found.append((node.name, node.index, key, kind))
+
+
+def index(module: t.Any, resolution: Resolution) -> SourceIndex:
+    """The definitions and references of ``module``, which ``resolution`` resolves."""
+    return Indexer(resolution).index(module)
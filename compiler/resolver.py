@@ -0,0 +1,185 @@
+"""Name resolution over parsed modules.
+
+``Resolver`` gives the module and every ``FunctionDeclaration`` a ``Scope``
+that numbers the names assigned in it densely: parameters first, then the
+other names in the order they are declared. Every ``Namespace``, and every
+parameter, is then bound to where its value lives:
+
+* ``local``: a slot of the function it is used in,
+* ``free``: a slot of a function around it, ``depth`` functions out,
+* ``global``: a slot of the module,
+* ``builtin``: the builtin of that name, numbered as the builtins are given.
+
+Assigning a name anywhere in a function makes it local to the whole function,
+as the interpreter does, so reading it before it is assigned fails even if a
+global has the same name. Names declared nowhere are reported, and given a
+module slot so that loading them fails at run time like any unset global.
+"""
+
+import typing as t
+
+from . import models, nodes
+from .incremental import fields
+from .interpreter import builtin_functions, declared_names
+from .positions import LineIndex
+
+LOCAL = "local"
+FREE = "free"
+GLOBAL = "global"
+BUILTIN = "builtin"
+
+
+class Scope:
+    """The slots of the names assigned in a module or in a function."""
+
+    __slots__ = ("name", "parent", "slots")
+
+    def __init__(
+        self, name: str, parent: t.Optional["Scope"], names: t.Iterable[str]
+    ) -> None:
+        self.name = name
+        self.parent = parent
+        self.slots: t.Dict[str, int] = {}
+        for local in names:
+            self.slot(local)
+
+    def __repr__(self) -> str:
+        return "<scope %s>" % self.name
+
+    @property
+    def names(self) -> t.Tuple[str, ...]:
+        """The names of the slots, in slot order."""
+        return tuple(self.slots)
+
+    def slot(self, name: str) -> int:
+        return self.slots.setdefault(name, len(self.slots))
+
+
+class Binding(t.NamedTuple):
+    kind: str
+    slot: int
+    depth: int = 0
+
+
+class ResolveError(t.NamedTuple):
+    message: str
+    line: int = 0
+    column: int = 0
+
+    def __str__(self) -> str:
+        return "%d:%d: %s" % (self.line, self.column, self.message)
+
+
+class Resolution(t.NamedTuple):
+    """The scopes and bindings of a module, and its undefined names.
+
+    ``scopes`` and ``bindings`` are keyed by the ``id`` of the
+    ``FunctionDeclaration`` and of the ``Namespace``, ``Arg`` or
+    ``DefaultArg`` nodes, so they are only meaningful while the module that
+    was resolved is alive and unchanged.
+    """
+
+    module: Scope
+    scopes: t.Dict[int, Scope]
+    bindings: t.Dict[int, Binding]
+    errors: t.List[ResolveError]
+
+    def scope(self, node: t.Any) -> Scope:
+        return self.scopes[id(node)]
+
+    def binding(self, node: t.Any) -> Binding:
+        return self.bindings[id(node)]
+
+
+class Resolver:
+    """Binds the names of a module to slots, in the order a code generator emits them."""
+
+    def __init__(
+        self,
+        builtins: t.Optional[t.Iterable[str]] = None,
+        line_index: t.Optional[LineIndex] = None,
+    ) -> None:
+        if builtins is None:
+            builtins = builtin_functions(print)
+        self.builtins = {name: slot for slot, name in enumerate(builtins)}
+        self.line_index = line_index
+        self.module = Scope("<module>", None, ())
+        self.scopes: t.Dict[int, Scope] = {}
+        self.bindings: t.Dict[int, Binding] = {}
+        self.errors: t.List[ResolveError] = []
+        self.undefined: t.Set[str] = set()
+
+    def resolve(self, module: t.Any) -> Resolution:
+        self.module = Scope("<module>", None, declared_names(module.body))
+        self.visit(module.body, self.module)
+        return Resolution(self.module, self.scopes, self.bindings, self.errors)
+
+    def visit(self, value: t.Any, scope: Scope) -> None:
+        if isinstance(value, (tuple, list)):
+            for item in value:
+                self.visit(item, scope)
+        elif isinstance(value, dict):
+            for item in value.values():
+                self.visit(item, scope)
+        elif isinstance(value, (nodes.Node, models.Ast)):
+            kind = type(value).__name__
+            if kind == "Namespace":
+                self.bind(value, scope)
+            elif kind == "FunctionDeclaration":
+                self.visit_function(value, scope)
+            else:
+                for field in fields(value):
+                    self.visit(getattr(value, field, None), scope)
+
+    def visit_function(self, node: t.Any, scope: Scope) -> None:
+        arguments = (node.arguments or ()) + (node.default_arguments or ())
+        # Default values are evaluated where the function is declared.
+        for argument in node.default_arguments or ():
+            self.visit(argument.value, scope)
+        local = Scope(
+            node.target.name,
+            scope,
+            [argument.arg for argument in arguments] + list(declared_names(node.body)),
+        )
+        self.scopes[id(node)] = local
+        for argument in arguments:
+            self.bindings[id(argument)] = Binding(LOCAL, local.slots[argument.arg])
+        self.visit(node.body, local)
+        self.bind(node.target, scope)
+
+    def bind(self, node: t.Any, scope: Scope) -> None:
+        self.bindings[id(node)] = self.lookup(node, scope)
+
+    def lookup(self, node: t.Any, scope: Scope) -> Binding:
+        name = node.name
+        module = self.module
+        if scope is not module:
+            if name in scope.slots:
+                return Binding(LOCAL, scope.slots[name])
+            depth = 0
+            enclosing = scope.parent
+            while enclosing is not None and enclosing is not module:
+                if name in enclosing.slots:
+                    return Binding(FREE, enclosing.slots[name], depth)
+                enclosing = enclosing.parent
+                depth += 1
+        if name in module.slots and name not in self.undefined:
+            return Binding(GLOBAL, module.slots[name])
+        if name in self.builtins:
+            return Binding(BUILTIN, self.builtins[name])
+        self.undefined.add(name)
+        line = column = 0
+        if node.index is not None and self.line_index is not None:
+            line, column = self.line_index.position(node.index)
+        self.errors.append(ResolveError("Name %r is not defined" % name, line, column))
+        return Binding(GLOBAL, module.slot(name))
+
+
+def resolve(
+    module: t.Any,
+    source: t.Optional[str] = None,
+    builtins: t.Optional[t.Iterable[str]] = None,
+) -> Resolution:
+    """The scopes and bindings of ``module``, with undefined names positioned in ``source``."""
+    line_index = None if source is None else LineIndex(source)
+    return Resolver(builtins, line_index).resolve(module)
@@ -0,0 +1,42 @@
+import typing as t
+
+
+class SymbolTable:
+    """Canonical copies of the names, operators and type hints in parsed code.
+
+    Every identifier and operator string goes through ``symbol``, so equal
+    strings across all trees built with the same table are the same object.
+    ``type_hint`` does the same for whole ``TypeHint`` trees: ``:list[:int]`` is
+    built once and then shared by every annotation that spells it, so those
+    nodes must be treated as immutable.
+    """
+
+    def __init__(self) -> None:
+        self.symbols: t.Dict[str, str] = {}
+        self.type_hints: t.Dict[t.Tuple[t.Any, str, t.Optional[tuple]], t.Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.symbols) + len(self.type_hints)
+
+    def symbol(self, value: str) -> str:
+        return self.symbols.setdefault(value, value)
+
+    def type_hint(
+        self, model: t.Any, type_value: str, type_structure: t.Optional[tuple] = None
+    ) -> t.Any:
+        """The shared ``model`` for a hint whose ``type_structure`` is already shared."""
+        key = (
+            model,
+            type_value,
+            None if type_structure is None else tuple(map(id, type_structure)),
+        )
+        hint = self.type_hints.get(key)
+        if hint is None:
+            if type_structure is None:
+                hint = model.construct(type_value=self.symbol(type_value))
+            else:
+                hint = model.construct(
+                    type_value=self.symbol(type_value), type_structure=type_structure
+                )
+            self.type_hints[key] = hint
+        return hint
@@ -0,0 +1,144 @@
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import typing as t
+
+import sly  # type: ignore[import]
+from sly.yacc import LRTable  # type: ignore[import]
+
+# Bump whenever the layout of the cached artifact changes.
+TABLE_VERSION = 1
+
+log = logging.getLogger(__name__)
+
+
+class CachedTable:
+    """The parts of a sly ``LRTable`` that ``sly.Parser.parse`` reads at runtime."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        lr_action: t.Dict[int, t.Dict[str, int]],
+        lr_goto: t.Dict[int, t.Dict[str, int]],
+        defaulted_states: t.Dict[int, int],
+        sr_conflicts: t.List[t.Tuple[int, str, str]],
+        rr_conflicts: t.List[t.Tuple[int, str, str]],
+    ) -> None:
+        self.lr_action = lr_action
+        self.lr_goto = lr_goto
+        self.defaulted_states = defaulted_states
+        self.sr_conflicts = sr_conflicts
+        self.rr_conflicts = rr_conflicts
+
+
+def grammar_signature(grammar: "sly.yacc.Grammar") -> str:
+    """Hash everything the LALR construction depends on."""
+    digest = hashlib.sha256()
+    digest.update(repr((TABLE_VERSION, sly.__version__, grammar.Start)).encode())
+    digest.update(repr(sorted(grammar.Precedence.items())).encode())
+    for production in grammar.Productions:
+        digest.update(
+            repr((production.name, production.prod, production.prec)).encode()
+        )
+    return digest.hexdigest()
+
+
+def default_table_path(name: str) -> t.Optional[str]:
+    if os.environ.get("STARLA_NO_TABLE_CACHE"):
+        return None
+    if os.environ.get("STARLA_TABLE_CACHE"):
+        return os.environ["STARLA_TABLE_CACHE"]
+    return os.path.join(
+        os.path.dirname(__file__),
+        "__pycache__",
+        "%s.%s.tab" % (name, sys.implementation.cache_tag),
+    )
+
+
+def load_table(path: str, signature: str) -> t.Optional[CachedTable]:
+    try:
+        with open(path, "rb") as file:
+            data = marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get("signature") != signature:
+        return None
+    return CachedTable(
+        data["action"],
+        data["goto"],
+        data["defaulted"],
+        data["sr_conflicts"],
+        data["rr_conflicts"],
+    )
+
+
+def dump_table(path: str, signature: str, table: LRTable) -> None:
+    data = {
+        "signature": signature,
+        "action": table.lr_action,
+        "goto": table.lr_goto,
+        "defaulted": table.defaulted_states,
+        "sr_conflicts": table.sr_conflicts,
+        "rr_conflicts": table.rr_conflicts,
+    }
+    temporary = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(temporary, "wb") as file:
+            marshal.dump(data, file)
+        os.replace(temporary, path)
+    except OSError as error:
+        log.debug("Could not write parser tables to %s: %s", path, error)
+
+
+def build_table(
+    grammar: "sly.yacc.Grammar", path: t.Optional[str]
+) -> t.Union[LRTable, CachedTable]:
+    """Load the LALR tables for ``grammar`` from ``path``, or build and store them."""
+    if path is None:
+        return LRTable(grammar)
+    signature = grammar_signature(grammar)
+    table = load_table(path, signature)
+    if table is None:
+        table = LRTable(grammar)
+        dump_table(path, signature, table)
+    return table
+
+
+class CachedTableParser(sly.Parser):
+    """A ``sly.Parser`` whose LALR tables are persisted between processes.
+
+    Subclasses set ``table_cache`` to a file path, or ``None`` to always
+    regenerate the tables. The grammar itself is still built from the ``@_``
+    rules, so the production functions stay bound to the class.
+    """
+
+    table_cache: t.Optional[str] = None
+
+    @classmethod
+    def _build(cls, definitions):
+        # pylint: disable=no-member
+        if vars(cls).get("_build", False):
+            return
+
+        rules = cls._Parser__collect_rules(definitions)
+        if not cls._Parser__validate_specification():
+            raise sly.yacc.YaccError("Invalid parser specification")
+
+        cls._Parser__build_grammar(rules)
+        cls._lrtable = build_table(cls._grammar, cls.table_cache)
+
+        num_sr = len(cls._lrtable.sr_conflicts)
+        if num_sr != getattr(cls, "expected_shift_reduce", None):
+            if num_sr == 1:
+                cls.log.warning("1 shift/reduce conflict")
+            elif num_sr > 1:
+                cls.log.warning("%d shift/reduce conflicts", num_sr)
+
+        num_rr = len(cls._lrtable.rr_conflicts)
+        if num_rr != getattr(cls, "expected_reduce_reduce", None):
+            if num_rr == 1:
+                cls.log.warning("1 reduce/reduce conflict")
+            elif num_rr > 1:
+                cls.log.warning("%d reduce/reduce conflicts", num_rr)
@@ -0,0 +1,164 @@
+import typing as t
+from array import array
+
+from .lexer import StarlaLexer  # type: ignore[attr-defined]
+from .positions import LineIndex
+
+TOKEN_TYPES: t.Tuple[str, ...] = tuple(
+    sorted(
+        StarlaLexer.tokens
+        | StarlaLexer.literals
+        | set(StarlaLexer.reserved_tokens.values())
+    )
+)
+TYPE_IDS: t.Dict[str, int] = {name: i for i, name in enumerate(TOKEN_TYPES)}
+
+
+class TokenView:
+    """A single token of a ``TokenStream``, created only when it is iterated over.
+
+    It has the same ``type``, ``value``, ``lineno`` and ``index`` attributes as a
+    ``sly.lex.Token``, so the parser can consume it directly.
+    """
+
+    __slots__ = ("type", "value", "lineno", "index")
+
+    def __init__(self, type_: str, value: str, lineno: int, index: int) -> None:
+        self.type = type_
+        self.value = value
+        self.lineno = lineno
+        self.index = index
+
+    def __repr__(self) -> str:
+        return (
+            f"Token(type={self.type!r}, value={self.value!r}, "
+            f"lineno={self.lineno}, index={self.index})"
+        )
+
+
+class TokenStream:
+    """The tokens of a source string, stored as parallel typed arrays."""
+
+    __slots__ = ("source", "types", "starts", "ends", "lines", "_line_index")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.types = array("B")
+        self.starts = array("Q")
+        self.ends = array("Q")
+        self.lines = array("L")
+        self._line_index: t.Optional[LineIndex] = None
+
+    @classmethod
+    def scan(cls, source: str, lexer) -> "TokenStream":
+        """Fill a stream from ``lexer.scan``'s ``(type, start, end, lineno)`` tuples."""
+        stream = cls(source)
+        type_ids = TYPE_IDS
+        types = stream.types.append
+        starts = stream.starts.append
+        ends = stream.ends.append
+        lines = stream.lines.append
+        for token_type, start, end, lineno in lexer.scan(source):
+            types(type_ids[token_type])
+            starts(start)
+            ends(end)
+            lines(lineno)
+        return stream
+
+    @property
+    def line_index(self) -> LineIndex:
+        if self._line_index is None:
+            self._line_index = LineIndex(self.source)
+        return self._line_index
+
+    def position(self, position: int) -> t.Tuple[int, int]:
+        """Line and column of the token at ``position``."""
+        return self.line_index.position(self.starts[position])
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, position: int) -> TokenView:
+        start = self.starts[position]
+        return TokenView(
+            TOKEN_TYPES[self.types[position]],
+            self.source[start : self.ends[position]],
+            self.lines[position],
+            start,
+        )
+
+    def __iter__(self) -> t.Iterator[TokenView]:
+        source = self.source
+        for type_id, start, end, lineno in zip(
+            self.types, self.starts, self.ends, self.lines
+        ):
+            yield TokenView(TOKEN_TYPES[type_id], source[start:end], lineno, start)
+
+
+OPENING = {"(", "[", "{"}
+CLOSING = {")", "]", "}"}
+MATCHING = {")": "(", "]": "[", "}": "{"}
+
+
+def matches(token_type: str, opened: t.List[str]) -> bool:
+    """Track the brackets ``opened`` so far, and whether ``token_type`` was one."""
+    if token_type in OPENING:
+        opened.append(token_type)
+        return True
+    if token_type in CLOSING and opened and opened[-1] == MATCHING[token_type]:
+        opened.pop()
+        return True
+    return False
+
+
+def split_statements(
+    lines: t.Iterable[str], lexer, lineno: int = 1, offset: int = 0
+) -> t.Iterator[t.List[TokenView]]:
+    """Group the tokens of ``lines`` into chunks of whole top-level statements.
+
+    Tokens never span lines, and a line that ends outside of any brackets ends
+    every statement on it, so each chunk can be parsed as a module on its own
+    while only one statement's worth of source is held in memory. A chunk is
+    yielded once the token after it has been read, and the tokens, offsets and
+    line numbers are the same as for the whole input, except that an illegal
+    character only ends the tokens of its own line. ``lineno`` and ``offset``
+    are those of the first line, for inputs that start part way into a file.
+    Brackets are matched as ``matches`` does, so a stray closing bracket
+    neither ends nor extends a chunk.
+    """
+    chunk: t.List[TokenView] = []
+    # The chunk before ``chunk``, once it is known to be complete.
+    finished: t.List[TokenView] = []
+    has_code = False
+    opened: t.List[str] = []
+    for line in lines:
+        for token_type, start, end, token_lineno in lexer.scan(line, lineno):
+            if token_type == "NEWLINE":
+                lineno = token_lineno + end - start
+                last = finished[-1] if finished else chunk[-1] if chunk else None
+                if (
+                    last is not None
+                    and last.type == "NEWLINE"
+                    and last.index + len(last.value) == offset + start
+                ):
+                    # Runs of line breaks are a single token.
+                    last.value += line[start:end]
+                    continue
+            else:
+                has_code = True
+                matches(token_type, opened)
+            if finished:
+                yield finished
+                finished = []
+            chunk.append(
+                TokenView(token_type, line[start:end], token_lineno, offset + start)
+            )
+        offset += len(line)
+        if has_code and not opened:
+            finished = chunk
+            chunk = []
+            has_code = False
+    if finished:
+        yield finished
+    if has_code:
+        yield chunk
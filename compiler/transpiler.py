@@ -0,0 +1,409 @@
+"""Lowering parsed modules to Python code objects.
+
+``Transpiler`` maps every node type to the Python ``ast`` node that behaves
+the same, through a dispatch table keyed by class, and the result is handed to
+``compile()`` so that CPython's own bytecode runs the program. Chained
+comparisons are Python's chained comparisons, ``||``, ``&&`` and ``^`` are
+the bitwise operators, and dividing two ints calls a helper doing floor
+division, unless the types ``typecheck.prove`` finds show which division the
+operands need.
+
+The top-level statements become the body of a function declaring every
+module level name ``global``, so that ``return`` works at the top level too.
+``CodeCache`` keeps the marshalled code objects on disk, addressed by a hash
+of the source, so unchanged programs are neither parsed nor compiled again.
+"""
+
+import ast
+import hashlib
+import importlib.util
+import marshal
+import sys
+import types
+import typing as t
+
+from . import deadcode, folding, inlining, optimizer, resolver, typecheck
+from .bytecode import LITERALS, literal
+from .cache import DEFAULT_MAX_SIZE, DiskCache, compiler_signature
+from .compiler import StarlaCompiler
+from .inlining import DEFAULT_BUDGET
+from .interpreter import (
+    StarlaRuntimeError,
+    both,
+    builtin_functions,
+    floor_or_true_divide,
+    format_value,
+)
+from .parser import StarlaSyntaxError
+from .resolver import declared_names
+from .typecheck import INTEGERS, NUMBERS, TypeCheck, prove
+
+# Helpers the generated code calls, named so that no program can refer to them.
+DIVIDE = "$divide"
+MODULE = "$module"
+# Names Python's ``ast`` does not take as identifiers, given a "$" prefix.
+RESERVED = frozenset(("None", "True", "False", "__debug__"))
+
+BINARY_OPERATORS: t.Dict[str, t.Type[ast.operator]] = {
+    "+": ast.Add,
+    "-": ast.Sub,
+    "*": ast.Mult,
+    "%": ast.Mod,
+    "**": ast.Pow,
+    "||": ast.BitOr,
+    "&&": ast.BitAnd,
+    "^": ast.BitXor,
+}
+BOOLEAN_OPERATORS: t.Dict[str, t.Type[ast.boolop]] = {"and": ast.And, "or": ast.Or}
+UNARY_OPERATORS: t.Dict[str, t.Type[ast.unaryop]] = {
+    "-": ast.USub,
+    "+": ast.UAdd,
+    "not": ast.Not,
+    "!": ast.Not,
+    "~": ast.Invert,
+}
+COMPARISONS: t.Dict[str, t.Type[ast.cmpop]] = {
+    "<": ast.Lt,
+    ">": ast.Gt,
+    "<=": ast.LtE,
+    ">=": ast.GtE,
+    "==": ast.Eq,
+    "!=": ast.NotEq,
+}
+
+
+def identifier(name: str) -> str:
+    """The Python identifier of the Starla name ``name``."""
+    return "$" + name if name in RESERVED else name
+
+
+def load(name: str) -> ast.Name:
+    return ast.Name(id=identifier(name), ctx=ast.Load())
+
+
+def store(name: str) -> ast.Name:
+    return ast.Name(id=identifier(name), ctx=ast.Store())
+
+
+def parameters(names: t.List[str], defaults: t.List[ast.expr]) -> ast.arguments:
+    return ast.arguments(
+        posonlyargs=[],
+        args=[ast.arg(arg=identifier(name)) for name in names],
+        kwonlyargs=[],
+        kw_defaults=[],
+        defaults=defaults,
+    )
+
+
+class Transpiler:
+    """Builds the Python ``ast`` of a module, one table entry per node type."""
+
+    def __init__(self, inferred: t.Optional[TypeCheck] = None) -> None:
+        self.inferred = inferred
+        expressions = {
+            **{name: self.literal for name in LITERALS},
+            "List": self.list,
+            "Tuple": self.tuple,
+            "Dict": self.dict,
+            "Namespace": self.namespace,
+            "Call": self.call,
+            "Operation": self.operation,
+            "Comparison": self.comparison,
+            "MultiComparison": self.multi_comparison,
+        }
+        statements = {
+            "VariableDeclaration": self.variable_declaration,
+            "FunctionDeclaration": self.function_declaration,
+            "IfStatement": self.if_statement,
+            "WhileLoop": self.while_loop,
+            "ForLoop": self.for_loop,
+            "Return": self.return_statement,
+            "Pass": self.pass_statement,
+        }
+        self.expressions: t.Dict[type, t.Callable[[t.Any], ast.expr]] = {}
+        self.statements: t.Dict[type, t.Callable[[t.Any], ast.stmt]] = {}
+        for name, expression in expressions.items():
+            for cls in both(name):
+                self.expressions[cls] = expression
+                self.statements[cls] = self.expression_statement
+        for name, statement in statements.items():
+            for cls in both(name):
+                self.statements[cls] = statement
+
+    def transpile(self, module: t.Any) -> ast.Module:
+        names = sorted(set(map(identifier, declared_names(module.body))))
+        body = self.body(module.body)
+        if names:
+            body.insert(0, ast.Global(names=names))
+        function = self.function(MODULE, parameters([], []), body)
+        tree = ast.Module(body=[function], type_ignores=[])
+        return ast.fix_missing_locations(tree)
+
+    def body(self, nodes: t.Iterable[t.Any]) -> t.List[ast.stmt]:
+        body = []
+        for node in nodes:
+            try:
+                statement = self.statements[type(node)]
+            except KeyError:
+                raise StarlaRuntimeError(
+                    "Cannot compile %s" % type(node).__name__
+                ) from None
+            body.append(statement(node))
+        return body or [ast.Pass()]
+
+    def expression(self, node: t.Any) -> ast.expr:
+        try:
+            expression = self.expressions[type(node)]
+        except KeyError:
+            raise StarlaRuntimeError(
+                "%s is not an expression" % type(node).__name__
+            ) from None
+        return expression(node)
+
+    @staticmethod
+    def function(
+        name: str, arguments: ast.arguments, body: t.List[ast.stmt]
+    ) -> ast.FunctionDef:
+        return ast.FunctionDef(
+            name=identifier(name),
+            args=arguments,
+            body=body,
+            decorator_list=[],
+            returns=None,
+        )
+
+    # Expressions
+    @staticmethod
+    def literal(node: t.Any) -> ast.expr:
+        return ast.Constant(value=literal(node))
+
+    def list(self, node: t.Any) -> ast.expr:
+        return ast.List(
+            elts=[self.expression(item) for item in node.items], ctx=ast.Load()
+        )
+
+    def tuple(self, node: t.Any) -> ast.expr:
+        return ast.Tuple(
+            elts=[self.expression(item) for item in node.items], ctx=ast.Load()
+        )
+
+    def dict(self, node: t.Any) -> ast.expr:
+        return ast.Dict(
+            keys=[self.expression(key) for key, _ in node.items],
+            values=[self.expression(value) for _, value in node.items],
+        )
+
+    @staticmethod
+    def namespace(node: t.Any) -> ast.expr:
+        return load(node.name)
+
+    def call(self, node: t.Any) -> ast.expr:
+        return ast.Call(
+            func=self.expression(node.target),
+            args=[self.expression(arg) for arg in node.args],
+            keywords=[
+                ast.keyword(arg=identifier(name), value=self.expression(value))
+                for name, value in node.kwargs.items()
+            ],
+        )
+
+    def operation(self, node: t.Any) -> ast.expr:
+        op = node.op
+        operands = [self.expression(argument) for argument in node.arguments]
+        if len(operands) == 1:
+            return ast.UnaryOp(op=UNARY_OPERATORS[op](), operand=operands[0])
+        if op in BOOLEAN_OPERATORS:
+            return ast.BoolOp(op=BOOLEAN_OPERATORS[op](), values=operands)
+        left, right = operands
+        if op == "/":
+            division = self.division(node)
+            if division is None:
+                return ast.Call(func=load(DIVIDE), args=operands, keywords=[])
+            return ast.BinOp(left=left, op=division(), right=right)
+        return ast.BinOp(left=left, op=BINARY_OPERATORS[op](), right=right)
+
+    def division(self, node: t.Any) -> t.Optional[t.Type[ast.operator]]:
+        """The division ``node`` does, if the types of its operands are known."""
+        if self.inferred is None:
+            return None
+        names = {self.inferred.type_of(argument).name for argument in node.arguments}
+        if names <= INTEGERS:
+            return ast.FloorDiv
+        return ast.Div if names <= NUMBERS else None
+
+    def comparison(self, node: t.Any) -> ast.expr:
+        left, right = node.arguments
+        return ast.Compare(
+            left=self.expression(left),
+            ops=[COMPARISONS[node.op]()],
+            comparators=[self.expression(right)],
+        )
+
+    def multi_comparison(self, node: t.Any) -> ast.expr:
+        # Neighbouring comparisons share an operand, just like Python's chains.
+        comparisons = node.comparisons
+        return ast.Compare(
+            left=self.expression(comparisons[0].arguments[0]),
+            ops=[COMPARISONS[comparison.op]() for comparison in comparisons],
+            comparators=[
+                self.expression(comparison.arguments[1]) for comparison in comparisons
+            ],
+        )
+
+    # Statements
+    def expression_statement(self, node: t.Any) -> ast.stmt:
+        return ast.Expr(value=self.expression(node))
+
+    def variable_declaration(self, node: t.Any) -> ast.stmt:
+        return ast.Assign(
+            targets=[store(node.target.name)], value=self.expression(node.value)
+        )
+
+    def function_declaration(self, node: t.Any) -> ast.stmt:
+        arguments = node.arguments or ()
+        default_arguments = node.default_arguments or ()
+        return self.function(
+            node.target.name,
+            parameters(
+                [argument.arg for argument in arguments + default_arguments],
+                [self.expression(argument.value) for argument in default_arguments],
+            ),
+            self.body(node.body),
+        )
+
+    def if_statement(self, node: t.Any) -> ast.stmt:
+        orelse = self.body(node.default) if node.default else []
+        for condition, body in reversed(node.conditionals):
+            statement = ast.If(
+                test=self.expression(condition), body=self.body(body), orelse=orelse
+            )
+            orelse = [statement]
+        return statement
+
+    def while_loop(self, node: t.Any) -> ast.stmt:
+        return ast.While(
+            test=self.expression(node.conditional), body=self.body(node.body), orelse=[]
+        )
+
+    def for_loop(self, node: t.Any) -> ast.stmt:
+        return ast.For(
+            target=store(node.target.name),
+            iter=self.expression(node.iterator),
+            body=self.body(node.body),
+            orelse=[],
+        )
+
+    def return_statement(self, node: t.Any) -> ast.stmt:
+        return ast.Return(value=self.expression(node.value))
+
+    @staticmethod
+    def pass_statement(node: t.Any) -> ast.stmt:
+        return ast.Pass()
+
+
+def transpile(
+    module: t.Any, filename: str = "<starla>", inferred: t.Optional[TypeCheck] = None
+) -> types.CodeType:
+    """The Python code object of ``module``, specialised by the ``inferred`` types,
+    which must be ones ``typecheck.prove`` found."""
+    return compile(Transpiler(inferred).transpile(module), filename, "exec")
+
+
+def transpiler_signature() -> str:
+    """Hash the parser, the modules lowering trees and the Python bytecode format."""
+    digest = hashlib.sha256()
+    digest.update(compiler_signature().encode())
+    digest.update(importlib.util.MAGIC_NUMBER)
+    passes = (deadcode, folding, inlining, optimizer, resolver, typecheck)
+    for module in (sys.modules[__name__], *passes):
+        with open(t.cast(str, module.__file__), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class CodeCache(DiskCache[types.CodeType]):
+    """Transpiled code objects, marshalled like the bodies of ``.pyc`` files."""
+
+    suffix = ".pyc"
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        super().__init__(directory, max_size, signature=transpiler_signature())
+
+    def read(self, file: t.BinaryIO) -> types.CodeType:
+        code = marshal.load(file)
+        if not isinstance(code, types.CodeType):
+            raise ValueError("not a code object")
+        return code
+
+    def write(self, entry: types.CodeType, file: t.BinaryIO) -> None:
+        marshal.dump(entry, file)
+
+
+def compile_source(  # pylint: disable=too-many-arguments
+    source: bytes,
+    compiler: StarlaCompiler,
+    cache: t.Optional[CodeCache] = None,
+    filename: str = "<starla>",
+    optimize: bool = False,
+    inline_budget: int = DEFAULT_BUDGET,
+) -> types.CodeType:
+    """The code object of ``source``, from ``cache`` when it was compiled before.
+
+    With ``optimize`` the tree goes through ``optimizer.optimize`` first, and
+    divisions are specialised by the types ``typecheck.prove`` finds for their
+    operands, if the module type checks. Raises ``SyntaxError`` for sources that do not parse.
+    """
+    key = ""
+    if cache is not None:
+        variant = b"optimize %d" % inline_budget if optimize else b""
+        key = cache.key(source, variant)
+        code = cache.load(key)
+        if code is not None:
+            return code
+    text = source.decode("utf-8")
+    try:
+        module = compiler.parse(text)
+    except StarlaSyntaxError as error:
+        line, column = compiler.position(text, error.index)
+        raise SyntaxError(error.msg, (filename, line, column, None)) from None
+    if module is None:
+        raise SyntaxError("Unexpected end of file", (filename, 0, 0, None))
+    inferred = None
+    if optimize:
+        module, _ = optimizer.optimize(module, inline_budget)
+        inferred = prove(module)
+        if inferred.errors:
+            inferred = None
+    code = transpile(module, filename, inferred)
+    if cache is not None:
+        cache.store(key, code)
+    return code
+
+
+class Runtime:
+    """Runs transpiled modules, keeping their top-level variables in ``globals``."""
+
+    def __init__(self, stdout: t.Optional[t.TextIO] = None) -> None:
+        self.stdout = sys.stdout if stdout is None else stdout
+        self.builtins = builtin_functions(self.output)
+        self.builtins[DIVIDE] = floor_or_true_divide
+        self.globals: t.Dict[str, t.Any] = {}
+
+    def output(self, *values: t.Any) -> None:
+        self.stdout.write(" ".join(map(format_value, values)) + "\n")
+
+    def run(self, code: types.CodeType, args: t.Optional[t.List[str]] = None) -> t.Any:
+        """Execute a module's ``code``, then its ``main`` function if it declares one."""
+        self.globals = {"__builtins__": self.builtins}
+        # pylint: disable-next=exec-used
+        exec(code, self.globals)
+        try:
+            result = self.globals.pop(MODULE)()
+            if result is not None:
+                return result
+            main = self.globals.get("main")
+            if isinstance(main, types.FunctionType):
+                return main(args or []) if main.__code__.co_argcount else main()
+        except NameError as error:
+            raise StarlaRuntimeError(str(error)) from error
+        return None
@@ -0,0 +1,859 @@
+"""Static type checking of parsed modules, driven by their type hints.
+
+``TypeChecker`` resolves the ``TypeHint`` trees of declarations into
+``Type`` values, infers the type of every expression bottom-up, and gives
+declarations without a hint the type of their first value. The types are
+recorded per expression. Every node is visited once, and function bodies
+are checked after the rest of the body declaring them, when every name the
+function may refer to at run time has been declared.
+
+Types are exact: an ``int`` is not a ``float``, because dividing two ints
+floors, but ``bool`` may be used as an ``int``. ``any`` is what nothing is
+known about, such as names the checker cannot see, and is compatible with
+every type in both directions. Errors do not stop the checker, and carry the
+line and column of the first positioned token, such as a name or a literal,
+of the offending node.
+
+The declared types are not always what a program holds at run time: an
+``any`` value may be stored where an ``int`` is declared, and a function
+called through a ``function`` value has its arguments checked against
+nothing. ``prove`` finds the types backends may specialise operations by,
+taking every name a value of another type may reach to be ``any``. It checks
+the module once recording which names each stored value reads, follows those
+dependencies from the names found loose, and checks the module a last time to
+give the types.
+"""
+
+import typing as t
+
+from . import models, nodes
+from .incremental import POSITIONED, fields
+from .interpreter import both
+from .positions import LineIndex
+
+# A name a value may be stored in, as ``ProvingChecker`` keys them.
+Key = t.Tuple[int, t.Optional[str]]
+
+
+class Signature(t.NamedTuple):
+    parameters: t.Tuple[str, ...]
+    types: t.Tuple["Type", ...]
+    required: int
+    returns: "Type"
+
+
+class Type(t.NamedTuple):
+    name: str
+    parameters: t.Tuple["Type", ...] = ()
+    signature: t.Optional[Signature] = None
+    # The name of the builtin function a "builtin" is, wherever it is stored.
+    builtin: t.Optional[str] = None
+
+    def __str__(self) -> str:
+        if not self.parameters:
+            return self.name
+        return "%s[%s]" % (self.name, ", ".join(map(str, self.parameters)))
+
+
+ANY = Type("any")
+INT = Type("int")
+FLOAT = Type("float")
+STR = Type("str")
+BOOL = Type("bool")
+NULL = Type("null")
+RANGE = Type("range")
+BUILTIN = Type("builtin")
+FUNCTION = Type("function")
+
+NUMBERS = frozenset(("int", "float", "bool"))
+INTEGERS = frozenset(("int", "bool"))
+SEQUENCES = frozenset(("str", "list", "tuple"))
+
+# Type hint names, and how many parameters they take, if they take a fixed number.
+HINTS: t.Dict[str, t.Tuple[Type, t.Optional[int]]] = {
+    "any": (ANY, 0),
+    "int": (INT, 0),
+    "float": (FLOAT, 0),
+    "double": (FLOAT, 0),
+    "str": (STR, 0),
+    "char": (STR, 0),
+    "bool": (BOOL, 0),
+    "null": (NULL, 0),
+    "function": (FUNCTION, 0),
+    "list": (Type("list", (ANY,)), 1),
+    "dict": (Type("dict", (ANY, ANY)), 2),
+    "tuple": (Type("tuple"), None),
+}
+LITERAL_TYPES = {
+    "Int": INT,
+    "Float": FLOAT,
+    "Double": FLOAT,
+    "String": STR,
+    "Char": STR,
+    "Bool": BOOL,
+    "Null": NULL,
+}
+
+
+class TypeCheckError(t.NamedTuple):
+    message: str
+    line: int = 0
+    column: int = 0
+
+    def __str__(self) -> str:
+        return "%d:%d: %s" % (self.line, self.column, self.message)
+
+
+def assignable(source: Type, target: Type) -> bool:
+    """Whether a value of type ``source`` may be stored where ``target`` is expected."""
+    if source == target or ANY in (source, target):
+        return True
+    if target.name == "int":
+        return source.name == "bool"
+    if target.name == "function":
+        return source.name in ("function", "builtin")
+    if source.name != target.name or len(source.parameters) != len(target.parameters):
+        return False
+    return all(map(assignable, source.parameters, target.parameters))
+
+
+def proves(source: Type, target: Type) -> bool:
+    """Whether a value of type ``source`` is sure to have the type ``target``,
+    which unlike ``assignable`` an ``any`` value is not."""
+    if target in (source, ANY):
+        return True
+    if source == ANY:
+        return False
+    if target.name == "int":
+        return source.name == "bool"
+    if target.name in ("function", "builtin"):
+        # Another builtin's results may have other types.
+        return (
+            target.name == "function"
+            and source.name in ("function", "builtin")
+            and target.signature is None
+        )
+    if source.name != target.name or len(source.parameters) != len(target.parameters):
+        return False
+    return all(map(proves, source.parameters, target.parameters))
+
+
+def erase(declared: Type) -> Type:
+    """``declared`` with the item types of lists and dicts made ``any``, as
+    ``append`` and ``put`` store values of any type in them."""
+    if declared.name in ("list", "dict"):
+        return Type(declared.name, (ANY,) * len(declared.parameters))
+    if declared.name == "tuple":
+        return Type("tuple", tuple(map(erase, declared.parameters)))
+    return declared
+
+
+def join(left: Type, right: Type) -> Type:
+    """The narrowest type that values of both ``left`` and ``right`` have."""
+    if assignable(left, right):
+        return left if right == ANY else right
+    if assignable(right, left):
+        return right if left == ANY else left
+    return ANY
+
+
+def join_all(types: t.Iterable[Type]) -> Type:
+    joined = None
+    for item in types:
+        joined = item if joined is None else join(joined, item)
+    return ANY if joined is None else joined
+
+
+def element(iterable: Type) -> t.Optional[Type]:
+    """The type of the values iterating over ``iterable`` yields, if it is iterable."""
+    name = iterable.name
+    if name in ("list", "dict"):
+        return iterable.parameters[0]
+    if name == "tuple":
+        return join_all(iterable.parameters)
+    if name == "range":
+        return INT
+    if name in ("str", "any"):
+        return iterable
+    return None
+
+
+def arithmetic(  # pylint: disable=too-many-return-statements
+    op: str, left: Type, right: Type
+) -> t.Optional[Type]:
+    """The type of ``left op right``, or ``None`` if the operands do not support it."""
+    if op in ("and", "or"):
+        return join(left, right)
+    if ANY in (left, right):
+        return ANY
+    names = {left.name, right.name}
+    if op in ("||", "&&", "^"):
+        if names == {"bool"}:
+            return BOOL
+        return INT if names <= INTEGERS else None
+    if names <= NUMBERS:
+        if "float" in names:
+            return FLOAT
+        # A negative exponent makes the power of two ints a float.
+        return ANY if op == "**" else INT
+    if op == "+" and left.name == right.name and left.name in SEQUENCES:
+        return join(left, right)
+    if op == "*" and len(names) == 2 and names <= SEQUENCES | INTEGERS:
+        sequence = left if left.name in SEQUENCES else right
+        return sequence if names - {sequence.name} <= INTEGERS else None
+    if op == "%" and left.name == "str":
+        return STR
+    return None
+
+
+def unary(op: str, operand: Type) -> t.Optional[Type]:
+    if op in ("not", "!"):
+        return BOOL
+    if operand == ANY:
+        return ANY
+    if operand.name in INTEGERS:
+        return INT
+    return FLOAT if operand.name == "float" and op != "~" else None
+
+
+def comparable(op: str, left: Type, right: Type) -> bool:
+    if op in ("==", "!=") or ANY in (left, right):
+        return True
+    if left.name in NUMBERS and right.name in NUMBERS:
+        return True
+    return left.name == right.name and left.name in SEQUENCES
+
+
+def first_item(types: t.List[Type]) -> Type:
+    if len(types) == 1:
+        return element(types[0]) or ANY
+    return join_all(types)
+
+
+def indexed(types: t.List[Type]) -> Type:
+    collection = types[0] if types else ANY
+    if collection.name == "dict":
+        return collection.parameters[1]
+    if collection.name == "tuple":
+        return join_all(collection.parameters)
+    return ANY if collection.name == "str" else element(collection) or ANY
+
+
+# The result type of each builtin, given the types of its positional arguments.
+BUILTINS: t.Dict[str, t.Callable[[t.List[Type]], Type]] = {
+    "output": lambda _: NULL,
+    "len": lambda _: INT,
+    "range": lambda _: RANGE,
+    "str": lambda _: STR,
+    "int": lambda _: INT,
+    "float": lambda _: FLOAT,
+    "abs": lambda types: types[0] if types and types[0].name in NUMBERS else ANY,
+    "min": first_item,
+    "max": first_item,
+    "append": lambda _: NULL,
+    "get": indexed,
+    "put": lambda _: NULL,
+}
+
+
+class Environment:
+    """The types of the names declared in a module or in one function."""
+
+    __slots__ = ("variables", "constants", "parent", "returns", "owner")
+
+    def __init__(
+        self,
+        parent: t.Optional["Environment"] = None,
+        returns: t.Optional[Type] = None,
+        owner: t.Any = None,
+    ) -> None:
+        self.variables: t.Dict[str, Type] = {}
+        self.constants: t.Set[str] = set()
+        self.parent = parent
+        self.returns = returns
+        # The function declaration whose locals these are, or None for a module.
+        self.owner = owner
+
+    def lookup(self, name: str) -> Type:
+        environment: t.Optional[Environment] = self
+        while environment is not None:
+            variables = environment.variables
+            if name in variables:
+                return variables[name]
+            environment = environment.parent
+        return ANY
+
+
+def module_environment() -> Environment:
+    """An empty environment for a module, inside one holding the builtins."""
+    builtins = Environment()
+    builtins.variables.update(
+        (name, Type(BUILTIN.name, builtin=name)) for name in BUILTINS
+    )
+    return Environment(builtins)
+
+
+class TypeCheck(t.NamedTuple):
+    """The types the checker inferred, and the errors it found.
+
+    ``types`` is keyed by the ``id`` of the nodes, so it is only meaningful
+    while the module that was checked is alive and unchanged.
+    """
+
+    types: t.Dict[int, Type]
+    errors: t.List[TypeCheckError]
+
+    def type_of(self, node: t.Any) -> Type:
+        return self.types.get(id(node), ANY)
+
+
+class TypeChecker:  # pylint: disable=too-many-instance-attributes
+    """Infers and checks the types of a module, one table entry per node type."""
+
+    def __init__(self, line_index: t.Optional[LineIndex] = None) -> None:
+        self.line_index = line_index
+        self.types: t.Dict[int, Type] = {}
+        self.errors: t.List[TypeCheckError] = []
+        self.hints: t.Dict[int, t.Tuple[Type, bool]] = {}
+        self.signatures: t.Dict[int, Signature] = {}
+        # The declaration of each signature, by the ``id`` of the signature.
+        self.owners: t.Dict[int, t.Any] = {}
+        # The statements being checked, from the outermost one in.
+        self.enclosing: t.List[t.Any] = []
+        # The least offset of the positioned nodes in each node, by its ``id``.
+        self.offsets: t.Dict[int, t.Optional[int]] = {}
+        expressions = {
+            **{name: self.infer_literal for name in LITERAL_TYPES},
+            "List": self.infer_list,
+            "Tuple": self.infer_tuple,
+            "Dict": self.infer_dict,
+            "Namespace": self.infer_namespace,
+            "Call": self.infer_call,
+            "Operation": self.infer_operation,
+            "Comparison": self.infer_comparison,
+            "MultiComparison": self.infer_multi_comparison,
+        }
+        statements = {
+            "VariableDeclaration": self.check_variable_declaration,
+            "FunctionDeclaration": self.check_function_declaration,
+            "IfStatement": self.check_if,
+            "WhileLoop": self.check_while,
+            "ForLoop": self.check_for,
+            "Return": self.check_return,
+            "Pass": self.check_pass,
+            "Error": self.check_pass,
+        }
+        self.expressions: t.Dict[type, t.Callable[[t.Any, Environment], Type]] = {}
+        self.statements: t.Dict[type, t.Callable[[t.Any, Environment], None]] = {}
+        for name, infer in expressions.items():
+            for cls in both(name):
+                self.expressions[cls] = infer
+                self.statements[cls] = self.check_expression
+        for name, check_statement in statements.items():
+            for cls in both(name):
+                self.statements[cls] = check_statement
+
+    def check(self, module: t.Any) -> TypeCheck:
+        self.body(module.body, module_environment())
+        return TypeCheck(self.types, self.errors)
+
+    def error(self, node: t.Any, message: str, *args: t.Any) -> None:
+        """Report ``message`` at the first token of ``node`` that has a position,
+        or failing that, at that of the statements around it."""
+        offset = None
+        for value in (node, *reversed(self.enclosing)):
+            offset = self.offset(value)
+            if offset is not None:
+                break
+        line = column = 0
+        if offset is not None and self.line_index is not None:
+            line, column = self.line_index.position(offset)
+        self.errors.append(TypeCheckError(message % args, line, column))
+
+    def offset(self, value: t.Any) -> t.Optional[int]:
+        """The least offset of the positioned nodes in ``value``, worked out once
+        per node however many errors are reported in it."""
+        own = None
+        if isinstance(value, (nodes.Node, models.Ast)):
+            children: t.Iterable[t.Any] = [
+                getattr(value, name) for name in fields(value)
+            ]
+            if type(value).__name__ in POSITIONED:
+                own = getattr(value, "index")
+        elif isinstance(value, (tuple, list)):
+            children = value
+        elif isinstance(value, dict):
+            children = value.values()
+        else:
+            return None
+        key = id(value)
+        if key not in self.offsets:
+            offsets = [self.offset(child) for child in children]
+            self.offsets[key] = min(
+                (offset for offset in (own, *offsets) if offset is not None),
+                default=None,
+            )
+        return self.offsets[key]
+
+    def body(self, body: t.Iterable[t.Any], environment: Environment) -> None:
+        # Functions are declared before the statements around them are
+        # checked, and their bodies checked after, as by then those
+        # statements have declared the names the functions may use.
+        functions = [
+            node for node in body if type(node).__name__ == "FunctionDeclaration"
+        ]
+        for node in functions:
+            self.declare_function(node, environment)
+        enclosing = self.enclosing
+        for node in body:
+            enclosing.append(node)
+            self.statements[type(node)](node, environment)
+            enclosing.pop()
+        for node in functions:
+            enclosing.append(node)
+            self.function_body(node, environment)
+            enclosing.pop()
+
+    def infer(self, node: t.Any, environment: Environment) -> Type:
+        inferred = self.expressions[type(node)](node, environment)
+        self.types[id(node)] = inferred
+        return inferred
+
+    def resolve(self, hint: t.Any) -> t.Tuple[Type, bool]:
+        """The type a hint stands for, and whether it declares a constant."""
+        resolved = self.hints.get(id(hint))
+        if resolved is not None:
+            return resolved
+        name = hint.type_value
+        structure = tuple(
+            self.resolve(item)[0] for item in getattr(hint, "type_structure", ()) or ()
+        )
+        if name == "constant" and len(structure) <= 1:
+            resolved = (structure[0] if structure else ANY, True)
+        elif name not in HINTS:
+            self.error(hint, "Unknown type %r", name)
+            resolved = (ANY, False)
+        else:
+            hinted, arity = HINTS[name]
+            if not structure:
+                resolved = (hinted, False)
+            elif arity is None or arity == len(structure):
+                resolved = (Type(hinted.name, structure), False)
+            else:
+                self.error(hint, "%s takes %d type parameters", name, arity)
+                resolved = (hinted, False)
+        self.hints[id(hint)] = resolved
+        return resolved
+
+    def expect(self, node: t.Any, actual: Type, expected: Type, what: str) -> None:
+        if not assignable(actual, expected):
+            self.error(
+                node, "Cannot assign %s to %s of type %s", actual, what, expected
+            )
+
+    def flow(
+        self, node: t.Any, owner: t.Any, name: t.Optional[str], declared: Type
+    ) -> None:
+        """Called for every value, given by ``node``, stored in the name ``name``
+        of ``owner`` where ``declared`` is expected, and for every value
+        ``owner`` returns with ``name`` None. A name declared by its first value
+        expects that value's type. Only ``ProvingChecker`` uses these."""
+
+    @staticmethod
+    def value_of(node: t.Any) -> t.Any:
+        """The expression giving the values ``node`` stores, which for a loop
+        is its iterator."""
+        return node.iterator if type(node).__name__ == "ForLoop" else node
+
+    # Expressions
+    @staticmethod
+    def infer_literal(node: t.Any, _: Environment) -> Type:
+        return LITERAL_TYPES[type(node).__name__]
+
+    def infer_list(self, node: t.Any, environment: Environment) -> Type:
+        items = [self.infer(item, environment) for item in node.items]
+        return Type("list", (join_all(items),))
+
+    def infer_tuple(self, node: t.Any, environment: Environment) -> Type:
+        return Type(
+            "tuple", tuple(self.infer(item, environment) for item in node.items)
+        )
+
+    def infer_dict(self, node: t.Any, environment: Environment) -> Type:
+        keys = []
+        values = []
+        for key, value in node.items:
+            keys.append(self.infer(key, environment))
+            values.append(self.infer(value, environment))
+        return Type("dict", (join_all(keys), join_all(values)))
+
+    def infer_namespace(self, node: t.Any, environment: Environment) -> Type:
+        return environment.lookup(node.name)
+
+    def infer_call(self, node: t.Any, environment: Environment) -> Type:
+        function = self.infer(node.target, environment)
+        args = [self.infer(arg, environment) for arg in node.args]
+        kwargs = {
+            name: self.infer(value, environment) for name, value in node.kwargs.items()
+        }
+        if function.name == "builtin":
+            result = BUILTINS.get(function.builtin or "")
+            return ANY if result is None else result(args)
+        signature = function.signature
+        if signature is None:
+            if function.name not in ("any", "function"):
+                self.error(node, "%s is not a function", function)
+            return ANY
+        return self.bind(node, signature, args, kwargs)
+
+    def bind(
+        self,
+        node: t.Any,
+        signature: Signature,
+        args: t.List[Type],
+        kwargs: t.Dict[str, Type],
+    ) -> Type:
+        name = getattr(node.target, "name", "function")
+        parameters = signature.parameters
+        if len(args) > len(parameters):
+            self.error(
+                node.args[len(parameters)],
+                "%s takes %d arguments but got %d",
+                name,
+                len(parameters),
+                len(args),
+            )
+            return signature.returns
+        bound = dict(zip(parameters, args))
+        # The expression giving each bound parameter, where errors are reported.
+        given = dict(zip(parameters, node.args))
+        for parameter, value in kwargs.items():
+            if parameter not in parameters or parameter in bound:
+                self.error(
+                    node.kwargs[parameter],
+                    "%s got an unexpected argument %r",
+                    name,
+                    parameter,
+                )
+            else:
+                bound[parameter] = value
+                given[parameter] = node.kwargs[parameter]
+        owner = self.owners.get(id(signature))
+        for parameter, expected in zip(parameters, signature.types):
+            if parameter in bound:
+                self.expect(
+                    given[parameter], bound[parameter], expected, repr(parameter)
+                )
+                self.flow(given[parameter], owner, parameter, expected)
+        for parameter in parameters[: signature.required]:
+            if parameter not in bound:
+                self.error(node, "%s is missing the argument %r", name, parameter)
+        return signature.returns
+
+    def infer_operation(self, node: t.Any, environment: Environment) -> Type:
+        op = node.op
+        operands = [self.infer(argument, environment) for argument in node.arguments]
+        if len(operands) == 1:
+            result = unary(op, operands[0])
+        else:
+            result = arithmetic(op, *operands)
+        if result is None:
+            self.error(
+                node,
+                "Unsupported operand types for %s: %s",
+                op,
+                " and ".join(map(str, operands)),
+            )
+            return ANY
+        return result
+
+    def compare(self, node: t.Any, op: str, left: Type, right: Type) -> None:
+        if not comparable(op, left, right):
+            self.error(node, "Cannot compare %s and %s with %s", left, right, op)
+
+    def infer_comparison(self, node: t.Any, environment: Environment) -> Type:
+        left, right = (self.infer(argument, environment) for argument in node.arguments)
+        self.compare(node, node.op, left, right)
+        return BOOL
+
+    def infer_multi_comparison(self, node: t.Any, environment: Environment) -> Type:
+        # Each comparison's left operand is the previous one's right operand.
+        comparisons = node.comparisons
+        left = self.infer(comparisons[0].arguments[0], environment)
+        for comparison in comparisons:
+            right = self.infer(comparison.arguments[1], environment)
+            self.compare(comparison, comparison.op, left, right)
+            self.types[id(comparison)] = BOOL
+            left = right
+        return BOOL
+
+    # Statements
+    def check_expression(self, node: t.Any, environment: Environment) -> None:
+        self.infer(node, environment)
+
+    def assign(
+        self, node: t.Any, target: t.Any, value: Type, environment: Environment
+    ) -> None:
+        """Store a value in ``target``, which is declared by its first value, and
+        which ``node``, an expression or a loop, gives."""
+        name = target.name
+        if name in environment.constants:
+            self.error(target, "Cannot assign to the constant %r", name)
+        declared = environment.variables.get(name)
+        if declared is None:
+            environment.variables[name] = declared = value
+        else:
+            self.expect(self.value_of(node), value, declared, repr(name))
+        self.flow(node, environment.owner, name, declared)
+        self.types[id(target)] = declared
+
+    def check_variable_declaration(self, node: t.Any, environment: Environment) -> None:
+        value = self.infer(node.value, environment)
+        if node.annotation is None:
+            self.assign(node.value, node.target, value, environment)
+            return
+        name = node.target.name
+        declared, constant = self.resolve(node.annotation)
+        if name in environment.constants:
+            self.error(node.target, "Cannot assign to the constant %r", name)
+        self.expect(node.value, value, declared, repr(name))
+        self.flow(node.value, environment.owner, name, declared)
+        environment.variables[name] = declared
+        if constant:
+            environment.constants.add(name)
+        self.types[id(node.target)] = declared
+
+    def declare_function(self, node: t.Any, environment: Environment) -> None:
+        arguments = (node.arguments or ()) + (node.default_arguments or ())
+        signature = Signature(
+            tuple(argument.arg for argument in arguments),
+            tuple(self.resolve(argument.annotation)[0] for argument in arguments),
+            len(node.arguments or ()),
+            self.resolve(node.annotation)[0],
+        )
+        self.signatures[id(node)] = signature
+        self.owners[id(signature)] = node
+        declared = Type("function", signature=signature)
+        environment.variables[node.target.name] = declared
+        self.types[id(node.target)] = declared
+
+    def check_function_declaration(self, node: t.Any, environment: Environment) -> None:
+        declared = self.types[id(node.target)]
+        environment.variables[node.target.name] = declared
+        signature = self.signatures[id(node)]
+        for argument in node.default_arguments or ():
+            value = self.infer(argument.value, environment)
+            expected = signature.types[signature.parameters.index(argument.arg)]
+            self.expect(argument.value, value, expected, repr(argument.arg))
+            self.flow(argument.value, node, argument.arg, expected)
+
+    def function_body(self, node: t.Any, environment: Environment) -> None:
+        signature = self.signatures[id(node)]
+        local = Environment(environment, signature.returns, node)
+        local.variables.update(zip(signature.parameters, signature.types))
+        self.body(node.body, local)
+
+    def check_if(self, node: t.Any, environment: Environment) -> None:
+        for condition, body in node.conditionals:
+            self.infer(condition, environment)
+            self.body(body, environment)
+        if node.default:
+            self.body(node.default, environment)
+
+    def check_while(self, node: t.Any, environment: Environment) -> None:
+        self.infer(node.conditional, environment)
+        self.body(node.body, environment)
+
+    def check_for(self, node: t.Any, environment: Environment) -> None:
+        iterator = self.infer(node.iterator, environment)
+        item = element(iterator)
+        if item is None:
+            self.error(node.iterator, "%s is not iterable", iterator)
+            item = ANY
+        self.assign(node, node.target, item, environment)
+        self.body(node.body, environment)
+
+    def check_return(self, node: t.Any, environment: Environment) -> None:
+        value = self.infer(node.value, environment)
+        returns = environment.returns
+        if returns is None:
+            return
+        if not assignable(value, returns):
+            self.error(
+                node.value,
+                "Cannot return %s from a function returning %s",
+                value,
+                returns,
+            )
+        self.flow(node.value, environment.owner, None, returns)
+
+    @staticmethod
+    def check_pass(node: t.Any, environment: Environment) -> None:
+        pass
+
+
+class Store(t.NamedTuple):
+    """A value ``ProvingChecker`` saw stored in the name ``name`` of ``owner``."""
+
+    node: t.Any
+    owner: t.Any
+    name: t.Optional[str]
+    declared: Type
+
+
+class ProvingChecker(TypeChecker):  # pylint: disable=too-many-instance-attributes
+    """Infers the types of a module taking the names in ``distrusted`` to be
+    ``any``, and collects in ``loose`` the names that may hold values of
+    other types than their declared ones.
+
+    Names are keyed by the ``id`` of the function declaration whose locals or
+    parameters they are, or of None for the module, and are None for the
+    values a function returns. Every parameter of a function that is used
+    other than by calling it is loose, as it may be called unchecked.
+
+    When ``recording``, it also notes the names the value of every store
+    reads, so that ``settle`` can then distrust every loose name in one pass
+    over those dependencies, inferring again only the values that read one.
+    """
+
+    def __init__(self, distrusted: t.Set[Key], recording: bool = True) -> None:
+        super().__init__()
+        self.distrusted = distrusted
+        self.recording = recording
+        self.loose: t.Set[Key] = set()
+        # The loose names that are not distrusted yet.
+        self.pending: t.List[Key] = []
+        self.callee: t.Any = None
+        # The names read so far, in order, and by the ``id`` of each expression
+        # the span of them it read and the environment it was inferred in.
+        self.reads: t.List[Key] = []
+        self.spans: t.Dict[int, t.Tuple[int, int, Environment]] = {}
+        # The stores whose values read each name, and the signatures of the
+        # functions called through it.
+        self.dependents: t.Dict[Key, t.List[Store]] = {}
+        self.callees: t.Dict[Key, t.List[Signature]] = {}
+        # The name each namespace refers to and its type, by the namespace's
+        # ``id``, as inferring it again must not see later declarations.
+        self.bindings: t.Dict[int, t.Optional[t.Tuple[Key, Type]]] = {}
+
+    def settle(self) -> t.Set[Key]:
+        """Distrust the loose names and, in turn, every name that becomes loose
+        when they are, and return the names distrusted."""
+        self.recording = False
+        while self.pending:
+            key = self.pending.pop()
+            self.distrusted.add(key)
+            for signature in self.callees.pop(key, ()):
+                self.escape(signature)
+            for store in self.dependents.pop(key, ()):
+                expression = self.value_of(store.node)
+                environment = self.spans[id(expression)][2]
+                self.infer(expression, environment)
+                self.flow(store.node, store.owner, store.name, store.declared)
+        return self.distrusted
+
+    def loosen(self, key: Key) -> None:
+        if key not in self.loose:
+            self.loose.add(key)
+            self.pending.append(key)
+
+    def infer(self, node: t.Any, environment: Environment) -> Type:
+        start = len(self.reads)
+        inferred = super().infer(node, environment)
+        if self.recording:
+            self.spans[id(node)] = (start, len(self.reads), environment)
+        return inferred
+
+    def read(self, key: Key) -> None:
+        if self.recording:
+            self.reads.append(key)
+
+    def resolve(self, hint: t.Any) -> t.Tuple[Type, bool]:
+        declared, constant = super().resolve(hint)
+        return erase(declared), constant
+
+    def flow(
+        self, node: t.Any, owner: t.Any, name: t.Optional[str], declared: Type
+    ) -> None:
+        expression = self.value_of(node)
+        value = self.types[id(expression)]
+        if expression is not node:
+            value = element(value) or ANY
+        if not proves(value, declared):
+            self.loosen((id(owner), name))
+        if self.recording:
+            start, end, _ = self.spans[id(expression)]
+            store = Store(node, owner, name, declared)
+            for key in set(self.reads[start:end]):
+                self.dependents.setdefault(key, []).append(store)
+
+    def escape(self, signature: Signature) -> None:
+        owner = self.owners.get(id(signature))
+        if owner is not None:
+            for name in signature.parameters:
+                self.loosen((id(owner), name))
+
+    def infer_list(self, node: t.Any, environment: Environment) -> Type:
+        return erase(super().infer_list(node, environment))
+
+    def infer_dict(self, node: t.Any, environment: Environment) -> Type:
+        return erase(super().infer_dict(node, environment))
+
+    def infer_namespace(self, node: t.Any, environment: Environment) -> Type:
+        if id(node) not in self.bindings:
+            name = node.name
+            scope: t.Optional[Environment] = environment
+            while scope is not None and name not in scope.variables:
+                scope = scope.parent
+            self.bindings[id(node)] = (
+                None
+                if scope is None
+                else ((id(scope.owner), name), scope.variables[name])
+            )
+        binding = self.bindings[id(node)]
+        if binding is None:
+            return ANY
+        key, declared = binding
+        self.read(key)
+        distrusted = key in self.distrusted
+        signature = declared.signature
+        if signature is not None:
+            if distrusted or node is not self.callee:
+                self.escape(signature)
+            elif self.recording:
+                self.callees.setdefault(key, []).append(signature)
+        return ANY if distrusted else declared
+
+    def infer_call(self, node: t.Any, environment: Environment) -> Type:
+        self.callee = node.target
+        returns = super().infer_call(node, environment)
+        signature = self.types[id(node.target)].signature
+        if signature is not None:
+            key = (id(self.owners.get(id(signature))), None)
+            self.read(key)
+            if key in self.distrusted:
+                return ANY
+        return returns
+
+
+def check(module: t.Any, source: t.Optional[str] = None) -> TypeCheck:
+    """The types of the expressions in ``module`` and its type errors.
+
+    Errors have the line and column of their position in ``source``, or 0 for
+    both if it is not given.
+    """
+    line_index = None if source is None else LineIndex(source)
+    return TypeChecker(line_index).check(module)
+
+
+def prove(module: t.Any, source: t.Optional[str] = None) -> TypeCheck:
+    """The errors ``check`` finds in ``module``, and if there are none, the types
+    its expressions are sure to have at run time."""
+    checked = check(module, source)
+    if checked.errors:
+        return TypeCheck({}, checked.errors)
+    recorder = ProvingChecker(set())
+    recorder.check(module)
+    distrusted = recorder.settle()
+    types = ProvingChecker(distrusted, recording=False).check(module).types
+    return TypeCheck(types, checked.errors)
@@ -0,0 +1,228 @@
+"""A virtual machine running the register-based bytecode of ``bytecode``.
+
+``VM.execute`` is a single dispatch loop over one function's instructions,
+with the most frequent opcodes tested first. Operators are looked up by
+opcode in tables of plain functions, and calls to functions of the program
+run a nested dispatch loop with a fresh copy of the callee's register file.
+"""
+
+import sys
+import typing as t
+
+from .bytecode import (
+    BINARY,
+    BINARY_BASE,
+    BUILD_DICT,
+    BUILD_LIST,
+    BUILD_TUPLE,
+    CALL,
+    CALL_KW,
+    CHECK_SET,
+    FOR_ITER,
+    GET_ITER,
+    JUMP,
+    JUMP_IF_FALSE,
+    JUMP_IF_TRUE,
+    LOAD_BUILTIN,
+    LOAD_FREE,
+    LOAD_GLOBAL,
+    MAKE_FUNCTION,
+    MOVE,
+    RETURN,
+    STORE_GLOBAL,
+    UNARY,
+    UNARY_BASE,
+    UNSET,
+    Code,
+)
+from .interpreter import (
+    BINARY_OPERATORS,
+    COMPARISONS,
+    UNARY_OPERATORS,
+    StarlaRuntimeError,
+    builtin_functions,
+    format_value,
+)
+
+BINARY_TABLE: t.List[t.Any] = [None] * BINARY_BASE + [
+    BINARY_OPERATORS.get(op) or COMPARISONS[op] for op in BINARY
+]
+UNARY_TABLE: t.List[t.Any] = [None] * UNARY_BASE + [UNARY_OPERATORS[op] for op in UNARY]
+
+
+class Function:
+    """A function of the program, with the values it closes over.
+
+    ``closure`` holds the register files of the enclosing calls, innermost
+    first, and is ``None`` for a module's own code.
+    """
+
+    __slots__ = ("code", "defaults", "closure", "globals", "names")
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        code: Code,
+        defaults: t.Tuple[t.Any, ...],
+        closure: t.Optional[t.Tuple[t.List[t.Any], ...]],
+        globals: t.List[t.Any],  # pylint: disable=redefined-builtin
+        names: t.Tuple[str, ...],
+    ) -> None:
+        self.code = code
+        self.defaults = defaults
+        self.closure = closure
+        self.globals = globals
+        self.names = names
+
+    def __repr__(self) -> str:
+        return "<function %s>" % self.code.name
+
+
+class VM:
+    def __init__(self, stdout: t.Optional[t.TextIO] = None) -> None:
+        self.stdout = sys.stdout if stdout is None else stdout
+        self.builtins = builtin_functions(self.output)
+        self.globals: t.Dict[str, t.Any] = {}
+
+    def output(self, *values: t.Any) -> None:
+        self.stdout.write(" ".join(map(format_value, values)) + "\n")
+
+    def run(self, code: Code, args: t.Optional[t.List[str]] = None) -> t.Any:
+        """Execute a module's ``code``, then its ``main`` function if it declares one."""
+        slots = [UNSET] * len(code.globals)
+        module = Function(code, (), None, slots, code.globals)
+        result = self.execute(module, code.frame.copy())
+        self.globals = {
+            name: value
+            for name, value in zip(code.globals, slots)
+            if value is not UNSET
+        }
+        if result is not None:
+            return result
+        main = self.globals.get("main")
+        if isinstance(main, Function):
+            return self.call(main, [args or []] if main.code.parameters else [])
+        return None
+
+    def call(
+        self,
+        function: t.Any,
+        args: t.List[t.Any],
+        kwargs: t.Optional[t.Dict[str, t.Any]] = None,
+    ) -> t.Any:
+        if type(function) is not Function:  # pylint: disable=unidiomatic-typecheck
+            if not callable(function):
+                raise StarlaRuntimeError(
+                    "%s is not a function" % format_value(function)
+                )
+            return function(*args, **(kwargs or {}))
+
+        code = function.code
+        parameters = code.parameters
+        count = len(args)
+        registers = code.frame.copy()
+        if count == len(parameters) and not kwargs:
+            registers[:count] = args
+            return self.execute(function, registers)
+        if count > len(parameters):
+            raise StarlaRuntimeError(
+                "%s takes %d arguments but got %d" % (code.name, len(parameters), count)
+            )
+        registers[:count] = args
+        bound = set(range(count))
+        for name, value in (kwargs or {}).items():
+            index = parameters.index(name) if name in parameters else -1
+            if index < 0 or index in bound:
+                raise StarlaRuntimeError(
+                    "%s got an unexpected argument %r" % (code.name, name)
+                )
+            registers[index] = value
+            bound.add(index)
+        first_default = len(parameters) - code.defaults
+        for index in range(count, len(parameters)):
+            if index not in bound:
+                if index < first_default:
+                    raise StarlaRuntimeError(
+                        "%s is missing the argument %r" % (code.name, parameters[index])
+                    )
+                registers[index] = function.defaults[index - first_default]
+        return self.execute(function, registers)
+
+    def execute(self, function: Function, registers: t.List[t.Any]) -> t.Any:
+        # pylint: disable=too-many-branches,too-many-locals,too-many-statements
+        code = function.code
+        instructions = code.instructions
+        slots = function.globals
+        closure = function.closure
+        binary = BINARY_TABLE
+        unary = UNARY_TABLE
+        stop = UNSET
+        pc = 0
+        while True:
+            op, a, b, c = instructions[pc]
+            pc += 1
+            if op >= BINARY_BASE:
+                registers[a] = binary[op](registers[b], registers[c])
+            elif op == JUMP_IF_FALSE:
+                if not registers[a]:
+                    pc = b
+            elif op == MOVE:
+                registers[a] = registers[b]
+            elif op == JUMP:
+                pc = a
+            elif op == LOAD_GLOBAL:
+                value = slots[b]
+                if value is UNSET:
+                    raise StarlaRuntimeError(
+                        "Name %r is not defined" % function.names[b]
+                    )
+                registers[a] = value
+            elif op == STORE_GLOBAL:
+                slots[a] = registers[b]
+            elif op == FOR_ITER:
+                value = next(registers[b], stop)
+                if value is stop:
+                    pc = c
+                else:
+                    registers[a] = value
+            elif op == CALL:
+                registers[a] = self.call(registers[b], registers[b + 1 : b + 1 + c])
+            elif op == LOAD_BUILTIN:
+                registers[a] = self.builtins[registers[b]]
+            elif op == RETURN:
+                return registers[a]
+            elif op >= UNARY_BASE:
+                registers[a] = unary[op](registers[b])
+            elif op == LOAD_FREE:
+                registers[a] = closure[b][c]  # type: ignore[index]
+            elif op == CHECK_SET:
+                if registers[a] is UNSET:
+                    raise StarlaRuntimeError("Name %r is not defined" % registers[b])
+            elif op == GET_ITER:
+                registers[a] = iter(registers[b])
+            elif op == JUMP_IF_TRUE:
+                if registers[a]:
+                    pc = b
+            elif op == BUILD_LIST:
+                registers[a] = registers[b : b + c]
+            elif op == BUILD_TUPLE:
+                registers[a] = tuple(registers[b : b + c])
+            elif op == BUILD_DICT:
+                items = registers[b : b + 2 * c]
+                registers[a] = dict(zip(items[::2], items[1::2]))
+            elif op == CALL_KW:
+                count, names = registers[c]
+                values = registers[b + 1 : b + 1 + count + len(names)]
+                registers[a] = self.call(
+                    registers[b], values[:count], dict(zip(names, values[count:]))
+                )
+            elif op == MAKE_FUNCTION:
+                inner = code.functions[b]
+                registers[a] = Function(
+                    inner,
+                    tuple(registers[c : c + inner.defaults]),
+                    () if closure is None else (registers,) + closure,
+                    slots,
+                    function.names,
+                )
+            else:
+                raise StarlaRuntimeError("Unknown opcode %d" % op)
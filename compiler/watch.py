@@ -0,0 +1,307 @@
+"""Recompiling a tree of sources whenever one of them changes.
+
+``Watch`` keeps one warm compiler and the trees of every file in memory, and
+only parses files whose contents hash changed since the last build. Changes
+are picked up with inotify on Linux, or by polling modification times
+everywhere else.
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import time
+import typing as t
+
+from .batch import CompileResult, find_sources, parse_file
+from .cache import ASTCache
+from .compiler import StarlaCompiler
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+EVENT = struct.Struct("iIII")
+
+
+def is_source(path: str) -> bool:
+    return path.endswith(".star")
+
+
+def walk_sources(root: str) -> t.Iterator[str]:
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if is_source(name):
+                yield os.path.join(directory, name)
+
+
+class PollingWatcher:
+    """Finds changed sources by comparing the size and mtime of every file."""
+
+    def __init__(self, root: str, interval: float = 0.5) -> None:
+        self.root = root
+        self.interval = interval
+        self.stats = self.scan()
+
+    def scan(self) -> t.Dict[str, t.Tuple[int, int]]:
+        stats = {}
+        for path in walk_sources(self.root):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def wait(self, timeout: t.Optional[float] = None) -> t.Set[str]:
+        """Paths of the sources changed, created or deleted within ``timeout``."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            stats = self.scan()
+            changed = {
+                path
+                for path in stats.keys() | self.stats.keys()
+                if stats.get(path) != self.stats.get(path)
+            }
+            self.stats = stats
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval
+            if deadline is not None:
+                delay = max(0.0, min(delay, deadline - time.monotonic()))
+            time.sleep(delay)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Finds changed sources from the inotify events of every directory in a tree."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories: t.Dict[int, str] = {}
+        self.add_tree(root)
+
+    def add_tree(self, root: str) -> t.Set[str]:
+        """Watch ``root`` and every directory below it, returning their sources."""
+        sources: t.Set[str] = set()
+        for directory, _, files in os.walk(root):
+            descriptor = self.libc.inotify_add_watch(
+                self.fd, os.fsencode(directory), WATCH_MASK
+            )
+            if descriptor < 0:
+                error = ctypes.get_errno()
+                if directory == root:
+                    raise OSError(error, os.strerror(error), directory)
+                continue
+            self.directories[descriptor] = directory
+            sources.update(os.path.join(directory, name) for name in files)
+        return {path for path in sources if is_source(path)}
+
+    def read(self) -> t.Set[str]:
+        changed: t.Set[str] = set()
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, so anything may have changed.
+                changed.update(walk_sources(self.root))
+                continue
+            if mask & IN_IGNORED:
+                self.directories.pop(descriptor, None)
+                continue
+            directory = self.directories.get(descriptor)
+            if directory is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                # The sources that were below it are gone too.
+                changed.add(directory)
+                continue
+            if not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.update(self.add_tree(path))
+                elif mask & IN_MOVED_FROM:
+                    self.remove_tree(path)
+                    changed.add(path)
+            elif is_source(path):
+                changed.add(path)
+        return changed
+
+    def remove_tree(self, root: str) -> None:
+        """Stop watching ``root`` and every directory below it, which moved away."""
+        prefix = os.path.join(root, "")
+        for descriptor, directory in list(self.directories.items()):
+            if directory == root or directory.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, descriptor)
+                del self.directories[descriptor]
+
+    def wait(self, timeout: t.Optional[float] = None) -> t.Set[str]:
+        """Paths of the sources changed, created or deleted within ``timeout``,
+        and of the directories deleted or moved away with sources below them."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if not readable:
+                return set()
+            changed = self.read()
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+Watcher = t.Union[PollingWatcher, InotifyWatcher]
+
+
+def start_watcher(root: str, poll: bool = False, interval: float = 0.5) -> Watcher:
+    """An inotify watcher for ``root``, or a polling one where that is unavailable."""
+    if not poll:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError, TypeError):
+            # No inotify on this platform, or no watches left.
+            pass
+    return PollingWatcher(root, interval)
+
+
+class Watch:
+    """The compiled state of a tree of sources, kept up to date by ``update``.
+
+    ``hashes`` and ``modules`` hold the content hash and tree of every file
+    built so far. Files whose hash did not change are never parsed again, and
+    an ``ASTCache`` also spares parsing contents seen in earlier runs.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        root: str,
+        watcher: Watcher,
+        lexer: str = "scanner",
+        ast_cache: t.Optional[ASTCache] = None,
+        debounce: float = 0.02,
+    ) -> None:
+        self.root = root
+        self.watcher = watcher
+        self.compiler = StarlaCompiler(lexer=lexer, fast=True)
+        self.ast_cache = ast_cache
+        self.debounce = debounce
+        self.hashes: t.Dict[str, str] = {}
+        self.modules: t.Dict[str, t.Any] = {}
+
+    def key(self, source: bytes) -> str:
+        if self.ast_cache is not None:
+            return self.ast_cache.key(source)
+        return hashlib.sha256(source).hexdigest()
+
+    def compile(self, path: str) -> t.Optional[CompileResult]:
+        """Compile ``path`` if its contents changed, forgetting it if it is gone."""
+        try:
+            with open(path, "rb") as file:
+                source = file.read()
+        except FileNotFoundError:
+            self.hashes.pop(path, None)
+            self.modules.pop(path, None)
+            return None
+        except OSError as error:
+            return CompileResult(path, None, str(error))
+
+        key = self.key(source)
+        if self.hashes.get(path) == key:
+            return None
+        self.hashes[path] = key
+        module = None if self.ast_cache is None else self.ast_cache.load(key)
+        if module is not None:
+            result = CompileResult(path, module)
+        else:
+            result = parse_file(path, source, self.compiler)
+            if self.ast_cache is not None and result.module is not None:
+                self.ast_cache.store(key, result.module)
+        self.modules[path] = result.module
+        return result
+
+    def build(self, paths: t.Optional[t.Iterable[str]] = None) -> t.List[CompileResult]:
+        """Compile ``paths``, or every source under ``root``, that changed.
+
+        Other paths are of directories that are gone, and the sources built
+        below them are forgotten.
+        """
+        if paths is None:
+            paths = find_sources([self.root])
+        sources = set()
+        for path in paths:
+            if is_source(path):
+                sources.add(path)
+            else:
+                prefix = os.path.join(path, "")
+                sources.update(
+                    known for known in self.hashes if known.startswith(prefix)
+                )
+        results = []
+        for path in sorted(sources):
+            result = self.compile(path)
+            if result is not None:
+                results.append(result)
+        return results
+
+    def wait(self, timeout: t.Optional[float] = None) -> t.Set[str]:
+        """Wait up to ``timeout`` for changes, returning the paths that changed.
+
+        Once something changes, further changes are collected until none
+        arrive for ``debounce`` seconds, so a burst of saves is built once.
+        """
+        changed = self.watcher.wait(timeout)
+        while changed:
+            more = self.watcher.wait(self.debounce)
+            if not more:
+                break
+            changed |= more
+        return changed
+
+    def update(self, timeout: t.Optional[float] = None) -> t.List[CompileResult]:
+        """Wait up to ``timeout`` for changes and rebuild the changed files."""
+        return self.build(self.wait(timeout))
+
+    def close(self) -> None:
+        self.watcher.close()
+        if self.ast_cache is not None:
+            self.ast_cache.prune()
@@ -0,0 +1,9 @@
+import pytest
+
+from compiler import StarlaCompiler
+
+
+@pytest.fixture(params=[False, True], ids=["models", "nodes"])
+def compiler(request):
+    """A compiler building pydantic models, then one building slotted nodes."""
+    return StarlaCompiler(lexer="scanner", fast=request.param)
@@ -0,0 +1,138 @@
+"""Programs that every backend must run the same way as the interpreter."""
+
+import glob
+
+with open("main.star", encoding="utf-8") as file:
+    SOURCE = file.read()
+
+PROGRAMS = {
+    "main": SOURCE,
+    "operators": """
+x = [1 + 2 * 3, 7 / 2, 7.0 / 2, 2 ** 10 % 1000, -3 + +1, ~5, !True, not 0]
+y = (6 || 1, 6 && 3, 6 ^ 3, 'a' 'b', null, {'a': 1, 2: 2.0})
+output(x, y)
+""",
+    "logic": """
+a = 0
+b = 5
+output(a and missing, b or missing, a or b, b and a)
+output(1 < 2 < 3, 3 > 2 > 2, 1 <= 1 == 1 != 2, a < b > a)
+b = a or b
+a = b and a
+output(a, b)
+""",
+    "functions": """
+def scale (a :int, b :int = 2, c :int = 3) -> :int {
+    return (a * b + c)
+}
+
+def counter (start :int) -> :int {
+    count = start
+    def bump (by :int) -> :int {
+        count = 100
+        def inner () -> :int {
+            return (count + by)
+        }
+        return inner
+    }
+    return bump
+}
+
+bump = counter(5)
+inner = bump(2)
+output(scale(1), scale(1, 10), scale(a=1 c=0), scale(1, 2, c=4), inner())
+""",
+    "loops": """
+squares = []
+for i in range(5) {
+    append(squares, i * i)
+}
+
+def first_over (values :list[:int], limit :int) -> :int {
+    for value in values {
+        if value > limit {
+            return value
+        }
+    }
+    return null
+}
+
+def total (values :list[:int]) -> :int {
+    sum = 0
+    i = 0
+    while i < (len(values)) {
+        sum = sum + (get(values, i))
+        i = i + 1
+    }
+    return sum
+}
+
+table = {}
+for i in squares {
+    if i % 2 == 0 {
+        put(table, i, "even")
+    } elif i == 1 {
+        put(table, i, "one")
+    } else {
+        put(table, i, "odd")
+    }
+}
+output(first_over(squares, 5), first_over(squares, 50), total(squares), table)
+""",
+}
+# Programs that every backend must stop at the same point as the interpreter,
+# reading the variable named with them before it is assigned.
+FAILING = {
+    "unset_local": (
+        """
+def f () -> :int {
+    if False {
+        z = 1
+    }
+    return z
+}
+def g (a :bool) -> :int {
+    if a {
+        y = 1
+    } else {
+        y = 2
+    }
+    return y + 1
+}
+output((g(True)), (g(False)))
+output((f()))
+""",
+        "z",
+    ),
+    "local_shadows_global": (
+        """
+x = 1
+def f () -> :int {
+    x = x + 1
+    return x
+}
+output(x)
+output((f()), x)
+""",
+        "x",
+    ),
+    "unset_free": (
+        """
+def f () -> :int {
+    def g () -> :int {
+        return w
+    }
+    output(1)
+    g()
+    w = 2
+    return w
+}
+f()
+""",
+        "w",
+    ),
+}
+
+for path in sorted(glob.glob("benchmarks/programs/*.star")):
+    with open(path, encoding="utf-8") as file:
+        PROGRAMS[path] = file.read()
@@ -0,0 +1,113 @@
+import random
+import re
+
+from compiler.analysis import Analyser
+from compiler.incremental import TextEdit
+from compiler.positions import LineIndex
+from compiler.resolver import resolve
+from compiler.typecheck import check
+
+with open("main.star", encoding="utf-8") as file:
+    SOURCE = file.read()
+
+
+def problems(analysis):
+    return sorted(analysis.problems)
+
+
+def expected(module, source):
+    lines = LineIndex(source)
+    errors = (*resolve(module, source).errors, *check(module, source).errors)
+    return sorted(
+        (error.message, lines.starts[error.line - 1] + error.column - 1)
+        for error in errors
+    )
+
+
+def test_same_as_the_whole_module(compiler):
+    source = SOURCE + "y :str = num\nz = undefined\n"
+    module = compiler.parse(source)
+    analysis = Analyser().analyse(module, LineIndex(source))
+    assert problems(analysis) == expected(module, source)
+    assert len(analysis.problems) == 2
+
+
+def test_sequence_of_edits(compiler):
+    source = SOURCE * 2
+    module = compiler.parse(source)
+    analyser = Analyser()
+    generator = random.Random(0)
+    for _ in range(30):
+        # Numbers outside of strings, names, or the start of a line.
+        pattern = r'(?<!["-])\b\d+\b(?!")|\bmy\w+|^'
+        match = generator.choice(list(re.finditer(pattern, source, re.M)))
+        if match.group().isdigit():
+            # Numbers become other numbers or strings, making type errors.
+            text = generator.choice([match.group() + "1", '"s"'])
+        elif match.group():
+            # Names declared again, or used before they are declared.
+            text = match.group() + generator.choice(["1", ""])
+        else:
+            text = generator.choice(["\n", " "])
+        edit = TextEdit(match.start(), match.end(), text)
+        module = compiler.reparse(module, source, edit)
+        source = edit.apply(source)
+        analysis = analyser.analyse(module, LineIndex(source))
+        assert problems(analysis) == expected(module, source)
+
+
+def test_keeps_unchanged_statements(compiler):
+    source = "x = 1\ndef f () -> :int {\n    return x\n}\ny :int = (f())\n"
+    module = compiler.parse(source)
+    analyser = Analyser()
+    analyser.analyse(module, LineIndex(source))
+    before = dict(analyser.summaries)
+    edit = TextEdit(0, 0, "w = 2\n")
+    module = compiler.reparse(module, source, edit)
+    source = edit.apply(source)
+    analysis = analyser.analyse(module, LineIndex(source))
+    assert [summary in before.values() for summary in analysis.summaries] == [
+        False,
+        True,
+        True,
+        True,
+    ]
+    assert analysis.at(source.index("x\n}")).definition.start == source.index("x =")
+
+
+def test_checks_again_when_types_change(compiler):
+    source = "x = 1\ndef f () -> :int {\n    return x\n}\n"
+    module = compiler.parse(source)
+    analyser = Analyser()
+    assert analyser.analyse(module, LineIndex(source)).problems == []
+    edit = TextEdit(4, 5, '"s"')
+    module = compiler.reparse(module, source, edit)
+    source = edit.apply(source)
+    analysis = analyser.analyse(module, LineIndex(source))
+    assert analysis.problems == [
+        ("Cannot return str from a function returning int", source.index("x\n}"))
+    ]
+
+
+def test_syntax_errors(compiler):
+    source = "x = 1\ny = ) 2\nz = x\n"
+    module, _ = compiler.parse_recovering(source)
+    analysis = Analyser().analyse(module, LineIndex(source))
+    assert analysis.problems == [("Unexpected ')'", source.index(")"))]
+
+
+def test_names(compiler):
+    source = "output((f(1)))\ndef f (a :int) -> :int {\n    return a\n}\nf = 2\n"
+    module = compiler.parse(source)
+    analysis = Analyser().analyse(module, LineIndex(source))
+    name, definition = analysis.at(source.index("f("))
+    assert (name.name, definition.start) == ("f", source.index("f ("))
+    assert analysis.at(source.index("f = 2")).definition.start == source.index("f (")
+    name, definition = analysis.at(source.index("a\n}"))
+    assert (definition.kind, definition.start) == ("argument", source.index("a :int"))
+    assert analysis.at(source.index("output")).definition is None
+    assert analysis.at(source.index("1")) is None
+    assert [definition.qualified for definition in analysis.definitions()] == [
+        "f",
+        "f.a",
+    ]
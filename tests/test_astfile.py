@@ -0,0 +1,123 @@
+import pytest
+import test_parsing
+from programs import PROGRAMS
+
+from compiler import StarlaCompiler, astfile, models, nodes
+from compiler.incremental import POSITIONED, walk
+
+
+def parsing_fixtures():
+    """Every source the parsing tests parse, found by running them."""
+    sources = []
+    parse = test_parsing.parse
+
+    def recording(code):
+        sources.append(code)
+        return parse(code)
+
+    test_parsing.parse = recording
+    try:
+        tests = test_parsing.TestCorrectParsing()
+        for name in dir(tests):
+            if name.startswith("test_"):
+                getattr(tests, name)()
+    finally:
+        test_parsing.parse = parse
+    return sources
+
+
+FIXTURES = parsing_fixtures()
+
+
+def positions(module):
+    return [
+        (type(node).__name__, node.index)
+        for node in walk(module)
+        if type(node).__name__ in POSITIONED
+    ]
+
+
+@pytest.fixture(params=[False, True], ids=["models", "nodes"])
+def fast(request):
+    return request.param
+
+
+def test_parsing_fixtures(fast):
+    tests = [name for name in dir(test_parsing.TestCorrectParsing) if "test_" in name]
+    assert len(FIXTURES) >= len(tests)
+    for source in FIXTURES:
+        module = test_parsing.parse(source)
+        if fast:
+            module = nodes.from_model(module)
+        read = astfile.loads(astfile.dumps(module), fast)
+        assert read == module
+        assert positions(read) == positions(module)
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_programs(name, fast):
+    module = StarlaCompiler(lexer="scanner", fast=fast).parse(PROGRAMS[name])
+    data = astfile.dumps(module)
+    read = astfile.loads(data, fast)
+    assert type(read) is type(module)
+    assert read == module
+    assert positions(read) == positions(module)
+    # Either flavour reads what the other wrote.
+    other = astfile.loads(data, not fast)
+    assert (nodes.to_model(other) if not fast else nodes.from_model(other)) == module
+
+
+def test_values():
+    module = nodes.Module(
+        body=(
+            nodes.Namespace(name="x", ctx="load", index=-5),
+            nodes.Namespace(name="\U0001f600", ctx="load", index=300_000),
+            nodes.Call(
+                target=nodes.Namespace(name="x", ctx="load"),
+                kwargs={"a": nodes.Bool(value="True"), "b": nodes.Null()},
+            ),
+        )
+    )
+    read = astfile.loads(astfile.dumps(module), fast=True)
+    assert read == module
+    assert [statement.index for statement in read.body[:2]] == [-5, 300_000]
+
+
+def test_node_types():
+    assert sorted(astfile.NODE_TYPES) == sorted(nodes.NODES)
+    assert sorted(astfile.NODE_TYPES) == sorted(
+        model.__name__ for model in models.Ast.__subclasses__()
+    )
+
+
+def test_lazy_statements(tmp_path):
+    module = StarlaCompiler(lexer="scanner", fast=True).parse(PROGRAMS["main"])
+    path = str(tmp_path / "main.ast")
+    astfile.dump(module, path)
+    with astfile.load(path, fast=True) as reader:
+        assert len(reader) == len(module.body)
+        assert reader.statements.count(None) == len(module.body)
+        statement = reader[3]
+        assert statement == module.body[3]
+        assert reader[3] is statement
+        assert reader.statements.count(None) == len(module.body) - 1
+        assert reader[-1] == module.body[-1]
+        assert list(reader[1:3]) == list(module.body[1:3])
+        assert reader.module() == module
+
+
+def test_invalid_data(tmp_path):
+    data = astfile.dumps(StarlaCompiler(fast=True).parse("x = 1\n"))
+    with pytest.raises(ValueError, match="Not an AST file"):
+        astfile.loads(b"STARBC" + data)
+    with pytest.raises(ValueError, match="Truncated"):
+        astfile.loads(data[:12])
+    version = len(astfile.MAGIC)
+    with pytest.raises(ValueError, match="another version"):
+        astfile.loads(data[:version] + b"\x7f" + data[version + 1 :])
+    with pytest.raises(ValueError, match="other node types"):
+        astfile.loads(data[: version + 1] + b"0000" + data[version + 5 :])
+    path = tmp_path / "empty.ast"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError, match="Not an AST file"):
+        astfile.load(str(path))
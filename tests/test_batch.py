@@ -0,0 +1,74 @@
+import os
+import pickle
+import subprocess
+import sys
+
+from compiler import StarlaCompiler
+from compiler.batch import compile_files, find_sources
+
+with open("main.star", encoding="utf-8") as file:
+    SOURCE = file.read()
+
+
+def write(path, source):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(source)
+    return str(path)
+
+
+class TestBatch:
+    def test_find_sources(self, tmp_path):
+        first = write(tmp_path / "a.star", SOURCE)
+        second = write(tmp_path / "sub" / "b.star", SOURCE)
+        write(tmp_path / "notes.txt", "")
+
+        assert find_sources([str(tmp_path)]) == [first, second]
+        assert find_sources([str(tmp_path / "*.star")]) == [first]
+        assert find_sources([second, first, second]) == [first, second]
+
+    def test_compile_files(self, tmp_path):
+        paths = [write(tmp_path / f"{i}.star", SOURCE) for i in range(4)]
+        expected = StarlaCompiler(lexer="scanner", fast=True).parse(SOURCE)
+
+        for workers in (1, 2):
+            results = list(compile_files(paths, workers=workers))
+            assert [result.path for result in results] == paths
+            for result in results:
+                assert result.error is None
+                assert result.module == expected
+
+    def test_results_pickle(self, tmp_path):
+        (result,) = compile_files([write(tmp_path / "a.star", SOURCE)], workers=1)
+        assert pickle.loads(pickle.dumps(result)) == result
+
+    def test_errors(self, tmp_path):
+        paths = [
+            write(tmp_path / "a.star", SOURCE),
+            write(tmp_path / "b.star", "x = (\n"),
+            write(tmp_path / "c.star", "x = ) 1\ny = 2\nz = ]\n"),
+            str(tmp_path / "missing.star"),
+        ]
+        results = list(compile_files(paths, workers=2))
+        assert results[0].error is None
+        assert results[1].error == "1:6: Incomplete statement"
+        assert results[2].error == "1:5: Unexpected ')'\n3:5: Unexpected ']'"
+        assert results[3].error is not None
+        assert all(result.module is None for result in results[1:])
+
+    def test_compile_one_file_uncached(self, tmp_path):
+        for source, errors in [
+            ("x = (\n", ["1:6: Incomplete statement"]),
+            ("x = ) 1\ny = 2\nz = ]\n", ["1:5: Unexpected ')'", "3:5: Unexpected ']'"]),
+        ]:
+            path = write(tmp_path / "a.star", source)
+            process = subprocess.run(
+                [sys.executable, "-m", "compiler", "compile", "--no-cache", path],
+                capture_output=True,
+                check=False,
+                text=True,
+            )
+            assert process.returncode == 1
+            assert process.stderr.splitlines() == [
+                "%s: %s" % (path, error) for error in errors
+            ]
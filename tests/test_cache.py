@@ -0,0 +1,75 @@
+import glob
+import os
+
+from compiler import StarlaCompiler
+from compiler.batch import compile_files
+from compiler.cache import ASTCache
+
+with open("main.star", encoding="utf-8") as file:
+    SOURCE = file.read()
+
+MODULE = StarlaCompiler(lexer="scanner", fast=True).parse(SOURCE)
+
+
+class TestASTCache:
+    def test_round_trip(self, tmp_path):
+        cache = ASTCache(str(tmp_path))
+        key = cache.key(SOURCE.encode())
+        assert cache.load(key) is None
+        cache.store(key, MODULE)
+        assert cache.load(key) == MODULE
+        assert cache.touch(key)
+        assert not glob.glob(str(tmp_path / "*" / "*.tmp"))
+
+    def test_keys(self, tmp_path):
+        cache = ASTCache(str(tmp_path))
+        assert cache.key(b"x = 1") == cache.key(b"x = 1")
+        assert cache.key(b"x = 1") != cache.key(b"x = 2")
+        assert cache.key(b"x = 1") != ASTCache(str(tmp_path), signature="v2").key(
+            b"x = 1"
+        )
+
+    def test_corrupt_entry(self, tmp_path):
+        cache = ASTCache(str(tmp_path))
+        key = cache.key(SOURCE.encode())
+        cache.store(key, MODULE)
+        with open(cache.path(key), "r+b") as file:
+            file.truncate(10)
+        assert cache.load(key) is None
+
+    def test_prune(self, tmp_path):
+        cache = ASTCache(str(tmp_path))
+        keys = [cache.key(b"%d" % i) for i in range(4)]
+        for age, key in enumerate(keys):
+            cache.store(key, MODULE)
+            os.utime(cache.path(key), (age, age))
+        size = os.path.getsize(cache.path(keys[0]))
+        cache.load(keys[0])
+
+        cache.max_size = size * 2
+        assert cache.prune() == size * 2
+        assert [os.path.exists(cache.path(key)) for key in keys] == [
+            True,
+            False,
+            False,
+            True,
+        ]
+
+    def test_compile_files(self, tmp_path):
+        path = str(tmp_path / "main.star")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(SOURCE)
+        cache_directory = str(tmp_path / "cache")
+
+        for _ in range(2):
+            (result,) = compile_files(
+                [path], workers=1, ast_cache=ASTCache(cache_directory)
+            )
+            assert result.module == MODULE
+        assert len(glob.glob(os.path.join(cache_directory, "*", "*.ast"))) == 1
+
+        (result,) = compile_files(
+            [path], workers=1, ast_cache=ASTCache(cache_directory), modules=False
+        )
+        assert result.error is None
+        assert result.module is None
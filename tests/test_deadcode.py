@@ -0,0 +1,155 @@
+import io
+
+import pytest
+from programs import PROGRAMS
+
+from compiler import StarlaCompiler
+from compiler.deadcode import eliminate
+from compiler.incremental import walk
+from compiler.interpreter import Interpreter
+
+SOURCE = """
+unused = 1
+used = 2
+helper_value = used * 3
+def helper (x :int) -> :int {
+    dead = x
+    return x * 2
+    output("never")
+    output("reached")
+}
+def unused_function () -> :int {
+    return (helper(unused))
+}
+def main () -> :null {
+    def inner () -> :int {
+        return helper_value
+    }
+    def unused_inner () -> :int {
+        return 1
+    }
+    junk = [1, 2]
+    kept = (helper(1))
+    output((inner()))
+}
+logged = output("side effect")
+"""
+
+
+def declared(module):
+    return sorted(
+        node.target.name
+        for node in walk(module)
+        if type(node).__name__ in ("VariableDeclaration", "FunctionDeclaration")
+    )
+
+
+def interpret(module):
+    stdout = io.StringIO()
+    Interpreter(stdout=stdout).run(module, ["arg"])
+    return stdout.getvalue()
+
+
+def test_removes_unused_declarations(compiler):
+    module, stats = eliminate(compiler.parse(SOURCE))
+    assert declared(module) == [
+        "helper",
+        "helper_value",
+        "inner",
+        "kept",
+        "logged",
+        "main",
+        "used",
+    ]
+    assert [(removed.kind, removed.name) for removed in stats.declarations] == [
+        ("variable", "unused"),
+        ("variable", "helper.dead"),
+        ("function", "unused_function"),
+        ("function", "main.unused_inner"),
+        ("variable", "main.junk"),
+    ]
+    assert stats.statements == 2
+    assert stats.saved > 0
+    assert interpret(module) == "side effect\n6\n"
+
+
+def test_report(compiler):
+    _, stats = eliminate(compiler.parse(SOURCE))
+    summary, *lines = stats.report(declarations=True).splitlines()
+    assert summary.startswith(
+        "Removed 5 unused declarations and 2 unreachable statements, "
+    )
+    assert lines[0].startswith("  variable unused: ")
+    assert stats.report() == summary
+
+
+def test_keeps_what_is_used_through_closures(compiler):
+    source = """
+def counter (start :int) -> :int {
+    count = start
+    step = 1
+    def bump () -> :int {
+        def inner () -> :int {
+            return (count + step)
+        }
+        return inner
+    }
+    return bump
+}
+output((((counter(1))())()))
+"""
+    module, stats = eliminate(compiler.parse(source))
+    assert not stats.declarations
+    assert interpret(module) == "2\n"
+
+
+def test_follows_declarations_transitively(compiler):
+    source = """
+a = 1
+b = a
+c = [b, (a, len)]
+d = 1
+while d < 3 {
+    d = d + 1
+    e = c
+}
+output(d)
+"""
+    module, stats = eliminate(compiler.parse(source))
+    assert declared(module) == ["d", "d"]
+    assert sorted(removed.name for removed in stats.declarations) == [
+        "a",
+        "b",
+        "c",
+        "e",
+    ]
+
+
+def test_keeps_declarations_that_may_raise(compiler):
+    source = """
+def half (n :int) -> :int {
+    copy = n
+    rest = later
+    return n / 2
+}
+x = 1 / 0
+y = [nope]
+z = later
+later = 2
+output("hi", (half(4)))
+"""
+    module, stats = eliminate(compiler.parse(source))
+    assert declared(module) == ["half", "later", "rest", "x", "y", "z"]
+    assert [removed.name for removed in stats.declarations] == ["half.copy"]
+    stdout = io.StringIO()
+    with pytest.raises(ZeroDivisionError):
+        Interpreter(stdout=stdout).run(module)
+    assert stdout.getvalue() == ""
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_preserves_behaviour(name):
+    compiler = StarlaCompiler(lexer="scanner", fast=True)
+    module = compiler.parse(PROGRAMS[name])
+    eliminated, _ = eliminate(module)
+    assert interpret(eliminated) == interpret(module)
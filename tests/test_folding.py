@@ -0,0 +1,142 @@
+import io
+
+import pytest
+from programs import PROGRAMS
+
+from compiler import StarlaCompiler, nodes
+from compiler.folding import fold
+from compiler.interpreter import Interpreter
+from compiler.transpiler import CodeCache, compile_source
+
+FOLDABLE = """
+day = 60 * 60 * 24
+neg = -1
+s = "a" + "b" + 'c'
+chars = 'a' * 3
+b = 1 < 2 <= 2
+ratio = 7 / 2 + 0.5 * 3
+bits = (6 || 1) ^ ~0 && 255
+picked = 0 or "default"
+kept = 1 and y
+logic = not (1 > 2) == !False
+"""
+
+
+def values(module):
+    return {
+        node.target.name: node.value
+        for node in module.body
+        if type(node).__name__ == "VariableDeclaration"
+    }
+
+
+def interpret(module):
+    stdout = io.StringIO()
+    interpreter = Interpreter(stdout=stdout)
+    interpreter.run(module, ["arg"])
+    return stdout.getvalue(), interpreter.globals.variables
+
+
+def test_folds_literals(compiler):
+    module, stats = fold(compiler.parse(FOLDABLE))
+    folded = {
+        name: (type(value).__name__, value.value)
+        for name, value in values(module).items()
+        if name != "kept"
+    }
+    assert folded == {
+        "day": ("Int", "86400"),
+        "neg": ("Int", "-1"),
+        "s": ("String", "abc"),
+        "chars": ("String", "aaa"),
+        "b": ("Bool", "True"),
+        "ratio": ("Float", "4.5"),
+        "bits": ("Int", "248"),
+        "picked": ("String", "default"),
+        "logic": ("Bool", "True"),
+    }
+    assert type(values(module)["kept"]).__name__ == "Namespace"
+    assert stats.operations == 17
+    assert stats.comparisons == 3
+    assert stats.removed > 0
+
+
+def test_keeps_the_tree_flavour(compiler):
+    module, _ = fold(compiler.parse("x = 1 + 2\n"))
+    assert isinstance(values(module)["x"], nodes.Node) == (
+        compiler.parser.models is nodes
+    )
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "x = 1 / 0\n",
+        "x = 2 ** 100000\n",
+        "x = 'a' * 100000\n",
+        'x = 1 + "a"\n',
+        "x = 1.5 ** 2000\n",
+        "x = 1 + y\n",
+        "x = 1 < y < 2\n",
+    ],
+)
+def test_leaves_what_cannot_fold(compiler, source):
+    module = compiler.parse(source)
+    folded, stats = fold(module)
+    assert folded == module
+    assert stats.operations == stats.comparisons == 0
+
+
+def test_eliminates_branches(compiler):
+    source = """
+if 1 > 2 {
+    output("no")
+} elif y {
+    output("maybe")
+} elif 2 > 1 and True {
+    output("yes")
+} else {
+    output("never")
+}
+while 1 > 2 {
+    output("never")
+}
+while y {
+    output(1 + 1)
+}
+if False {
+    pass
+} else {
+    z = 1
+}
+"""
+    module, stats = fold(compiler.parse(source))
+    first, loop, assignment = module.body
+    ((condition, _),) = first.conditionals
+    assert condition.name == "y"
+    assert first.default[0].args[0].value == "yes"
+    assert loop.body[0].args[0].value == "2"
+    assert assignment.target.name == "z"
+    assert (stats.branches, stats.loops) == (3, 1)
+    assert "Removed 3 if branches and 1 while loops" in stats.report()
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS) + ["foldable"])
+def test_preserves_behaviour(compiler, name):
+    source = FOLDABLE.replace("kept = 1 and y\n", "") if name == "foldable" else None
+    module = compiler.parse(source or PROGRAMS[name])
+    folded, _ = fold(module)
+    output, variables = interpret(module)
+    folded_output, folded_variables = interpret(folded)
+    assert folded_output == output
+    assert folded_variables.keys() == variables.keys()
+
+
+def test_optimized_code_is_cached_apart(tmp_path):
+    source = FOLDABLE.encode()
+    compiler = StarlaCompiler(lexer="scanner", fast=True)
+    cache = CodeCache(str(tmp_path))
+    plain = compile_source(source, compiler, cache)
+    optimized = compile_source(source, compiler, cache, optimize=True)
+    assert len(list(tmp_path.glob("*/*.pyc"))) == 2
+    assert optimized.co_consts[0].co_code != plain.co_consts[0].co_code
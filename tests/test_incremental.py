@@ -0,0 +1,72 @@
+import random
+import re
+
+from compiler import StarlaCompiler, nodes
+from compiler.incremental import TextEdit, positioned
+
+with open("main.star", encoding="utf-8") as file:
+    SOURCE = file.read()
+
+
+def offsets(module):
+    return [(type(node).__name__, node.index) for node in positioned(module.body)]
+
+
+def check(compiler, source, edit):
+    module = compiler.parse(source)
+    body = module.body
+    reparsed = compiler.reparse(module, source, edit)
+    expected = StarlaCompiler(
+        lexer="scanner", fast=compiler.parser.models is nodes
+    ).parse(edit.apply(source))
+    assert reparsed == expected
+    assert offsets(reparsed) == offsets(expected)
+    return body, reparsed.body
+
+
+class TestIncremental:
+    def test_edit_apply(self):
+        assert TextEdit(1, 3, "xyz").apply("abcd") == "axyzd"
+        assert TextEdit(1, 3, "xyz").delta == 1
+
+    def test_top_level_statement(self, compiler):
+        start = SOURCE.index("[1, 2, 3, 4]") + 1
+        old, new = check(compiler, SOURCE, TextEdit(start, start + 1, "100"))
+        changed = [i for i, (a, b) in enumerate(zip(old, new)) if a is not b]
+        assert len(changed) == 1
+
+    def test_inside_block(self, compiler):
+        start = SOURCE.index("output(num)")
+        old, new = check(compiler, SOURCE, TextEdit(start + 7, start + 10, "mylist"))
+        function = next(i for i, (a, b) in enumerate(zip(old, new)) if a is not b)
+        assert all(a is b for i, (a, b) in enumerate(zip(old, new)) if i != function)
+        # Only the for loop at the end of main's body was parsed again.
+        assert old[function].body[:-1] == new[function].body[:-1]
+        assert all(
+            a is b for a, b in zip(old[function].body[:-1], new[function].body[:-1])
+        )
+
+    def test_across_statements(self, compiler):
+        source = "x = 1\ny = 2\nz = 3\n"
+        check(compiler, source, TextEdit(0, 11, "if x > 0 {\n    y = 2\n}"))
+        check(compiler, source, TextEdit(5, 6, ""))
+        check(compiler, source, TextEdit(0, len(source), "w = 4"))
+        check(compiler, source, TextEdit(12, 17, "z = 3\nw = 4\nv = 5"))
+
+    def test_sequence_of_edits(self, compiler):
+        source = SOURCE * 3
+        module = compiler.parse(source)
+        generator = random.Random(0)
+        for _ in range(50):
+            match = generator.choice(
+                list(re.finditer(r"\b\d+\b|\bmy\w+|^", source, re.M))
+            )
+            if match.group():
+                text = match.group() + generator.choice(["1", "", " "])
+            else:
+                text = generator.choice(["\n", " "])
+            edit = TextEdit(match.start(), match.end(), text)
+            module = compiler.reparse(module, source, edit)
+            source = edit.apply(source)
+            assert module == compiler.parse(source)
+            assert offsets(module) == offsets(compiler.parse(source))
@@ -0,0 +1,168 @@
+import io
+
+import pytest
+from programs import PROGRAMS
+
+from compiler import StarlaCompiler
+from compiler.incremental import walk
+from compiler.inlining import inline
+from compiler.interpreter import Interpreter, StarlaRuntimeError
+from compiler.optimizer import optimize
+
+SOURCE = """
+def minus (a :int, b :int, c :int = 1) -> :int {
+    return a - b * c
+}
+def square (x :int) -> :int {
+    return x * x
+}
+def main () -> :null {
+    n = 4
+    output((minus(n, 2)))
+    output((minus(b=1 a=n)))
+    output((minus(n, 1, c=3)))
+    output((square(n)))
+    output((square(n + 1)))
+}
+"""
+
+
+def called(module):
+    return sorted(
+        node.target.name
+        for node in walk(module)
+        if type(node).__name__ == "Call" and type(node.target).__name__ == "Namespace"
+    )
+
+
+def interpret(module):
+    stdout = io.StringIO()
+    Interpreter(stdout=stdout).run(module, ["arg"])
+    return stdout.getvalue()
+
+
+def test_inlines_calls(compiler):
+    module, stats = inline(compiler.parse(SOURCE))
+    # ``n + 1`` is used twice by ``square``, so is not substituted.
+    assert called(module) == ["output"] * 5 + ["square"]
+    assert stats.calls == 4
+    assert stats.report() == "Inlined 4 calls to 2 functions"
+    assert interpret(module) == "2\n3\n1\n16\n25\n"
+
+
+def test_respects_budget(compiler):
+    module, stats = inline(compiler.parse(SOURCE), budget=3)
+    assert called(module) == ["minus"] * 3 + ["output"] * 5 + ["square"]
+    assert stats.calls == 1
+
+
+def test_does_not_inline_recursive_functions(compiler):
+    source = """
+def loop (n :int) -> :int {
+    return (loop(n - 1))
+}
+def twice (n :int) -> :int {
+    return (again(n)) * 2
+}
+def again (n :int) -> :int {
+    return (twice(n))
+}
+output((again(1)))
+"""
+    module, _ = inline(compiler.parse(source))
+    assert called(module) == ["again", "loop", "output", "twice", "twice"]
+
+
+def test_does_not_capture_local_names(compiler):
+    source = """
+scale = 10
+def scaled (x :int) -> :int {
+    return x * scale
+}
+def main () -> :null {
+    scale = 2
+    output((scaled(3)))
+}
+output((scaled(4)))
+"""
+    module, stats = inline(compiler.parse(source))
+    assert stats.calls == 1
+    assert called(module) == ["output", "output", "scaled"]
+    assert interpret(module) == "40\n30\n"
+
+
+def test_does_not_inline_before_declaration(compiler):
+    source = """
+def main () -> :null {
+    output((double(1)))
+}
+def double (x :int) -> :int {
+    return x * 2
+}
+"""
+    module, stats = inline(compiler.parse(source))
+    assert stats.calls == 1
+    assert interpret(module) == "2\n"
+    # At the top level, ``double`` is not declared yet where it is called.
+    module, stats = inline(compiler.parse("output((double(1)))" + source))
+    assert "double" in called(module)
+
+
+def test_keeps_arguments_that_may_raise(compiler):
+    source = """
+def first (a :int, b :int) -> :int {
+    return a
+}
+def either (a :bool, b :int) -> :int {
+    return a or b
+}
+def add (a :int, b :int) -> :int {
+    return a + b
+}
+x = 1
+output((first(1, 1 / 0)))
+output((either(True, 1 / 0)))
+output((add(x + 1, 1 / 0)))
+output((first(x, 0)), (either(x > 1, False)), (add(x, x + 1)))
+"""
+    module, stats = inline(compiler.parse(source))
+    assert called(module) == ["add", "either", "first"] + ["output"] * 4
+    assert stats.calls == 3
+
+
+def test_keeps_names_that_may_be_unbound(compiler):
+    source = """
+def first (a :int, b :int) -> :int {
+    return a
+}
+def main (n :int) -> :null {
+    output((first(n, len)), (first(n, m)))
+    m = 1
+}
+x = 1
+output((first(x, output)))
+output((first(1, nope)))
+"""
+    module, stats = inline(compiler.parse(source))
+    assert called(module) == ["first", "first"] + ["output"] * 3
+    assert stats.calls == 2
+    stdout = io.StringIO()
+    with pytest.raises(StarlaRuntimeError, match="'nope' is not defined"):
+        Interpreter(stdout=stdout).run(module)
+    assert stdout.getvalue() == "1\n"
+
+
+def test_optimize_folds_inlined_constants(compiler):
+    module, stats = optimize(compiler.parse(SOURCE))
+    assert stats.inlined.calls == 4
+    assert [removed.name for removed in stats.eliminated.declarations] == ["minus"]
+    assert stats.report().splitlines()[0] == "Inlined 4 calls to 2 functions"
+    assert interpret(module) == "2\n3\n1\n16\n25\n"
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_preserves_behaviour(name):
+    compiler = StarlaCompiler(lexer="scanner", fast=True)
+    module = compiler.parse(PROGRAMS[name])
+    inlined, _ = inline(module)
+    assert interpret(inlined) == interpret(module)
@@ -0,0 +1,163 @@
+import glob
+import io
+
+import pytest
+from programs import FAILING
+
+from compiler import StarlaCompiler
+from compiler.interpreter import Interpreter, StarlaRuntimeError
+
+
+def run(compiler, source, args=None):
+    stdout = io.StringIO()
+    interpreter = Interpreter(stdout=stdout)
+    interpreter.run(compiler.parse(source), args)
+    return stdout.getvalue(), interpreter.globals.variables
+
+
+def test_main(compiler):
+    with open("main.star", encoding="utf-8") as file:
+        output, variables = run(compiler, file.read())
+    assert output == "-1\n\n\nHi\n" + "".join("%d\n" % i for i in range(1, 10))
+    assert variables["num"] == 10
+    assert variables["my_dict"] == {1: 2, 3: 4}
+    assert variables["mysupernestedtype"] == {1: [1, 2, 3]}
+
+
+@pytest.mark.parametrize(
+    "expression, value",
+    [
+        ("1 + 2 * 3", 7),
+        ("7 / 2", 3),
+        ("7.0 / 2", 3.5),
+        ("2 ** 10 % 1000", 24),
+        ("-3 + +1", -2),
+        ("6 || 1", 7),
+        ("6 && 3", 2),
+        ("6 ^ 3", 5),
+        ("~5", -6),
+        ("!True", False),
+        ("not 0", True),
+        ("1 < 2 < 3", True),
+        ("3 > 2 > 2", False),
+        ("1 <= 1 == 1 != 2", True),
+        ("0 and missing", 0),
+        ("1 or missing", 1),
+        ("'a' 'b'", "ab"),
+        ("null", None),
+        ("[1, 2]", [1, 2]),
+        ("(1, 2)", (1, 2)),
+        ("{'a': 1}", {"a": 1}),
+    ],
+)
+def test_expressions(compiler, expression, value):
+    _, variables = run(compiler, "x = %s\n" % expression)
+    assert variables["x"] == value
+
+
+def test_functions(compiler):
+    source = """
+def fib (n :int) -> :int {
+    if n < 2 {
+        return n
+    }
+    total :int = (fib(n - 1)) + (fib(n - 2))
+    return total
+}
+
+def scale (a :int, b :int = 2, c :int = 3) -> :int {
+    return (a * b + c)
+}
+
+def counter () -> :int {
+    count = 0
+    def bump () -> :int {
+        return (count + 1)
+    }
+    return bump
+}
+
+x = fib(15)
+y = scale(a=1 c=0)
+z = scale(1, 10)
+bump = counter()
+w = bump()
+"""
+    _, variables = run(compiler, source)
+    assert variables["x"] == 610
+    assert variables["y"] == 2
+    assert variables["z"] == 13
+    assert variables["w"] == 1
+    assert "count" not in variables
+
+
+def test_loops(compiler):
+    source = """
+squares = []
+for i in range(5) {
+    append(squares, i * i)
+}
+
+table = {}
+i = 0
+while i < 5 {
+    put(table, i, get(squares, i))
+    i = i + 1
+}
+
+def first_over (values :list[:int], limit :int) -> :int {
+    for value in values {
+        if value > limit {
+            return value
+        }
+    }
+    return null
+}
+
+found = first_over(squares, 5)
+"""
+    _, variables = run(compiler, source)
+    assert variables["squares"] == [0, 1, 4, 9, 16]
+    assert variables["table"] == {0: 0, 1: 1, 2: 4, 3: 9, 4: 16}
+    assert variables["found"] == 9
+
+
+def test_main_arguments(compiler):
+    source = "def main (args :list[:str]) -> :null {\n    output(len(args), args)\n}\n"
+    output, _ = run(compiler, source, ["a"])
+    assert output == "1 ['a']\n"
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ("x = y\n", "'y' is not defined"),
+        ("x = 1\nx()\n", "1 is not a function"),
+        (
+            "def f (a :int) -> :null {\n    pass\n}\nf(1, 2)\n",
+            "takes 1 arguments but got 2",
+        ),
+        ("def f (a :int) -> :null {\n    pass\n}\nf()\n", "missing the argument 'a'"),
+        (
+            "def f (a :int) -> :null {\n    pass\n}\nf(a=1 b=2)\n",
+            "unexpected argument 'b'",
+        ),
+    ],
+)
+def test_errors(compiler, source, message):
+    with pytest.raises(StarlaRuntimeError, match=message):
+        run(compiler, source)
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob("benchmarks/programs/*.star")))
+def test_benchmark_programs(path):
+    with open(path, encoding="utf-8") as file:
+        output, _ = run(StarlaCompiler(lexer="scanner", fast=True), file.read())
+    assert output.strip().isdigit()
+
+
+@pytest.mark.parametrize("name", sorted(FAILING))
+def test_locals_are_local_to_the_whole_function(compiler, name):
+    source, variable = FAILING[name]
+    with pytest.raises(StarlaRuntimeError, match="Name '%s' is not defined" % variable):
+        run(compiler, source)
@@ -3,202 +3,207 @@ import sys
 
 sys.path.insert(0, os.getcwd())
 
-from compiler import StarlaLexer
+import pytest
 
-lexer = StarlaLexer()
+from compiler import StarlaLexer, StarlaScanner
+
+
+@pytest.fixture(params=[StarlaLexer, StarlaScanner])
+def lexer(request):
+    return request.param()
 
 
 class TestCorrectTokens:
-    def test_ignore(self):
+    def test_ignore(self, lexer):
         for tok in lexer.tokenize("    \t\t\t"):
             assert False
 
-    def test_ARROW(self):
+    def test_ARROW(self, lexer):
         for tok in lexer.tokenize("  ->  "):
             assert tok.type == "ARROW"
 
-    def test_MINUS(self):
+    def test_MINUS(self, lexer):
         for tok in lexer.tokenize("  - - -  "):
             assert tok.type == "MINUS"
 
-    def test_PLUS(self):
+    def test_PLUS(self, lexer):
         for tok in lexer.tokenize("  + + +  "):
             assert tok.type == "PLUS"
 
-    def test_TIMES(self):
+    def test_TIMES(self, lexer):
         for tok in lexer.tokenize("  * * *  "):
             assert tok.type == "TIMES"
 
-    def test_DIVIDE(self):
+    def test_DIVIDE(self, lexer):
         for tok in lexer.tokenize("  / / /  "):
             assert tok.type == "DIVIDE"
 
-    def test_POWER(self):
+    def test_POWER(self, lexer):
         for tok in lexer.tokenize(" ** ** ** "):
             assert tok.type == "POWER"
 
-    def test_MOD(self):
+    def test_MOD(self, lexer):
         for tok in lexer.tokenize(" % % % "):
             assert tok.type == "MOD"
 
-    def test_NULL(self):
+    def test_NULL(self, lexer):
         for tok in lexer.tokenize("   null null null   "):
             assert tok.type == "NULL"
 
-    def test_NE(self):
+    def test_NE(self, lexer):
         for tok in lexer.tokenize(" != !=  != "):
             assert tok.type == "NE"
 
-    def test_ELIF(self):
+    def test_ELIF(self, lexer):
         for tok in lexer.tokenize("   elif elif elif  "):
             assert tok.type == "ELIF"
 
-    def test_INT(self):
+    def test_INT(self, lexer):
         for tok in lexer.tokenize("  1234567890 0987654321 6543210987  "):
             assert tok.type == "INT"
 
-    def test_DOUBLE(self):
+    def test_DOUBLE(self, lexer):
         for tok in lexer.tokenize(" 1234567890.0987654321 54321.09876 00.0 "):
             assert tok.type == "DOUBLE"
 
-    def test_OR(self):
+    def test_OR(self, lexer):
         for tok in lexer.tokenize(" or or or "):
             assert tok.type == "OR"
 
-    def test_ELSE(self):
+    def test_ELSE(self, lexer):
         for tok in lexer.tokenize(" else else else "):
             assert tok.type == "ELSE"
 
-    def test_PASS(self):
+    def test_PASS(self, lexer):
         for tok in lexer.tokenize(" pass pass pass"):
             assert tok.type == "PASS"
 
-    def test_WHILE(self):
+    def test_WHILE(self, lexer):
         for tok in lexer.tokenize(" while while while "):
             assert tok.type == "WHILE"
 
-    def test_NOT(self):
+    def test_NOT(self, lexer):
         for tok in lexer.tokenize(" not not not "):
             assert tok.type == "NOT"
 
-    def test_STRING(self):
+    def test_STRING(self, lexer):
         for tok in lexer.tokenize(
             r""" "abc" "acdef" "1234" "\\\n\v\t\"'" "~pass"  """
         ):  # TODO: Fix regex to match with \\ at end of string.
             assert tok.type == "STRING"
 
-    def test_IF(self):
+    def test_IF(self, lexer):
         for tok in lexer.tokenize("  if if if  "):
             assert tok.type == "IF"
 
-    def test_BOOL(self):
+    def test_BOOL(self, lexer):
         for tok in lexer.tokenize(" True False True"):
             assert tok.type == "BOOL"
 
-    def test_GT(self):
+    def test_GT(self, lexer):
         for tok in lexer.tokenize("  > > >  "):
             assert tok.type == "GT"
 
-    def test_LBRACKET(self):
+    def test_LBRACKET(self, lexer):
         for tok in lexer.tokenize(" [ [ [ "):
             assert tok.type == "["
 
-    def test_GE(self):
+    def test_GE(self, lexer):
         for tok in lexer.tokenize(" >= >= >="):
             assert tok.type == "GE"
 
-    def test_TYPE(self):
+    def test_TYPE(self, lexer):
         for tok in lexer.tokenize("  :dict :list :constant :zeb  "):
             assert tok.type == "TYPE"
 
-    def test_NAMESPACE(self):
+    def test_NAMESPACE(self, lexer):
         for tok in lexer.tokenize("  foobar lol code os  "):
             assert tok.type == "NAMESPACE"
 
-    def test_RETURN(self):
+    def test_RETURN(self, lexer):
         for tok in lexer.tokenize(" return return return "):
             assert tok.type == "RETURN"
 
-    def test_BINOR(self):
+    def test_BINOR(self, lexer):
         for tok in lexer.tokenize(" || || || "):
             assert tok.type == "BINOR"
 
-    def test_CHAR(self):
+    def test_CHAR(self, lexer):
         for tok in lexer.tokenize(r" 'a' '1' ' ' '\n' "):
             assert tok.type == "CHAR"
 
-    def test_EQUALS(self):
+    def test_EQUALS(self, lexer):
         for tok in lexer.tokenize(" = = = "):
             assert tok.type == "EQUALS"
 
-    def test_FLOAT(self):
+    def test_FLOAT(self, lexer):
         for tok in lexer.tokenize(" 0.1 0.0 0.1234567890 "):
             assert tok.type == "FLOAT"
 
-    def test_BINNOT(self):
+    def test_BINNOT(self, lexer):
         for tok in lexer.tokenize(" ~ ! ~ ! "):
             assert tok.type == "BINNOT"
 
-    def test_FOR(self):
+    def test_FOR(self, lexer):
         for tok in lexer.tokenize(" for for for "):
             assert tok.type == "FOR"
 
-    def test_RPAREN(self):
+    def test_RPAREN(self, lexer):
         for tok in lexer.tokenize(" ) ) ) "):
             assert tok.type == ")"
 
-    def test_LBRACE(self):
+    def test_LBRACE(self, lexer):
         for tok in lexer.tokenize(" { { { "):
             assert tok.type == "{"
 
-    def test_IN(self):
+    def test_IN(self, lexer):
         for tok in lexer.tokenize(" in in in "):
             assert tok.type == "IN"
 
-    def test_DEFINE(self):
+    def test_DEFINE(self, lexer):
         for tok in lexer.tokenize(" def def def "):
             assert tok.type == "DEFINE"
 
-    def test_COLON(self):
+    def test_COLON(self, lexer):
         for tok in lexer.tokenize(" ::: "):
             assert tok.type == "COLON"
 
-    def test_LE(self):
+    def test_LE(self, lexer):
         for tok in lexer.tokenize(" <= <= <= "):
             assert tok.type == "LE"
 
-    def test_RBRACE(self):
+    def test_RBRACE(self, lexer):
         for tok in lexer.tokenize(" } } } "):
             assert tok.type == "}"
 
-    def test_SEPARATOR(self):
+    def test_SEPARATOR(self, lexer):
         for tok in lexer.tokenize(" , , , "):
             assert tok.type == ","
 
-    def test_BINAND(self):
+    def test_BINAND(self, lexer):
         for tok in lexer.tokenize(" && && && "):
             assert tok.type == "BINAND"
 
-    def test_BINXOR(self):
+    def test_BINXOR(self, lexer):
         for tok in lexer.tokenize(" ^ ^ ^ "):
             assert tok.type == "BINXOR"
 
-    def test_LPAREN(self):
+    def test_LPAREN(self, lexer):
         for tok in lexer.tokenize(" ( ( ( "):
             assert tok.type == "("
 
-    def test_RBRACKET(self):
+    def test_RBRACKET(self, lexer):
         for tok in lexer.tokenize(" ] ] ] "):
             assert tok.type == "]"
 
-    def test_LT(self):
+    def test_LT(self, lexer):
         for tok in lexer.tokenize(" < < < "):
             assert tok.type == "LT"
 
-    def test_AND(self):
+    def test_AND(self, lexer):
         for tok in lexer.tokenize(" and and and "):
             assert tok.type == "AND"
 
-    def test_EQ(self):
+    def test_EQ(self, lexer):
         for tok in lexer.tokenize(" == == =="):
             assert tok.type == "EQ"
@@ -0,0 +1,68 @@
+import logging
+
+from compiler import StarlaCompiler
+from compiler.parser import SlyLogger
+
+
+class Formatted:
+    """Counts how many times it is formatted into a message."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __repr__(self):
+        self.count += 1
+        return "formatted"
+
+
+class TestSlyLogger:
+    def test_formats_only_enabled_messages(self, caplog):
+        caplog.set_level(logging.WARNING, logger="compiler.parser")
+        logger = SlyLogger()
+        skipped, logged = Formatted(), Formatted()
+        logger.debug("debug %r", skipped)
+        logger.warning("warning %r", logged)
+        assert logged.count == 0
+        logger.flush()
+        assert skipped.count == 0
+        assert logged.count > 0
+        assert caplog.messages == ["warning formatted"]
+
+    def test_flush_empties_buffer(self, caplog):
+        logger = SlyLogger()
+        logger.warning("%d shift/reduce conflicts", 115)
+        logger.flush()
+        logger.flush()
+        assert caplog.messages == ["115 shift/reduce conflicts"]
+
+    def test_buffer_is_bounded(self, caplog):
+        logger = SlyLogger(limit=3)
+        for number in range(5):
+            logger.error("message %d", number)
+        assert len(logger.buffer) == 3
+        logger.flush()
+        assert caplog.messages == [
+            "2 parser messages were dropped",
+            "message 2",
+            "message 3",
+            "message 4",
+        ]
+
+
+class TestTokenLogging:
+    def test_logs_tokens_at_debug(self, caplog):
+        caplog.set_level(logging.DEBUG, logger="compiler.scanner")
+        compiler = StarlaCompiler(lexer="scanner")
+        tokens = list(compiler.tokens("x = 1"))
+        assert caplog.messages == [
+            "Encountered token, %r" % (token,) for token in tokens
+        ]
+
+    def test_skips_tokens_when_disabled(self, caplog):
+        caplog.set_level(logging.INFO, logger="compiler.scanner")
+        compiler = StarlaCompiler(lexer="scanner")
+        module = compiler.parse("x = 1\noutput(x)")
+        assert len(module.body) == 2
+        assert not [
+            record for record in caplog.records if record.name == "compiler.scanner"
+        ]
@@ -0,0 +1,257 @@
+import io
+import subprocess
+import sys
+
+from compiler.lsp import LanguageServer, read_message, write_message
+
+URI = "file:///main.star"
+DOCUMENT = {"uri": URI}
+
+with open("main.star", encoding="utf-8") as file:
+    SOURCE = file.read()
+
+
+def request(identifier, method, params=None):
+    return {"jsonrpc": "2.0", "id": identifier, "method": method, "params": params}
+
+
+def notification(method, params=None):
+    return {"jsonrpc": "2.0", "method": method, "params": params}
+
+
+def position(source, text, after=0):
+    offset = source.index(text) + after
+    line = source.count("\n", 0, offset)
+    return {"line": line, "character": offset - source.rfind("\n", 0, offset) - 1}
+
+
+def opened(source=SOURCE):
+    return notification(
+        "textDocument/didOpen",
+        {"textDocument": {**DOCUMENT, "version": 0, "text": source}},
+    )
+
+
+def changed(start, end, text, version=1):
+    change = {"range": {"start": start, "end": end}, "text": text}
+    return notification(
+        "textDocument/didChange",
+        {"textDocument": {**DOCUMENT, "version": version}, "contentChanges": [change]},
+    )
+
+
+def at(identifier, method, where):
+    return request(identifier, method, {"textDocument": DOCUMENT, "position": where})
+
+
+def serve(*messages, capabilities=None):
+    """The exit code of a server handling ``messages``, and what it wrote."""
+    reader = io.BytesIO()
+    for message in (
+        request(0, "initialize", {"capabilities": capabilities or {}}),
+        notification("initialized", {}),
+        *messages,
+    ):
+        write_message(reader, message)
+    reader.seek(0)
+    writer = io.BytesIO()
+    code = LanguageServer(reader, writer).serve()
+    writer.seek(0)
+    written = []
+    while True:
+        message = read_message(writer)
+        if message is None:
+            return code, written
+        written.append(message)
+
+
+def responses(written):
+    return {message["id"]: message for message in written if "id" in message}
+
+
+def diagnostics(written):
+    return [
+        [diagnostic["message"] for diagnostic in message["params"]["diagnostics"]]
+        for message in written
+        if message.get("method") == "textDocument/publishDiagnostics"
+    ]
+
+
+def test_initialize():
+    _, written = serve()
+    capabilities = written[0]["result"]["capabilities"]
+    assert capabilities["positionEncoding"] == "utf-16"
+    assert capabilities["textDocumentSync"] == {"openClose": True, "change": 2}
+    assert capabilities["hoverProvider"]
+    assert capabilities["definitionProvider"]
+    assert capabilities["documentSymbolProvider"]
+
+
+def test_exit_code():
+    assert serve(request(1, "shutdown"), notification("exit"))[0] == 0
+    assert serve(notification("exit"))[0] == 1
+    assert serve()[0] == 1
+
+
+def test_unknown_method():
+    _, written = serve(request(1, "textDocument/rename"))
+    assert responses(written)[1]["error"]["code"] == -32601
+
+
+def test_failing_notifications_keep_serving():
+    code, written = serve(
+        notification("textDocument/didChange", {"textDocument": DOCUMENT}),
+        opened('x = "\\x"\n'),
+        request(1, "shutdown"),
+        notification("exit"),
+    )
+    assert code == 0
+    assert diagnostics(written) == [['Invalid escape sequence in "\\x"']]
+    assert responses(written)[1]["result"] is None
+
+
+def test_diagnostics_follow_changes():
+    where = position(SOURCE, "a - b")
+    after = position(SOURCE, "a - b", 1)
+    _, written = serve(
+        opened(),
+        changed(where, after, "zz"),
+        changed(where, position(SOURCE, "a - b", 2), "a", 2),
+        changed(where, where, "= ", 3),
+        notification("textDocument/didClose", {"textDocument": DOCUMENT}),
+    )
+    assert diagnostics(written) == [
+        [],
+        ["Name 'zz' is not defined"],
+        [],
+        ["Unexpected '='"],
+        [],
+    ]
+
+
+def test_diagnostic_ranges():
+    source = "x = 1\ny :str = x\n"
+    _, written = serve(opened(source))
+    (diagnostic,) = written[-1]["params"]["diagnostics"]
+    assert diagnostic["range"] == {
+        "start": {"line": 1, "character": 9},
+        "end": {"line": 1, "character": 10},
+    }
+    assert diagnostic["severity"] == 1
+
+
+def test_document_symbols():
+    _, written = serve(
+        opened(), request(1, "textDocument/documentSymbol", {"textDocument": DOCUMENT})
+    )
+    symbols = responses(written)[1]["result"]
+    assert [(symbol["name"], symbol["kind"]) for symbol in symbols] == [
+        ("my_dict", 13),
+        ("minus", 12),
+        ("myvar", 13),
+        ("myarr", 13),
+        ("mysupernestedtype", 13),
+        ("main", 12),
+        ("num", 13),
+    ]
+    main = symbols[5]
+    assert main["detail"] == "def main (arg :list[:str]) -> :null"
+    assert [symbol["name"] for symbol in main["children"]] == ["mylist", "num"]
+    assert main["selectionRange"]["start"] == position(SOURCE, "main")
+
+
+def test_hover():
+    _, written = serve(
+        opened(),
+        at(1, "textDocument/hover", position(SOURCE, "a - b")),
+        at(2, "textDocument/hover", position(SOURCE, "minus")),
+        at(3, "textDocument/hover", position(SOURCE, "output")),
+        at(4, "textDocument/hover", position(SOURCE, "1 > 0")),
+    )
+    found = responses(written)
+    assert found[1]["result"]["contents"] == {
+        "kind": "markdown",
+        "value": "```starla\n(argument) a :int\n```",
+    }
+    assert found[1]["result"]["range"]["start"] == position(SOURCE, "a - b")
+    assert "def minus (a :int, b :int, c :int, d :int = ...) -> :int" in (
+        found[2]["result"]["contents"]["value"]
+    )
+    assert "(builtin) output" in found[3]["result"]["contents"]["value"]
+    assert found[4]["result"] is None
+
+
+def test_definition():
+    source = SOURCE + "output((minus(1, 2, 3)))\n"
+    _, written = serve(
+        opened(source),
+        at(1, "textDocument/definition", position(source, "minus(")),
+        at(2, "textDocument/definition", position(source, "num)")),
+        at(3, "textDocument/definition", position(source, "output")),
+    )
+    found = responses(written)
+    assert found[1]["result"] == {
+        "uri": URI,
+        "range": {
+            "start": position(source, "minus"),
+            "end": position(source, "minus", 5),
+        },
+    }
+    assert found[2]["result"]["range"]["start"] == position(source, "num in")
+    assert found[3]["result"] is None
+
+
+def test_definition_after_changes():
+    where = position(SOURCE, "my_dict")
+    _, written = serve(
+        opened(),
+        changed(where, where, "\n\n"),
+        at(1, "textDocument/definition", position("\n\n" + SOURCE, "num + 1")),
+    )
+    assert responses(written)[1]["result"]["range"]["start"] == position(
+        "\n\n" + SOURCE, "num :int"
+    )
+
+
+def test_positions_in_utf16():
+    source = 'x = "\U0001f600"; y = x\n'
+    # The last x is 13 characters in, after a character of two code units.
+    where = {"line": 0, "character": 14}
+    _, written = serve(
+        opened(source),
+        at(1, "textDocument/definition", where),
+        at(2, "textDocument/hover", where),
+    )
+    found = responses(written)
+    assert found[1]["result"]["range"]["start"]["character"] == 0
+    assert found[2]["result"]["range"]["start"]["character"] == 14
+
+    _, written = serve(
+        opened(source),
+        at(1, "textDocument/hover", {"line": 0, "character": 13}),
+        capabilities={"general": {"positionEncodings": ["utf-32"]}},
+    )
+    assert written[0]["result"]["capabilities"]["positionEncoding"] == "utf-32"
+    assert responses(written)[1]["result"]["range"]["start"]["character"] == 13
+
+
+def test_standard_streams():
+    reader = io.BytesIO()
+    for message in (
+        request(1, "initialize", {"capabilities": {}}),
+        opened("x = y\n"),
+        request(2, "shutdown"),
+        notification("exit"),
+    ):
+        write_message(reader, message)
+    process = subprocess.run(
+        [sys.executable, "-m", "compiler", "lsp"],
+        input=reader.getvalue(),
+        capture_output=True,
+        check=False,
+    )
+    assert process.returncode == 0
+    writer = io.BytesIO(process.stdout)
+    written = [read_message(writer) for _ in range(3)]
+    assert diagnostics(written) == [["Name 'y' is not defined"]]
+    assert read_message(writer) is None
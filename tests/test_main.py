@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from compiler.__main__ import cli
+
+
+def test_commands_import_their_backends_lazily():
+    imported = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, compiler.__main__; print(*sorted(sys.modules))",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    for backend in ("lsp", "project", "transpiler", "typecheck", "vm", "watch"):
+        assert "compiler.%s" % backend not in imported
+
+
+def test_inline_budget_defaults(tmp_path):
+    path = tmp_path / "main.star"
+    path.write_text(
+        "def twice (n :int) -> :int {\n    return n * 2\n}\noutput((twice(2)))\n"
+    )
+    result = CliRunner().invoke(cli, ["interpret", "-O", "--no-cache", str(path)])
+    assert (result.exit_code, result.output) == (0, "4\n")
+
+
+def test_check_logs_only_errors(tmp_path):
+    path = tmp_path / "main.star"
+    path.write_text("output(1)\n")
+    result = subprocess.run(
+        [sys.executable, "-m", "compiler", "check", str(path)],
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+    assert (result.returncode, result.stderr) == (0, "")
+
+
+@pytest.mark.parametrize(
+    "command", [["interpret"], ["interpret", "--backend", "tree"], ["run"]]
+)
+def test_runtime_errors_are_one_line(tmp_path, command):
+    path = tmp_path / "main.star"
+    path.write_text("x = 1 / 0\n")
+    runner = CliRunner(env={"STARLA_NO_AST_CACHE": "1", "STARLA_NO_CODE_CACHE": "1"})
+    runner.invoke(cli, ["compile", "--bytecode", str(path)])
+    result = runner.invoke(cli, command + [str(path)])
+    assert result.exit_code == 1
+    assert result.output.splitlines() == [
+        "%s: ZeroDivisionError: integer division or modulo by zero"
+        % (path.with_suffix(".starc") if command == ["run"] else path)
+    ]
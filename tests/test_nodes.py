@@ -0,0 +1,35 @@
+from compiler import StarlaCompiler, nodes
+from compiler.nodes import from_model, to_model
+
+with open("main.star", encoding="utf-8") as file:
+    SOURCE = file.read()
+
+
+class TestNodes:
+    def test_fast_parse(self):
+        tree = StarlaCompiler().parse(SOURCE)
+        fast_tree = StarlaCompiler(fast=True).parse(SOURCE)
+        assert isinstance(fast_tree, nodes.Module)
+        assert to_model(fast_tree) == tree
+        assert from_model(tree) == fast_tree
+
+    def test_round_trip_keeps_positions(self):
+        tree = StarlaCompiler().parse(SOURCE)
+        target = to_model(from_model(tree)).body[0].target
+        assert target.index == tree.body[0].target.index == 0
+
+    def test_defaults(self):
+        first = nodes.Call(target=nodes.Namespace(name="f", ctx="load"))
+        second = nodes.Call.construct(target=nodes.Namespace(name="f", ctx="load"))
+        assert first == second
+        assert first.args == ()
+        assert first.kwargs == {} and first.kwargs is not second.kwargs
+        assert nodes.FunctionDeclaration(
+            target=nodes.Namespace(name="f", ctx="store"), body=()
+        ).annotation == nodes.TypeHint(type_value="null", type_structure=None)
+
+    def test_equality_ignores_positions(self):
+        assert nodes.Namespace(name="a", ctx="load", index=1) == nodes.Namespace(
+            name="a", ctx="load", index=2
+        )
+        assert nodes.Int(value="1") != nodes.Float(value="1")
@@ -1011,3 +1011,50 @@ class TestCorrectParsing:
                 ),
             )
         )
+
+    # Long sequences
+    def test_LONG_SEQUENCES(self):
+        size = 5000
+        tree = parse(
+            "x = [%s]\n" % ", ".join(map(str, range(size)))
+            + "y = {%s}\n" % ", ".join("%d: %d" % (i, i) for i in range(size))
+            + "z = "
+            + '"a" ' * size
+        )
+        assert isinstance(tree.body, tuple)
+        assert tree.body[0].value == List(
+            items=tuple(Int(value=str(i)) for i in range(size))
+        )
+        assert tree.body[1].value == Dict(
+            items=tuple((Int(value=str(i)), Int(value=str(i))) for i in range(size))
+        )
+        assert tree.body[2].value == String(value="a" * size)
+
+    def test_DEFAULT_ARGUMENTS(self):
+        tree = parse("def f (a :int = 1, b :int = 2) -> :int { g(c=a) }")
+        assert tree == Module.construct(
+            body=(
+                FunctionDeclaration.construct(
+                    target=Namespace(name="f", ctx="store"),
+                    default_arguments=(
+                        DefaultArg(
+                            arg="a",
+                            annotation=TypeHint(type_value="int"),
+                            value=Int(value="1"),
+                        ),
+                        DefaultArg(
+                            arg="b",
+                            annotation=TypeHint(type_value="int"),
+                            value=Int(value="2"),
+                        ),
+                    ),
+                    annotation=TypeHint(type_value="int"),
+                    body=(
+                        Call.construct(
+                            target=Namespace(name="g", ctx="load"),
+                            kwargs={"c": Namespace(name="a", ctx="load")},
+                        ),
+                    ),
+                ),
+            )
+        )
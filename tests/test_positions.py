@@ -0,0 +1,36 @@
+from compiler import StarlaCompiler
+from compiler.positions import LineIndex
+
+SOURCE = "a = 1\n\nb = a\n  c(b)"
+
+
+class TestLineIndex:
+    def test_lines(self):
+        index = LineIndex(SOURCE)
+        assert len(index) == 4
+        assert index.position(0) == (1, 1)
+        assert index.position(4) == (1, 5)
+        assert index.position(5) == (1, 6)  # The newline itself
+        assert index.position(6) == (2, 1)
+        assert index.position(7) == (3, 1)
+        assert index.position(SOURCE.index("c")) == (4, 3)
+
+    def test_empty(self):
+        assert LineIndex("").position(0) == (1, 1)
+
+    def test_tokens(self):
+        compiler = StarlaCompiler()
+        stream = compiler.token_stream(SOURCE)
+        lines = SOURCE.split("\n")
+        for position, token in enumerate(stream):
+            line, column = stream.position(position)
+            assert compiler.position(SOURCE, token.index) == (line, column)
+            assert sum(len(text) + 1 for text in lines[: line - 1]) + column - 1 == (
+                token.index
+            )
+
+    def test_namespaces(self):
+        compiler = StarlaCompiler()
+        module = compiler.parse(SOURCE)
+        assert compiler.position(SOURCE, module.body[1].target.index) == (3, 1)
+        assert compiler.position(SOURCE, module.body[2].target.index) == (4, 3)
@@ -0,0 +1,118 @@
+import os
+import subprocess
+import sys
+
+from compiler.project import ProjectIndex
+
+with open("main.star", encoding="utf-8") as file:
+    SOURCE = file.read()
+
+HELPER = "def helper (x :int) -> :int {\n    return (minus(x, 1, 2))\n}\n"
+
+
+def write(path, source):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(source)
+    return str(path)
+
+
+def project(tmp_path):
+    write(tmp_path / "src" / "main.star", SOURCE)
+    write(tmp_path / "src" / "lib" / "helper.star", HELPER)
+    return ProjectIndex(str(tmp_path / "src"), str(tmp_path / "index.sqlite"))
+
+
+def listed(locations, root):
+    return [
+        (os.path.relpath(location.path, root), *location[1:]) for location in locations
+    ]
+
+
+def test_definitions_and_references(tmp_path):
+    root = str(tmp_path / "src")
+    with project(tmp_path) as index:
+        assert index.update(workers=1) == (2, 2, 0)
+        assert listed(index.definitions("minus"), root) == [
+            (
+                "main.star",
+                6,
+                5,
+                "function",
+                "def minus (a :int, b :int, c :int, d :int = ...) -> :int",
+            )
+        ]
+        assert listed(index.references("minus"), root) == [
+            (os.path.join("lib", "helper.star"), 2, 13, "call", "minus")
+        ]
+        assert [location.line for location in index.definitions("num")] == [46, 51]
+        assert [location.line for location in index.references("num")] == [
+            47,
+            53,
+            54,
+        ]
+        assert [location.line for location in index.definitions("main.num")] == [46]
+        assert listed(index.references("main.num"), root) == [
+            ("main.star", 47, 16, "load", "main.num")
+        ]
+        assert listed(index.definitions("helper.x"), root) == [
+            (os.path.join("lib", "helper.star"), 1, 13, "argument", "x :int")
+        ]
+        assert index.references("helper.x")[0][1:3] == (2, 19)
+        assert len(index.references("output")) == 7
+        assert index.definitions("output") == []
+
+
+def test_updates_changed_files(tmp_path):
+    with project(tmp_path) as index:
+        index.update(workers=1)
+        assert index.update(workers=1) == (2, 0, 0)
+
+        helper = str(tmp_path / "src" / "lib" / "helper.star")
+        write(helper, HELPER)
+        os.utime(helper, ns=(0, 0))
+        assert index.update(workers=1) == (2, 0, 0)
+
+        write(helper, HELPER.replace("minus", "helper"))
+        assert index.update(workers=1) == (2, 1, 0)
+        assert index.references("minus") == []
+        assert len(index.references("helper")) == 1
+
+        os.unlink(helper)
+        assert index.update(workers=1) == (1, 0, 1)
+        assert index.definitions("helper") == []
+
+
+def test_persistent(tmp_path):
+    with project(tmp_path) as index:
+        index.update(workers=2)
+        definitions = index.definitions("minus")
+    with project(tmp_path) as index:
+        assert index.definitions("minus") == definitions
+        assert index.update(workers=1) == (2, 0, 0)
+
+
+def test_syntax_errors(tmp_path):
+    with project(tmp_path) as index:
+        write(tmp_path / "src" / "broken.star", "x = ) 1\ny = 2\nz = y\n")
+        assert index.update(workers=1).parsed == 3
+        assert [location.line for location in index.definitions("y")] == [2]
+        assert [location.line for location in index.references("y")] == [3]
+        ((path, error),) = index.errors()
+        assert (os.path.basename(path), error) == ("broken.star", "1:5: Unexpected ')'")
+
+
+def test_query_command(tmp_path):
+    write(tmp_path / "src" / "main.star", SOURCE)
+    command = [sys.executable, "-m", "compiler", "query", "-r", str(tmp_path / "src")]
+    command += ["--index", str(tmp_path / "index.sqlite")]
+    process = subprocess.run(
+        command + ["minus"], capture_output=True, check=False, text=True
+    )
+    assert process.returncode == 0
+    assert process.stdout.splitlines() == [
+        "%s:6:5: function def minus (a :int, b :int, c :int, d :int = ...) -> :int"
+        % os.path.join(tmp_path, "src", "main.star")
+    ]
+    process = subprocess.run(command + ["missing"], capture_output=True, check=False)
+    assert process.returncode == 1
@@ -0,0 +1,137 @@
+import pytest
+
+from compiler.incremental import TextEdit, walk
+from compiler.parser import StarlaSyntaxError
+from compiler.resolver import resolve
+from compiler.typecheck import check
+
+SOURCE = """x = 1
+y = ) 2
+def f (a :int) -> :int {
+    b = a +
+    if a > 1 { c = ] }
+    return a
+}
+output((f(x)))
+z = [1, 2
+"""
+
+
+def kinds(body):
+    return [type(node).__name__ for node in body]
+
+
+def test_parse_raises_at_the_bad_token(compiler):
+    with pytest.raises(StarlaSyntaxError, match="Unexpected '\\)'") as error:
+        compiler.parse("x = ) 2\n")
+    assert error.value.index == 4
+
+
+def test_valid_source(compiler):
+    source = "x = 1\noutput(x)\n"
+    module, errors = compiler.parse_recovering(source)
+    assert errors == []
+    assert module == compiler.parse(source)
+
+
+def test_reports_every_error(compiler):
+    _, errors = compiler.parse_recovering(SOURCE)
+    assert [str(error) for error in errors] == [
+        "2:5: Unexpected ')'",
+        "4:12: Incomplete statement",
+        "5:20: Unexpected ']'",
+        "9:10: Incomplete statement",
+    ]
+
+
+def test_keeps_what_parses(compiler):
+    module, _ = compiler.parse_recovering(SOURCE)
+    assert kinds(module.body) == [
+        "VariableDeclaration",
+        "Error",
+        "FunctionDeclaration",
+        "Call",
+        "Error",
+    ]
+    function = module.body[2]
+    assert kinds(function.body) == ["Error", "IfStatement", "Return"]
+    assert kinds(function.body[1].conditionals[0][1]) == ["Error"]
+    errors = [node for node in walk(module) if type(node).__name__ == "Error"]
+    assert sorted(error.index for error in errors) == [
+        SOURCE.index(")"),
+        SOURCE.index("+") + 1,
+        SOURCE.index("]"),
+        len(SOURCE) - 1,
+    ]
+
+
+def test_errors_in_every_block(compiler):
+    source = """
+if x { y = = 1 } elif z {
+    pass
+} else {
+    w = 1 +
+}
+"""
+    module, errors = compiler.parse_recovering(source)
+    assert [str(error) for error in errors] == [
+        "2:12: Unexpected '='",
+        "5:12: Incomplete statement",
+    ]
+    (statement,) = module.body
+    assert kinds(statement.conditionals[0][1]) == ["Error"]
+    assert kinds(statement.conditionals[1][1]) == ["Pass"]
+    assert kinds(statement.default) == ["Error"]
+
+
+def test_partial_modules_can_be_checked(compiler):
+    source = "def f (a :int) -> :int {\n    return a +\n}\nx :str = (f(1))\n"
+    module, errors = compiler.parse_recovering(source)
+    assert len(errors) == 1
+    assert resolve(module, source).errors == []
+    assert [str(error) for error in check(module, source).errors] == [
+        "4:11: Cannot assign int to 'x' of type str"
+    ]
+
+
+def test_reparse_recovering(compiler):
+    source = "x = 1\ndef f (a :int) -> :int {\n    return a\n}\ny = 2\n"
+    module = compiler.parse(source)
+    for start, end, text in [
+        (source.index("return a") + 8, None, " +"),
+        (source.index("y = 2") + 5, None, " ]"),
+        (source.index("return a") + 8, source.index("return a") + 10, ""),
+    ]:
+        edit = TextEdit(start, start if end is None else end, text)
+        module = compiler.reparse(module, source, edit, recovering=True)
+        source = edit.apply(source)
+        expected, _ = compiler.parse_recovering(source)
+        assert module == expected
+        assert errors(module) == errors(expected)
+    assert errors(module) == [("Unexpected ']'", source.index("]"))]
+
+
+def errors(module):
+    return sorted(
+        (node.message, node.index)
+        for node in walk(module)
+        if type(node).__name__ == "Error"
+    )
+
+
+@pytest.mark.parametrize(
+    "source, literal",
+    [
+        ('x = "\\x"\n', '"\\x"'),
+        ("x = '\\N'\n", "'\\N'"),
+        ('x = "a\\u12"\n', '"a\\u12"'),
+        ("x = '\\'\ny = 1\n", "'\\'"),
+    ],
+)
+def test_invalid_escape_sequences(compiler, source, literal):
+    module, errors = compiler.parse_recovering(source)
+    assert [str(error) for error in errors] == [
+        "1:5: Invalid escape sequence in %s" % literal
+    ]
+    assert kinds(module.body)[0] == "Error"
+    assert module.body[0].index == source.index(literal)
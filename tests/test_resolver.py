@@ -0,0 +1,118 @@
+from compiler.bytecode import generate
+from compiler.incremental import walk
+from compiler.resolver import BUILTIN, FREE, GLOBAL, LOCAL, Binding, resolve
+
+SOURCE = """
+total = 0
+def counter (start :int, step :int = total) -> :int {
+    count = start
+    def bump () -> :int {
+        def inner () -> :int {
+            return (count + step)
+        }
+        return inner
+    }
+    for i in range(3) {
+        count = count + i
+    }
+    return bump
+}
+output(counter(1))
+"""
+
+
+def names(module, resolution):
+    """The bindings of every name, in the order they appear in the source."""
+    found = [
+        node
+        for node in walk(module)
+        if type(node).__name__ in ("Namespace", "Arg", "DefaultArg")
+    ]
+    found.sort(key=lambda node: node.index)
+    return [
+        (getattr(node, "name", None) or node.arg, resolution.binding(node))
+        for node in found
+    ]
+
+
+def functions(module):
+    return {
+        node.target.name: node
+        for node in walk(module)
+        if type(node).__name__ == "FunctionDeclaration"
+    }
+
+
+def test_binds_names(compiler):
+    module = compiler.parse(SOURCE)
+    resolution = resolve(module, SOURCE)
+    assert resolution.errors == []
+    assert names(module, resolution) == [
+        ("total", Binding(GLOBAL, 0)),
+        ("counter", Binding(GLOBAL, 1)),
+        ("start", Binding(LOCAL, 0)),
+        ("step", Binding(LOCAL, 1)),
+        ("total", Binding(GLOBAL, 0)),
+        ("count", Binding(LOCAL, 2)),
+        ("start", Binding(LOCAL, 0)),
+        ("bump", Binding(LOCAL, 3)),
+        ("inner", Binding(LOCAL, 0)),
+        ("count", Binding(FREE, 2, 1)),
+        ("step", Binding(FREE, 1, 1)),
+        ("inner", Binding(LOCAL, 0)),
+        ("i", Binding(LOCAL, 4)),
+        ("range", Binding(BUILTIN, 2)),
+        ("count", Binding(LOCAL, 2)),
+        ("count", Binding(LOCAL, 2)),
+        ("i", Binding(LOCAL, 4)),
+        ("bump", Binding(LOCAL, 3)),
+        ("output", Binding(BUILTIN, 0)),
+        ("counter", Binding(GLOBAL, 1)),
+    ]
+
+
+def test_numbers_slots_densely(compiler):
+    module = compiler.parse(SOURCE)
+    resolution = resolve(module)
+    scopes = {
+        name: resolution.scope(node).names for name, node in functions(module).items()
+    }
+    assert resolution.module.names == ("total", "counter")
+    assert scopes == {
+        "counter": ("start", "step", "count", "bump", "i"),
+        "bump": ("inner",),
+        "inner": (),
+    }
+
+
+def test_reports_undefined_names(compiler):
+    source = "def f () -> :int {\n    return (g(x))\n}\ny = x + len\n"
+    module = compiler.parse(source)
+    resolution = resolve(module, source)
+    assert [str(error) for error in resolution.errors] == [
+        "2:13: Name 'g' is not defined",
+        "2:15: Name 'x' is not defined",
+        "4:5: Name 'x' is not defined",
+    ]
+    # Undefined names share a module slot, which is never set.
+    assert resolution.module.names == ("f", "y", "g", "x")
+
+
+def test_declared_names_shadow_builtins(compiler):
+    module = compiler.parse("len = 3\noutput(len)")
+    resolution = resolve(module)
+    assert [binding.kind for _, binding in names(module, resolution)] == [
+        GLOBAL,
+        BUILTIN,
+        GLOBAL,
+    ]
+
+
+def test_code_uses_resolved_slots(compiler):
+    module = compiler.parse(SOURCE + "output(missing)")
+    code = generate(module)
+    assert code.globals == ("total", "counter", "missing")
+    (counter,) = code.functions
+    # Locals take the first registers, in slot order, then temporaries follow.
+    assert counter.parameters == ("start", "step")
+    assert counter.registers > 5
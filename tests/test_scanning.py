@@ -0,0 +1,93 @@
+import random
+
+from compiler import StarlaLexer
+from compiler.scanner import StarlaScanner
+
+FRAGMENTS = [
+    " ",
+    "\t",
+    "\n",
+    ";",
+    "#",
+    "-",
+    ">",
+    "<",
+    "=",
+    "!",
+    "|",
+    "&",
+    "^",
+    "~",
+    "+",
+    "*",
+    "/",
+    "%",
+    ":",
+    ".",
+    ",",
+    "(",
+    ")",
+    "{",
+    "}",
+    "[",
+    "]",
+    '"',
+    "'",
+    "\\",
+    "0",
+    "7",
+    "0.",
+    "1.5",
+    "٣",
+    "²",
+    "True",
+    "False",
+    "Tru",
+    "if",
+    "elif",
+    "xor",
+    "def",
+    "null",
+    "foo",
+    "_bar9",
+    "é",
+    ":int",
+    ":",
+    "->",
+    "**",
+    "&&",
+    "||",
+    "==",
+    "!=",
+    "<=",
+    ">=",
+    '""',
+    '"a"',
+    '"\\""',
+    "'a'",
+    "'\\n'",
+    "\r",
+    "$",
+]
+
+
+def stream(lexer, source: str):
+    return [
+        (token.type, token.value, token.lineno, token.index)
+        for token in lexer.tokenize(source)
+    ]
+
+
+class TestScannerMatchesLexer:
+    def test_main(self):
+        with open("main.star", encoding="utf-8") as file:
+            source = file.read()
+        assert stream(StarlaScanner(), source) == stream(StarlaLexer(), source)
+
+    def test_fuzz(self):
+        rng = random.Random(0)
+        for _ in range(5000):
+            source = "".join(rng.choices(FRAGMENTS, k=rng.randint(0, 30)))
+            assert stream(StarlaScanner(), source) == stream(
+                StarlaLexer(), source
+            ), source
@@ -0,0 +1,98 @@
+import io
+
+from compiler import StarlaCompiler, StarlaLexer, StarlaScanner
+from compiler.tokens import TokenStream, split_statements
+
+with open("main.star", encoding="utf-8") as file:
+    SOURCE = file.read()
+
+SPACED = """
+
+# leading comment
+x = [
+    1,
+
+    2
+]; y = 2
+
+
+if x > 1 { output(x) } else {
+    # comment
+    output(y)
+}
+"""
+
+
+def flatten(chunks):
+    return [
+        (token.type, token.value, token.lineno, token.index)
+        for chunk in chunks
+        for token in chunk
+    ]
+
+
+class TestStreaming:
+    def test_tokens_match(self):
+        for source in (SOURCE, SPACED):
+            for lexer in (StarlaLexer(), StarlaScanner()):
+                expected = [
+                    (token.type, token.value, token.lineno, token.index)
+                    for token in TokenStream.scan(source, lexer)
+                ]
+                lines = io.StringIO(source)
+                assert flatten(split_statements(lines, lexer)) == expected
+
+    def test_statements_match(self):
+        for source in (SOURCE, SPACED):
+            compiler = StarlaCompiler()
+            statements = compiler.parse_stream(io.StringIO(source))
+            module = compiler.parse(source)
+            assert tuple(statements) == module.body
+
+    def test_positions(self):
+        compiler = StarlaCompiler()
+        *_, statement = compiler.parse_stream(io.StringIO(SOURCE))
+        assert statement.body[0].target.index == SOURCE.rindex("num = num")
+
+    def test_lazy(self):
+        def lines():
+            yield "x = 1\n"
+            yield "y = [\n"
+            raise AssertionError("Read past the first statement")
+
+        assert next(StarlaCompiler().parse_stream(lines())).target.name == "x"
+
+    def test_recovering(self):
+        source = "x = ) 1\ny = 2\nif y {\n    z = ]\n}\nw = (\n"
+        compiler = StarlaCompiler()
+        errors = []
+        statements = tuple(
+            compiler.parse_stream_recovering(io.StringIO(source), errors)
+        )
+        module, expected = compiler.parse_recovering(source)
+        assert statements == module.body
+        assert errors == expected
+        assert [str(error) for error in errors] == [
+            "1:5: Unexpected ')'",
+            "4:9: Unexpected ']'",
+            "6:6: Incomplete statement",
+        ]
+
+    def test_recovering_lazily(self):
+        def lines():
+            yield "x = ]\n"
+            yield "y = [\n"
+            raise AssertionError("Read past the first statement")
+
+        errors = []
+        statements = StarlaCompiler().parse_stream_recovering(lines(), errors)
+        assert type(next(statements)).__name__ == "Error"
+        assert [str(error) for error in errors] == ["1:5: Unexpected ']'"]
+
+    def test_stray_closing_bracket(self):
+        lines = ["while ] x {\n", "    x = 1\n", "}\n", "y = 2\n"]
+        chunks = list(split_statements(lines, StarlaScanner()))
+        assert [[token.value for token in chunk][:2] for chunk in chunks] == [
+            ["while", "]"],
+            ["y", "="],
+        ]
@@ -0,0 +1,38 @@
+from compiler import StarlaCompiler, StarlaParser, models, nodes
+
+SOURCE = """
+a :list[:int] = [1]
+b :list[:int] = a + a
+def f (x :int, y :list[:int]) -> :int { return x - y }
+"""
+
+
+class TestSymbolTable:
+    def test_names(self):
+        compiler = StarlaCompiler()
+        first = compiler.parse(SOURCE)
+        second = compiler.parse(SOURCE)
+        assert first.body[0].target.name is second.body[0].target.name
+        value = first.body[1].value
+        assert value.arguments[0].name is value.arguments[1].name
+        assert value.op is second.body[1].value.op
+
+    def test_type_hints(self):
+        for fast in (False, True):
+            compiler = StarlaCompiler(fast=fast)
+            module = compiler.parse(SOURCE)
+            hint = module.body[0].annotation
+            assert module.body[1].annotation is hint
+            assert module.body[2].arguments[1].annotation is hint
+            assert module.body[2].arguments[0].annotation is hint.type_structure[0]
+            assert module.body[2].annotation is hint.type_structure[0]
+
+    def test_models_not_mixed(self):
+        compiler = StarlaCompiler()
+        fast_parser = StarlaParser(fast=True, symbols=compiler.symbols)
+        tokens = compiler.tokens("a :int = 1")
+        fast_hint = fast_parser.parse(tokens).body[0].annotation
+        hint = compiler.parse("a :int = 1").body[0].annotation
+        assert isinstance(fast_hint, nodes.TypeHint)
+        assert isinstance(hint, models.TypeHint)
+        assert hint.type_value is fast_hint.type_value
@@ -0,0 +1,22 @@
+from compiler.parser import StarlaParser
+from compiler.tables import build_table, grammar_signature, load_table
+
+
+class TestTableCache:
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "parsetab")
+        grammar = StarlaParser._grammar
+        built = build_table(grammar, path)
+        loaded = load_table(path, grammar_signature(grammar))
+        assert loaded is not None
+        assert loaded.lr_action == built.lr_action
+        assert loaded.lr_goto == built.lr_goto
+        assert loaded.defaulted_states == built.defaulted_states
+
+    def test_signature_mismatch(self, tmp_path):
+        path = str(tmp_path / "parsetab")
+        build_table(StarlaParser._grammar, path)
+        assert load_table(path, "not the grammar") is None
+
+    def test_missing_file(self, tmp_path):
+        assert load_table(str(tmp_path / "missing"), "") is None
@@ -0,0 +1,24 @@
+from compiler import StarlaLexer, StarlaScanner
+from compiler.tokens import TokenStream
+
+SOURCE = 'def f (a :int) -> :int {\n    return a ** 2 # square\n}; f(3) == "9"\n'
+
+
+class TestTokenStream:
+    def test_matches_lexer(self):
+        expected = [
+            (token.type, token.value, token.lineno, token.index)
+            for token in StarlaLexer().tokenize(SOURCE)
+        ]
+        for lexer in (StarlaLexer(), StarlaScanner()):
+            stream = TokenStream.scan(SOURCE, lexer)
+            assert len(stream) == len(expected)
+            assert [
+                (token.type, token.value, token.lineno, token.index) for token in stream
+            ] == expected
+
+    def test_getitem(self):
+        stream = TokenStream.scan(SOURCE, StarlaScanner())
+        assert stream[0].type == "DEFINE"
+        assert stream[-1].type == "NEWLINE"
+        assert stream[-2].value == '"9"'
@@ -0,0 +1,109 @@
+import io
+
+import pytest
+from programs import FAILING, PROGRAMS
+
+from compiler import StarlaCompiler
+from compiler.interpreter import Function, Interpreter, StarlaRuntimeError
+from compiler.transpiler import CodeCache, Runtime, compile_source, transpile
+
+
+def execute(code, args=None):
+    stdout = io.StringIO()
+    runtime = Runtime(stdout=stdout)
+    result = runtime.run(code, args)
+    return stdout.getvalue(), runtime.globals, result
+
+
+def run(source):
+    module = StarlaCompiler(lexer="scanner", fast=True).parse(source)
+    return execute(transpile(module))
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_matches_interpreter(compiler, name):
+    module = compiler.parse(PROGRAMS[name])
+    stdout = io.StringIO()
+    interpreter = Interpreter(stdout=stdout)
+    interpreter.run(module, ["arg"])
+    expected = interpreter.globals.variables
+
+    output, variables, _ = execute(transpile(module), ["arg"])
+    assert output == stdout.getvalue()
+    assert variables.keys() - {"__builtins__"} == expected.keys()
+    for variable, value in expected.items():
+        if not isinstance(value, Function):
+            assert variables[variable] == value
+
+
+@pytest.mark.parametrize("name", sorted(FAILING))
+def test_fails_like_interpreter(compiler, name):
+    source, variable = FAILING[name]
+    module = compiler.parse(source)
+    outputs = []
+    for backend, program in ((Interpreter, module), (Runtime, transpile(module))):
+        stdout = io.StringIO()
+        with pytest.raises(StarlaRuntimeError, match="'%s'" % variable):
+            backend(stdout=stdout).run(program)
+        outputs.append(stdout.getvalue())
+    assert outputs[0] == outputs[1]
+
+
+def test_chained_comparisons_evaluate_operands_once():
+    output, _, _ = run("""
+calls = []
+def middle () -> :int {
+    append(calls, 1)
+    return 2
+}
+output(1 < (middle()) < 3, 3 < (middle()) < 4, len(calls))
+""")
+    assert output == "True False 2\n"
+
+
+def test_return_at_top_level():
+    output, variables, result = run("x = 1\nreturn x + 1\noutput(x)\n")
+    assert output == ""
+    assert result == 2
+    assert variables["x"] == 1
+
+
+def test_names_python_reserves():
+    output, _, _ = run("""
+None = 3
+def __debug__ (None :int, b :int = 1) -> :int {
+    return None + b
+}
+output(None, __debug__(None), __debug__(None=1 b=2))
+""")
+    assert output == "3 4 3\n"
+
+
+def test_undefined_names():
+    with pytest.raises(StarlaRuntimeError, match="'y' is not defined"):
+        run("x = y\n")
+
+
+def test_code_cache(tmp_path, monkeypatch):
+    source = PROGRAMS["functions"].encode()
+    compiler = StarlaCompiler(lexer="scanner", fast=True)
+    cache = CodeCache(str(tmp_path))
+    code = compile_source(source, compiler, cache)
+    assert list(tmp_path.glob("*/*.pyc"))
+
+    def fail(_):
+        raise AssertionError("parsed a cached source")
+
+    monkeypatch.setattr(compiler, "parse", fail)
+    cached = compile_source(source, compiler, CodeCache(str(tmp_path)))
+    assert cached.co_consts == code.co_consts
+    assert execute(cached)[0] == execute(code)[0]
+
+
+def test_syntax_errors():
+    compiler = StarlaCompiler(lexer="scanner", fast=True)
+    with pytest.raises(SyntaxError, match="Unexpected '='") as error:
+        compile_source(b"x = = 1\n", compiler)
+    assert (error.value.lineno, error.value.offset) == (1, 5)
+    with pytest.raises(SyntaxError, match="Unexpected end of file"):
+        compile_source(b"x = (1", compiler)
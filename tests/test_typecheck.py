@@ -0,0 +1,227 @@
+import ast
+import io
+
+import pytest
+from programs import PROGRAMS
+
+from compiler import StarlaCompiler
+from compiler.incremental import walk
+from compiler.interpreter import Interpreter
+from compiler.transpiler import Runtime, Transpiler, transpile
+from compiler.typecheck import ANY, INT, STR, check, prove
+
+TYPED = """
+count :int = 1
+ratio = 2.5
+names :list[:str] = ["a", "b"]
+table :dict[:str, :list[:int]] = {"a": [1, 2]}
+pair = (1, "a")
+mixed = [1, 2.5]
+halves = count / 2
+scaled = ratio / 2
+
+def scale (a :int, b :int = 2) -> :float {
+    return a * b * 1.0
+}
+
+result = scale(count)
+first = get(names, 0)
+for key in table {
+    output(key)
+}
+"""
+ERRORS = """
+x :int = "a"
+y = 1
+y = 2.5
+z :constant[:int] = 3
+z = 4
+w :list[:zeb] = []
+def f (a :int, b :float = 1) -> :str {
+    return a
+}
+f(a="s" c=2)
+q = "a" - 1
+for i in 5 {
+    pass
+}
+s = 1 < "a"
+"""
+
+
+def declarations(module):
+    return {
+        node.target.name: node
+        for node in walk(module)
+        if type(node).__name__ in ("VariableDeclaration", "ForLoop")
+    }
+
+
+def test_infers_types(compiler):
+    module = compiler.parse(TYPED)
+    inferred = check(module, TYPED)
+    assert inferred.errors == []
+    types = {
+        name: str(inferred.type_of(node.target))
+        for name, node in declarations(module).items()
+    }
+    assert types == {
+        "count": "int",
+        "ratio": "float",
+        "names": "list[str]",
+        "table": "dict[str, list[int]]",
+        "pair": "tuple[int, str]",
+        "mixed": "list[any]",
+        "halves": "int",
+        "scaled": "float",
+        "result": "float",
+        "first": "str",
+        "key": "str",
+    }
+    # Every expression has a type, down to the operands.
+    halves = declarations(module)["halves"].value
+    assert [inferred.type_of(argument) for argument in halves.arguments] == [
+        INT,
+        INT,
+    ]
+    assert inferred.type_of(declarations(module)["names"].value.items[0]) == STR
+
+
+def test_reports_errors_with_positions(compiler):
+    inferred = check(compiler.parse(ERRORS), ERRORS)
+    assert [str(error) for error in inferred.errors] == [
+        "2:10: Cannot assign str to 'x' of type int",
+        "4:5: Cannot assign float to 'y' of type int",
+        "6:1: Cannot assign to the constant 'z'",
+        "7:1: Unknown type 'zeb'",
+        "8:27: Cannot assign int to 'b' of type float",
+        "11:11: f got an unexpected argument 'c'",
+        "11:5: Cannot assign str to 'a' of type int",
+        "12:5: Unsupported operand types for -: str and int",
+        "13:10: int is not iterable",
+        "16:5: Cannot compare int and str with <",
+        # Function bodies are checked after the statements around them.
+        "9:12: Cannot return int from a function returning str",
+    ]
+
+
+def test_functions_see_later_declarations(compiler):
+    source = """
+def main () -> :int {
+    return (twice(limit))
+}
+def twice (n :int) -> :int {
+    return n * 2
+}
+limit = "a"
+"""
+    (error,) = check(compiler.parse(source), source).errors
+    assert error.message == "Cannot assign str to 'n' of type int"
+    assert (error.line, error.column) == (3, 19)
+
+
+def test_errors_are_at_the_offending_expression(compiler):
+    source = 'def f () -> :int {\n    return "x"\n}\ny :int = 2\ny = 1 + "a"\n'
+    assert [str(error) for error in check(compiler.parse(source), source).errors] == [
+        "5:5: Unsupported operand types for +: int and str",
+        "2:12: Cannot return str from a function returning int",
+    ]
+
+
+def test_unknown_names_are_any(compiler):
+    module = compiler.parse("x = missing + 1\ny = (missing(1)) / 2")
+    inferred = check(module)
+    assert inferred.errors == []
+    assert {
+        name: inferred.type_of(node.target)
+        for name, node in declarations(module).items()
+    } == {"x": ANY, "y": ANY}
+
+
+def test_aliased_builtins(compiler):
+    source = "p = output\np(1)\nq = len\nn = (q([1]))\nq = str\n"
+    module = compiler.parse(source)
+    inferred = check(module, source)
+    assert inferred.errors == []
+    assert inferred.type_of(declarations(module)["n"].target) == INT
+    assert prove(module).type_of(declarations(module)["n"].value) == ANY
+
+
+def test_loose_values_reach_names_declared_by_them(compiler):
+    source = """
+def same (n :int) -> :int {
+    return n
+}
+x :int = 1
+x = input()
+y = x
+z :int = y
+w = (same(z))
+"""
+    module = compiler.parse(source)
+    assert check(module).errors == []
+    inferred = prove(module)
+    names = declarations(module)
+    assert [inferred.type_of(names[name].target) for name in "xyzw"] == [
+        INT,
+        ANY,
+        INT,
+        ANY,
+    ]
+    assert [inferred.type_of(names[name].value) for name in "yzw"] == [ANY] * 3
+
+
+def test_specializes_division(compiler):
+    module = compiler.parse(TYPED)
+    tree = Transpiler(prove(module)).transpile(module)
+    divisions = [
+        type(node.op)
+        for node in ast.walk(tree)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Div, ast.FloorDiv))
+    ]
+    assert divisions == [ast.FloorDiv, ast.Div]
+    assert "$divide" not in ast.unparse(tree)
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_specialized_code_runs_the_same(name):
+    compiler = StarlaCompiler(lexer="scanner", fast=True)
+    module = compiler.parse(PROGRAMS[name])
+    inferred = prove(module)
+    if inferred.errors:
+        pytest.skip("%s does not type check" % name)
+    outputs = []
+    for code in (transpile(module), transpile(module, inferred=inferred)):
+        stdout = io.StringIO()
+        Runtime(stdout=stdout).run(code, ["arg"])
+        outputs.append(stdout.getvalue())
+    assert outputs[0] == outputs[1]
+
+
+UNCHECKED = """
+def half (a :int) -> :int {
+    r = a / 2
+    return r
+}
+def apply (f :function, v :any) -> :any {
+    return (f(v))
+}
+def twice (a :int) -> :int {
+    return a / 2 * 2
+}
+values :list[:int] = [4]
+append(values, 5.0)
+x :int = (apply(half, 5.0))
+output(x, (twice(get(values, 1))), (twice(8)), x / 2)
+"""
+
+
+def test_unchecked_values_are_not_proven(compiler):
+    module = compiler.parse(UNCHECKED)
+    assert check(module).errors == []
+    stdout = io.StringIO()
+    Interpreter(stdout=stdout).run(module)
+    assert stdout.getvalue() == "2.5 5.0 8 1.25\n"
+    stdout = io.StringIO()
+    Runtime(stdout=stdout).run(transpile(module, inferred=prove(module)))
+    assert stdout.getvalue() == "2.5 5.0 8 1.25\n"
@@ -0,0 +1,100 @@
+import io
+
+import pytest
+from programs import FAILING, PROGRAMS
+
+from compiler import StarlaCompiler
+from compiler.bytecode import dump, generate, load
+from compiler.interpreter import Interpreter, StarlaRuntimeError
+from compiler.vm import VM
+
+
+def interpret(module, args=None):
+    stdout = io.StringIO()
+    interpreter = Interpreter(stdout=stdout)
+    interpreter.run(module, args)
+    return stdout.getvalue(), interpreter.globals.variables
+
+
+def execute(code, args=None):
+    stdout = io.StringIO()
+    vm = VM(stdout=stdout)
+    vm.run(code, args)
+    return stdout.getvalue(), vm.globals
+
+
+def plain(variables):
+    return {
+        name: value
+        for name, value in variables.items()
+        if isinstance(value, (int, float, str, list, tuple, dict, type(None)))
+    }
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_matches_interpreter(compiler, name):
+    module = compiler.parse(PROGRAMS[name])
+    expected_output, expected_variables = interpret(module, ["arg"])
+    output, variables = execute(generate(module), ["arg"])
+    assert output == expected_output
+    assert plain(variables) == plain(expected_variables)
+    assert variables.keys() == expected_variables.keys()
+
+
+@pytest.mark.parametrize("name", sorted(FAILING))
+def test_fails_like_interpreter(compiler, name):
+    source, variable = FAILING[name]
+    module = compiler.parse(source)
+    outputs = []
+    for backend, program in ((Interpreter, module), (VM, generate(module))):
+        stdout = io.StringIO()
+        with pytest.raises(StarlaRuntimeError, match="'%s' is not defined" % variable):
+            backend(stdout=stdout).run(program)
+        outputs.append(stdout.getvalue())
+    assert outputs[0] == outputs[1]
+
+
+def test_dump_and_load(tmp_path):
+    module = StarlaCompiler(lexer="scanner", fast=True).parse(PROGRAMS["functions"])
+    code = generate(module)
+    path = str(tmp_path / "functions.starc")
+    dump(code, path)
+    loaded = load(path)
+    assert list(loaded.disassemble()) == list(code.disassemble())
+    assert execute(loaded)[0] == execute(code)[0]
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "junk.starc"
+    path.write_bytes(b"#!/bin/sh\n")
+    with pytest.raises(ValueError, match="Not a bytecode file"):
+        load(str(path))
+    path.write_bytes(b"STARBC\xff")
+    with pytest.raises(ValueError):
+        load(str(path))
+
+
+def test_constants_are_operands():
+    module = StarlaCompiler(lexer="scanner", fast=True).parse(
+        "def f (n :int) -> :int {\n    return (n * 2 + 1.0)\n}\n"
+    )
+    (function,) = generate(module).functions
+    # Two arithmetic instructions and the two returns, with no loads or moves.
+    assert len(function.instructions) == 4
+    assert function.constants == (2, 1.0, None)
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ("x = y\n", "'y' is not defined"),
+        ("x = 1\nx()\n", "1 is not a function"),
+        ("def f (a :int) -> :null {\n    pass\n}\nf(1, 2)\n", "takes 1 arguments"),
+        ("def f (a :int) -> :null {\n    pass\n}\nf()\n", "missing the argument 'a'"),
+        ("def f (a :int) -> :null {\n    pass\n}\nf(a=1 b=2)\n", "argument 'b'"),
+    ],
+)
+def test_errors(source, message):
+    module = StarlaCompiler(lexer="scanner", fast=True).parse(source)
+    with pytest.raises(StarlaRuntimeError, match=message):
+        execute(generate(module))
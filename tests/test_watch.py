@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from compiler.cache import ASTCache
+from compiler.watch import InotifyWatcher, PollingWatcher, Watch, start_watcher
+
+with open("main.star", encoding="utf-8") as file:
+    SOURCE = file.read()
+
+
+def write(path, source):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(source)
+    return str(path)
+
+
+def inotify(root):
+    try:
+        return InotifyWatcher(root)
+    except (OSError, AttributeError, TypeError):
+        pytest.skip("inotify is not available")
+
+
+class TestWatchers:
+    def test_polling(self, tmp_path):
+        first = write(tmp_path / "a.star", SOURCE)
+        watcher = PollingWatcher(str(tmp_path), interval=0.01)
+        assert watcher.wait(0.05) == set()
+
+        write(tmp_path / "a.star", SOURCE + "\n")
+        second = write(tmp_path / "sub" / "b.star", SOURCE)
+        write(tmp_path / "notes.txt", "")
+        assert watcher.wait(1) == {first, second}
+
+        os.unlink(second)
+        assert watcher.wait(1) == {second}
+
+    def test_inotify(self, tmp_path):
+        first = write(tmp_path / "a.star", SOURCE)
+        watcher = inotify(str(tmp_path))
+        try:
+            assert watcher.wait(0.05) == set()
+            write(tmp_path / "a.star", SOURCE + "\n")
+            write(tmp_path / "notes.txt", "")
+            assert watcher.wait(1) == {first}
+
+            second = write(tmp_path / "sub" / "b.star", SOURCE)
+            changed = watcher.wait(1)
+            while second not in changed:
+                changed |= watcher.wait(1)
+            write(tmp_path / "sub" / "b.star", "")
+            assert watcher.wait(1) == {second}
+        finally:
+            watcher.close()
+
+    def test_fallback(self, tmp_path):
+        watcher = start_watcher(str(tmp_path), poll=True)
+        assert isinstance(watcher, PollingWatcher)
+
+
+class TestWatch:
+    @pytest.mark.parametrize("cached", [False, True])
+    def test_rebuilds_changed_contents(self, tmp_path, cached):
+        root = tmp_path / "src"
+        first = write(root / "a.star", SOURCE)
+        second = write(root / "b.star", SOURCE)
+        ast_cache = ASTCache(str(tmp_path / "cache")) if cached else None
+        watch = Watch(
+            str(root),
+            PollingWatcher(str(root), interval=0.01),
+            ast_cache=ast_cache,
+        )
+        try:
+            results = watch.build()
+            assert [result.path for result in results] == [first, second]
+            assert watch.modules[first] == watch.modules[second]
+
+            # Saving the same contents again builds nothing.
+            write(root / "b.star", SOURCE)
+            os.utime(second, (0, 0))
+            assert watch.update(1) == []
+
+            write(root / "b.star", "x = (\n")
+            (result,) = watch.update(1)
+            assert result.path == second
+            assert result.error is not None
+
+            os.unlink(first)
+            assert watch.update(1) == []
+            assert first not in watch.modules
+        finally:
+            watch.close()
+
+    def test_forgets_directories_moved_away(self, tmp_path):
+        root = tmp_path / "src"
+        first = write(root / "a.star", SOURCE)
+        second = write(root / "sub" / "b.star", SOURCE)
+        watch = Watch(str(root), inotify(str(root)))
+        try:
+            watch.build()
+            assert set(watch.modules) == {first, second}
+
+            os.rename(root / "sub", tmp_path / "elsewhere")
+            assert watch.update(1) == []
+            assert set(watch.modules) == set(watch.hashes) == {first}
+
+            # The moved directory is no longer watched.
+            write(tmp_path / "elsewhere" / "b.star", "")
+            assert watch.wait(0.05) == set()
+        finally:
+            watch.close()